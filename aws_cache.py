@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Caché en disco (con TTL) de metadatos de AWS compartida por setup, monitoreo y limpieza."""
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from throttling import classify_error
+
+# ==========================================
+# ⚙️ CONFIGURACIÓN
+# ==========================================
+CACHE_PATH = os.environ.get("SRE_CACHE_FILE",
+                            os.path.expanduser("~/.cache/sre-demo/aws-metadata.json"))
+DEFAULT_TTL = 3600           # 1 hora para datos que pueden cambiar (VPC, IRSA...)
+ACCOUNT_TTL = 24 * 3600      # El ID de cuenta prácticamente nunca cambia
+
+class Colors:
+    BLUE = '\033[94m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    END = '\033[0m'
+
+@contextlib.contextmanager
+def file_lock(path):
+    """Lock entre procesos (flock) sobre '<path>.lock'; varios entornos comparten el archivo."""
+    try:
+        import fcntl
+    except ImportError:  # Windows: solo nos queda el lock entre hilos
+        yield
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+class MetadataCache:
+    """
+    Caché clave/valor con expiración por entrada, agrupada por perfil/región/clúster.
+    Es segura entre hilos y cada escritura es atómica (archivo temporal + rename).
+    """
+
+    def __init__(self, profile, region, cluster, path=CACHE_PATH, enabled=True):
+        self.scope = f"{profile}/{region}/{cluster}"
+        self.path = path
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, data):
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".aws-metadata-")
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def get(self, key):
+        """Devuelve el valor guardado o None si no existe, expiró o la caché está desactivada."""
+        if not self.enabled:
+            self.misses += 1
+            return None
+        with self._lock, file_lock(self.path):
+            entry = self._load().get(self.scope, {}).get(key)
+            if entry is None or entry["expires"] < time.time():
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry["value"]
+
+    def set(self, key, value, ttl=DEFAULT_TTL):
+        if not self.enabled:
+            return
+        with self._lock, file_lock(self.path):
+            # Releemos el archivo para no pisar lo que otro proceso haya escrito entretanto
+            data = self._load()
+            data.setdefault(self.scope, {})[key] = {"value": value, "expires": time.time() + ttl}
+            self._save(data)
+
+    def invalidate(self, key=None):
+        """Borra una clave, o todo el ámbito perfil/región/clúster si key es None."""
+        with self._lock, file_lock(self.path):
+            data = self._load()
+            if key is None:
+                data.pop(self.scope, None)
+            else:
+                data.get(self.scope, {}).pop(key, None)
+            self._save(data)
+
+    def get_or_fetch(self, key, fetch, ttl=DEFAULT_TTL):
+        """Devuelve el valor cacheado o llama a fetch() y guarda el resultado."""
+        value = self.get(key)
+        if value is None:
+            value = fetch()
+            if value is not None:
+                self.set(key, value, ttl)
+        return value
+
+    def report(self):
+        state = "activa" if self.enabled else "desactivada (--no-cache)"
+        print(f"🗃️  Caché de metadatos {state}: {Colors.GREEN}{self.hits} aciertos{Colors.END} / "
+              f"{Colors.YELLOW}{self.misses} fallos{Colors.END} ({self.scope})")
+
+def describe_cluster_cached(cache, eks_client, cluster_name):
+    """
+    Datos básicos del clúster (estado, VPC, emisor OIDC). Devuelve None solo si el clúster
+    no existe (no se cachea la ausencia). Un throttling que persiste tras los reintentos
+    se propaga: tratarlo como "no existe" lanzaría un 'eksctl create cluster' innecesario.
+    """
+    def fetch():
+        try:
+            cluster = eks_client.describe_cluster(name=cluster_name)['cluster']
+        except Exception as e:
+            if classify_error(e) != "not_found":
+                raise
+            return None
+        return {
+            "status": cluster['status'],
+            "vpc_id": cluster['resourcesVpcConfig']['vpcId'],
+            "oidc_issuer": cluster.get('identity', {}).get('oidc', {}).get('issuer'),
+            "endpoint": cluster.get('endpoint'),
+        }
+    return cache.get_or_fetch("cluster", fetch)
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Capa de acceso a AWS / Kubernetes / CLIs compartida por los scripts.
+
+- "sdk" (por defecto): clientes boto3 reutilizados y una sola conexión al API server
+  (paquete 'kubernetes'); si no está disponible, cae a kubectl.
+- "cli": todo por subprocess, como los scripts originales.
+- "fake": nube y clúster en memoria para ejecutar el flujo completo sin AWS
+  (ver fake_backend.py).
+
+Se elige con la variable de entorno SRE_BACKEND.
+"""
+import json
+import os
+import shlex
+import subprocess
+import threading
+import time
+
+from tracing import get_tracer
+from throttling import AWS_MAX_ATTEMPTS, rate_limiter, retry_call
+
+# ==========================================
+# ⚙️ CONFIGURACIÓN
+# ==========================================
+BACKEND = os.environ.get("SRE_BACKEND", "sdk")
+FIELD_MANAGER = "sre-demo"
+MAX_POOL_CONNECTIONS = 20   # Conexiones HTTP por cliente boto3 (los pasos corren en paralelo)
+
+try:
+    from botocore.exceptions import ClientError
+except ImportError:  # Backend "fake" sin boto3 instalado
+    class ClientError(Exception):
+        """Equivalente mínimo de botocore.exceptions.ClientError."""
+
+        def __init__(self, error_response, operation_name):
+            self.response = error_response
+            self.operation_name = operation_name
+            error = error_response.get("Error", {})
+            super().__init__(f"An error occurred ({error.get('Code')}) when calling the "
+                             f"{operation_name} operation: {error.get('Message', '')}")
+
+class Colors:
+    BLUE = '\033[94m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    END = '\033[0m'
+
+# Tipos de Kubernetes que manejan los scripts: alias -> (apiVersion, kind, namespaced)
+KINDS = {
+    "deployment": ("apps/v1", "Deployment", True),
+    "service": ("v1", "Service", True),
+    "ingress": ("networking.k8s.io/v1", "Ingress", True),
+    "namespace": ("v1", "Namespace", False),
+    "serviceaccount": ("v1", "ServiceAccount", True),
+    "hpa": ("autoscaling/v2", "HorizontalPodAutoscaler", True),
+    "pdb": ("policy/v1", "PodDisruptionBudget", True),
+    "servicemonitor": ("monitoring.coreos.com/v1", "ServiceMonitor", True),
+}
+
+def resolve_kind(kind):
+    """Normaliza 'deployments', 'Deployment', 'ingress'... a la clave de KINDS."""
+    key = kind.lower()
+    if key in KINDS:
+        return key
+    for alias, (_, name, _) in KINDS.items():
+        if key in (name.lower(), name.lower() + "s", name.lower() + "es", alias + "s", alias + "es"):
+            return alias
+    raise ValueError(f"Tipo de Kubernetes no soportado: {kind}")
+
+def kube_errors():
+    """
+    Excepciones con las que un backend indica que Kubernetes no responde o rechazó
+    la llamada: kubectl (RuntimeError/OSError) y, si está instalado, el paquete
+    'kubernetes' (API, kubeconfig, descubrimiento y transporte).
+    """
+    errors = [RuntimeError, OSError]
+    try:
+        from kubernetes.client.exceptions import ApiException
+        from kubernetes.config.config_exception import ConfigException
+        from kubernetes.dynamic.exceptions import DynamicApiError, ResourceNotFoundError
+        from urllib3.exceptions import HTTPError
+        errors += [ApiException, ConfigException, DynamicApiError, ResourceNotFoundError, HTTPError]
+    except ImportError:
+        pass
+    return tuple(errors)
+
+class OpStats:
+    """Latencias por operación para comparar backends."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.ops = {}
+
+    def record(self, op, seconds):
+        with self._lock:
+            self.ops.setdefault(op, []).append(seconds)
+
+    def timed(self, op, func, *args, **kwargs):
+        """Mide func(); además deja un span en la traza (con el código de salida si es un proceso)."""
+        with get_tracer().span(op, kind=op.split()[0]) as span:
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                self.record(op, time.perf_counter() - start)
+            if isinstance(result, subprocess.CompletedProcess):
+                span.set(command=result.args, exit_code=result.returncode)
+                if result.returncode != 0:
+                    span.fail(f"exit {result.returncode}")
+            return result
+
+    def print_table(self, title):
+        print(f"\n{Colors.BLUE}📈 Latencia por operación ({title}){Colors.END}")
+        print(f"   {'OPERACIÓN':<44}{'LLAMADAS':>9}{'MEDIA':>10}{'TOTAL':>10}")
+        rows = sorted(self.ops.items(), key=lambda kv: -sum(kv[1]))
+        for op, times in rows:
+            print(f"   {op:<44}{len(times):>9}{sum(times) / len(times) * 1000:>8.1f}ms{sum(times):>9.2f}s")
+
+def command_name(command):
+    """'helm upgrade --install ...' -> 'helm upgrade' (para agrupar estadísticas)."""
+    parts = command.split()
+    return " ".join(parts[:2]) if len(parts) > 1 else (parts[0] if parts else "")
+
+class CliBackend:
+    """Comportamiento original: cada operación lanza un proceso (kubectl, helm, eksctl...)."""
+
+    name = "cli"
+
+    def __init__(self):
+        self.stats = OpStats()
+        self._clients = {}
+        self._lock = threading.Lock()
+        self._session = None
+
+    # ---------------------------------------------------------
+    # AWS: un cliente boto3 por (servicio, región) reutilizado por todos los hilos
+    # ---------------------------------------------------------
+    def client(self, service, region):
+        with self._lock:
+            key = (service, region)
+            if key not in self._clients:
+                self._clients[key] = self._create_client(service, region)
+            return self._clients[key]
+
+    def _create_client(self, service, region):
+        import boto3
+        from botocore.config import Config
+        if self._session is None:
+            self._session = boto3.session.Session()
+        # Modo adaptive: backoff con jitter ante throttling y limitador del lado cliente de botocore
+        config = Config(max_pool_connections=MAX_POOL_CONNECTIONS,
+                        retries={"mode": "adaptive", "max_attempts": AWS_MAX_ATTEMPTS})
+        client = self._session.client(service, region_name=region, config=config)
+        self._instrument(client, service)
+        self._limit(client, service)
+        return client
+
+    @staticmethod
+    def _limit(client, service):
+        """Cada intento HTTP (reintentos incluidos) consume un token del bucket del servicio."""
+        limiter = rate_limiter(service)
+
+        def before_send(**kwargs):
+            limiter.acquire()   # Debe devolver None: un valor distinto sustituiría la respuesta
+
+        client.meta.events.register("before-send.*.*", before_send)
+
+    def _instrument(self, client, service):
+        """Mide cada llamada del cliente (y sus reintentos) usando los eventos de botocore."""
+        def quiet(handler):
+            # Un hook que lanza sustituye a la respuesta o al error real de la llamada (y rompe el reintento)
+            def wrapper(**kwargs):
+                try:
+                    handler(**kwargs)
+                except Exception:
+                    pass
+            return wrapper
+
+        def before(context, model=None, **kwargs):
+            context["sre_start"] = time.perf_counter()
+            context["sre_op"] = f"aws {service}.{model.name if model is not None else '?'}"
+
+        def after(context, parsed=None, **kwargs):
+            if "sre_start" in context:
+                op, elapsed = context["sre_op"], time.perf_counter() - context["sre_start"]
+                self.stats.record(op, elapsed)
+                retries = (parsed or {}).get("ResponseMetadata", {}).get("RetryAttempts", 0)
+                get_tracer().record(op, "aws", elapsed, retries=retries, region=client.meta.region_name)
+
+        # botocore solo pasa exception= y context= a after-call-error (sin model)
+        def after_error(context, exception=None, **kwargs):
+            if "sre_start" in context:
+                get_tracer().record(context["sre_op"], "aws", time.perf_counter() - context["sre_start"],
+                                    status="error", error=f"{exception.__class__.__name__}: {exception}",
+                                    region=client.meta.region_name)
+
+        client.meta.events.register("before-call.*.*", quiet(before))
+        client.meta.events.register("after-call.*.*", quiet(after))
+        client.meta.events.register("after-call-error.*.*", quiet(after_error))
+
+    # ---------------------------------------------------------
+    # Procesos externos
+    # ---------------------------------------------------------
+    def run(self, command, capture=False, quiet=False):
+        """Ejecuta un comando de shell. Devuelve un subprocess.CompletedProcess (no lanza)."""
+        kwargs = {"capture_output": True, "text": True} if capture else {}
+        if quiet and not capture:
+            kwargs["stdout"] = subprocess.DEVNULL
+        return self.stats.timed(f"exec {command_name(command)}", subprocess.run,
+                                command, shell=True, **kwargs)
+
+    def fetch(self, url, timeout=30):
+        """Descarga un recurso HTTP(S) en proceso (sin lanzar curl)."""
+        import urllib.request
+        def download():
+            with urllib.request.urlopen(url, timeout=timeout) as response:
+                return response.read()
+        return self.stats.timed("http get", download)
+
+    def get_json(self, command):
+        """
+        Ejecuta un comando de lectura que devuelve JSON. Devuelve None si el recurso no
+        existe; si el API server nos frena, reintenta (es una lectura, es seguro repetirla).
+        """
+        def read():
+            rate_limiter("kube").acquire()
+            proc = self.run(command, capture=True)
+            if proc.returncode != 0:
+                err = proc.stderr.lower()
+                if "not found" in err or "notfound" in err:
+                    return None
+                raise RuntimeError(f"'{command}' falló: {proc.stderr.strip()}")
+            return json.loads(proc.stdout) if proc.stdout.strip() else None
+        return retry_call(command_name(command), read)
+
+    # ---------------------------------------------------------
+    # Kubernetes
+    # ---------------------------------------------------------
+    @staticmethod
+    def _ns(kind, namespace):
+        return f" -n {namespace}" if KINDS[kind][2] and namespace else ""
+
+    def kube_apply(self, path, server_side=False):
+        flags = f" --server-side --field-manager={FIELD_MANAGER} --force-conflicts" if server_side else ""
+        proc = self.run(f"kubectl apply -f {shlex.quote(path)}{flags}")
+        return proc.returncode == 0
+
+    def kube_get(self, kind, name, namespace="default"):
+        kind = resolve_kind(kind)
+        return self.get_json(f"kubectl get {kind} {name}{self._ns(kind, namespace)} -o json")
+
+    def kube_list(self, kind, namespace="default", label_selector=None):
+        kind = resolve_kind(kind)
+        selector = f" -l {label_selector}" if label_selector else ""
+        result = self.get_json(f"kubectl get {kind}{self._ns(kind, namespace)}{selector} -o json")
+        return (result or {}).get("items", [])
+
+    def kube_delete(self, kind, name, namespace="default"):
+        kind = resolve_kind(kind)
+        proc = self.run(f"kubectl delete {kind} {name}{self._ns(kind, namespace)} --ignore-not-found=true",
+                        quiet=True)
+        return proc.returncode == 0
+
+    def kube_ensure_namespace(self, name):
+        proc = self.run(f"kubectl create namespace {name} --dry-run=client -o yaml | kubectl apply -f -")
+        return proc.returncode == 0
+
+    def print_stats(self):
+        self.stats.print_table(f"backend {self.name}")
+
+class SdkBackend(CliBackend):
+    """
+    Kubernetes a través de una única conexión reutilizada al API server (paquete
+    'kubernetes') con server-side apply. helm y eksctl no tienen API: siguen por CLI.
+    """
+
+    name = "sdk"
+
+    def __init__(self):
+        super().__init__()
+        self._dynamic = None
+        self._kube_unavailable = False
+
+    def _kube(self):
+        """Cliente dinámico perezoso; None si el paquete o el kubeconfig no están disponibles."""
+        if self._dynamic is None and not self._kube_unavailable:
+            with self._lock:
+                if self._dynamic is None and not self._kube_unavailable:
+                    try:
+                        from kubernetes import config, dynamic
+                        from kubernetes.client import api_client
+                        self._dynamic = dynamic.DynamicClient(api_client.ApiClient(config.load_kube_config()))
+                    except Exception as e:
+                        print(f"   {Colors.YELLOW}(Aviso) Sin cliente de Kubernetes ({e.__class__.__name__}); "
+                              f"usando kubectl.{Colors.END}")
+                        self._kube_unavailable = True
+        return self._dynamic
+
+    def _resource(self, kind):
+        api_version, kind_name, namespaced = KINDS[kind]
+        return self._kube().resources.get(api_version=api_version, kind=kind_name), namespaced
+
+    def _call(self, op, func, **kwargs):
+        """Llamada al API server con límite de ritmo y reintentos ante 429/5xx."""
+        def attempt():
+            rate_limiter("kube").acquire()
+            return func(**kwargs)
+        return self.stats.timed(op, retry_call, op, attempt)
+
+    def kube_apply(self, path, server_side=False):
+        # Con el cliente de Kubernetes siempre es server-side apply
+        if self._kube() is None:
+            return super().kube_apply(path, server_side)
+        import yaml
+        with open(path) as f:
+            docs = [d for d in yaml.safe_load_all(f) if d]
+
+        def apply():
+            for doc in docs:
+                resource = self._kube().resources.get(api_version=doc["apiVersion"], kind=doc["kind"])
+                namespace = doc["metadata"].get("namespace", "default") if resource.namespaced else None
+                self._call("kube apply", resource.patch, body=doc, name=doc["metadata"]["name"],
+                           namespace=namespace, content_type="application/apply-patch+yaml",
+                           field_manager=FIELD_MANAGER, force_conflicts=True)
+                print(f"   ✔ {doc['kind'].lower()}/{doc['metadata']['name']} aplicado (server-side)")
+        # Como con kubectl: un fallo se devuelve como False para que el llamador lo gestione
+        try:
+            apply()
+        except kube_errors() as e:
+            print(f"   {Colors.RED}❌ Error aplicando {path}: {e.__class__.__name__}: {e}{Colors.END}")
+            return False
+        return True
+
+    def kube_get(self, kind, name, namespace="default"):
+        if self._kube() is None:
+            return super().kube_get(kind, name, namespace)
+        from kubernetes.dynamic.exceptions import NotFoundError
+        kind = resolve_kind(kind)
+        resource, namespaced = self._resource(kind)
+        try:
+            obj = self._call("kube get", resource.get, name=name,
+                             namespace=namespace if namespaced else None)
+        except NotFoundError:
+            return None
+        return obj.to_dict()
+
+    def kube_list(self, kind, namespace="default", label_selector=None):
+        if self._kube() is None:
+            return super().kube_list(kind, namespace, label_selector)
+        kind = resolve_kind(kind)
+        resource, namespaced = self._resource(kind)
+        result = self._call("kube list", resource.get, namespace=namespace if namespaced else None,
+                            label_selector=label_selector)
+        return result.to_dict().get("items", [])
+
+    def kube_delete(self, kind, name, namespace="default"):
+        if self._kube() is None:
+            return super().kube_delete(kind, name, namespace)
+        from kubernetes.dynamic.exceptions import NotFoundError
+        kind = resolve_kind(kind)
+        try:
+            resource, namespaced = self._resource(kind)
+            self._call("kube delete", resource.delete, name=name,
+                       namespace=namespace if namespaced else None)
+        except NotFoundError:
+            pass
+        except kube_errors() as e:
+            # API server o kubeconfig ya no disponibles (p.ej. el clúster se está borrando): no abortamos la limpieza
+            print(f"   {Colors.YELLOW}(Ignorado) No se pudo borrar {kind}/{name}: {e.__class__.__name__}{Colors.END}")
+            return False
+        return True
+
+    def kube_ensure_namespace(self, name):
+        if self._kube() is None:
+            return super().kube_ensure_namespace(name)
+        resource, _ = self._resource("namespace")
+        body = {"apiVersion": "v1", "kind": "Namespace", "metadata": {"name": name}}
+        self._call("kube apply", resource.patch, body=body, name=name,
+                   content_type="application/apply-patch+yaml",
+                   field_manager=FIELD_MANAGER, force_conflicts=True)
+        return True
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    """Backend único por proceso (todos los módulos comparten clientes y conexiones)."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if BACKEND == "fake":
+                from fake_backend import FakeBackend
+                _backend = FakeBackend()
+            elif BACKEND == "cli":
+                _backend = CliBackend()
+            else:
+                _backend = SdkBackend()
+        return _backend
+
+def set_backend(backend):
+    """Sustituye el backend del proceso (lo usan los benchmarks con un FakeBackend configurado)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Benchmark sin AWS de los flujos completos: setup, setup repetido (convergido),
+monitoreo y limpieza, contra el backend fake.
+
+Escenarios:
+- fake:     todo en proceso (AWS, Kubernetes y CLIs simulados en memoria).
+- fake-cli: CliBackend real; eksctl/helm/kubectl son ejecutables fake (un proceso
+            por comando) y AWS sigue simulado en proceso sobre el mismo estado.
+
+Por paso mide tiempo de reloj, llamadas externas (AWS, Kubernetes, comandos),
+procesos lanzados y pico de memoria, y puede compararse con una línea base guardada
+para detectar regresiones en CI: bloquean los conteos de llamadas (deterministas);
+tiempo y memoria son avisos porque dependen de la máquina.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# ==========================================
+# ⚙️ CONFIGURACIÓN
+# ==========================================
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(REPO_DIR, "benchmark-baseline.json")
+SCENARIOS = ("fake", "fake-cli")
+# (etiqueta, módulo, argumentos) en el orden en que se ejecutan dentro de cada escenario
+FLOW = [
+    ("setup", "setup_sdk", []),
+    ("setup (convergido)", "setup_sdk", []),
+    ("monitoring", "setup_monitoring", []),
+    ("cleanup", "cleanup_sdk_all", ["--yes"]),
+]
+# Solo los conteos son deterministas y bloquean; tiempo y memoria dependen de la máquina que
+# grabó la línea base y se muestran como aviso (salvo --strict-timing).
+# Margen para esos avisos: relativo y absoluto (evita falsos positivos en runs cortos)
+WALL_TOLERANCE = 0.25
+WALL_SLACK = 0.25            # segundos
+MEMORY_TOLERANCE = 0.25
+COUNT_METRICS = ("aws", "kube", "exec", "spawns")
+
+class Colors:
+    BLUE = '\033[94m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    END = '\033[0m'
+
+# ---------------------------------------------------------
+# Proceso worker: ejecuta el flujo de un escenario y guarda las métricas
+# ---------------------------------------------------------
+def _call_counts(stats):
+    """Llamadas registradas por el backend, agrupadas por familia (aws, kube, exec, http)."""
+    counts = {}
+    for op, times in stats.ops.items():
+        family = op.split()[0]
+        counts[family] = counts.get(family, 0) + len(times)
+    return counts
+
+def run_worker(scenario, workdir, failure_rate, seed, result_path):
+    import tracemalloc
+    spawns = []
+
+    def audit(event, args):
+        if event == "subprocess.Popen":
+            spawns.append(args[0])
+    sys.addaudithook(audit)
+
+    from backends import set_backend
+    from fake_backend import FakeBackend, FakeCliBackend
+    if scenario == "fake":
+        backend = FakeBackend(failure_rate=failure_rate, seed=seed)
+    else:
+        backend = FakeCliBackend(os.path.join(workdir, "fake-cloud.json"), os.path.join(workdir, "bin"),
+                                 failure_rate=failure_rate, seed=seed)
+    set_backend(backend)
+
+    import importlib
+    results = []
+    tracemalloc.start()
+    for label, module_name, argv in FLOW:
+        module = importlib.import_module(module_name)
+        before, spawned = _call_counts(backend.stats), len(spawns)
+        tracemalloc.reset_peak()
+        status = "ok"
+        start = time.perf_counter()
+        try:
+            module.main(list(argv))
+        except SystemExit as e:
+            if e.code not in (0, None):
+                status = "falló"
+        except Exception as e:
+            status = f"error: {e.__class__.__name__}"
+        wall = time.perf_counter() - start
+        after = _call_counts(backend.stats)
+        results.append({
+            "step": label, "status": status, "wall": round(wall, 4),
+            "aws": after.get("aws", 0) - before.get("aws", 0),
+            "kube": after.get("kube", 0) - before.get("kube", 0),
+            "exec": after.get("exec", 0) - before.get("exec", 0),
+            "spawns": len(spawns) - spawned,
+            "peak_kb": round(tracemalloc.get_traced_memory()[1] / 1024, 1),
+        })
+    tracemalloc.stop()
+    with open(result_path, "w") as f:
+        json.dump(results, f)
+
+# ---------------------------------------------------------
+# Proceso principal
+# ---------------------------------------------------------
+def run_scenario(scenario, args):
+    """Lanza un worker aislado (directorio, caché y estado propios) y devuelve sus métricas."""
+    with tempfile.TemporaryDirectory(prefix=f"sre-bench-{scenario}-") as workdir:
+        env = dict(os.environ,
+                   SRE_BACKEND="fake",
+                   SRE_CACHE_FILE=os.path.join(workdir, "cache.json"),
+                   SRE_STATE_FILE=os.path.join(workdir, "state.json"),
+                   SRE_VENDOR_DIR=os.path.join(workdir, "vendor"),
+                   SRE_FAKE_LATENCY_SCALE=str(args.latency_scale),
+                   PYTHONPATH=REPO_DIR)
+        env.pop("SRE_TRACE_FILE", None)
+        env.pop("SRE_BACKEND_STATS", None)
+        result_path = os.path.join(workdir, "result.json")
+        log_path = os.path.join(workdir, "output.log")
+        command = [sys.executable, os.path.abspath(__file__), "--worker", scenario, "--workdir", workdir,
+                   "--failure-rate", str(args.failure_rate), "--seed", str(args.seed), "--result", result_path]
+        with open(log_path, "w") as log:
+            proc = subprocess.run(command, cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT,
+                                  stdin=subprocess.DEVNULL)
+        if proc.returncode != 0 or not os.path.exists(result_path):
+            with open(log_path) as f:
+                print(f.read()[-3000:])
+            raise RuntimeError(f"El worker del escenario '{scenario}' terminó con código {proc.returncode}")
+        with open(result_path) as f:
+            return json.load(f)
+
+def median_runs(runs):
+    """Combina varias repeticiones: mediana por métrica y paso."""
+    combined = []
+    for steps in zip(*runs):
+        row = {"step": steps[0]["step"],
+               "status": "ok" if all(s["status"] == "ok" for s in steps) else steps[-1]["status"]}
+        for metric in ("wall", "peak_kb") + COUNT_METRICS:
+            row[metric] = statistics.median(s[metric] for s in steps)
+        combined.append(row)
+    return combined
+
+def print_results(results):
+    print(f"\n{Colors.BLUE}🏁 Resultados del benchmark{Colors.END}")
+    print(f"   {'ESCENARIO':<10}{'PASO':<20}{'ESTADO':<8}{'TIEMPO':>9}{'AWS':>6}{'KUBE':>6}{'EXEC':>6}"
+          f"{'PROCESOS':>10}{'PICO MEM':>12}")
+    for scenario, steps in results.items():
+        for s in steps:
+            color = Colors.GREEN if s["status"] == "ok" else Colors.RED
+            print(f"   {scenario:<10}{s['step']:<20}{color}{s['status']:<8}{Colors.END}{s['wall']:8.2f}s"
+                  f"{s['aws']:>6g}{s['kube']:>6g}{s['exec']:>6g}{s['spawns']:>10g}{s['peak_kb'] / 1024:>10.1f}MB")
+        total = sum(s["wall"] for s in steps)
+        print(f"   {scenario:<10}{'TOTAL':<20}{'':<8}{total:8.2f}s")
+
+def compare(results, baseline, strict_timing=False):
+    """
+    Devuelve la lista de regresiones respecto a la línea base: estado y conteos
+    de llamadas. Tiempo y memoria solo cuentan con strict_timing; si no, se avisa.
+    """
+    regressions = []
+    print(f"\n{Colors.BLUE}📐 Comparación con la línea base{Colors.END}")
+    for scenario, steps in results.items():
+        base_steps = {s["step"]: s for s in baseline.get("results", {}).get(scenario, [])}
+        for s in steps:
+            base = base_steps.get(s["step"])
+            if base is None:
+                print(f"   {scenario}/{s['step']}: sin línea base")
+                continue
+            problems = []
+            if s["status"] != "ok" and base["status"] == "ok":
+                problems.append(f"estado {s['status']}")
+            for metric in COUNT_METRICS:
+                if s[metric] > base[metric]:
+                    problems.append(f"{metric} {base[metric]:g} → {s[metric]:g}")
+            timing = []
+            if s["wall"] > base["wall"] * (1 + WALL_TOLERANCE) + WALL_SLACK:
+                timing.append(f"tiempo {base['wall']:.2f}s → {s['wall']:.2f}s")
+            if s["peak_kb"] > base["peak_kb"] * (1 + MEMORY_TOLERANCE):
+                timing.append(f"memoria {base['peak_kb']:.0f}KB → {s['peak_kb']:.0f}KB")
+            if strict_timing:
+                problems += timing
+                timing = []
+            delta = s["wall"] - base["wall"]
+            if problems:
+                regressions.append(f"{scenario}/{s['step']}: " + ", ".join(problems))
+                print(f"   {Colors.RED}✖ {scenario}/{s['step']}: {', '.join(problems)}{Colors.END}")
+            elif timing:
+                print(f"   {Colors.YELLOW}⚠ {scenario}/{s['step']}: {', '.join(timing)} (aviso, no bloquea){Colors.END}")
+            else:
+                print(f"   {Colors.GREEN}✔{Colors.END} {scenario}/{s['step']}: {delta:+.2f}s")
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark sin AWS de setup, monitoreo y limpieza.")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS,
+                        help="Escenario a ejecutar (se puede repetir; default: todos)")
+    parser.add_argument("--repeat", type=int, default=1, help="Repeticiones por escenario (se usa la mediana)")
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="Multiplica las latencias simuladas (0 = sin latencia)")
+    parser.add_argument("--failure-rate", type=float, default=0.0,
+                        help="Probabilidad de fallo transitorio por operación simulada")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baseline", metavar="ARCHIVO",
+                        help=f"Compara con esta línea base y falla si hay regresiones (p.ej. {os.path.basename(BASELINE_FILE)})")
+    parser.add_argument("--strict-timing", action="store_true",
+                        help="Tiempo y memoria también bloquean (solo tiene sentido en la máquina que grabó la línea base)")
+    parser.add_argument("--save-baseline", metavar="ARCHIVO", help="Guarda los resultados como nueva línea base")
+    parser.add_argument("--json", metavar="ARCHIVO", help="Escribe los resultados en JSON")
+    # Uso interno: el proceso principal lanza un worker por escenario
+    parser.add_argument("--worker", choices=SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.worker:
+        run_worker(args.worker, args.workdir, args.failure_rate, args.seed, args.result)
+        return
+
+    params = {"latency_scale": args.latency_scale, "failure_rate": args.failure_rate, "seed": args.seed}
+    results = {}
+    for scenario in args.scenario or SCENARIOS:
+        print(f"▶ Escenario {scenario} ({args.repeat} repetición(es))...")
+        results[scenario] = median_runs([run_scenario(scenario, args) for _ in range(max(1, args.repeat))])
+    print_results(results)
+
+    document = {"params": params, "python": sys.version.split()[0], "results": results}
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(document, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(document, f, indent=2)
+            f.write("\n")
+        print(f"\n💾 Línea base guardada en {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("params") != params:
+            print(f"{Colors.YELLOW}⚠️ Parámetros distintos a la línea base: {baseline.get('params')}{Colors.END}")
+        regressions = compare(results, baseline, args.strict_timing)
+        if regressions:
+            print(f"\n{Colors.RED}❌ {len(regressions)} regresión(es) de rendimiento.{Colors.END}")
+            sys.exit(1)
+        print(f"\n{Colors.GREEN}✅ Sin regresiones.{Colors.END}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+Simulador de capacidad del node group antes de crear el clúster.
+
+Reúne todo lo que va a pedir sitio en los nodos: la app del manifiesto generado
+(réplicas, requests, surge del rollout y reglas de reparto), el stack de monitoreo
+del perfil elegido, los controladores de setup_sdk.py y los DaemonSets de EKS. Para
+cada tipo de instancia calcula la capacidad asignable real (max-pods por ENI,
+kube-reserved y umbral de desalojo del AMI de EKS) y coloca los pods como el
+scheduler: cabe o queda en Pending. Devuelve la forma más barata del node group que
+lo programa todo.
+
+    python3 capacity.py                       # Plan para el manifiesto actual
+    python3 capacity.py --replicas 2-12       # Forma más barata por número de réplicas
+    python3 capacity.py --apply               # Guarda el plan: setup_sdk.py lo pasa a eksctl
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+from manifests import (APP_AUTOSCALING, APP_LABEL, MONITORING_COPIES, MONITORING_PROFILE, MONITORING_PROFILES,
+                       ManifestError, app_manifests, load_all, parse_quantity, write_if_changed)
+
+# ==========================================
+# ⚙️ CONFIGURACIÓN
+# ==========================================
+MANIFEST_FILE = "amazon-generated.yaml"
+# Plan guardado con --apply: si existe, setup_sdk.py crea el node group con él (ver node_group())
+CAPACITY_PLAN_FILE = os.environ.get("SRE_CAPACITY_PLAN_FILE", "capacity-plan.json")
+DEFAULT_NODE_GROUP = {"node_type": "t3.medium", "nodes": 2, "nodes_max": 6}
+# tipo: (vCPU, memoria GiB, ENIs, IPv4 por ENI, USD/h On-Demand us-east-1). Solo x86: la imagen no es multi-arch
+INSTANCE_TYPES = {
+    "t3.small": (2, 2, 3, 4, 0.0208),
+    "t3.medium": (2, 4, 3, 6, 0.0416),
+    "t3.large": (2, 8, 3, 12, 0.0832),
+    "t3.xlarge": (4, 16, 4, 15, 0.1664),
+    "t3a.medium": (2, 4, 3, 6, 0.0376),
+    "t3a.large": (2, 8, 3, 12, 0.0752),
+    "t3a.xlarge": (4, 16, 4, 15, 0.1504),
+    "c5.large": (2, 4, 3, 10, 0.085),
+    "c5.xlarge": (4, 8, 4, 15, 0.17),
+    "m5.large": (2, 8, 3, 10, 0.096),
+    "m5.xlarge": (4, 16, 4, 15, 0.192),
+    "m6i.large": (2, 8, 3, 10, 0.096),
+    "r5.large": (2, 16, 3, 10, 0.126),
+}
+MEMORY_CAPACITY = 0.96          # Parte de la memoria nominal que el kubelet ve como capacity
+EVICTION_HARD = 100 * 2 ** 20   # memory.available<100Mi del AMI de EKS
+HOURS_PER_MONTH = 730
+MIN_NODES = 2                   # Nunca un solo nodo: su caída tira toda la app
+MAX_NODES = 40
+ZONES = 3                       # eksctl reparte el node group entre las zonas de sus subredes
+# DaemonSets de EKS en cada nodo (requests de los add-ons por defecto)
+EKS_DAEMONSETS = {"aws-node": {"cpu": "25m"}, "kube-proxy": {"cpu": "100m"}}
+# Pods de sistema y controladores de setup_sdk.py: (nombre, réplicas, requests, solo con autoscaling).
+# Los charts de ExternalDNS, ALB Controller y Cluster Autoscaler no fijan requests: solo ocupan un hueco de pod
+SYSTEM_PODS = [
+    ("coredns", 2, {"cpu": "100m", "memory": "70Mi"}, False),
+    ("aws-load-balancer-controller", 2, {}, False),
+    ("external-dns", 1, {}, False),
+    ("metrics-server", 1, {"cpu": "100m", "memory": "200Mi"}, True),
+    ("cluster-autoscaler", 1, {}, True),
+]
+# Ruta de valores de MONITORING_PROFILES -> pod que contiene ese contenedor (node-exporter es un DaemonSet)
+MONITORING_PODS = {
+    "prometheus.prometheusSpec": "prometheus",
+    "grafana": "grafana",
+    "grafana.sidecar": "grafana",
+    "kube-state-metrics": "kube-state-metrics",
+    "prometheusOperator": "prometheus-operator",
+    "alertmanager.alertmanagerSpec": "alertmanager",
+}
+MONITORING_DAEMONSET = "prometheus-node-exporter"
+
+class Colors:
+    BLUE = '\033[94m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    END = '\033[0m'
+
+# ---------------------------------------------------------
+# Capacidad por tipo de instancia
+# ---------------------------------------------------------
+def max_pods(enis, ips_per_eni):
+    """Fórmula del VPC CNI sin prefix delegation: una IP por pod, menos la primaria de cada ENI."""
+    return enis * (ips_per_eni - 1) + 2
+
+def kube_reserved(vcpus, pods):
+    """Reservas del AMI de EKS: CPU por tramos de núcleos y 255Mi + 11Mi por pod admitido."""
+    cpu = 0.06 + 0.01 * (vcpus > 1) + 0.005 * max(0, min(vcpus, 4) - 2) + 0.0025 * max(0, vcpus - 4)
+    return cpu, (255 + 11 * pods) * 2 ** 20
+
+def node_shape(instance_type):
+    """Capacidad asignable (allocatable) de un nodo y su precio."""
+    vcpus, memory_gib, enis, ips, price = INSTANCE_TYPES[instance_type]
+    pods = max_pods(enis, ips)
+    reserved_cpu, reserved_memory = kube_reserved(vcpus, pods)
+    return {
+        "type": instance_type,
+        "cpu": vcpus - reserved_cpu,
+        "memory": memory_gib * 2 ** 30 * MEMORY_CAPACITY - reserved_memory - EVICTION_HARD,
+        "pods": pods,
+        "price": price,
+    }
+
+# ---------------------------------------------------------
+# Carga: pods a colocar y DaemonSets por nodo
+# ---------------------------------------------------------
+def _pod(name, group, requests, spread=(), strict=False):
+    return {"name": name, "group": group, "cpu": parse_quantity(requests.get("cpu", 0)),
+            "memory": parse_quantity(requests.get("memory", 0)), "spread": tuple(spread), "strict": strict}
+
+def read_manifest(path=MANIFEST_FILE):
+    """Objetos del manifiesto generado; si aún no existe, los que generaría setup_sdk.py."""
+    try:
+        with open(path) as f:
+            return load_all(f.read()), path
+    except FileNotFoundError:
+        return app_manifests("app.example.com", "arn:aws:acm:example"), "manifests.app_manifests()"
+
+def app_workload(objects, replicas=None, surge=True):
+    """
+    Pods de la app según el Deployment: réplicas (o las de la HPA), requests, claves de
+    reparto y, con surge, los pods extra que crea un rollout con maxUnavailable 0.
+    Devuelve (réplicas, réplicas de la HPA como (min, max) o None, pods).
+    """
+    by_kind = {o["kind"]: o for o in objects}
+    spec = by_kind["Deployment"]["spec"]
+    pod_spec = spec["template"]["spec"]
+    hpa = by_kind.get("HorizontalPodAutoscaler")
+    hpa_range = (hpa["spec"]["minReplicas"], hpa["spec"]["maxReplicas"]) if hpa else None
+    if replicas is None:
+        replicas = spec.get("replicas") or (hpa_range[1] if hpa_range else 1)
+    requests = pod_spec["containers"][0].get("resources", {}).get("requests", {})
+    spread = {c["topologyKey"]: c["whenUnsatisfiable"] == "DoNotSchedule"
+              for c in pod_spec.get("topologySpreadConstraints", [])}
+    for term in pod_spec.get("affinity", {}).get("podAntiAffinity", {}).get(
+            "preferredDuringSchedulingIgnoredDuringExecution", []):
+        spread.setdefault(term["podAffinityTerm"]["topologyKey"], False)
+    extra = 0
+    if surge:
+        max_surge = spec.get("strategy", {}).get("rollingUpdate", {}).get("maxSurge", "25%")
+        extra = math.ceil(replicas * int(max_surge[:-1]) / 100) if str(max_surge).endswith("%") else int(max_surge)
+    keys = [k.split("/")[-1] for k in spread]   # hostname / zone
+    strict = spread.get("kubernetes.io/hostname", False)
+    pods = [_pod(f"{APP_LABEL}-{i}", APP_LABEL, requests, keys, strict) for i in range(replicas + extra)]
+    return replicas, hpa_range, pods
+
+def cluster_workload(profile, autoscaling, monitoring=True):
+    """Pods de sistema, controladores y monitoreo, y requests de los DaemonSets de cada nodo."""
+    pods = [_pod(f"{name}-{i}", name, requests, ["hostname"])
+            for name, replicas, requests, only_autoscaling in SYSTEM_PODS
+            if autoscaling or not only_autoscaling for i in range(replicas)]
+    daemonsets = [_pod(name, name, requests) for name, requests in EKS_DAEMONSETS.items()]
+    if monitoring:
+        settings = MONITORING_PROFILES[profile] or {"resources": {}}
+        containers = {}
+        for path, pod_name in MONITORING_PODS.items():
+            containers.setdefault(pod_name, [])
+            if path in settings["resources"]:
+                copies = MONITORING_COPIES.get(path, 1)
+                containers[pod_name] += [settings["resources"][path]["requests"]] * copies
+        for pod_name, requests in containers.items():
+            total = {"cpu": sum(parse_quantity(r.get("cpu", 0)) for r in requests),
+                     "memory": sum(parse_quantity(r.get("memory", 0)) for r in requests)}
+            pods.append(_pod(pod_name, pod_name, total))
+        exporter = settings["resources"].get(MONITORING_DAEMONSET, {}).get("requests", {})
+        daemonsets.append(_pod(MONITORING_DAEMONSET, MONITORING_DAEMONSET, exporter))
+    return pods, daemonsets
+
+# ---------------------------------------------------------
+# Colocación (bin packing al estilo del scheduler)
+# ---------------------------------------------------------
+def pack(pods, daemonsets, shape, count, strict=False):
+    """
+    Coloca los pods (de mayor a menor) en 'count' nodos iguales. Entre los nodos donde
+    caben, elige como el scheduler: menos pods del mismo grupo en el nodo y en la zona
+    (antiafinidad y topologySpread preferentes) y después el más libre (LeastAllocated).
+    Las reglas 'strict' (o todas, con strict=True) impiden repetir grupo en un nodo.
+    Devuelve (nodos, pods en Pending).
+    """
+    base = {"cpu": shape["cpu"] - sum(d["cpu"] for d in daemonsets),
+            "memory": shape["memory"] - sum(d["memory"] for d in daemonsets),
+            "pods": shape["pods"] - len(daemonsets)}
+    if min(base.values()) < 0:
+        return [], list(pods)
+    nodes = [dict(base, zone=i % ZONES, groups={}) for i in range(count)]
+    zone_counts = {}
+    pending = []
+    for pod in sorted(pods, key=lambda p: (-p["memory"], -p["cpu"], p["name"])):
+        group = pod["group"]
+        exclusive = "hostname" in pod["spread"] and (strict or pod["strict"])
+        best, best_score = None, None
+        for node in nodes:
+            if node["cpu"] < pod["cpu"] or node["memory"] < pod["memory"] or node["pods"] < 1:
+                continue
+            on_node = node["groups"].get(group, 0)
+            if exclusive and on_node:
+                continue
+            score = (on_node if "hostname" in pod["spread"] else 0,
+                     zone_counts.get((group, node["zone"]), 0) if "zone" in pod["spread"] else 0,
+                     -(node["memory"] / shape["memory"] + node["cpu"] / shape["cpu"]))
+            if best_score is None or score < best_score:
+                best, best_score = node, score
+        if best is None:
+            pending.append(pod)
+            continue
+        best["cpu"] -= pod["cpu"]
+        best["memory"] -= pod["memory"]
+        best["pods"] -= 1
+        best["groups"][group] = best["groups"].get(group, 0) + 1
+        zone_counts[(group, best["zone"])] = zone_counts.get((group, best["zone"]), 0) + 1
+    return nodes, pending
+
+def nodes_needed(pods, daemonsets, shape, strict=False, min_nodes=MIN_NODES):
+    """Mínimo de nodos de este tipo que lo programan todo (None si no basta con MAX_NODES)."""
+    free = {r: shape[r] - sum(d[r] for d in daemonsets) for r in ("cpu", "memory")}
+    free["pods"] = shape["pods"] - len(daemonsets)
+    if min(free.values()) <= 0 or any(p["cpu"] > free["cpu"] or p["memory"] > free["memory"] for p in pods):
+        return None
+    # Cota inferior: el recurso más escaso y, con antiafinidad estricta, una réplica por nodo
+    count = max(min_nodes, math.ceil(len(pods) / free["pods"]),
+                *(math.ceil(sum(p[r] for p in pods) / free[r]) for r in ("cpu", "memory")))
+    groups = {}
+    for p in pods:
+        if "hostname" in p["spread"] and (strict or p["strict"]):
+            groups[p["group"]] = groups.get(p["group"], 0) + 1
+    count = max([count] + list(groups.values()))
+    while count <= MAX_NODES:
+        if not pack(pods, daemonsets, shape, count, strict)[1]:
+            return count
+        count += 1
+    return None
+
+def monthly_cost(shape, nodes):
+    return shape["price"] * nodes * HOURS_PER_MONTH
+
+def plan(types, pods, daemonsets, args, peak_pods=None):
+    """
+    Por tipo: nodos para 'pods' (y para 'peak_pods', el máximo de la HPA), coste y uso.
+    Ordenado de más barato a más caro; los tipos que no caben en MAX_NODES no aparecen.
+    """
+    rows = []
+    for instance_type in types:
+        shape = node_shape(instance_type)
+        nodes = nodes_needed(pods, daemonsets, shape, args.strict_affinity, args.min_nodes)
+        if nodes is None:
+            continue
+        nodes_max = nodes
+        if peak_pods:
+            nodes_max = nodes_needed(peak_pods, daemonsets, shape, args.strict_affinity, args.min_nodes)
+            if nodes_max is None:
+                continue
+        placed, _ = pack(pods, daemonsets, shape, nodes, args.strict_affinity)
+        shared = sum(max(0, n["groups"].get(APP_LABEL, 0) - 1) for n in placed)
+        rows.append({"type": instance_type, "shape": shape, "nodes": nodes, "nodes_max": nodes_max,
+                     "cost": monthly_cost(shape, nodes),
+                     "cpu": 1 - sum(n["cpu"] for n in placed) / (shape["cpu"] * nodes),
+                     "memory": 1 - sum(n["memory"] for n in placed) / (shape["memory"] * nodes),
+                     "shared": shared})
+    return sorted(rows, key=lambda r: (r["cost"], monthly_cost(r["shape"], r["nodes_max"]), r["type"]))
+
+# ---------------------------------------------------------
+# Plan guardado (lo lee setup_sdk.py)
+# ---------------------------------------------------------
+def node_group(path=CAPACITY_PLAN_FILE):
+    """Tipo y número de nodos del node group: los del plan de --apply si existe, si no t3.medium x 2."""
+    try:
+        with open(path) as f:
+            saved = json.load(f)
+    except FileNotFoundError:
+        return dict(DEFAULT_NODE_GROUP)
+    except ValueError as e:
+        raise ManifestError(f"{path} no es JSON válido: {e}")
+    if saved.get("node_type") not in INSTANCE_TYPES or not isinstance(saved.get("nodes"), int):
+        raise ManifestError(f"{path}: se esperaba node_type (uno de INSTANCE_TYPES) y nodes (entero)")
+    group = dict(DEFAULT_NODE_GROUP, **saved)
+    group["nodes_max"] = max(group["nodes_max"], group["nodes"])
+    return group
+
+# ---------------------------------------------------------
+# Informe
+# ---------------------------------------------------------
+def format_memory(size):
+    return f"{size / 2 ** 20:,.0f}Mi"
+
+def print_workload(pods, daemonsets):
+    print(f"\n{Colors.BLUE}📦 Carga a colocar{Colors.END}")
+    groups = {}
+    for p in pods:
+        groups.setdefault(p["group"], []).append(p)
+    for group, members in sorted(groups.items(), key=lambda item: -sum(p["memory"] for p in item[1])):
+        p = members[0]
+        print(f"   {group:<30}{len(members):>3} x {p['cpu'] * 1000:>5.0f}m {format_memory(p['memory']):>8}")
+    per_node = f"{sum(d['cpu'] for d in daemonsets) * 1000:.0f}m {format_memory(sum(d['memory'] for d in daemonsets))}"
+    print(f"   DaemonSets por nodo ({', '.join(d['name'] for d in daemonsets)}): {per_node}")
+
+def print_current(current, pods, daemonsets, strict):
+    shape = node_shape(current["node_type"])
+    _, pending = pack(pods, daemonsets, shape, current["nodes"], strict)
+    label = f"{current['nodes']} x {current['node_type']}"
+    print(f"\n{Colors.BLUE}🔎 Node group actual ({label}: {shape['pods']} pods, "
+          f"{shape['cpu'] * 1000:.0f}m y {format_memory(shape['memory'])} asignables por nodo){Colors.END}")
+    if pending:
+        names = {}
+        for p in pending:
+            names[p["group"]] = names.get(p["group"], 0) + 1
+        summary = ", ".join(f"{group} x{n}" for group, n in names.items())
+        print(f"{Colors.RED}   ❌ {len(pending)} pod(s) en Pending: {summary}{Colors.END}")
+    else:
+        print(f"{Colors.GREEN}   ✔ Todo cabe.{Colors.END}")
+    return pending
+
+def print_plan(rows, hpa_range, top):
+    print(f"\n{Colors.BLUE}🧮 Formas del node group, de más barata a más cara{Colors.END}")
+    print(f"   {'TIPO':<12}{'NODOS':>6}{'MÁX':>6}{'PODS/NODO':>11}{'CPU':>6}{'MEM':>6}{'USD/MES':>10}  NOTAS")
+    for row in rows[:top]:
+        notes = f"{row['shared']} réplica(s) comparten nodo" if row["shared"] else ""
+        print(f"   {row['type']:<12}{row['nodes']:>6}{row['nodes_max']:>6}{row['shape']['pods']:>11}"
+              f"{row['cpu']:>6.0%}{row['memory']:>6.0%}{row['cost']:>10.2f}  {notes}")
+    if hpa_range:
+        print(f"   NODOS con {hpa_range[0]} réplicas (mínimo de la HPA); MÁX con {hpa_range[1]}: "
+              f"límites del Cluster Autoscaler.")
+
+def print_sweep(results):
+    print(f"\n{Colors.BLUE}📈 Forma más barata por número de réplicas{Colors.END}")
+    print(f"   {'RÉPLICAS':>8}  {'NODE GROUP':<18}{'USD/MES':>10}")
+    for replicas, row in results:
+        shape = f"{row['nodes']} x {row['type']}" if row else "no cabe"
+        cost = f"{row['cost']:>10.2f}" if row else f"{'-':>10}"
+        print(f"   {replicas:>8}  {shape:<18}{cost}")
+
+# ---------------------------------------------------------
+# Ejecución
+# ---------------------------------------------------------
+def parse_replicas(text):
+    low, _, high = text.partition("-")
+    try:
+        values = range(int(low), int(high or low) + 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Réplicas inválidas: {text!r} (usa p.ej. 6 o 2-12)")
+    if not values or values[0] < 1:
+        raise argparse.ArgumentTypeError("Las réplicas deben ser positivas y el rango creciente")
+    return values
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Forma más barata del node group que programa todos los pods.")
+    parser.add_argument("--manifest", default=MANIFEST_FILE, help=f"Manifiesto de la app (default: {MANIFEST_FILE})")
+    parser.add_argument("--replicas", type=parse_replicas,
+                        help="Réplicas de la app, o un rango (2-12) para ver la forma más barata de cada una")
+    parser.add_argument("--stack-profile", choices=sorted(MONITORING_PROFILES), default=MONITORING_PROFILE,
+                        help=f"Perfil del stack de monitoreo (default: {MONITORING_PROFILE})")
+    parser.add_argument("--no-monitoring", action="store_true", help="Sin el stack de setup_monitoring.py")
+    parser.add_argument("--autoscaling", action="store_true",
+                        help="Incluye metrics-server y Cluster Autoscaler (también SRE_AUTOSCALING=1)")
+    parser.add_argument("--strict-affinity", action="store_true",
+                        help="Trata la antiafinidad preferente como obligatoria (una réplica por nodo)")
+    parser.add_argument("--no-surge", action="store_true", help="No reserva hueco para los pods extra del rollout")
+    parser.add_argument("--types", type=lambda v: v.split(","), default=sorted(INSTANCE_TYPES),
+                        help="Tipos de instancia a considerar (default: todos los de INSTANCE_TYPES)")
+    parser.add_argument("--min-nodes", type=int, default=MIN_NODES, help=f"Mínimo de nodos (default: {MIN_NODES})")
+    parser.add_argument("--top", type=int, default=8, help="Formas a mostrar (default: 8)")
+    parser.add_argument("--apply", action="store_true",
+                        help=f"Guarda la forma más barata en {CAPACITY_PLAN_FILE} para setup_sdk.py")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    unknown = [t for t in args.types if t not in INSTANCE_TYPES]
+    if unknown:
+        print(f"{Colors.RED}❌ Tipos sin datos en INSTANCE_TYPES: {', '.join(unknown)}{Colors.END}")
+        sys.exit(1)
+    autoscaling = args.autoscaling or os.environ.get("SRE_AUTOSCALING", "0").lower() in ("1", "true", "yes", "si")
+    print(f"{Colors.BLUE}================================================={Colors.END}")
+    print(f"{Colors.BLUE}   CAPACITY PLANNER (node group)                 {Colors.END}")
+    print(f"{Colors.BLUE}================================================={Colors.END}")
+    try:
+        args.objects, source = read_manifest(args.manifest)
+        current = node_group()
+    except ManifestError as e:
+        print(f"{Colors.RED}❌ {e}{Colors.END}")
+        sys.exit(1)
+    replicas, hpa_range, _ = app_workload(args.objects)
+    if hpa_range is None and autoscaling:
+        hpa_range = (APP_AUTOSCALING["min_replicas"], APP_AUTOSCALING["max_replicas"])
+    base_pods, daemonsets = cluster_workload(args.stack_profile, autoscaling, not args.no_monitoring)
+    print(f"📄 {source} | monitoreo: {'no' if args.no_monitoring else args.stack_profile} | "
+          f"autoscaling: {'sí' if autoscaling else 'no'}")
+
+    def pods_for(count):
+        return base_pods + app_workload(args.objects, count, not args.no_surge)[2]
+
+    if args.replicas and len(args.replicas) > 1:
+        started = time.monotonic()
+        results = []
+        for count in args.replicas:
+            rows = plan(args.types, pods_for(count), daemonsets, args)
+            results.append((count, rows[0] if rows else None))
+        print_sweep(results)
+        print(f"   {len(args.replicas) * len(args.types)} combinaciones en {time.monotonic() - started:.2f}s")
+        return
+
+    if args.replicas:
+        replicas, hpa_range = args.replicas[0], None
+    elif hpa_range:
+        replicas = hpa_range[0]
+    pods = pods_for(replicas)
+    print_workload(pods, daemonsets)
+    print_current(current, pods, daemonsets, args.strict_affinity)
+    rows = plan(args.types, pods, daemonsets, args, pods_for(hpa_range[1]) if hpa_range else None)
+    if not rows:
+        print(f"{Colors.RED}❌ Ningún tipo programa todos los pods con {MAX_NODES} nodos o menos.{Colors.END}")
+        sys.exit(1)
+    print_plan(rows, hpa_range, args.top)
+
+    best = rows[0]
+    chosen = {"node_type": best["type"], "nodes": best["nodes"]}
+    command = f"eksctl create cluster ... --node-type {best['type']} --nodes {best['nodes']}"
+    if hpa_range:
+        command += f" --nodes-min {best['nodes']} --nodes-max {best['nodes_max']}"
+        chosen["nodes_max"] = best["nodes_max"]
+    print(f"\n➤ Más barata: {Colors.GREEN}{best['nodes']} x {best['type']}{Colors.END} "
+          f"({best['cost']:.2f} USD/mes frente a {monthly_cost(node_shape(current['node_type']), current['nodes']):.2f})")
+    print(f"   {command}")
+    if args.apply:
+        if write_if_changed(CAPACITY_PLAN_FILE, json.dumps(chosen, indent=2) + "\n"):
+            print(f"   💾 Plan guardado en {CAPACITY_PLAN_FILE}: setup_sdk.py creará el node group con él.")
+        else:
+            print(f"   💾 {CAPACITY_PLAN_FILE} ya tenía este plan.")
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,59 @@
 #!/usr/bin/env python3
-import boto3
-import subprocess
-import time
 import sys
-from botocore.exceptions import ClientError
+import os
+import argparse
+
+from backends import get_backend, ClientError
+from tracing import get_tracer, TRACE_FORMATS
+from throttling import classify_error
+from concurrent.futures import ThreadPoolExecutor
+
+from dag_runner import Task, run_dag
+from aws_cache import MetadataCache, ACCOUNT_TTL
+from state_fingerprint import FingerprintStore, fingerprint
+from step_journal import StepJournal, select_steps
+from readiness import wait_until, load_balancers_gone, ReadinessError
 
 # ==========================================
 # CONFIGURACIÓN
 # ==========================================
-CLUSTER_NAME = "cluster-sre-demo"
-REGION = "us-east-1"
+# Cada valor se puede sobrescribir por variable de entorno (lo usa fleet.py para varios entornos)
+CLUSTER_NAME = os.environ.get("SRE_CLUSTER_NAME", "cluster-sre-demo")
+REGION = os.environ.get("SRE_REGION", "us-east-1")
+AWS_PROFILE = os.environ.get("AWS_PROFILE", "default")
+# Mismos nombres que setup_sdk.py: una política por clúster
 POLICIES_TO_DELETE = [
-    "AllowExternalDNSUpdates",
-    "AWSLoadBalancerControllerIAMPolicy"
+    f"AllowExternalDNSUpdates-{CLUSTER_NAME}",
+    f"AWSLoadBalancerControllerIAMPolicy-{CLUSTER_NAME}",
+    f"AmazonEKSClusterAutoscalerPolicy-{CLUSTER_NAME}"
+]
+# Service Accounts IRSA: (nombre, namespace, política que usa su rol)
+IRSA_ACCOUNTS = [
+    ("external-dns", "default", POLICIES_TO_DELETE[0]),
+    ("aws-load-balancer-controller", "kube-system", POLICIES_TO_DELETE[1]),
+    ("cluster-autoscaler", "kube-system", POLICIES_TO_DELETE[2]),
 ]
+# Ingress cuyos ALBs deben desaparecer antes de desinstalar el controlador
+INGRESSES_WITH_ALB = [
+    "default/amazon-ingress-alb",
+    "monitoring/grafana-ingress"
+]
+ALB_DELETE_TIMEOUT = 300  # Segundos máximos esperando que AWS borre los ALBs
+POLICY_VERSION_WORKERS = 4  # Borrados de versiones IAM simultáneos por política
+
+# Backend (boto3/Kubernetes en proceso, CLI o fake) y clientes reutilizados
+backend = get_backend()
+tracer = get_tracer()
+iam_client = backend.client('iam', REGION)
+sts_client = backend.client('sts', REGION)
+elbv2_client = backend.client('elbv2', REGION)
 
-# Inicializar clientes de Boto3
-iam_client = boto3.client('iam', region_name=REGION)
-sts_client = boto3.client('sts', region_name=REGION)
+# Caché de metadatos compartida con setup_sdk.py y setup_monitoring.py
+cache = MetadataCache(AWS_PROFILE, REGION, CLUSTER_NAME)
+# Huellas de lo aplicado por setup_sdk.py: tras la limpieza ya no describen nada real
+state = FingerprintStore(cache.scope)
+# Diario de la limpieza: si se corta, la siguiente no repite los borrados ni las esperas ya hechos
+journal = StepJournal(cache.scope, "cleanup_sdk_all")
 
 class Colors:
     RED = '\033[91m'
@@ -28,119 +64,256 @@ class Colors:
 
 def run_command(command, ignore_errors=True):
     print(f"   > Ejecutando: {command}")
-    try:
-        subprocess.run(command, shell=True, check=True, stdout=subprocess.DEVNULL)
-    except subprocess.CalledProcessError:
+    if backend.run(command, quiet=True).returncode != 0:
         if ignore_errors:
             print(f"     {Colors.YELLOW}(Ignorado) El recurso no existía o falló.{Colors.END}")
         else:
             print(f"     {Colors.RED}Error crítico.{Colors.END}")
             sys.exit(1)
 
+def delete_k8s(kind, name, namespace="default"):
+    """Borra un objeto de Kubernetes por la conexión del backend (ignora si no existe)."""
+    print(f"   > Eliminando {kind}/{name} ({namespace})")
+    if not backend.kube_delete(kind, name, namespace):
+        print(f"     {Colors.YELLOW}(Ignorado) El recurso no existía o falló.{Colors.END}")
+
+def detach_policy(arn):
+    """
+    Desvincula la política de los roles IRSA de este clúster (eksctl-<clúster>-addon-iamserviceaccount-*).
+    Devuelve las demás entidades que la usan (roles, usuarios, grupos), que no se tocan.
+    """
+    own_prefix = f"eksctl-{CLUSTER_NAME}-addon-iamserviceaccount-"
+    foreign = []
+    paginator = iam_client.get_paginator('list_entities_for_policy')
+    for page in paginator.paginate(PolicyArn=arn):
+        for role in page.get('PolicyRoles', []):
+            if not role['RoleName'].startswith(own_prefix):
+                foreign.append(f"rol {role['RoleName']}")
+                continue
+            print(f"     - Desvinculando del rol: {role['RoleName']}")
+            iam_client.detach_role_policy(RoleName=role['RoleName'], PolicyArn=arn)
+        foreign += [f"usuario {user['UserName']}" for user in page.get('PolicyUsers', [])]
+        foreign += [f"grupo {group['GroupName']}" for group in page.get('PolicyGroups', [])]
+    return foreign
+
 def delete_iam_policy(policy_name, account_id):
     """Borra una política IAM usando Boto3 (Maneja versiones y detach)."""
-    arn = f"arn:aws:iam::{account_id}:policy/{policy_name}"
+    arn = cache.get(f"policy_arn:{policy_name}") or f"arn:aws:iam::{account_id}:policy/{policy_name}"
     print(f"   > Buscando política: {policy_name}")
     
     try:
-        # 1. Listar versiones de la política
-        versions = iam_client.list_policy_versions(PolicyArn=arn)['Versions']
-        
-        # 2. Borrar versiones no predeterminadas
-        for v in versions:
-            if not v['IsDefaultVersion']:
-                print(f"     - Borrando versión antigua: {v['VersionId']}")
-                iam_client.delete_policy_version(PolicyArn=arn, VersionId=v['VersionId'])
+        # 1. Desvincular de los roles de este clúster (si no, delete_policy falla con DeleteConflict)
+        foreign = detach_policy(arn)
+        if foreign:
+            print(f"     {Colors.YELLOW}⚠ No se borra: también la usan {', '.join(foreign)} (fuera de {CLUSTER_NAME}).{Colors.END}")
+            return
+
+        # 2. Borrar en paralelo las versiones no predeterminadas
+        versions = [v['VersionId'] for v in iam_client.list_policy_versions(PolicyArn=arn)['Versions']
+                    if not v['IsDefaultVersion']]
+        if versions:
+            print(f"     - Borrando versiones antiguas: {', '.join(versions)}")
+            with ThreadPoolExecutor(max_workers=min(len(versions), POLICY_VERSION_WORKERS)) as pool:
+                list(pool.map(lambda v: iam_client.delete_policy_version(PolicyArn=arn, VersionId=v), versions))
         
         # 3. Borrar la política
         iam_client.delete_policy(PolicyArn=arn)
         print(f"     {Colors.GREEN}✔ Política eliminada correctamente.{Colors.END}")
+        cache.invalidate(f"policy_arn:{policy_name}")
         
     except ClientError as e:
         if e.response['Error']['Code'] == 'NoSuchEntity':
             print(f"     {Colors.YELLOW}(Ignorado) La política no existe.{Colors.END}")
+            cache.invalidate(f"policy_arn:{policy_name}")
         elif e.response['Error']['Code'] == 'DeleteConflict':
             print(f"     {Colors.RED}⚠ No se pudo borrar. Aún está adjunta a algún Rol.{Colors.END}")
+        elif classify_error(e) in ("throttling", "transient"):
+            # Ni siquiera los reintentos bastaron: fallamos la tarea en vez de dejar la política huérfana
+            print(f"     {Colors.RED}⚠ IAM sigue limitando las llamadas. Vuelve a ejecutar la limpieza.{Colors.END}")
+            raise
         else:
             print(f"     {Colors.RED}Error AWS: {e}{Colors.END}")
 
-def main():
+def wait_for_albs():
+    print(f"{Colors.YELLOW}⏳ Esperando a que AWS elimine los balanceadores físicos...{Colors.END}")
+    # Consultamos ELBv2 por los tags del controlador: seguimos en cuanto ya no existen.
+    # Si el controlador se desinstala antes, los ALBs quedarían huérfanos.
+    try:
+        wait_until(load_balancers_gone(elbv2_client, CLUSTER_NAME, INGRESSES_WITH_ALB),
+                   "ALBs eliminados", timeout=ALB_DELETE_TIMEOUT)
+    except ReadinessError as e:
+        print(f"{Colors.RED}❌ {e}{Colors.END}")
+        print(f"{Colors.RED}   Revisa los logs del controlador: kubectl logs -n kube-system deployment/aws-load-balancer-controller{Colors.END}")
+        sys.exit(1)
+
+def delete_cluster():
+    print(f"\n{Colors.BLUE}[3/4] Destruyendo Clúster EKS (eksctl)...{Colors.END}")
+    if backend.run(f"eksctl delete cluster --name {CLUSTER_NAME} --region {REGION}").returncode != 0:
+        print(f"{Colors.RED}Error borrando el clúster. Puede que ya no exista.{Colors.END}")
+    # El clúster ya no existe: su VPC, OIDC y Service Accounts cacheados dejan de ser válidos
+    cache.invalidate("cluster")
+    for name, namespace, _ in IRSA_ACCOUNTS:
+        cache.invalidate(f"irsa:{namespace}/{name}")
+
+def build_orphan_tasks(report):
+    """
+    Pasos para los huérfanos de un informe de inventory.py: registros DNS y ALBs
+    en paralelo con el resto; target groups y security groups cuando sus ALBs ya
+    no existen (antes AWS los rechaza por estar en uso).
+    """
+    from inventory import ORPHAN_TYPES, delete_orphans
+    kinds = [kind for kind in ORPHAN_TYPES if any(entry["type"] == kind for entry in report["orphans"])]
+    # Sin ALBs huérfanos en el informe no hay paso al que esperar
+    after_albs = ["orphans_load-balancer"] if "load-balancer" in kinds else []
+    deps = {"target-group": after_albs, "security-group": after_albs}
+    return [Task(f"orphans_{kind}", lambda r, k=kind: delete_orphans(report, k, REGION), deps=deps.get(kind, []))
+            for kind in kinds]
+
+def build_teardown_tasks(account_id, report=None):
+    """
+    Grafo de borrado. Los Ingress de la app y de Grafana se borran a la vez; los
+    controladores (ALB, ExternalDNS) siguen vivos hasta que los ALBs desaparecen para
+    que limpien los balanceadores y los registros DNS; cada política IAM se borra en
+    cuanto su Service Account IRSA (y su rol) ya no existen, sin esperar al clúster.
+    Con un informe de huérfanos (inventory.py --orphans) se añaden sus borrados.
+    """
+    tasks = [
+        # PASO 1: Recursos Kubernetes (Ingress/ALB) - CRÍTICO
+        Task("ingress_app", lambda r: delete_k8s("ingress", "amazon-ingress-alb", "default")),
+        Task("ingress_grafana", lambda r: delete_k8s("ingress", "grafana-ingress", "monitoring")),
+        Task("deployment_app", lambda r: delete_k8s("deployment", "amazon-deployment", "default")),
+        Task("pdb_app", lambda r: delete_k8s("pdb", "amazon-pdb", "default")),
+        # Autoscaling (setup_sdk.py --autoscaling): fuera primero para que nadie reescale durante el borrado
+        Task("hpa_app", lambda r: delete_k8s("hpa", "amazon-hpa", "default")),
+        Task("helm_cluster_autoscaler", lambda r: run_command("helm uninstall cluster-autoscaler -n kube-system")),
+        Task("helm_metrics_server", lambda r: run_command("helm uninstall metrics-server -n kube-system"),
+             deps=["hpa_app"]),
+        Task("service_app", lambda r: delete_k8s("service", "amazon-service-alb", "default"),
+             deps=["ingress_app"]),
+        # Esto borra el servicio LoadBalancer si existiera alguno extra
+        Task("service_grafana", lambda r: delete_k8s("service", "prometheus-grafana", "monitoring"),
+             deps=["ingress_grafana"]),
+        Task("wait_albs", lambda r: wait_for_albs(), deps=["ingress_app", "ingress_grafana"]),
+        # PASO 2: Helm, Namespaces y Service Accounts (IRSA)
+        Task("helm_external_dns", lambda r: run_command("helm uninstall external-dns -n default"),
+             deps=["wait_albs"]),
+        Task("helm_alb", lambda r: run_command("helm uninstall aws-load-balancer-controller -n kube-system"),
+             deps=["wait_albs"]),
+        Task("helm_prometheus", lambda r: run_command("helm uninstall prometheus -n monitoring"),
+             deps=["wait_albs", "service_grafana"]),
+        # Borramos el namespace completo para asegurar limpieza
+        Task("namespace_monitoring", lambda r: delete_k8s("namespace", "monitoring"),
+             deps=["helm_prometheus"]),
+        Task("irsa_external-dns", lambda r: run_command(
+            f"eksctl delete iamserviceaccount --name external-dns --cluster {CLUSTER_NAME} --namespace default"),
+             deps=["helm_external_dns"]),
+        Task("irsa_aws-load-balancer-controller", lambda r: run_command(
+            f"eksctl delete iamserviceaccount --name aws-load-balancer-controller --cluster {CLUSTER_NAME} --namespace kube-system"),
+             deps=["helm_alb"]),
+        Task("irsa_cluster-autoscaler", lambda r: run_command(
+            f"eksctl delete iamserviceaccount --name cluster-autoscaler --cluster {CLUSTER_NAME} --namespace kube-system"),
+             deps=["helm_cluster_autoscaler"]),
+        # PASO 3: Clúster EKS
+        Task("cluster", lambda r: delete_cluster(),
+             deps=["namespace_monitoring", "deployment_app", "service_app", "helm_metrics_server"]
+                  + [f"irsa_{n}" for n, _, _ in IRSA_ACCOUNTS]),
+    ]
+    # PASO 4: Políticas IAM (Puro Boto3)
+    owners = {policy: f"irsa_{name}" for name, _, policy in IRSA_ACCOUNTS}
+    for policy in POLICIES_TO_DELETE:
+        deps = [owners[policy]] if policy in owners else ["cluster"]
+        tasks.append(Task(f"policy_{policy}", lambda r, p=policy: delete_iam_policy(p, account_id), deps=deps))
+    # PASO 5: Lo que la lista fija no conoce (ALBs, target groups, DNS... huérfanos)
+    if report:
+        tasks.extend(build_orphan_tasks(report))
+    return tasks
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Limpieza total del clúster EKS y del stack de monitoreo.")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignora la caché de metadatos de AWS y consulta todo de nuevo")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Número máximo de borrados ejecutándose en paralelo (default: 4)")
+    parser.add_argument("--yes", action="store_true",
+                        help="No pide confirmación (ejecuciones desatendidas, p.ej. fleet.py)")
+    parser.add_argument("--orphans", metavar="ARCHIVO",
+                        help="Borra también los recursos huérfanos de este informe (inventory.py --orphans)")
+    parser.add_argument("--restart", action="store_true",
+                        help="Ignora el diario de una limpieza interrumpida y empieza desde el primer paso")
+    selectors = parser.add_mutually_exclusive_group()
+    selectors.add_argument("--from-step", metavar="PASO",
+                           help="Repite este paso y los que dependen de él; el resto sale del diario")
+    selectors.add_argument("--only", metavar="PASO[,PASO]", type=lambda v: v.split(","),
+                           help="Ejecuta solo estos pasos (sus dependencias deben constar en el diario)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Al terminar, muestra los pasos y comandos más lentos")
+    parser.add_argument("--trace", metavar="ARCHIVO",
+                        help="Exporta la traza (un span por paso, comando y llamada a AWS) a este archivo")
+    parser.add_argument("--trace-format", choices=TRACE_FORMATS, default="jsonl",
+                        help="Formato de --trace: jsonl (default), otlp (OpenTelemetry) o prometheus")
+    return parser.parse_args(argv)
+
+def cleanup(args):
+    cache.enabled = not args.no_cache
     print(f"{Colors.BLUE}================================================={Colors.END}")
     print(f"{Colors.BLUE}   CLEANUP SCRIPT (AWS SDK + MONITORING)         {Colors.END}")
     print(f"{Colors.BLUE}================================================={Colors.END}")
     
     # Validar identidad con Boto3
     try:
-        identity = sts_client.get_caller_identity()
-        account_id = identity['Account']
+        account_id = cache.get_or_fetch("account_id", lambda: sts_client.get_caller_identity()['Account'], ACCOUNT_TTL)
         print(f"🔑 AWS Account ID: {Colors.GREEN}{account_id}{Colors.END}")
         print(f"🌎 Región:        {Colors.GREEN}{REGION}{Colors.END}")
     except Exception as e:
         print(f"{Colors.RED}Error conectando con AWS. Revisa tus credenciales.{Colors.END}")
         sys.exit(1)
 
-    confirm = input(f"\n¿Borrar clúster {Colors.YELLOW}{CLUSTER_NAME}{Colors.END} y TODOS sus recursos (App + Monitoreo)? (si/no): ")
-    if confirm.lower() != "si":
-        sys.exit(0)
+    report = None
+    if args.orphans:
+        # Solo con --orphans: el resto de limpiezas no carga el inventario
+        from inventory import OrphanReportError, load_orphan_report
+        try:
+            report = load_orphan_report(args.orphans, CLUSTER_NAME, account_id)
+        except OrphanReportError as e:
+            print(f"{Colors.RED}❌ {e}{Colors.END}")
+            sys.exit(1)
+        print(f"🧟 Huérfanos a borrar: {Colors.YELLOW}{len(report['orphans'])}{Colors.END} (de {args.orphans})")
 
-    # ---------------------------------------------------------
-    # PASO 1: Recursos Kubernetes (Ingress/ALB) - CRÍTICO
-    # ---------------------------------------------------------
-    print(f"\n{Colors.BLUE}[1/4] Eliminando Ingress para liberar Balanceadores (ALBs)...{Colors.END}")
-    
-    # 1. App Principal
-    print("   - Limpiando App Amazon...")
-    run_command("kubectl delete ingress amazon-ingress-alb --ignore-not-found=true")
-    run_command("kubectl delete service amazon-service-alb --ignore-not-found=true")
-    run_command("kubectl delete deployment amazon-deployment --ignore-not-found=true")
-    
-    # 2. Monitoreo (Grafana) - NUEVO
-    print("   - Limpiando Stack de Monitoreo...")
-    # Esto borra el ALB de Grafana
-    run_command("kubectl delete ingress grafana-ingress -n monitoring --ignore-not-found=true")
-    # Esto borra el servicio LoadBalancer si existiera alguno extra
-    run_command("kubectl delete service prometheus-grafana -n monitoring --ignore-not-found=true")
-
-    print(f"{Colors.YELLOW}⏳ Esperando 30s para que AWS elimine los balanceadores físicos...{Colors.END}")
-    # Damos un poco más de tiempo porque ahora son 2 balanceadores
-    time.sleep(30)
-
-    # ---------------------------------------------------------
-    # PASO 2: Helm y Namespaces
-    # ---------------------------------------------------------
-    print(f"\n{Colors.BLUE}[2/4] Desinstalando Helm Charts y Namespaces...{Colors.END}")
-    
-    # Controladores Base
-    run_command("helm uninstall external-dns -n default")
-    run_command("helm uninstall aws-load-balancer-controller -n kube-system")
-    
-    # Stack Prometeus - NUEVO
-    run_command("helm uninstall prometheus -n monitoring")
-    # Borramos el namespace completo para asegurar limpieza
-    run_command("kubectl delete namespace monitoring --ignore-not-found=true")
-
-    # Service Accounts (IRSA)
-    print("   - Borrando IAM Service Accounts...")
-    run_command(f"eksctl delete iamserviceaccount --name external-dns --cluster {CLUSTER_NAME} --namespace default")
-    run_command(f"eksctl delete iamserviceaccount --name aws-load-balancer-controller --cluster {CLUSTER_NAME} --namespace kube-system")
-
-    # ---------------------------------------------------------
-    # PASO 3: Clúster EKS
-    # ---------------------------------------------------------
-    print(f"\n{Colors.BLUE}[3/4] Destruyendo Clúster EKS (eksctl)...{Colors.END}")
-    try:
-        subprocess.run(f"eksctl delete cluster --name {CLUSTER_NAME} --region {REGION}", shell=True, check=True)
-    except subprocess.CalledProcessError:
-        print(f"{Colors.RED}Error borrando el clúster. Puede que ya no exista.{Colors.END}")
+    if not args.yes:
+        confirm = input(f"\n¿Borrar clúster {Colors.YELLOW}{CLUSTER_NAME}{Colors.END} y TODOS sus recursos (App + Monitoreo)? (si/no): ")
+        if confirm.lower() != "si":
+            sys.exit(0)
 
-    # ---------------------------------------------------------
-    # PASO 4: Políticas IAM (Puro Boto3)
-    # ---------------------------------------------------------
-    print(f"\n{Colors.BLUE}[4/4] Limpiando Políticas IAM huérfanas...{Colors.END}")
-    for policy in POLICIES_TO_DELETE:
-        delete_iam_policy(policy, account_id)
+    print(f"\n{Colors.BLUE}Eliminando App, Monitoreo, IRSA, Clúster y Políticas IAM ({args.workers} en paralelo)...{Colors.END}")
+    tasks = build_teardown_tasks(account_id, report)
+    journal.forget("setup_sdk")   # Lo que el setup dejó anotado deja de existir
+    config = {"account": account_id}
+    if report:
+        config["orphans"] = fingerprint(report["orphans"])
+    journal.begin(config, restart=args.restart, keep=bool(args.from_step or args.only))
+    try:
+        selected = select_steps(tasks, journal, args.from_step, args.only)
+    except ValueError as e:
+        print(f"{Colors.RED}❌ {e}{Colors.END}")
+        sys.exit(1)
+    run_dag(tasks, max_workers=args.workers, title="Resumen de tiempos (limpieza)", journal=journal,
+            selected=selected)
+    journal.finish()
 
+    state.forget()
+    cache.report()
+    if os.environ.get("SRE_BACKEND_STATS"):
+        backend.print_stats()
     print(f"\n{Colors.GREEN}✨ Limpieza TOTAL completada exitosamente. ✨{Colors.END}")
 
+def main(argv=None):
+    args = parse_args(argv)
+    tracer.reset("cleanup_sdk_all")
+    try:
+        with tracer.span("cleanup_sdk_all", kind="script", cluster=CLUSTER_NAME, region=REGION):
+            cleanup(args)
+    finally:
+        tracer.finish(args.trace, args.trace_format, args.profile)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""Planificador de tareas en forma de grafo (DAG) para los scripts de setup y limpieza."""
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from tracing import get_tracer
+
+class Colors:
+    BLUE = '\033[94m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    END = '\033[0m'
+
+class Task:
+    """Nodo del grafo: una función que recibe los resultados de las tareas ya completadas."""
+
+    def __init__(self, name, func, deps=()):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.start = None
+        self.end = None
+        self.status = "pendiente"
+
+    @property
+    def duration(self):
+        if self.start is None or self.end is None:
+            return 0.0
+        return self.end - self.start
+
+def _validate(tasks):
+    """Verifica nombres únicos, dependencias conocidas y ausencia de ciclos."""
+    names = [t.name for t in tasks]
+    if len(names) != len(set(names)):
+        raise ValueError(f"Nombres de tarea duplicados: {names}")
+    known = set(names)
+    for t in tasks:
+        missing = [d for d in t.deps if d not in known]
+        if missing:
+            raise ValueError(f"La tarea '{t.name}' depende de tareas inexistentes: {missing}")
+
+    # Algoritmo de Kahn: si no podemos ordenar todas las tareas, hay un ciclo
+    indegree = {t.name: len(t.deps) for t in tasks}
+    children = {t.name: [] for t in tasks}
+    for t in tasks:
+        for d in t.deps:
+            children[d].append(t.name)
+    queue = [n for n, deg in indegree.items() if deg == 0]
+    ordered = 0
+    while queue:
+        node = queue.pop()
+        ordered += 1
+        for child in children[node]:
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                queue.append(child)
+    if ordered != len(tasks):
+        raise ValueError("El grafo de tareas contiene un ciclo.")
+
+def _execute(task, results):
+    task.start = time.monotonic()
+    task.status = "ejecutando"
+    try:
+        with get_tracer().span(task.name, kind="task", deps=",".join(task.deps)):
+            return task.func(results)
+    finally:
+        task.end = time.monotonic()
+
+def critical_path(tasks):
+    """Cadena de tareas que determina el tiempo total (la que terminó más tarde, hacia atrás)."""
+    by_name = {t.name: t for t in tasks}
+    finished = [t for t in tasks if t.end is not None]
+    if not finished:
+        return []
+    node = max(finished, key=lambda t: t.end)
+    path = [node]
+    while node.deps:
+        deps = [by_name[d] for d in node.deps if by_name[d].end is not None]
+        if not deps:
+            break
+        node = max(deps, key=lambda t: t.end)
+        path.append(node)
+    return list(reversed(path))
+
+def print_report(tasks, origin, title="Resumen de tiempos"):
+    """Imprime el tiempo de reloj por tarea y la ruta crítica."""
+    total = time.monotonic() - origin
+    print(f"\n{Colors.BLUE}⏱️  {title}{Colors.END}")
+    width = max([24] + [len(t.name) + 2 for t in tasks])
+    print(f"   {'TAREA':<{width}}{'INICIO':>9}{'DURACIÓN':>11}  ESTADO")
+    for t in sorted(tasks, key=lambda t: (t.start is None, t.start or 0)):
+        offset = f"{t.start - origin:8.1f}s" if t.start is not None else f"{'-':>9}"
+        print(f"   {t.name:<{width}}{offset}{t.duration:10.1f}s  {t.status}")
+
+    path = critical_path(tasks)
+    serial = sum(t.duration for t in tasks)
+    print(f"   Tiempo total (reloj): {Colors.GREEN}{total:.1f}s{Colors.END} | Suma secuencial: {serial:.1f}s")
+    if path:
+        chain = " → ".join(t.name for t in path)
+        print(f"   Ruta crítica ({sum(t.duration for t in path):.1f}s): {Colors.YELLOW}{chain}{Colors.END}")
+
+def prerequisites(tasks, names):
+    """Todas las dependencias, directas o indirectas, de los pasos dados (sin incluirlos)."""
+    deps = {t.name: t.deps for t in tasks}
+    found = set()
+    stack = [d for n in names for d in deps.get(n, [])]
+    while stack:
+        name = stack.pop()
+        if name not in found:
+            found.add(name)
+            stack.extend(deps.get(name, []))
+    return found
+
+def run_dag(tasks, max_workers=4, title="Resumen de tiempos", journal=None, selected=None):
+    """
+    Ejecuta las tareas en un pool de hilos respetando sus dependencias.
+    Las tareas independientes corren al mismo tiempo. Si una falla, no se lanzan
+    nuevas tareas, se espera a las que ya están corriendo y se relanza el error.
+    Con un diario (step_journal.StepJournal), cada tarea terminada se registra en él
+    y las que no están en 'selected' no se ejecutan: las que necesita alguna
+    seleccionada (o que constan en él) toman su resultado del diario y el resto
+    se queda sin ejecutar.
+    """
+    _validate(tasks)
+    origin = time.monotonic()
+    pending = {t.name: t for t in tasks}
+    running = {}
+    results = {}
+    failure = None
+
+    if journal is not None and selected is not None:
+        needed = prerequisites(tasks, selected)
+        reused = [t for t in tasks if t.name not in selected and (t.name in needed or journal.completed(t.name))]
+        for t in tasks:
+            if t.name not in selected:
+                del pending[t.name]
+                t.status = "no seleccionada"
+        for t in reused:
+            results[t.name] = journal.output(t.name)
+            t.status = "del diario"
+        if reused:
+            print(f"   ⏭️  Completadas en una ejecución anterior: {', '.join(t.name for t in reused)}")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while running or (pending and failure is None):
+            if failure is None:
+                ready = [t for t in pending.values() if all(d in results for d in t.deps)]
+                for t in ready:
+                    del pending[t.name]
+                    # Copiamos el contexto para que el span de la tarea cuelgue del span del script
+                    context = contextvars.copy_context()
+                    running[pool.submit(context.run, _execute, t, dict(results))] = t
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = running.pop(future)
+                try:
+                    results[task.name] = future.result()
+                    task.status = "ok"
+                    if journal is not None:
+                        journal.record(task.name, results[task.name])
+                except BaseException as e:  # sys.exit() de run_command llega como SystemExit
+                    task.status = "falló"
+                    if failure is None:
+                        failure = e
+
+    for t in pending.values():
+        t.status = "omitida"
+    print_report(tasks, origin, title)
+    if failure is not None:
+        raise failure
+    return results
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Deploy incremental para CI (lo llama WorkflowForGithubActions/deploy.yaml).
+
+Calcula un hash por objeto de amazon-generated.yaml y lo compara con la anotación
+que dejó el último deploy en el objeto vivo: solo se aplican (server-side apply) los
+objetos que cambiaron, y solo se espera el rollout si cambió el template de los pods.
+Un push que no toca el manifiesto termina tras leer los objetos vivos.
+
+Con --tools descarga kubectl y kube-linter una sola vez por versión (el workflow
+cachea el directorio entre ejecuciones).
+"""
+import argparse
+import copy
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from backends import get_backend, resolve_kind
+from manifests import dump_all, load_all
+from readiness import wait_until, deployment_ready, ReadinessError
+from state_fingerprint import fingerprint
+
+# ==========================================
+# ⚙️ CONFIGURACIÓN
+# ==========================================
+MANIFEST = "amazon-generated.yaml"
+HASH_ANNOTATION = "sre-demo/content-hash"        # Hash del objeto tal y como está en el manifiesto
+TEMPLATE_ANNOTATION = "sre-demo/template-hash"   # Hash de spec.template: si no cambia, no hay rollout
+ROLLOUT_TIMEOUT = 600
+READ_WORKERS = 8
+TOOLS_DIR = os.environ.get("SRE_TOOLS_DIR", os.path.expanduser("~/.cache/sre-demo/tools"))
+# Herramienta -> (versión, URL de descarga). Cambiar la versión invalida la caché del workflow
+TOOLS = {
+    "kubectl": ("v1.34.1", "https://dl.k8s.io/release/{version}/bin/linux/amd64/kubectl"),
+    "kube-linter": ("v0.6.8", "https://github.com/stackrox/kube-linter/releases/download/{version}/kube-linter-linux"),
+}
+
+class Colors:
+    BLUE = '\033[94m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    END = '\033[0m'
+
+backend = get_backend()
+
+# ---------------------------------------------------------
+# Diff por objeto
+# ---------------------------------------------------------
+def object_ref(obj):
+    """(tipo, nombre, namespace) con el que se lee el objeto vivo."""
+    kind = resolve_kind(obj["kind"])
+    return kind, obj["metadata"]["name"], obj["metadata"].get("namespace", "default")
+
+def annotate(obj):
+    """Copia del objeto con sus hashes en anotaciones. Los hashes no incluyen las propias anotaciones."""
+    annotated = copy.deepcopy(obj)
+    annotations = annotated["metadata"].setdefault("annotations", {})
+    annotations[HASH_ANNOTATION] = fingerprint(obj)[:16]
+    if obj["kind"] == "Deployment":
+        annotations[TEMPLATE_ANNOTATION] = fingerprint(obj["spec"]["template"])[:16]
+    return annotated
+
+def live_annotations(objects, workers=READ_WORKERS):
+    """Anotaciones de cada objeto vivo (None si no existe), leídas en paralelo."""
+    def read(obj):
+        live = backend.kube_get(*object_ref(obj))
+        return None if live is None else live["metadata"].get("annotations", {})
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(objects)))) as pool:
+        return list(pool.map(read, objects))
+
+def compute_changes(objects, force=False):
+    """Lista de (objeto anotado, acción, requiere rollout) para cada objeto del manifiesto."""
+    changes = []
+    for obj, live in zip(objects, live_annotations(objects)):
+        annotated = annotate(obj)
+        wanted = annotated["metadata"]["annotations"]
+        if live is None:
+            action = "crear"
+        elif force or live.get(HASH_ANNOTATION) != wanted[HASH_ANNOTATION]:
+            action = "actualizar"
+        else:
+            action = "ok"
+        rollout = obj["kind"] == "Deployment" and action != "ok" and \
+            live_template_changed(live, wanted)
+        changes.append((annotated, action, rollout))
+    return changes
+
+def live_template_changed(live, wanted):
+    # Sin anotación previa no sabemos qué template corre: esperamos al rollout por si acaso
+    return live is None or live.get(TEMPLATE_ANNOTATION) != wanted[TEMPLATE_ANNOTATION]
+
+def print_changes(changes):
+    symbols = {
+        "ok": f"{Colors.GREEN}✔ sin cambios{Colors.END}",
+        "crear": f"{Colors.YELLOW}+ crear{Colors.END}",
+        "actualizar": f"{Colors.YELLOW}~ actualizar{Colors.END}",
+    }
+    print(f"\n{Colors.BLUE}📋 Diff contra el clúster{Colors.END}")
+    for obj, action, rollout in changes:
+        kind, name, _ = object_ref(obj)
+        note = " (nuevo template: rollout)" if rollout else ""
+        print(f"   {kind + '/' + name:<36} {symbols[action]}{note}")
+
+def write_outputs(changes):
+    """En GitHub Actions, deja 'changed' y 'rollout' como outputs del paso."""
+    path = os.environ.get("GITHUB_OUTPUT")
+    if not path:
+        return
+    with open(path, "a") as f:
+        f.write(f"changed={str(any(a != 'ok' for _, a, _ in changes)).lower()}\n")
+        f.write(f"rollout={str(any(r for _, _, r in changes)).lower()}\n")
+
+# ---------------------------------------------------------
+# Aplicación
+# ---------------------------------------------------------
+def apply_changes(changes):
+    """Un solo apply server-side con los objetos cambiados, en el orden del manifiesto."""
+    pending = [obj for obj, action, _ in changes if action != "ok"]
+    fd, path = tempfile.mkstemp(prefix="deploy-ci-", suffix=".yaml")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(dump_all(pending))
+        print(f"   > kubectl apply --server-side ({len(pending)} objeto(s))")
+        return backend.kube_apply(path, server_side=True)
+    finally:
+        os.remove(path)
+
+def wait_rollouts(changes, timeout=ROLLOUT_TIMEOUT):
+    for obj, _, rollout in changes:
+        if rollout:
+            _, name, namespace = object_ref(obj)
+            wait_until(deployment_ready(name, namespace), f"Rollout de {name}", timeout=timeout)
+
+# ---------------------------------------------------------
+# Binarios de herramientas cacheados por versión
+# ---------------------------------------------------------
+def tools_key():
+    return "_".join(f"{name}-{version}" for name, (version, _) in sorted(TOOLS.items()))
+
+def ensure_tools(tools_dir=TOOLS_DIR):
+    """Descarga cada herramienta si su versión no está ya en tools_dir. Devuelve el directorio bin."""
+    bin_dir = os.path.join(tools_dir, "bin")
+    os.makedirs(bin_dir, exist_ok=True)
+    for name, (version, url) in TOOLS.items():
+        target = os.path.join(tools_dir, f"{name}-{version}", name)
+        if os.path.exists(target):
+            print(f"   ⚡ {name} {version}: en caché")
+        else:
+            print(f"   ⬇️ {name} {version}")
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            data = backend.fetch(url.format(version=version), timeout=120)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target))
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.chmod(tmp, 0o755)
+            os.replace(tmp, target)
+        link = os.path.join(bin_dir, name)
+        if os.path.lexists(link):
+            os.remove(link)
+        os.symlink(target, link)
+    if os.environ.get("GITHUB_PATH"):
+        with open(os.environ["GITHUB_PATH"], "a") as f:
+            f.write(bin_dir + "\n")
+    return bin_dir
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Deploy incremental: aplica solo los objetos que cambiaron.")
+    parser.add_argument("--manifest", default=MANIFEST, help=f"Manifiesto a desplegar (default: {MANIFEST})")
+    parser.add_argument("--plan", action="store_true", help="Muestra el diff sin aplicar nada")
+    parser.add_argument("--force", action="store_true",
+                        help="Aplica todos los objetos aunque su hash no haya cambiado (p.ej. tras editar a mano)")
+    parser.add_argument("--timeout", type=int, default=ROLLOUT_TIMEOUT,
+                        help=f"Segundos máximos de espera del rollout (default: {ROLLOUT_TIMEOUT})")
+    parser.add_argument("--tools", action="store_true",
+                        help=f"Descarga kubectl y kube-linter en {TOOLS_DIR} (una vez por versión) y sale")
+    parser.add_argument("--tools-key", action="store_true",
+                        help="Imprime la clave de caché de las herramientas (versiones) y sale")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.tools_key:
+        print(tools_key())
+        return
+    if args.tools:
+        print(f"🧰 Herramientas en {ensure_tools()}")
+        return
+
+    with open(args.manifest) as f:
+        objects = load_all(f.read())
+    changes = compute_changes(objects, force=args.force)
+    print_changes(changes)
+    write_outputs(changes)
+    if args.plan:
+        return
+    if all(action == "ok" for _, action, _ in changes):
+        print(f"\n{Colors.GREEN}✅ El clúster ya coincide con {args.manifest}. Nada que aplicar.{Colors.END}")
+        return
+    if not apply_changes(changes):
+        print(f"{Colors.RED}   ❌ No se pudo aplicar el manifiesto.{Colors.END}")
+        sys.exit(1)
+    try:
+        wait_rollouts(changes, args.timeout)
+    except ReadinessError as e:
+        print(f"{Colors.RED}   ❌ {e}{Colors.END}")
+        sys.exit(1)
+    if not any(rollout for _, _, rollout in changes):
+        print("   ⚡ El template de los pods no cambió: sin rollout que esperar.")
+    print(f"\n{Colors.GREEN}✅ Deploy completado.{Colors.END}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1025 @@
+#!/usr/bin/env python3
+"""
+Backend en memoria: simula AWS (STS, EKS, IAM, ELBv2), Kubernetes, helm y eksctl
+para ejecutar setup, monitoreo y limpieza sin cuenta de AWS ni clúster real.
+Permite inyectar latencia y una tasa de fallos por operación.
+"""
+import datetime
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import shlex
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+from aws_cache import file_lock
+from backends import CliBackend, ClientError, OpStats, KINDS, resolve_kind, command_name
+from manifests import ManifestError, load_all
+from throttling import rate_limiter, retry_call
+
+# ==========================================
+# ⚙️ CONFIGURACIÓN
+# ==========================================
+FAKE_ACCOUNT_ID = "123456789012"
+# Latencia simulada (segundos) por familia de operación; se puede escalar con SRE_FAKE_LATENCY_SCALE
+DEFAULT_LATENCY = {
+    "aws": 0.02,
+    "kube": 0.005,
+    "helm": 0.05,
+    "eksctl": 0.1,
+    "curl": 0.02,
+    "other": 0.0,
+}
+LATENCY_SCALE = float(os.environ.get("SRE_FAKE_LATENCY_SCALE", "1.0"))
+# Segundos que tarda en desaparecer un ALB después de borrar su Ingress
+LB_DELETE_DELAY = float(os.environ.get("SRE_FAKE_LB_DELETE_DELAY", "0.2"))
+
+# Documento devuelto en lugar del iam_policy.json oficial del AWS Load Balancer Controller
+FAKE_ALB_POLICY = {"Version": "2012-10-17", "Statement": [
+    {"Effect": "Allow", "Action": ["elasticloadbalancing:*", "ec2:Describe*"], "Resource": "*"}]}
+
+# Errores modelados de boto3: nombre de la excepción -> código de error
+AWS_ERRORS = {
+    "ResourceNotFoundException": "ResourceNotFoundException",
+    "EntityAlreadyExistsException": "EntityAlreadyExists",
+    "NoSuchEntityException": "NoSuchEntity",
+    "DeleteConflictException": "DeleteConflict",
+    "LimitExceededException": "LimitExceeded",
+    "InvalidChangeBatch": "InvalidChangeBatch",
+}
+
+class _Exceptions:
+    """Imita client.exceptions de boto3: una subclase de ClientError por error modelado."""
+
+    def __init__(self):
+        for name in AWS_ERRORS:
+            setattr(self, name, type(name, (ClientError,), {}))
+
+    def raise_error(self, name, operation, message=""):
+        raise getattr(self, name)({"Error": {"Code": AWS_ERRORS[name], "Message": message}}, operation)
+
+class _Paginator:
+    def __init__(self, method, result_key):
+        self._method = method
+        self._result_key = result_key
+
+    def paginate(self, **kwargs):
+        # Una sola página: suficiente para el volumen de recursos de la demo
+        yield self._method(**kwargs)
+
+class FakeCloud:
+    """Estado compartido de la nube y el clúster simulados."""
+
+    def __init__(self, account_id=FAKE_ACCOUNT_ID):
+        self.lock = threading.RLock()
+        self.account_id = account_id
+        self.clusters = {}        # nombre -> descripción EKS
+        self.policies = {}        # arn -> {"name", "versions", "attached_roles"}
+        self.roles = {}           # nombre -> set(arns de políticas)
+        self.load_balancers = {}  # arn -> {"name", "tags", "deleted_at"}
+        self.target_groups = {}   # arn -> {"name", "tags", "load_balancers", "deleted_at"}
+        self.security_groups = {} # id -> {"name", "tags", "vpc", "deleted_at"}
+        self.zones = {}           # id -> {"name", "records"} (Route53)
+        self.objects = {}         # (kind, namespace, nombre) -> objeto de Kubernetes
+        self.releases = {}        # (namespace, release) -> info de helm
+        self.repos = {}           # nombre -> url
+
+    def to_dict(self):
+        """Estado serializable a JSON (las claves tupla pasan a listas)."""
+        return {
+            "account_id": self.account_id,
+            "clusters": self.clusters,
+            "policies": self.policies,
+            "roles": {role: sorted(arns) for role, arns in self.roles.items()},
+            "load_balancers": self.load_balancers,
+            "target_groups": self.target_groups,
+            "security_groups": self.security_groups,
+            "zones": self.zones,
+            "objects": [[list(key), obj] for key, obj in self.objects.items()],
+            "releases": [[list(key), info] for key, info in self.releases.items()],
+            "repos": self.repos,
+        }
+
+    def load_dict(self, data):
+        self.account_id = data.get("account_id", self.account_id)
+        self.clusters = data.get("clusters", {})
+        self.policies = data.get("policies", {})
+        for policy in self.policies.values():
+            for version in policy["versions"]:
+                if isinstance(version.get("CreateDate"), str):
+                    version["CreateDate"] = datetime.datetime.fromisoformat(version["CreateDate"])
+        self.roles = {role: set(arns) for role, arns in data.get("roles", {}).items()}
+        self.load_balancers = data.get("load_balancers", {})
+        self.target_groups = data.get("target_groups", {})
+        self.security_groups = data.get("security_groups", {})
+        self.zones = data.get("zones", {})
+        self.objects = {tuple(key): obj for key, obj in data.get("objects", [])}
+        self.releases = {tuple(key): info for key, info in data.get("releases", [])}
+        self.repos = data.get("repos", {})
+
+class _FileTransaction:
+    """
+    Lock reentrante de FileCloud: al entrar (primer nivel) toma el flock y carga el
+    estado del archivo; al salir lo guarda. Así cada herramienta fake y el proceso
+    del script ven y modifican la misma nube.
+    """
+
+    def __init__(self, cloud):
+        self._cloud = cloud
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._flock = None
+
+    def __enter__(self):
+        self._lock.acquire()
+        self._depth += 1
+        if self._depth == 1:
+            self._flock = file_lock(self._cloud.path)
+            self._flock.__enter__()
+            self._cloud.load()
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if self._depth == 1:
+                try:
+                    self._cloud.save()
+                finally:
+                    self._flock.__exit__(None, None, None)
+        finally:
+            self._depth -= 1
+            self._lock.release()
+
+class FileCloud(FakeCloud):
+    """FakeCloud persistida en un archivo JSON compartido entre procesos."""
+
+    def __init__(self, path, account_id=FAKE_ACCOUNT_ID):
+        super().__init__(account_id)
+        self.path = path
+        self.lock = _FileTransaction(self)
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                self.load_dict(json.load(f))
+        except (OSError, ValueError):
+            self.load_dict({})
+
+    def save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".fake-cloud-")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.to_dict(), f, default=str)
+        os.replace(tmp, self.path)
+
+class FakeAwsClient:
+    """Cliente boto3 simulado. Cada operación se despacha al método _<servicio>_<operación>."""
+
+    def __init__(self, backend, service, region):
+        self._backend = backend
+        self._cloud = backend.cloud
+        self.service = service
+        self.region = region
+        self.exceptions = backend.exceptions
+
+    def __getattr__(self, operation):
+        handler = getattr(self, f"_{self.service}_{operation}", None)
+        if handler is None:
+            raise AttributeError(f"FakeAwsClient({self.service}) no implementa {operation}")
+
+        def call(**kwargs):
+            def invoke():
+                # Igual que un cliente real: token bucket por servicio y reintentos ante throttling
+                rate_limiter(self.service).acquire()
+                self._backend.simulate("aws", f"{self.service}.{operation}")
+                with self._cloud.lock:
+                    return handler(**kwargs)
+            op = f"aws {self.service}.{operation}"
+            return self._backend.stats.timed(op, retry_call, op, invoke)
+        return call
+
+    def get_paginator(self, operation):
+        keys = {"describe_load_balancers": "LoadBalancers", "list_policy_versions": "Versions",
+                "list_entities_for_policy": "PolicyRoles", "describe_target_groups": "TargetGroups",
+                "describe_security_groups": "SecurityGroups", "list_hosted_zones": "HostedZones",
+                "list_resource_record_sets": "ResourceRecordSets", "list_policies": "Policies",
+                "list_roles": "Roles", "list_clusters": "clusters"}
+        return _Paginator(getattr(self, operation), keys.get(operation))
+
+    # --- STS ---
+    def _sts_get_caller_identity(self):
+        return {"Account": self._cloud.account_id, "Arn": f"arn:aws:iam::{self._cloud.account_id}:user/fake"}
+
+    # --- EKS ---
+    def _eks_describe_cluster(self, name):
+        cluster = self._cloud.clusters.get(name)
+        if cluster is None:
+            self.exceptions.raise_error("ResourceNotFoundException", "DescribeCluster", f"No cluster found for name: {name}.")
+        return {"cluster": cluster}
+
+    def _eks_list_clusters(self, **kwargs):
+        return {"clusters": sorted(self._cloud.clusters)}
+
+    # --- IAM ---
+    def _policy(self, arn, operation):
+        policy = self._cloud.policies.get(arn)
+        if policy is None:
+            self.exceptions.raise_error("NoSuchEntityException", operation, f"Policy {arn} was not found.")
+        return policy
+
+    def _iam_create_policy(self, PolicyName, PolicyDocument, **kwargs):
+        arn = f"arn:aws:iam::{self._cloud.account_id}:policy/{PolicyName}"
+        if arn in self._cloud.policies:
+            self.exceptions.raise_error("EntityAlreadyExistsException", "CreatePolicy",
+                                        f"A policy called {PolicyName} already exists.")
+        version = {"VersionId": "v1", "IsDefaultVersion": True, "Document": PolicyDocument,
+                   "CreateDate": datetime.datetime.now(datetime.timezone.utc)}
+        self._cloud.policies[arn] = {"name": PolicyName, "versions": [version], "next": 2}
+        return {"Policy": {"PolicyName": PolicyName, "Arn": arn, "DefaultVersionId": "v1"}}
+
+    def _iam_get_policy(self, PolicyArn):
+        policy = self._policy(PolicyArn, "GetPolicy")
+        default = next(v for v in policy["versions"] if v["IsDefaultVersion"])
+        return {"Policy": {"PolicyName": policy["name"], "Arn": PolicyArn, "DefaultVersionId": default["VersionId"],
+                           "AttachmentCount": len(self._attached_roles(PolicyArn))}}
+
+    def _iam_get_policy_version(self, PolicyArn, VersionId):
+        policy = self._policy(PolicyArn, "GetPolicyVersion")
+        for v in policy["versions"]:
+            if v["VersionId"] == VersionId:
+                return {"PolicyVersion": dict(v)}
+        self.exceptions.raise_error("NoSuchEntityException", "GetPolicyVersion", VersionId)
+
+    def _iam_list_policy_versions(self, PolicyArn):
+        policy = self._policy(PolicyArn, "ListPolicyVersions")
+        return {"Versions": [{k: v for k, v in ver.items() if k != "Document"} for ver in policy["versions"]]}
+
+    def _iam_create_policy_version(self, PolicyArn, PolicyDocument, SetAsDefault=False):
+        policy = self._policy(PolicyArn, "CreatePolicyVersion")
+        if len(policy["versions"]) >= 5:
+            self.exceptions.raise_error("LimitExceededException", "CreatePolicyVersion", "5 versions max")
+        version_id = f"v{policy['next']}"
+        policy["next"] += 1
+        if SetAsDefault:
+            for v in policy["versions"]:
+                v["IsDefaultVersion"] = False
+        policy["versions"].append({"VersionId": version_id, "IsDefaultVersion": SetAsDefault,
+                                   "Document": PolicyDocument,
+                                   "CreateDate": datetime.datetime.now(datetime.timezone.utc)})
+        return {"PolicyVersion": {"VersionId": version_id, "IsDefaultVersion": SetAsDefault}}
+
+    def _iam_delete_policy_version(self, PolicyArn, VersionId):
+        policy = self._policy(PolicyArn, "DeletePolicyVersion")
+        policy["versions"] = [v for v in policy["versions"] if v["VersionId"] != VersionId]
+        return {}
+
+    def _attached_roles(self, arn):
+        return sorted(role for role, arns in self._cloud.roles.items() if arn in arns)
+
+    def _iam_list_entities_for_policy(self, PolicyArn, **kwargs):
+        self._policy(PolicyArn, "ListEntitiesForPolicy")
+        return {"PolicyRoles": [{"RoleName": r} for r in self._attached_roles(PolicyArn)],
+                "PolicyUsers": [], "PolicyGroups": []}
+
+    def _iam_detach_role_policy(self, RoleName, PolicyArn):
+        self._cloud.roles.get(RoleName, set()).discard(PolicyArn)
+        return {}
+
+    def _iam_delete_policy(self, PolicyArn):
+        self._policy(PolicyArn, "DeletePolicy")
+        if self._attached_roles(PolicyArn):
+            self.exceptions.raise_error("DeleteConflictException", "DeletePolicy",
+                                        "Cannot delete a policy attached to entities.")
+        del self._cloud.policies[PolicyArn]
+        return {}
+
+    def _iam_list_policies(self, Scope="All", **kwargs):
+        return {"Policies": [{"PolicyName": p["name"], "Arn": arn,
+                              "DefaultVersionId": next(v["VersionId"] for v in p["versions"] if v["IsDefaultVersion"]),
+                              "AttachmentCount": len(self._attached_roles(arn))}
+                             for arn, p in sorted(self._cloud.policies.items())]}
+
+    def _iam_list_roles(self, **kwargs):
+        return {"Roles": [{"RoleName": role, "Arn": f"arn:aws:iam::{self._cloud.account_id}:role/{role}", "Path": "/"}
+                          for role in sorted(self._cloud.roles)]}
+
+    def _role(self, name, operation):
+        if name not in self._cloud.roles:
+            self.exceptions.raise_error("NoSuchEntityException", operation, f"The role with name {name} cannot be found.")
+        return self._cloud.roles[name]
+
+    def _iam_list_attached_role_policies(self, RoleName, **kwargs):
+        return {"AttachedPolicies": [{"PolicyArn": arn, "PolicyName": arn.rsplit("/", 1)[-1]}
+                                     for arn in sorted(self._role(RoleName, "ListAttachedRolePolicies"))]}
+
+    def _iam_list_role_policies(self, RoleName, **kwargs):
+        self._role(RoleName, "ListRolePolicies")
+        return {"PolicyNames": []}
+
+    def _iam_delete_role(self, RoleName):
+        if self._role(RoleName, "DeleteRole"):
+            self.exceptions.raise_error("DeleteConflictException", "DeleteRole",
+                                        "Cannot delete entity, must detach all policies first.")
+        del self._cloud.roles[RoleName]
+        return {}
+
+    # --- ELBv2 ---
+    @staticmethod
+    def _live(resources):
+        now = time.time()
+        return {key: r for key, r in resources.items() if r["deleted_at"] is None or r["deleted_at"] > now}
+
+    def _live_load_balancers(self):
+        return self._live(self._cloud.load_balancers)
+
+    def _elbv2_describe_load_balancers(self, **kwargs):
+        return {"LoadBalancers": [{"LoadBalancerArn": arn, "LoadBalancerName": lb["name"],
+                                   "DNSName": f"{lb['name']}.{self.region}.elb.amazonaws.com",
+                                   "Scheme": "internet-facing", "Type": "application",
+                                   "VpcId": "vpc-0fake0000000000001", "State": {"Code": "active"}}
+                                  for arn, lb in self._live_load_balancers().items()]}
+
+    def _elbv2_describe_target_groups(self, **kwargs):
+        live_lbs = self._live_load_balancers()
+        return {"TargetGroups": [{"TargetGroupArn": arn, "TargetGroupName": tg["name"], "Protocol": "HTTP",
+                                  "Port": 80, "TargetType": "instance", "VpcId": "vpc-0fake0000000000001",
+                                  "LoadBalancerArns": [lb for lb in tg["load_balancers"] if lb in live_lbs]}
+                                 for arn, tg in self._live(self._cloud.target_groups).items()]}
+
+    def _elbv2_describe_tags(self, ResourceArns):
+        live = dict(self._live_load_balancers(), **self._live(self._cloud.target_groups))
+        return {"TagDescriptions": [{"ResourceArn": arn,
+                                     "Tags": [{"Key": k, "Value": v} for k, v in live[arn]["tags"].items()]}
+                                    for arn in ResourceArns if arn in live]}
+
+    def _elbv2_delete_load_balancer(self, LoadBalancerArn):
+        # Idempotente como en AWS: borrar un ALB inexistente no es un error
+        lb = self._cloud.load_balancers.get(LoadBalancerArn)
+        if lb is not None and lb["deleted_at"] is None:
+            lb["deleted_at"] = time.time() + LB_DELETE_DELAY
+        return {}
+
+    def _elbv2_delete_target_group(self, TargetGroupArn):
+        tg = self._cloud.target_groups.get(TargetGroupArn)
+        if tg is not None and [lb for lb in tg["load_balancers"] if lb in self._live_load_balancers()]:
+            raise ClientError({"Error": {"Code": "ResourceInUse",
+                                         "Message": "Target group is currently in use by a listener"}},
+                              "DeleteTargetGroup")
+        self._cloud.target_groups.pop(TargetGroupArn, None)
+        return {}
+
+    # --- EC2 ---
+    def _ec2_describe_security_groups(self, **kwargs):
+        return {"SecurityGroups": [{"GroupId": group_id, "GroupName": sg["name"], "VpcId": sg["vpc"],
+                                    "Description": sg["name"], "IpPermissions": [],
+                                    "Tags": [{"Key": k, "Value": v} for k, v in sg["tags"].items()]}
+                                   for group_id, sg in self._live(self._cloud.security_groups).items()]}
+
+    def _ec2_delete_security_group(self, GroupId):
+        sg = self._live(self._cloud.security_groups).get(GroupId)
+        if sg is None:
+            raise ClientError({"Error": {"Code": "InvalidGroup.NotFound",
+                                         "Message": f"The security group '{GroupId}' does not exist"}},
+                              "DeleteSecurityGroup")
+        stack = sg["tags"].get("ingress.k8s.aws/stack")
+        if stack and any(lb["tags"].get("ingress.k8s.aws/stack") == stack
+                         for lb in self._live_load_balancers().values()):
+            raise ClientError({"Error": {"Code": "DependencyViolation",
+                                         "Message": f"resource {GroupId} has a dependent object"}},
+                              "DeleteSecurityGroup")
+        del self._cloud.security_groups[GroupId]
+        return {}
+
+    # --- Route53 ---
+    def _route53_list_hosted_zones(self, **kwargs):
+        return {"HostedZones": [{"Id": zone_id, "Name": zone["name"], "ResourceRecordSetCount": len(zone["records"])}
+                                for zone_id, zone in sorted(self._cloud.zones.items())]}
+
+    def _zone(self, zone_id):
+        zone = self._cloud.zones.get(zone_id) or self._cloud.zones.get(f"/hostedzone/{zone_id}")
+        if zone is None:
+            raise ClientError({"Error": {"Code": "NoSuchHostedZone", "Message": f"No hosted zone found with ID: {zone_id}"}},
+                              "ListResourceRecordSets")
+        return zone
+
+    def _route53_list_resource_record_sets(self, HostedZoneId, **kwargs):
+        return {"ResourceRecordSets": [dict(r) for r in self._zone(HostedZoneId)["records"]]}
+
+    def _route53_change_resource_record_sets(self, HostedZoneId, ChangeBatch):
+        zone = self._zone(HostedZoneId)
+        for change in ChangeBatch["Changes"]:
+            record = change["ResourceRecordSet"]
+            key = (record["Name"], record["Type"])
+            existing = [r for r in zone["records"] if (r["Name"], r["Type"]) == key]
+            if change["Action"] == "DELETE" and existing != [record]:
+                self.exceptions.raise_error("InvalidChangeBatch", "ChangeResourceRecordSets",
+                                            f"Tried to delete resource record set [name='{key[0]}', type='{key[1]}'] "
+                                            f"but it was not found")
+            zone["records"] = [r for r in zone["records"] if (r["Name"], r["Type"]) != key]
+            if change["Action"] != "DELETE":
+                zone["records"].append(record)
+        return {"ChangeInfo": {"Status": "PENDING"}}
+
+def _parse_documents(text):
+    """Objetos de un YAML multi-documento, con el mismo parser que el camino real (ManifestError si no es válido)."""
+    return [d for d in load_all(text) if d]
+
+# Flags sin valor de eksctl/helm/kubectl (el resto consume el argumento siguiente)
+BOOLEAN_FLAGS = {"install", "approve", "override-existing-serviceaccounts", "with-oidc", "wait",
+                 "atomic", "force", "asg-access", "server-side", "force-conflicts", "create-namespace"}
+
+def _options(args):
+    """Convierte ['--name', 'x', '-n', 'ns', '--approve'] en {'name': 'x', 'n': 'ns', 'approve': True}."""
+    opts, positional = {}, []
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg.startswith("-"):
+            key = arg.lstrip("-")
+            if "=" in key:
+                key, value = key.split("=", 1)
+                opts.setdefault(key, value)
+            elif key not in BOOLEAN_FLAGS and i + 1 < len(args) and \
+                    (args[i + 1] == "-" or not args[i + 1].startswith("-")):   # '-f -' = stdin
+                opts.setdefault(key, args[i + 1])
+                i += 1
+            else:
+                opts[key] = True
+        else:
+            positional.append(arg)
+        i += 1
+    return opts, positional
+
+def _fake_chart(name, version):
+    # Importación tardía: solo la necesita 'helm pull'
+    import gzip
+    import io
+    import tarfile
+    chart_yaml = f"apiVersion: v2\nname: {name}\nversion: {version}\n".encode()
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode="wb", mtime=0) as gz:
+        with tarfile.open(fileobj=gz, mode="w") as tar:
+            info = tarfile.TarInfo(f"{name}/Chart.yaml")
+            info.size = len(chart_yaml)
+            tar.addfile(info, io.BytesIO(chart_yaml))
+    return buffer.getvalue()
+
+class FakeBackend:
+    """Backend en memoria compatible con CliBackend/SdkBackend."""
+
+    name = "fake"
+
+    def __init__(self, latency=None, failure_rate=0.0, seed=None, cloud=None):
+        self.cloud = cloud or FakeCloud()
+        self.latency = dict(DEFAULT_LATENCY, **(latency or {}))
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.stats = OpStats()
+        self.exceptions = _Exceptions()
+        self.calls = []
+        self.stdin_text = None
+        self._clients = {}
+
+    def simulate(self, family, op):
+        """Aplica la latencia configurada y, con probabilidad failure_rate, un fallo transitorio."""
+        self.calls.append((family, op))
+        delay = self.latency.get(family, 0.0) * LATENCY_SCALE
+        if delay:
+            time.sleep(delay)
+        if self.failure_rate and self.random.random() < self.failure_rate:
+            if family == "aws":
+                raise ClientError({"Error": {"Code": "Throttling", "Message": "Rate exceeded"}}, op)
+            return False
+        return True
+
+    def client(self, service, region):
+        key = (service, region)
+        if key not in self._clients:
+            self._clients[key] = FakeAwsClient(self, service, region)
+        return self._clients[key]
+
+    # ---------------------------------------------------------
+    # Kubernetes en memoria
+    # ---------------------------------------------------------
+    def _store(self, doc):
+        kind = resolve_kind(doc["kind"])
+        namespace = doc["metadata"].get("namespace", "default") if KINDS[kind][2] else None
+        name = doc["metadata"]["name"]
+        obj = json.loads(json.dumps(doc))
+        obj["metadata"].setdefault("generation", 1)
+        if kind == "deployment":
+            replicas = obj["spec"].get("replicas", 1)
+            obj["metadata"]["generation"] = self.cloud.objects.get((kind, namespace, name), obj)["metadata"].get("generation", 0) + 1
+            obj["status"] = {"observedGeneration": obj["metadata"]["generation"], "replicas": replicas,
+                             "updatedReplicas": replicas, "availableReplicas": replicas, "conditions": []}
+        if kind == "ingress" and self._is_alb(obj):
+            arn = self._create_load_balancer(namespace, name)
+            self._create_dns_records(obj, namespace, name, arn)
+            obj["status"] = {"loadBalancer": {"ingress": [{"hostname": f"{arn.rsplit('/', 2)[1]}.elb.amazonaws.com"}]}}
+        self.cloud.objects[(kind, namespace, name)] = obj
+        return obj
+
+    @staticmethod
+    def _is_alb(obj):
+        annotations = obj["metadata"].get("annotations", {})
+        return annotations.get("kubernetes.io/ingress.class") == "alb" or obj.get("spec", {}).get("ingressClassName") == "alb"
+
+    def _create_load_balancer(self, namespace, name):
+        lb_name = f"k8s-{namespace}-{name}"[:32]
+        arn = f"arn:aws:elasticloadbalancing:us-east-1:{self.cloud.account_id}:loadbalancer/app/{lb_name}/fake"
+        cluster = next(iter(self.cloud.clusters), "")
+        tags = {"elbv2.k8s.aws/cluster": cluster, "ingress.k8s.aws/stack": f"{namespace}/{name}"}
+        self.cloud.load_balancers[arn] = {
+            "name": lb_name, "deleted_at": None, "tags": dict(tags, **{"ingress.k8s.aws/resource": "LoadBalancer"}),
+        }
+        # Lo que el controlador crea junto al ALB: target group y security group gestionado
+        suffix = hashlib.sha256(f"{cluster}/{namespace}/{name}".encode()).hexdigest()
+        tg_arn = f"arn:aws:elasticloadbalancing:us-east-1:{self.cloud.account_id}:targetgroup/{lb_name}/{suffix[:16]}"
+        self.cloud.target_groups[tg_arn] = {
+            "name": lb_name, "deleted_at": None, "load_balancers": [arn],
+            "tags": dict(tags, **{"ingress.k8s.aws/resource": f"{namespace}/{name}-tg"}),
+        }
+        self.cloud.security_groups[f"sg-{suffix[:17]}"] = {
+            "name": lb_name, "vpc": "vpc-0fake0000000000001", "deleted_at": None,
+            "tags": dict(tags, **{"ingress.k8s.aws/resource": "ManagedLBSecurityGroup"}),
+        }
+        return arn
+
+    def _create_dns_records(self, obj, namespace, name, arn):
+        """Lo que haría ExternalDNS: registro alias al ALB y TXT de propiedad (registro 'a-')."""
+        host = obj["metadata"].get("annotations", {}).get("external-dns.alpha.kubernetes.io/hostname")
+        if not host or "." not in host:
+            return
+        domain = host.split(".", 1)[1] + "."
+        zone_id = f"/hostedzone/Z{hashlib.sha256(domain.encode()).hexdigest()[:20].upper()}"
+        zone = self.cloud.zones.setdefault(zone_id, {"name": domain, "records": [
+            {"Name": domain, "Type": "NS", "TTL": 172800, "ResourceRecords": [{"Value": "ns-1.awsdns-fake.com."}]},
+            {"Name": domain, "Type": "SOA", "TTL": 900, "ResourceRecords": [{"Value": "ns-1.awsdns-fake.com. 1"}]}]})
+        owner = next(iter(self.cloud.clusters), "")
+        records = [
+            {"Name": f"{host}.", "Type": "A",
+             "AliasTarget": {"HostedZoneId": "Z35SXDOTRQ7X7K", "EvaluateTargetHealth": True,
+                             "DNSName": f"dualstack.{arn.rsplit('/', 2)[1]}.us-east-1.elb.amazonaws.com."}},
+            {"Name": f"a-{host}.", "Type": "TXT", "TTL": 300, "ResourceRecords": [{"Value":
+             f'"heritage=external-dns,external-dns/owner={owner},external-dns/resource=ingress/{namespace}/{name}"'}]},
+        ]
+        keys = {(r["Name"], r["Type"]) for r in records}
+        zone["records"] = [r for r in zone["records"] if (r["Name"], r["Type"]) not in keys] + records
+
+    def kube_apply(self, path, server_side=False):
+        self.stats.timed("kube apply", self.simulate, "kube", "apply")
+        with open(path) as f:
+            docs = _parse_documents(f.read())
+        with self.cloud.lock:
+            for doc in docs:
+                self._store(doc)
+                print(f"   ✔ {doc['kind'].lower()}/{doc['metadata']['name']} aplicado (fake)")
+        return True
+
+    def kube_get(self, kind, name, namespace="default"):
+        self.stats.timed("kube get", self.simulate, "kube", "get")
+        kind = resolve_kind(kind)
+        with self.cloud.lock:
+            obj = self.cloud.objects.get((kind, namespace if KINDS[kind][2] else None, name))
+            return json.loads(json.dumps(obj)) if obj else None
+
+    def kube_list(self, kind, namespace="default", label_selector=None):
+        self.stats.timed("kube list", self.simulate, "kube", "list")
+        kind = resolve_kind(kind)
+        wanted = dict(part.split("=", 1) for part in label_selector.split(",")) if label_selector else {}
+        with self.cloud.lock:
+            items = []
+            for (k, ns, _), obj in self.cloud.objects.items():
+                labels = obj["metadata"].get("labels", {})
+                if k == kind and (namespace is None or ns == namespace) and \
+                        all(labels.get(key) == value for key, value in wanted.items()):
+                    items.append(json.loads(json.dumps(obj)))
+            return items
+
+    def kube_delete(self, kind, name, namespace="default"):
+        self.stats.timed("kube delete", self.simulate, "kube", "delete")
+        kind = resolve_kind(kind)
+        with self.cloud.lock:
+            if kind == "namespace":
+                for key in [k for k in self.cloud.objects if k[1] == name]:
+                    self._delete_object(key)
+                self.cloud.objects.pop((kind, None, name), None)
+                return True
+            self._delete_object((kind, namespace if KINDS[kind][2] else None, name))
+        return True
+
+    def _delete_object(self, key):
+        obj = self.cloud.objects.pop(key, None)
+        if obj is not None and key[0] == "ingress":
+            stack = f"{key[1]}/{key[2]}"
+            for resources in (self.cloud.load_balancers, self.cloud.target_groups, self.cloud.security_groups):
+                for resource in resources.values():
+                    if resource["tags"].get("ingress.k8s.aws/stack") == stack and resource["deleted_at"] is None:
+                        resource["deleted_at"] = time.time() + LB_DELETE_DELAY
+            # ExternalDNS retira los registros de los que es dueño
+            owned = f"external-dns/resource=ingress/{stack}\""
+            for zone in self.cloud.zones.values():
+                txt = [r for r in zone["records"] if r["Type"] == "TXT"
+                       and any(owned in v["Value"] for v in r.get("ResourceRecords", []))]
+                names = {r["Name"] for r in txt} | {r["Name"][2:] for r in txt if r["Name"].startswith("a-")}
+                zone["records"] = [r for r in zone["records"] if r["Name"] not in names]
+
+    def kube_ensure_namespace(self, name):
+        self.simulate("kube", "apply")
+        with self.cloud.lock:
+            self.cloud.objects.setdefault(("namespace", None, name),
+                                          {"apiVersion": "v1", "kind": "Namespace", "metadata": {"name": name}})
+        return True
+
+    # ---------------------------------------------------------
+    # CLIs simuladas (eksctl, helm, kubectl, curl)
+    # ---------------------------------------------------------
+    def run(self, command, capture=False, quiet=False):
+        return self.stats.timed(f"exec {command_name(command)}", self._run, command)
+
+    def get_json(self, command):
+        def read():
+            proc = self.run(command, capture=True)
+            if proc.returncode != 0:
+                if "not found" in proc.stderr.lower():
+                    return None
+                raise RuntimeError(f"'{command}' falló: {proc.stderr.strip()}")
+            return json.loads(proc.stdout) if proc.stdout.strip() else None
+        return retry_call(command_name(command), read)
+
+    def _run(self, command):
+        args = shlex.split(command.replace("\\\n", " "))
+        tool = args[0] if args else ""
+        family = tool if tool in self.latency else "other"
+        if not self.simulate(family, command_name(command)):
+            return subprocess.CompletedProcess(command, 1, "", "Error: TooManyRequests (fallo transitorio simulado)")
+        handler = getattr(self, f"_cmd_{tool}", None)
+        with self.cloud.lock:
+            rc, out, err = handler(args[1:]) if handler else (0, "", "")
+        return subprocess.CompletedProcess(command, rc, out, err)
+
+    def fetch(self, url, timeout=30):
+        def download():
+            if urllib.parse.urlparse(url).hostname in ("127.0.0.1", "localhost"):
+                # Servidores locales (p.ej. el mirror de 'vendor.py --serve'): descarga real
+                from urllib.request import urlopen
+                with urlopen(url, timeout=timeout) as response:
+                    return response.read()
+            self.simulate("curl", "fetch")
+            return json.dumps(FAKE_ALB_POLICY).encode()
+        return self.stats.timed("http get", download)
+
+    def _cmd_curl(self, args):
+        opts, _ = _options(args)
+        if "o" in opts:
+            with open(opts["o"], "w") as f:
+                json.dump(FAKE_ALB_POLICY, f)
+        return 0, "", ""
+
+    def _cmd_eksctl(self, args):
+        opts, positional = _options(args)
+        action = " ".join(positional[:2])
+        name = opts.get("name", "")
+        if action == "create cluster":
+            self.cloud.clusters[name] = {
+                "name": name, "status": "ACTIVE", "version": opts.get("version", "1.34"),
+                "endpoint": f"https://{name}.eks.fake",
+                "resourcesVpcConfig": {"vpcId": "vpc-0fake0000000000001"},
+                "identity": {"oidc": {"issuer": f"https://oidc.eks.fake/id/{name.upper()}"}},
+            }
+            return 0, "", ""
+        if action == "delete cluster":
+            if self.cloud.clusters.pop(name, None) is None:
+                return 1, "", f"Error: cluster {name} not found"
+            self.cloud.objects.clear()
+            self.cloud.releases.clear()
+            return 0, "", ""
+        # Mismo patrón que eksctl (sin el sufijo aleatorio de CloudFormation)
+        role = f"eksctl-{opts.get('cluster', '')}-addon-iamserviceaccount-{opts.get('namespace', 'default')}-{name}"
+        if action == "create iamserviceaccount":
+            self.cloud.roles.setdefault(role, set()).add(opts.get("attach-policy-arn"))
+            self._store({"apiVersion": "v1", "kind": "ServiceAccount",
+                         "metadata": {"name": name, "namespace": opts.get("namespace", "default"),
+                                      "annotations": {"eks.amazonaws.com/role-arn":
+                                                      f"arn:aws:iam::{self.cloud.account_id}:role/{role}"}}})
+            return 0, "", ""
+        if action == "delete iamserviceaccount":
+            self.cloud.roles.pop(role, None)
+            self.cloud.objects.pop(("serviceaccount", opts.get("namespace", "default"), name), None)
+            return 0, "", ""
+        return 0, "", ""
+
+    def _cmd_helm(self, args):
+        opts, positional = _options(args)
+        namespace = opts.get("n") or opts.get("namespace") or "default"
+        action = positional[0] if positional else ""
+        if action == "repo":
+            sub = positional[1] if len(positional) > 1 else ""
+            if sub == "add":
+                self.cloud.repos[positional[2]] = positional[3]
+            elif sub == "list":
+                if not self.cloud.repos:
+                    return 1, "", "Error: no repositories to show"
+                return 0, json.dumps([{"name": n, "url": u} for n, u in self.cloud.repos.items()]), ""
+            return 0, "", ""
+        if action == "pull":
+            # .tgz determinista (mismo contenido, mismo digest) con solo el Chart.yaml
+            chart = positional[1].rsplit("/", 1)[-1]
+            version = opts.get("version", "0.1.0")
+            path = os.path.join(opts.get("d", "."), f"{chart}-{version}.tgz")
+            with open(path, "wb") as f:
+                f.write(_fake_chart(chart, version))
+            return 0, "", ""
+        if action == "upgrade":
+            release, chart = positional[1], positional[2]
+            previous = self.cloud.releases.get((namespace, release))
+            self.cloud.releases[(namespace, release)] = {
+                "name": release, "chart": chart, "namespace": namespace,
+                "version": (previous["version"] + 1) if previous else 1,
+                "info": {"status": "deployed", "description": "Upgrade complete" if previous else "Install complete"},
+            }
+            self._store({"apiVersion": "apps/v1", "kind": "Deployment",
+                         "metadata": {"name": release, "namespace": namespace,
+                                      "labels": {"app.kubernetes.io/instance": release}},
+                         "spec": {"replicas": 1}})
+            return 0, "", ""
+        if action == "status":
+            info = self.cloud.releases.get((namespace, positional[1]))
+            if info is None:
+                return 1, "", "Error: release: not found"
+            return 0, json.dumps(info), ""
+        if action == "uninstall":
+            if self.cloud.releases.pop((namespace, positional[1]), None) is None:
+                return 1, "", f"Error: uninstall: Release not loaded: {positional[1]}: release: not found"
+            for key in [k for k, o in self.cloud.objects.items()
+                        if k[1] == namespace and o["metadata"].get("labels", {}).get("app.kubernetes.io/instance") == positional[1]]:
+                self._delete_object(key)
+            return 0, "", ""
+        return 0, "", ""
+
+    def _cmd_kubectl(self, args):
+        opts, positional = _options(args)
+        action = positional[0] if positional else ""
+        namespace = opts.get("n") or opts.get("namespace") or "default"
+        if action == "apply" and "f" in opts:
+            if opts["f"] == "-":
+                # Solo las herramientas fake reciben stdin ('kubectl create ... | kubectl apply -f -')
+                text = self.stdin_text or ""
+            else:
+                with open(opts["f"]) as f:
+                    text = f.read()
+            try:
+                docs = _parse_documents(text)
+            except ManifestError as e:
+                return 1, "", f"error: {e}\n"
+            for doc in docs:
+                self._store(doc)
+            return 0, "", ""
+        if action == "create" and positional[1:2] == ["namespace"] and len(positional) > 2:
+            doc = {"apiVersion": "v1", "kind": "Namespace", "metadata": {"name": positional[2]}}
+            if "dry-run" in opts:
+                return 0, f"apiVersion: v1\nkind: Namespace\nmetadata:\n  name: {positional[2]}\n", ""
+            self._store(doc)
+            return 0, "", ""
+        if action == "get" and len(positional) == 2:
+            kind = resolve_kind(positional[1])
+            items = self.kube_list(kind, namespace if KINDS[kind][2] else None, opts.get("l"))
+            return 0, json.dumps({"apiVersion": "v1", "kind": "List", "items": items}), ""
+        if action == "get" and len(positional) >= 2:
+            kind = resolve_kind(positional[1])
+            key = (kind, namespace if KINDS[kind][2] else None, positional[2] if len(positional) > 2 else None)
+            obj = self.cloud.objects.get(key)
+            if obj is None:
+                return 1, "", f'Error from server (NotFound): {positional[1]} "{key[2]}" not found'
+            return 0, json.dumps(obj), ""
+        if action == "delete" and len(positional) >= 3:
+            self.kube_delete(positional[1], positional[2], namespace)
+        return 0, "", ""
+
+    def print_stats(self):
+        self.stats.print_table(f"backend {self.name}")
+
+# ---------------------------------------------------------
+# Herramientas fake (eksctl, helm, kubectl) como ejecutables reales
+# ---------------------------------------------------------
+FAKE_TOOLS = ("eksctl", "helm", "kubectl")
+FAKE_TOOL_TEMPLATE = """#!{python}
+import sys
+sys.path.insert(0, {repo!r})
+import fake_backend
+sys.exit(fake_backend.tool_main({tool!r}, sys.argv[1:]))
+"""
+
+def install_fake_tools(directory):
+    """Crea ejecutables eksctl/helm/kubectl que operan sobre la FileCloud de SRE_FAKE_STATE."""
+    os.makedirs(directory, exist_ok=True)
+    repo = os.path.dirname(os.path.abspath(__file__))
+    for tool in FAKE_TOOLS:
+        path = os.path.join(directory, tool)
+        with open(path, "w") as f:
+            f.write(FAKE_TOOL_TEMPLATE.format(python=sys.executable, repo=repo, tool=tool))
+        os.chmod(path, 0o755)
+    return directory
+
+def tool_main(tool, args):
+    """Punto de entrada de cada herramienta fake: un proceso por comando, como las reales."""
+    backend = FakeBackend(failure_rate=float(os.environ.get("SRE_FAKE_FAILURE_RATE", "0")),
+                          cloud=FileCloud(os.environ["SRE_FAKE_STATE"]))
+    if "-" in args:
+        # stdin se lee antes de tomar el lock del estado: el otro extremo del pipe también lo necesita
+        backend.stdin_text = sys.stdin.read()
+    proc = backend._run(shlex.join([tool] + args))
+    sys.stdout.write(proc.stdout)
+    sys.stderr.write(proc.stderr)
+    return proc.returncode
+
+class FakeCliBackend(CliBackend):
+    """
+    CliBackend real (un proceso por cada kubectl/helm/eksctl) contra las herramientas
+    fake; AWS sigue en proceso con los clientes simulados sobre la misma FileCloud.
+    Sirve para medir el coste real de lanzar procesos sin tocar AWS.
+    """
+
+    name = "fake-cli"
+
+    def __init__(self, state_path, tools_dir, latency=None, failure_rate=0.0, seed=None):
+        super().__init__()
+        self.cloud = FileCloud(state_path)
+        self._aws = FakeBackend(latency, failure_rate, seed, cloud=self.cloud)
+        self._aws.stats = self.stats
+        os.environ["SRE_FAKE_STATE"] = os.path.abspath(state_path)
+        os.environ["SRE_FAKE_FAILURE_RATE"] = str(failure_rate)
+        os.environ["PATH"] = os.path.abspath(install_fake_tools(tools_dir)) + os.pathsep + os.environ.get("PATH", "")
+
+    def client(self, service, region):
+        return self._aws.client(service, region)
+
+    def fetch(self, url, timeout=30):
+        return self._aws.fetch(url, timeout)
+
+# ---------------------------------------------------------
+# Prometheus fake (API HTTP de consultas)
+# ---------------------------------------------------------
+FAKE_PROMETHEUS_MAX_POINTS = 11000   # Mismo tope de puntos por serie que Prometheus
+# Series activas por métrica del kube-prometheus-stack con los valores del chart en 2 nodos.
+# Con otro perfil se le aplican sus reglas de drop (sobre __name__, sin distinguir el job)
+FAKE_STACK_SERIES = {
+    "apiserver_request_duration_seconds_bucket": 11800,
+    "apiserver_request_sli_duration_seconds_bucket": 8900,
+    "etcd_request_duration_seconds_bucket": 6900,
+    "apiserver_response_sizes_bucket": 2400,
+    "apiserver_watch_events_sizes_bucket": 1500,
+    "apiserver_storage_objects": 700,
+    "apiserver_flowcontrol_request_wait_duration_seconds_bucket": 1900,
+    "workqueue_queue_duration_seconds_bucket": 1200,
+    "rest_client_request_duration_seconds_bucket": 2100,
+    "kubelet_runtime_operations_duration_seconds_bucket": 1800,
+    "storage_operation_duration_seconds_bucket": 900,
+    "kubelet_pleg_relist_duration_seconds_bucket": 60,
+    "container_fs_usage_bytes": 420,
+    "container_fs_reads_bytes_total": 840,
+    "container_memory_failures_total": 1300,
+    "container_blkio_device_usage_total": 700,
+    "container_network_receive_errors_total": 180,
+    "container_cpu_usage_seconds_total": 620,
+    "container_memory_working_set_bytes": 450,
+    "node_scrape_collector_duration_seconds": 400,
+    "node_cpu_seconds_total": 64,
+    "node_network_iface_link": 40,
+    "kube_pod_container_resource_requests": 310,
+    "kube_pod_status_phase": 250,
+    "prometheus_http_request_duration_seconds_bucket": 900,
+    "grafana_http_request_duration_seconds_bucket": 1100,
+}
+FAKE_STACK_OTHER_SERIES = 9000       # Resto de métricas, que ningún perfil descarta
+FAKE_STACK_MEMORY = {                # Working set por contenedor (bytes); Prometheus escala con las series
+    "grafana": 180 * 2 ** 20, "grafana-sc-dashboard": 60 * 2 ** 20, "grafana-sc-datasources": 55 * 2 ** 20,
+    "node-exporter": 36 * 2 ** 20, "kube-state-metrics": 45 * 2 ** 20, "kube-prometheus-stack": 35 * 2 ** 20,
+    "alertmanager": 30 * 2 ** 20, "config-reloader": 40 * 2 ** 20,
+}
+FAKE_PROMETHEUS_BASE_MEMORY = 150 * 2 ** 20
+FAKE_PROMETHEUS_BYTES_PER_SERIES = 6 * 1024
+
+class FakePrometheus:
+    """
+    Servidor HTTP local que responde /api/v1/query_range con series sintéticas y
+    deterministas (patrón diario + ruido) por pod de la app, para usar rightsizing.py
+    sin clúster. Las consultas de CPU devuelven núcleos y las de memoria bytes.
+    /api/v1/query responde las consultas de monitoring_report.py sobre el propio stack
+    según el perfil 'stack_profile' de manifests.MONITORING_PROFILES.
+    """
+
+    def __init__(self, pods=6, cpu=0.0004, memory=480 * 2 ** 20, port=0, stack_profile="full"):
+        self.pods = [f"amazon-deployment-7d9c6b5f4-{i:05x}" for i in range(pods)]
+        self.cpu = cpu
+        self.memory = memory
+        self.stack_profile = stack_profile
+        self.requests = 0
+        # Importación tardía: cada herramienta fake importa este módulo y http.server no es barato
+        import http.server
+        fake = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                fake.requests += 1
+                status, body = fake.handle(self.path)
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", port), Handler)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def value(self, query, index, ts):
+        """Muestra determinista: carga diaria (pico a media tarde) más ruido por pod."""
+        daily = math.sin(2 * math.pi * (ts % 86400) / 86400 + index)
+        noise = math.sin(ts * 12.9898 + index * 78.233) * 43758.5453 % 1
+        if "memory" in query:
+            return self.memory * (1 + 0.06 * daily + 0.04 * noise)
+        return self.cpu * (1 + 0.5 * daily + 1.5 * noise ** 4)
+
+    def stack_series(self):
+        """Series por métrica que quedan tras las reglas de drop del perfil."""
+        from manifests import MONITORING_PROFILES
+        settings = MONITORING_PROFILES[self.stack_profile] or {"drop": {}}
+        patterns = [re.compile(rule) for rules in settings["drop"].values() for rule in rules
+                    if isinstance(rule, str)]
+        return {name: count for name, count in FAKE_STACK_SERIES.items()
+                if not any(p.fullmatch(name) for p in patterns)}
+
+    def instant(self, query):
+        from manifests import MONITORING_PROFILES, APP_RESOURCES, APP_REPLICAS, monitoring_requests, parse_quantity
+        now = time.time()
+        series = self.stack_series()
+        head = sum(series.values()) + FAKE_STACK_OTHER_SERIES
+
+        def vector(value, **labels):
+            return {"metric": labels, "value": [now, f"{value:.6g}"]}
+        if query.startswith("topk"):
+            return [vector(count, __name__=name) for name, count in
+                    sorted(series.items(), key=lambda item: -item[1])[:10]]
+        if "prometheus_tsdb_head_series" in query:
+            return [vector(head)]
+        if "samples_appended" in query:
+            settings = MONITORING_PROFILES[self.stack_profile] or {"scrape_interval": "30s"}
+            return [vector(head / int(settings["scrape_interval"].rstrip("s")))]
+        if "container_memory_working_set_bytes" in query:
+            memory = dict(FAKE_STACK_MEMORY, prometheus=FAKE_PROMETHEUS_BASE_MEMORY + head * FAKE_PROMETHEUS_BYTES_PER_SERIES)
+            return [vector(value, container=name) for name, value in memory.items()]
+        if "kube_node_status_allocatable" in query:
+            return [vector(2 * 3388 * 2 ** 20)]
+        if "kube_pod_container_resource_requests" in query:
+            stack = (monitoring_requests(self.stack_profile) or 0) + 2 * 50 * 2 ** 20   # + config-reloaders
+            if 'namespace="monitoring"' in query:
+                return [vector(stack)]
+            system = 2 * 100 * 2 ** 20   # aws-node, kube-proxy, coredns...
+            return [vector(stack + system + APP_REPLICAS * parse_quantity(APP_RESOURCES["requests"]["memory"]))]
+        return []
+
+    def handle(self, path):
+        url = urllib.parse.urlsplit(path)
+        params = dict(urllib.parse.parse_qsl(url.query))
+        if url.path == "/api/v1/query" and "query" in params:
+            return 200, {"status": "success", "data": {"resultType": "vector", "result": self.instant(params["query"])}}
+        if url.path != "/api/v1/query_range":
+            return 404, {"status": "error", "errorType": "not_found", "error": f"ruta desconocida {url.path}"}
+        try:
+            query, start, end, step = params["query"], float(params["start"]), float(params["end"]), float(params["step"])
+        except (KeyError, ValueError) as e:
+            return 400, {"status": "error", "errorType": "bad_data", "error": f"parámetro inválido: {e}"}
+        if step <= 0 or end < start:
+            return 400, {"status": "error", "errorType": "bad_data", "error": "rango o step inválido"}
+        points = int((end - start) // step) + 1
+        if points > FAKE_PROMETHEUS_MAX_POINTS:
+            return 400, {"status": "error", "errorType": "bad_data",
+                         "error": "exceeded maximum resolution of 11,000 points per timeseries. "
+                                  "Try decreasing the query resolution (?step=XX)"}
+        timestamps = [start + i * step for i in range(points)]
+        result = [{"metric": {"pod": pod},
+                   "values": [[ts, f"{self.value(query, i, ts):.6g}"] for ts in timestamps]}
+                  for i, pod in enumerate(self.pods)]
+        return 200, {"status": "success", "data": {"resultType": "matrix", "result": result}}
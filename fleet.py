@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Modo flota: ejecuta setup, monitoreo o limpieza sobre N entornos en paralelo.
+
+Cada entorno corre en su propio proceso (clientes boto3 y kubeconfig aislados),
+con un tope de concurrencia para no saturar los límites de la API de AWS.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# ==========================================
+# ⚙️ CONFIGURACIÓN
+# ==========================================
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+WORK_DIR = os.environ.get("SRE_FLEET_DIR", os.path.join(os.getcwd(), "fleet-runs"))
+KUBECONFIG_DIR = os.path.expanduser("~/.kube/sre-fleet")
+DEFAULT_CONCURRENCY = 3
+# Acciones que no pueden seguir sin kubeconfig (setup lo escribe al crear el clúster y
+# la limpieza debe poder borrar IAM aunque el clúster ya no exista)
+KUBECONFIG_REQUIRED = {"monitoring"}
+
+# Acción -> scripts a ejecutar en orden para cada entorno
+ACTIONS = {
+    "setup": [("setup_sdk.py", [])],
+    "monitoring": [("setup_monitoring.py", [])],
+    "all": [("setup_sdk.py", []), ("setup_monitoring.py", [])],
+    "cleanup": [("cleanup_sdk_all.py", ["--yes"])],
+}
+
+# Campo del inventario -> variable de entorno que leen los scripts
+ENV_FIELDS = {
+    "cluster_name": "SRE_CLUSTER_NAME",
+    "region": "SRE_REGION",
+    "profile": "AWS_PROFILE",
+    "base_domain": "SRE_BASE_DOMAIN",
+    "domain_name": "SRE_DOMAIN_NAME",
+    "grafana_domain": "SRE_GRAFANA_DOMAIN",
+    "cert_arn": "SRE_CERT_ARN",
+    "autoscaling": "SRE_AUTOSCALING",
+    "nodes_min": "SRE_NODES_MIN",
+    "nodes_max": "SRE_NODES_MAX",
+    "ip_targets": "SRE_IP_TARGETS",
+}
+
+class Colors:
+    BLUE = '\033[94m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    END = '\033[0m'
+
+def load_inventory(path):
+    """
+    Lee el inventario JSON: {"defaults": {...}, "environments": [{"name": ..., ...}]}.
+    Cada entorno hereda los valores de "defaults"; cluster_name por defecto es el nombre.
+    """
+    with open(path) as f:
+        data = json.load(f)
+    defaults = data.get("defaults", {})
+    environments = []
+    for env in data.get("environments", []):
+        if "name" not in env:
+            raise ValueError(f"Entorno sin 'name' en {path}: {env}")
+        merged = dict(defaults, **env)
+        merged.setdefault("cluster_name", env["name"])
+        unknown = set(merged) - set(ENV_FIELDS) - {"name", "extra_args"}
+        if unknown:
+            raise ValueError(f"Campos desconocidos en el entorno {env['name']}: {sorted(unknown)}")
+        environments.append(merged)
+    names = [e["name"] for e in environments]
+    if len(names) != len(set(names)):
+        raise ValueError(f"Nombres de entorno duplicados en {path}")
+    return environments
+
+def environment_vars(env, concurrency=1):
+    """Variables de entorno aisladas para un entorno (incluye su propio kubeconfig)."""
+    variables = dict(os.environ)
+    # Los entornos comparten los límites de la API de la cuenta: cada proceso usa su parte
+    variables["SRE_RATE_SCALE"] = f"{1 / max(1, concurrency):.3f}"
+    for field, var in ENV_FIELDS.items():
+        if field in env:
+            variables[var] = str(env[field])
+    variables["KUBECONFIG"] = os.path.join(KUBECONFIG_DIR, f"{env['name']}.config")
+    return variables
+
+def update_kubeconfig(env, variables, log):
+    """
+    Escribe el kubeconfig propio del entorno para un clúster que ya existe (si
+    setup no lo creó en esta misma ejecución, el archivo estaría vacío). Devuelve
+    True si quedó escrito; con el backend fake no hay nada que escribir.
+    """
+    if variables.get("SRE_BACKEND", "sdk") == "fake":
+        return True
+    command = ["aws", "eks", "update-kubeconfig", "--name", variables["SRE_CLUSTER_NAME"],
+               "--region", variables.get("SRE_REGION", "us-east-1"), "--kubeconfig", variables["KUBECONFIG"]]
+    if env.get("profile"):
+        command += ["--profile", env["profile"]]
+    log.write(f"$ {' '.join(command)}\n")
+    log.flush()
+    try:
+        proc = subprocess.run(command, env=variables, stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL)
+    except OSError as e:
+        log.write(f"No se pudo ejecutar aws: {e}\n")
+        return False
+    return proc.returncode == 0
+
+def run_environment(env, action, extra_args, concurrency=1):
+    """Ejecuta los scripts de la acción para un entorno. Devuelve un dict con el resultado."""
+    workdir = os.path.join(WORK_DIR, env["name"])
+    os.makedirs(workdir, exist_ok=True)
+    os.makedirs(KUBECONFIG_DIR, exist_ok=True)
+    log_path = os.path.join(workdir, f"{action}.log")
+    variables = environment_vars(env, concurrency)
+    # Traza JSON lines por entorno: setup y monitoreo se añaden al mismo archivo
+    variables["SRE_TRACE_FILE"] = os.path.join(workdir, "trace.jsonl")
+    start = time.monotonic()
+    steps = []
+    status = "ok"
+
+    with open(log_path, "w") as log:
+        step_start = time.monotonic()
+        written = update_kubeconfig(env, variables, log)
+        steps.append(("kubeconfig", time.monotonic() - step_start, 0 if written else 1))
+        if not written and action in KUBECONFIG_REQUIRED:
+            return {"name": env["name"], "status": "falló", "duration": time.monotonic() - start,
+                    "steps": steps, "log": log_path}
+        for script, args in ACTIONS[action]:
+            command = [sys.executable, os.path.join(REPO_DIR, script)] + args + extra_args + env.get("extra_args", [])
+            step_start = time.monotonic()
+            # Cada entorno trabaja en su carpeta: los YAML generados no se pisan entre sí
+            proc = subprocess.run(command, cwd=workdir, env=variables, stdout=log,
+                                  stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL)
+            steps.append((script, time.monotonic() - step_start, proc.returncode))
+            if proc.returncode != 0:
+                status = "falló"
+                break
+
+    return {"name": env["name"], "status": status, "duration": time.monotonic() - start,
+            "steps": steps, "log": log_path}
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def print_summary(results, action, wall):
+    print(f"\n{Colors.BLUE}📊 Resumen de la flota ({action}){Colors.END}")
+    print(f"   {'ENTORNO':<28}{'ESTADO':<9}{'DURACIÓN':>10}  LOG")
+    for r in sorted(results, key=lambda r: r["name"]):
+        color = Colors.GREEN if r["status"] == "ok" else Colors.RED
+        print(f"   {r['name']:<28}{color}{r['status']:<9}{Colors.END}{r['duration']:9.1f}s  {r['log']}")
+
+    durations = [r["duration"] for r in results]
+    ok = sum(r["status"] == "ok" for r in results)
+    print(f"   Entornos: {ok}/{len(results)} correctos | Tiempo total (reloj): {wall:.1f}s "
+          f"| Suma secuencial: {sum(durations):.1f}s")
+    if wall > 0:
+        print(f"   Throughput: {len(results) / wall * 60:.2f} entornos/min")
+    print(f"   Latencia por entorno: p50={percentile(durations, 50):.1f}s "
+          f"p95={percentile(durations, 95):.1f}s máx={max(durations, default=0):.1f}s")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Provisiona, monitorea o destruye varios entornos en paralelo.")
+    parser.add_argument("action", choices=sorted(ACTIONS), help="Qué ejecutar en cada entorno")
+    parser.add_argument("inventory", help="Archivo JSON con la lista de entornos")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Entornos procesándose a la vez (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--only", action="append", default=[],
+                        help="Limita la ejecución a estos entornos (se puede repetir)")
+    parser.add_argument("--yes", action="store_true",
+                        help="No pide confirmación antes de destruir los entornos (cleanup desatendido)")
+    parser.epilog = "Los argumentos tras '--' se pasan a cada script (p.ej. -- --workers 2)."
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # Todo lo que va tras '--' es para los scripts de cada entorno, no para fleet.py
+    script_args = argv[argv.index("--") + 1:] if "--" in argv else []
+    args = parser.parse_args(argv[:argv.index("--")] if "--" in argv else argv)
+    args.script_args = script_args
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    extra_args = args.script_args
+    environments = load_inventory(args.inventory)
+    if args.only:
+        environments = [e for e in environments if e["name"] in args.only]
+
+    print(f"{Colors.BLUE}================================================={Colors.END}")
+    print(f"{Colors.BLUE}   FLEET MODE: {args.action} x {len(environments)} entornos{Colors.END}")
+    print(f"{Colors.BLUE}================================================={Colors.END}")
+    if args.action == "cleanup":
+        print(f"{Colors.YELLOW}⚠️ Se destruirán: {', '.join(e['name'] for e in environments)}{Colors.END}")
+        # Cada cleanup_sdk_all.py recibe --yes: esta es la única confirmación de toda la flota
+        if not args.yes:
+            try:
+                confirm = input(f"¿Destruir {Colors.YELLOW}{len(environments)}{Colors.END} entorno(s) y TODOS sus "
+                                f"recursos? Escribe el número de entornos para confirmar: ")
+            except EOFError:
+                confirm = ""
+            if confirm.strip() != str(len(environments)):
+                print(f"{Colors.RED}Cancelado: no se ha borrado nada (usa --yes en ejecuciones desatendidas).{Colors.END}")
+                sys.exit(1)
+
+    start = time.monotonic()
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        futures = {pool.submit(run_environment, env, args.action, extra_args, args.concurrency): env
+                   for env in environments}
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            color = Colors.GREEN if result["status"] == "ok" else Colors.RED
+            print(f"   {color}● {result['name']}: {result['status']} ({result['duration']:.1f}s){Colors.END}")
+
+    print_summary(results, args.action, time.monotonic() - start)
+    if any(r["status"] != "ok" for r in results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
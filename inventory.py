@@ -0,0 +1,622 @@
+#!/usr/bin/env python3
+"""
+Inventario en vivo de lo que el clúster deja en la cuenta: ALBs, target groups,
+security groups, registros Route53 de ExternalDNS, roles IRSA y políticas IAM.
+
+    python3 inventory.py --save antes.json.gz           # foto compacta (gzip si acaba en .gz)
+    python3 inventory.py --compare antes.json.gz        # deriva respecto a esa foto
+    python3 inventory.py --diff antes.json.gz despues.json.gz   # dos fotos, sin llamar a AWS
+    python3 inventory.py --orphans huerfanos.json       # informe para cleanup_sdk_all.py --orphans
+    python3 inventory.py --tag ingress.k8s.aws/stack=default/amazon-ingress-alb
+
+Un recurso es de un clúster por sus tags (elbv2.k8s.aws/cluster,
+alpha.eksctl.io/cluster-name, kubernetes.io/cluster/<nombre>), por el TXT de
+propiedad de ExternalDNS (txtOwnerId = nombre del clúster) o, en los roles de
+eksctl, por el prefijo eksctl-<clúster>-. Cada tipo se lista con paginadores en
+su propio hilo y los tags de ELBv2 en lotes de 20 en paralelo.
+"""
+import argparse
+import gzip
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from backends import get_backend, kube_errors, ClientError
+from readiness import wait_until, ReadinessError
+from state_fingerprint import fingerprint
+
+# ==========================================
+# ⚙️ CONFIGURACIÓN
+# ==========================================
+CLUSTER_NAME = os.environ.get("SRE_CLUSTER_NAME", "cluster-sre-demo")
+REGION = os.environ.get("SRE_REGION", "us-east-1")
+INVENTORY_WORKERS = 8        # Listados (y lotes de tags) simultáneos
+TAGS_PER_CALL = 20           # Máximo de ARNs por describe_tags de ELBv2
+SNAPSHOT_VERSION = 1
+ORPHAN_REPORT_MAX_AGE = 24 * 3600   # Un informe más antiguo ya no describe la cuenta: hay que regenerarlo
+ALB_DELETE_TIMEOUT = 300     # Segundos esperando a que AWS borre los ALBs huérfanos
+SG_DELETE_TIMEOUT = 600      # Las ENIs de un ALB tardan minutos en liberar su security group
+ALB_MONTHLY_COST = 0.0225 * 730     # Hora de ALB On-Demand en us-east-1 (sin LCUs), USD
+# Tags con los que el controlador de ALBs y eksctl marcan al clúster dueño
+OWNER_TAGS = ["elbv2.k8s.aws/cluster", "alpha.eksctl.io/cluster-name", "eks:cluster-name"]
+CLUSTER_TAG_PREFIX = "kubernetes.io/cluster/"
+# TXT de propiedad de ExternalDNS y roles que crea eksctl (IRSA, clúster y nodegroups)
+TXT_OWNER = re.compile(r"heritage=external-dns,external-dns/owner=([^,\"]+)(?:,external-dns/resource=([^,\"]+))?")
+TXT_PREFIXES = ("a-", "aaaa-", "cname-")
+ROLE_OWNER = re.compile(r"^eksctl-(.+?)-(addon-iamserviceaccount|cluster|nodegroup)-")
+
+# Orden de borrado de los huérfanos (y nombre del paso en cleanup_sdk_all.py)
+ORPHAN_TYPES = ["dns-record", "load-balancer", "target-group", "security-group", "iam-role"]
+
+backend = get_backend()
+
+class Colors:
+    BLUE = '\033[94m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    END = '\033[0m'
+
+class OrphanReportError(Exception):
+    """El informe de huérfanos no se puede usar con este clúster o cuenta."""
+
+# ---------------------------------------------------------
+# Listados en bloque
+# ---------------------------------------------------------
+def paginate(client, operation, key, **kwargs):
+    items = []
+    for page in client.get_paginator(operation).paginate(**kwargs):
+        items.extend(page.get(key, []))
+    return items
+
+def parallel_map(func, items, workers=INVENTORY_WORKERS):
+    items = list(items)
+    if len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(workers, len(items))) as pool:
+        return list(pool.map(func, items))
+
+def tag_dict(tags):
+    return {t["Key"]: t["Value"] for t in tags or []}
+
+def owner_from_tags(tags):
+    for key in OWNER_TAGS:
+        if tags.get(key):
+            return tags[key]
+    for key, value in tags.items():
+        if key.startswith(CLUSTER_TAG_PREFIX) and value in ("owned", "shared"):
+            return key[len(CLUSTER_TAG_PREFIX):]
+    return None
+
+def dns_name(name):
+    """Normaliza un nombre DNS para comparar alias con el DNSName de un ALB."""
+    name = (name or "").lower().rstrip(".")
+    return name[len("dualstack."):] if name.startswith("dualstack.") else name
+
+def resource(kind, resource_id, name, owner=None, tags=None, attrs=None, links=None):
+    tags = tags or {}
+    attrs = attrs or {}
+    return {"id": resource_id, "type": kind, "name": name, "owner": owner, "tags": tags, "attrs": attrs,
+            "links": links or {}, "digest": fingerprint({"tags": tags, "attrs": attrs})[:16]}
+
+def elbv2_tags(elbv2, arns):
+    chunks = [arns[i:i + TAGS_PER_CALL] for i in range(0, len(arns), TAGS_PER_CALL)]
+    tags = {}
+    for descriptions in parallel_map(lambda c: elbv2.describe_tags(ResourceArns=c)["TagDescriptions"], chunks):
+        tags.update((d["ResourceArn"], tag_dict(d["Tags"])) for d in descriptions)
+    return tags
+
+def collect_load_balancers(clients):
+    elbv2 = clients["elbv2"]
+    lbs = paginate(elbv2, "describe_load_balancers", "LoadBalancers")
+    tags = elbv2_tags(elbv2, [lb["LoadBalancerArn"] for lb in lbs])
+    found = []
+    for lb in lbs:
+        lb_tags = tags.get(lb["LoadBalancerArn"], {})
+        found.append(resource("load-balancer", lb["LoadBalancerArn"], lb["LoadBalancerName"], owner_from_tags(lb_tags),
+                              lb_tags, attrs={"dns": dns_name(lb.get("DNSName")), "scheme": lb.get("Scheme"),
+                                              "type": lb.get("Type"), "vpc": lb.get("VpcId"),
+                                              "state": lb.get("State", {}).get("Code")},
+                              links={"stack": lb_tags.get("ingress.k8s.aws/stack"),
+                                     "dns": dns_name(lb.get("DNSName"))}))
+    return found
+
+def collect_target_groups(clients):
+    elbv2 = clients["elbv2"]
+    groups = paginate(elbv2, "describe_target_groups", "TargetGroups")
+    tags = elbv2_tags(elbv2, [tg["TargetGroupArn"] for tg in groups])
+    found = []
+    for tg in groups:
+        tg_tags = tags.get(tg["TargetGroupArn"], {})
+        found.append(resource("target-group", tg["TargetGroupArn"], tg["TargetGroupName"], owner_from_tags(tg_tags),
+                              tg_tags, attrs={"protocol": tg.get("Protocol"), "port": tg.get("Port"),
+                                              "target_type": tg.get("TargetType"), "vpc": tg.get("VpcId"),
+                                              "load_balancers": sorted(tg.get("LoadBalancerArns", []))},
+                              links={"stack": tg_tags.get("ingress.k8s.aws/stack")}))
+    return found
+
+def collect_security_groups(clients):
+    # Solo los que llevan tags de propiedad: el resto de la VPC no es asunto del clúster
+    groups = paginate(clients["ec2"], "describe_security_groups", "SecurityGroups", Filters=[
+        {"Name": "tag-key", "Values": OWNER_TAGS + [f"{CLUSTER_TAG_PREFIX}*"]}])
+    found = []
+    for sg in groups:
+        sg_tags = tag_dict(sg.get("Tags"))
+        found.append(resource("security-group", sg["GroupId"], sg.get("GroupName", sg["GroupId"]),
+                              owner_from_tags(sg_tags), sg_tags,
+                              attrs={"vpc": sg.get("VpcId"), "ingress": sg.get("IpPermissions", [])},
+                              links={"stack": sg_tags.get("ingress.k8s.aws/stack")}))
+    return found
+
+def _zone_records(route53, zone):
+    records = paginate(route53, "list_resource_record_sets", "ResourceRecordSets", HostedZoneId=zone["Id"])
+    # Dueño de cada nombre según los TXT de ExternalDNS (formato nuevo con prefijo y antiguo sin él)
+    owners = {}
+    for record in records:
+        if record["Type"] != "TXT":
+            continue
+        for value in record.get("ResourceRecords", []):
+            match = TXT_OWNER.search(value["Value"])
+            if match:
+                owners[record["Name"]] = match.groups()
+                prefix = next((p for p in TXT_PREFIXES if record["Name"].startswith(p)), None)
+                if prefix:
+                    owners.setdefault(record["Name"][len(prefix):], match.groups())
+    found = []
+    for record in records:
+        if record["Name"] not in owners or record["Type"] in ("NS", "SOA"):
+            continue
+        owner, source = owners[record["Name"]]
+        alias = record.get("AliasTarget", {}).get("DNSName")
+        values = [v["Value"] for v in record.get("ResourceRecords", [])]
+        if record["Type"] == "TXT":
+            prefix = next((p for p in TXT_PREFIXES if record["Name"].startswith(p)), "")
+            links = {"owns": record["Name"][len(prefix):]}
+        else:
+            links = {"target": dns_name(alias or (values[0] if values else ""))}
+        record_id = "|".join(filter(None, [zone["Id"], record["Name"], record["Type"], record.get("SetIdentifier")]))
+        found.append(resource("dns-record", record_id, f"{record['Name'].rstrip('.')} ({record['Type']})", owner,
+                              {"external-dns/owner": owner, "external-dns/resource": source or ""},
+                              attrs=record, links=dict(links, zone=zone["Id"], name=record["Name"])))
+    return found
+
+def collect_dns_records(clients):
+    route53 = clients["route53"]
+    zones = paginate(route53, "list_hosted_zones", "HostedZones")
+    return [r for records in parallel_map(lambda z: _zone_records(route53, z), zones) for r in records]
+
+def collect_iam_roles(clients):
+    found = []
+    for role in paginate(clients["iam"], "list_roles", "Roles"):
+        match = ROLE_OWNER.match(role["RoleName"])
+        if match:
+            found.append(resource("iam-role", role["Arn"], role["RoleName"], match.group(1),
+                                  attrs={"path": role.get("Path")}, links={"kind": match.group(2)}))
+    return found
+
+def collect_iam_policies(clients):
+    # Políticas gestionadas por el cliente: de la cuenta, no de un clúster
+    return [resource("iam-policy", p["Arn"], p["PolicyName"],
+                     attrs={"default_version": p.get("DefaultVersionId"), "attachments": p.get("AttachmentCount")})
+            for p in paginate(clients["iam"], "list_policies", "Policies", Scope="Local")]
+
+def collect_clusters(clients):
+    return [resource("eks-cluster", f"eks:{name}", name, name)
+            for name in paginate(clients["eks"], "list_clusters", "clusters")]
+
+COLLECTORS = {
+    "load-balancer": collect_load_balancers,
+    "target-group": collect_target_groups,
+    "security-group": collect_security_groups,
+    "dns-record": collect_dns_records,
+    "iam-role": collect_iam_roles,
+    "iam-policy": collect_iam_policies,
+    "eks-cluster": collect_clusters,
+}
+
+def aws_clients(region=REGION):
+    return {service: backend.client(service, region)
+            for service in ("elbv2", "ec2", "route53", "iam", "eks", "sts")}
+
+def collect(region=REGION, workers=INVENTORY_WORKERS):
+    """Lista todos los tipos a la vez (un hilo por tipo) y devuelve el índice."""
+    clients = aws_clients(region)
+    account = clients["sts"].get_caller_identity()["Account"]
+    with ThreadPoolExecutor(max_workers=min(workers, len(COLLECTORS))) as pool:
+        results = list(pool.map(lambda collector: collector(clients), COLLECTORS.values()))
+    return Inventory([r for found in results for r in found], account=account, region=region)
+
+# ---------------------------------------------------------
+# Índice en memoria y fotos
+# ---------------------------------------------------------
+class Inventory:
+    """
+    Recursos indexados por id, tipo, dueño, tag (clave y clave=valor) y enlace
+    (stack del Ingress, DNS del ALB...), para que la deriva y los huérfanos se
+    resuelvan con búsquedas y no recorriendo la lista por cada recurso.
+    """
+
+    def __init__(self, resources, account=None, region=None, taken_at=None):
+        self.account = account
+        self.region = region
+        self.taken_at = taken_at or time.strftime("%Y-%m-%dT%H:%M:%S")
+        self.resources = {}
+        self.by_type = defaultdict(set)
+        self.by_owner = defaultdict(set)
+        self.by_tag = defaultdict(set)
+        self.by_link = defaultdict(set)
+        for r in resources:
+            self.resources[r["id"]] = r
+            self.by_type[r["type"]].add(r["id"])
+            self.by_owner[r["owner"]].add(r["id"])
+            for key, value in r["tags"].items():
+                self.by_tag[key].add(r["id"])
+                self.by_tag[f"{key}={value}"].add(r["id"])
+            for key, value in r["links"].items():
+                if isinstance(value, str):
+                    self.by_link[(r["type"], key, value)].add(r["id"])
+
+    def _get(self, ids):
+        return [self.resources[i] for i in sorted(ids)]
+
+    def of_type(self, kind, owner=...):
+        ids = self.by_type.get(kind, set())
+        return self._get(ids if owner is ... else ids & self.by_owner.get(owner, set()))
+
+    def owned_by(self, owner):
+        return self._get(self.by_owner.get(owner, set()))
+
+    def tagged(self, tag):
+        """tag: 'clave' o 'clave=valor'."""
+        return self._get(self.by_tag.get(tag, set()))
+
+    def linked(self, kind, key, value):
+        return self._get(self.by_link.get((kind, key, value), set()))
+
+    def owners(self):
+        return sorted(o for o in self.by_owner if o)
+
+def write_snapshot(inventory, path):
+    """Foto compacta: por recurso solo tipo, nombre, dueño, huella y tags (gzip si la ruta acaba en .gz)."""
+    data = {"version": SNAPSHOT_VERSION, "taken_at": inventory.taken_at, "account": inventory.account,
+            "region": inventory.region,
+            "resources": {r["id"]: [r["type"], r["name"], r["owner"], r["digest"], r["tags"]]
+                          for r in inventory.resources.values()}}
+    payload = json.dumps(data, sort_keys=True, separators=(",", ":")).encode()
+    if path.endswith(".gz"):
+        payload = gzip.compress(payload, mtime=0)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".inventory-")
+    with os.fdopen(fd, "wb") as f:
+        f.write(payload)
+    os.replace(tmp, path)
+    return len(payload)
+
+def read_snapshot(path):
+    with open(path, "rb") as f:
+        payload = f.read()
+    if payload[:2] == b"\x1f\x8b":
+        payload = gzip.decompress(payload)
+    data = json.loads(payload)
+    if data.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"{path}: versión de foto {data.get('version')} no soportada")
+    resources = []
+    for resource_id, (kind, name, owner, digest, tags) in data["resources"].items():
+        resources.append({"id": resource_id, "type": kind, "name": name, "owner": owner, "tags": tags,
+                          "attrs": {}, "links": {}, "digest": digest})
+    return Inventory(resources, account=data.get("account"), region=data.get("region"), taken_at=data.get("taken_at"))
+
+def diff(before, after, owner=None):
+    """Recursos nuevos, desaparecidos y con deriva (misma id, distinta huella) entre dos inventarios."""
+    def ids(inventory):
+        return set(inventory.resources) if owner is None else inventory.by_owner.get(owner, set())
+    old, new = ids(before), ids(after)
+    return {
+        "added": after._get(new - old),
+        "removed": before._get(old - new),
+        "changed": [(before.resources[i], after.resources[i]) for i in sorted(old & new)
+                    if before.resources[i]["digest"] != after.resources[i]["digest"]
+                    or before.resources[i]["owner"] != after.resources[i]["owner"]],
+    }
+
+# ---------------------------------------------------------
+# Huérfanos
+# ---------------------------------------------------------
+def kubernetes_state():
+    """Ingress ('ns/nombre') y roles anotados en Service Accounts del clúster; None si no responde."""
+    try:
+        ingresses = {f"{i['metadata'].get('namespace', 'default')}/{i['metadata']['name']}"
+                     for i in backend.kube_list("ingress", namespace=None)}
+        roles = {sa["metadata"].get("annotations", {}).get("eks.amazonaws.com/role-arn")
+                 for sa in backend.kube_list("serviceaccount", namespace=None)}
+    except kube_errors() as e:
+        print(f"{Colors.YELLOW}⚠️ Kubernetes no responde ({e}): solo se aplican las reglas de AWS.{Colors.END}")
+        return None
+    return {"ingresses": ingresses, "roles": roles - {None}}
+
+def find_orphans(inventory, cluster, kube=None):
+    """
+    Recursos del clúster que ya nada usa, con el motivo. Si el clúster no existe,
+    todo lo que lleva su nombre es huérfano. Si existe: ALBs cuyo Ingress ya no
+    está, target groups sin ALB, security groups del controlador sin ALB, registros
+    de ExternalDNS que apuntan a un ALB que no existe (o se va a borrar) y roles
+    IRSA que ninguna Service Account usa. Sin kube, solo las reglas de AWS.
+    """
+    owned = [r for r in inventory.owned_by(cluster) if r["type"] in ORPHAN_TYPES]
+    if not inventory.resources.get(f"eks:{cluster}"):
+        return [(r, f"el clúster {cluster} ya no existe") for r in owned]
+
+    orphans = {}
+    for lb in inventory.of_type("load-balancer", cluster):
+        stack = lb["links"].get("stack")
+        if kube is not None and stack and stack not in kube["ingresses"]:
+            orphans[lb["id"]] = f"el Ingress {stack} ya no existe"
+    live_stacks = {lb["links"].get("stack") for lb in inventory.of_type("load-balancer", cluster)
+                   if lb["id"] not in orphans}
+    for tg in inventory.of_type("target-group", cluster):
+        if not [arn for arn in tg["attrs"].get("load_balancers", []) if arn not in orphans]:
+            orphans[tg["id"]] = "sin ALB asociado"
+    for sg in inventory.of_type("security-group", cluster):
+        stack = sg["links"].get("stack")
+        if stack and stack not in live_stacks:
+            orphans[sg["id"]] = f"el ALB de {stack} ya no existe"
+    for record in inventory.of_type("dns-record", cluster):
+        target = record["links"].get("target", "")
+        if target.endswith(".elb.amazonaws.com"):
+            lbs = inventory.linked("load-balancer", "dns", target)
+            if not lbs or all(lb["id"] in orphans for lb in lbs):
+                orphans[record["id"]] = f"apunta a un ALB que no existe ({target})"
+    # Los TXT de propiedad siguen al registro que describen
+    for record in inventory.of_type("dns-record", cluster):
+        owns = record["links"].get("owns")
+        if owns:
+            described = [r for r in inventory.linked("dns-record", "name", owns) if r["id"] != record["id"]]
+            if not described or all(r["id"] in orphans for r in described):
+                orphans[record["id"]] = f"TXT de propiedad de un registro huérfano ({owns.rstrip('.')})"
+    if kube is not None:
+        for role in inventory.of_type("iam-role", cluster):
+            if role["links"].get("kind") == "addon-iamserviceaccount" and role["id"] not in kube["roles"]:
+                orphans[role["id"]] = "ninguna Service Account lo usa"
+    return [(inventory.resources[i], reason) for i, reason in sorted(orphans.items())]
+
+def orphan_report(inventory, cluster, orphans):
+    entries = []
+    for r, reason in orphans:
+        entry = {"type": r["type"], "id": r["id"], "name": r["name"], "reason": reason}
+        if r["type"] == "dns-record":
+            entry.update(zone=r["links"]["zone"], record=r["attrs"])
+        entries.append(entry)
+    return {"version": SNAPSHOT_VERSION, "generated_at": time.time(), "account": inventory.account,
+            "region": inventory.region, "cluster": cluster,
+            "cluster_exists": f"eks:{cluster}" in inventory.resources, "orphans": entries}
+
+def load_orphan_report(path, cluster, account):
+    """Lee un informe de --orphans comprobando que es de este clúster y cuenta y que no está caducado."""
+    try:
+        with open(path) as f:
+            report = json.load(f)
+    except (OSError, ValueError) as e:
+        raise OrphanReportError(f"No se pudo leer {path}: {e}")
+    if report.get("cluster") != cluster or report.get("account") != account:
+        raise OrphanReportError(f"{path} es del clúster {report.get('cluster')} en la cuenta {report.get('account')}, "
+                                f"no de {cluster} en {account}")
+    age = time.time() - report.get("generated_at", 0)
+    if age > ORPHAN_REPORT_MAX_AGE:
+        raise OrphanReportError(f"{path} tiene {age / 3600:.0f}h: vuelve a generarlo con inventory.py --orphans")
+    return report
+
+# ---------------------------------------------------------
+# Borrado de huérfanos (lo usa cleanup_sdk_all.py)
+# ---------------------------------------------------------
+def _ignore_missing(e, *codes):
+    if e.response["Error"]["Code"] in codes:
+        print(f"     {Colors.YELLOW}(Ignorado) Ya no existe.{Colors.END}")
+        return True
+    return False
+
+def _delete_records(route53, zone, records):
+    route53.change_resource_record_sets(HostedZoneId=zone, ChangeBatch={
+        "Changes": [{"Action": "DELETE", "ResourceRecordSet": r} for r in records]})
+
+def _delete_dns_records(clients, entries):
+    route53 = clients["route53"]
+    by_zone = defaultdict(list)
+    for entry in entries:
+        by_zone[entry["zone"]].append(entry["record"])
+    for zone, records in by_zone.items():
+        try:
+            _delete_records(route53, zone, records)
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "InvalidChangeBatch":
+                raise
+            # Algún registro cambió o ya no está desde el informe: uno a uno
+            for record in records:
+                try:
+                    _delete_records(route53, zone, [record])
+                except ClientError as e:
+                    print(f"   > {record['Name']} ({record['Type']})")
+                    if not _ignore_missing(e, "InvalidChangeBatch"):
+                        raise
+
+def _delete_load_balancers(clients, entries):
+    elbv2 = clients["elbv2"]
+    arns = {entry["id"] for entry in entries}
+    for arn in sorted(arns):
+        elbv2.delete_load_balancer(LoadBalancerArn=arn)
+
+    def gone():
+        remaining = [lb["LoadBalancerName"] for lb in paginate(elbv2, "describe_load_balancers", "LoadBalancers")
+                     if lb["LoadBalancerArn"] in arns]
+        return not remaining, f"{len(remaining)} ALB(s) huérfanos pendientes: {', '.join(sorted(remaining))}"
+    wait_until(gone, "ALBs huérfanos eliminados", timeout=ALB_DELETE_TIMEOUT)
+
+def _delete_target_groups(clients, entries):
+    for entry in entries:
+        try:
+            clients["elbv2"].delete_target_group(TargetGroupArn=entry["id"])
+        except ClientError as e:
+            if not _ignore_missing(e, "TargetGroupNotFound"):
+                raise
+
+def _delete_security_groups(clients, entries):
+    for entry in entries:
+        def deleted(group_id=entry["id"]):
+            try:
+                clients["ec2"].delete_security_group(GroupId=group_id)
+            except ClientError as e:
+                code = e.response["Error"]["Code"]
+                if code == "DependencyViolation":
+                    return False, "aún lo usa alguna interfaz de red"
+                if code != "InvalidGroup.NotFound":
+                    raise
+            return True, "borrado"
+        wait_until(deleted, f"security group {entry['id']} eliminado", timeout=SG_DELETE_TIMEOUT)
+
+def _delete_roles(clients, entries):
+    iam = clients["iam"]
+    for entry in entries:
+        name = entry["name"]
+        try:
+            for policy in paginate(iam, "list_attached_role_policies", "AttachedPolicies", RoleName=name):
+                iam.detach_role_policy(RoleName=name, PolicyArn=policy["PolicyArn"])
+            for policy_name in paginate(iam, "list_role_policies", "PolicyNames", RoleName=name):
+                iam.delete_role_policy(RoleName=name, PolicyName=policy_name)
+            iam.delete_role(RoleName=name)
+        except ClientError as e:
+            if not _ignore_missing(e, "NoSuchEntity"):
+                raise
+
+DELETERS = {
+    "dns-record": _delete_dns_records,
+    "load-balancer": _delete_load_balancers,
+    "target-group": _delete_target_groups,
+    "security-group": _delete_security_groups,
+    "iam-role": _delete_roles,
+}
+
+def delete_orphans(report, kind, region=REGION):
+    """Borra los huérfanos de un tipo del informe. Idempotente: lo que ya no existe se ignora."""
+    entries = [entry for entry in report["orphans"] if entry["type"] == kind]
+    if not entries:
+        return 0
+    for entry in entries:
+        print(f"   > Eliminando {kind} huérfano: {entry['name']} ({entry['reason']})")
+    try:
+        DELETERS[kind](aws_clients(region), entries)
+    except ReadinessError as e:
+        print(f"     {Colors.RED}⚠ {e}{Colors.END}")
+        raise
+    print(f"     {Colors.GREEN}✔ {len(entries)} {kind} huérfano(s) eliminados.{Colors.END}")
+    return len(entries)
+
+# ---------------------------------------------------------
+# Salida
+# ---------------------------------------------------------
+def print_inventory(inventory, cluster):
+    print(f"\n{Colors.BLUE}📦 Inventario de {inventory.account} ({inventory.region}) - {inventory.taken_at}{Colors.END}")
+    print(f"   {'Tipo':<16} {'Total':>6} {cluster[:20]:>20} {'otros clústeres':>16} {'sin dueño':>10}")
+    for kind in COLLECTORS:
+        items = inventory.of_type(kind)
+        mine = sum(1 for r in items if r["owner"] == cluster)
+        unowned = sum(1 for r in items if r["owner"] is None)
+        print(f"   {kind:<16} {len(items):>6} {mine:>20} {len(items) - mine - unowned:>16} {unowned:>10}")
+    others = [o for o in inventory.owners() if o != cluster]
+    if others:
+        print(f"   Otros dueños: {', '.join(others)}")
+
+def print_resources(resources, title):
+    print(f"\n{Colors.BLUE}{title} ({len(resources)}){Colors.END}")
+    for r in resources:
+        owner = f" [{r['owner']}]" if r["owner"] else ""
+        print(f"   - {r['type']:<16} {r['name']}{owner}")
+
+def print_diff(changes, before, after):
+    print(f"\n{Colors.BLUE}🔀 Cambios entre {before.taken_at} y {after.taken_at}{Colors.END}")
+    if not any(changes.values()):
+        print(f"   {Colors.GREEN}✔ Sin cambios.{Colors.END}")
+        return
+    for r in changes["added"]:
+        print(f"   {Colors.GREEN}+ {r['type']:<16} {r['name']}{Colors.END}" + (f" [{r['owner']}]" if r["owner"] else ""))
+    for r in changes["removed"]:
+        print(f"   {Colors.RED}- {r['type']:<16} {r['name']}{Colors.END}" + (f" [{r['owner']}]" if r["owner"] else ""))
+    for old, new in changes["changed"]:
+        detail = [f"dueño {old['owner']} → {new['owner']}"] if old["owner"] != new["owner"] else []
+        detail += [f"{k}: {old['tags'].get(k)} → {new['tags'].get(k)}"
+                   for k in sorted(set(old["tags"]) | set(new["tags"])) if old["tags"].get(k) != new["tags"].get(k)]
+        print(f"   {Colors.YELLOW}~ {new['type']:<16} {new['name']}{Colors.END}"
+              + (f" ({'; '.join(detail)})" if detail else " (configuración)"))
+
+def print_orphans(orphans, cluster):
+    if not orphans:
+        print(f"\n{Colors.GREEN}✔ Sin recursos huérfanos de {cluster}.{Colors.END}")
+        return
+    print(f"\n{Colors.YELLOW}🧟 Recursos huérfanos de {cluster} ({len(orphans)}){Colors.END}")
+    for r, reason in orphans:
+        print(f"   - {r['type']:<16} {r['name']}: {reason}")
+    albs = sum(1 for r, _ in orphans if r["type"] == "load-balancer")
+    if albs:
+        print(f"   💸 {albs} ALB(s) huérfanos: ~{albs * ALB_MONTHLY_COST:.2f} USD/mes sin contar LCUs")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Inventario de los recursos AWS del clúster: fotos, deriva y huérfanos.")
+    parser.add_argument("--cluster", default=CLUSTER_NAME,
+                        help=f"Clúster cuyos recursos se analizan (default: {CLUSTER_NAME})")
+    parser.add_argument("--save", metavar="ARCHIVO", help="Guarda una foto compacta del inventario (.gz para comprimirla)")
+    parser.add_argument("--compare", metavar="ARCHIVO", help="Muestra la deriva respecto a una foto anterior")
+    parser.add_argument("--diff", nargs=2, metavar=("ANTES", "DESPUÉS"),
+                        help="Compara dos fotos guardadas sin consultar AWS")
+    parser.add_argument("--orphans", metavar="ARCHIVO",
+                        help="Escribe el informe de huérfanos que consume cleanup_sdk_all.py --orphans")
+    parser.add_argument("--all-owners", action="store_true",
+                        help="En --compare/--diff incluye los recursos de otros clústeres y de la cuenta")
+    parser.add_argument("--tag", metavar="CLAVE[=VALOR]", help="Lista los recursos con este tag")
+    parser.add_argument("--owner", metavar="CLÚSTER", help="Lista los recursos de este dueño")
+    parser.add_argument("--no-kube", action="store_true",
+                        help="No consulta Kubernetes: huérfanos solo por el estado de AWS")
+    parser.add_argument("--workers", type=int, default=INVENTORY_WORKERS,
+                        help=f"Listados en paralelo (default: {INVENTORY_WORKERS})")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    owner = None if args.all_owners else args.cluster
+    if args.diff:
+        before, after = (read_snapshot(path) for path in args.diff)
+        print_diff(diff(before, after, owner), before, after)
+        return
+
+    start = time.monotonic()
+    try:
+        inventory = collect(workers=args.workers)
+    except ClientError as e:
+        print(f"{Colors.RED}❌ Error listando recursos en AWS: {e}{Colors.END}")
+        sys.exit(1)
+    print(f"🔎 {len(inventory.resources)} recursos listados en {time.monotonic() - start:.1f}s")
+    print_inventory(inventory, args.cluster)
+    if args.tag:
+        print_resources(inventory.tagged(args.tag), f"🏷️  Con el tag {args.tag}")
+    if args.owner:
+        print_resources(inventory.owned_by(args.owner), f"👤 De {args.owner}")
+    if args.compare:
+        before = read_snapshot(args.compare)
+        print_diff(diff(before, inventory, owner), before, inventory)
+
+    cluster_exists = f"eks:{args.cluster}" in inventory.resources
+    kube = kubernetes_state() if cluster_exists and not args.no_kube else None
+    orphans = find_orphans(inventory, args.cluster, kube)
+    print_orphans(orphans, args.cluster)
+    if args.orphans:
+        with open(args.orphans, "w") as f:
+            json.dump(orphan_report(inventory, args.cluster, orphans), f, indent=2, sort_keys=True, default=str)
+        print(f"   📝 Informe en {args.orphans}: python3 cleanup_sdk_all.py --orphans {args.orphans}")
+    if args.save:
+        size = write_snapshot(inventory, args.save)
+        print(f"   💾 Foto guardada en {args.save} ({size / 1024:.1f} KiB)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga de la app con informe de SLO y uso real de los pods.
+
+Genera tráfico en modelo abierto (las llegadas siguen un ritmo fijo o de Poisson,
+no esperan a las respuestas) con un cliente asyncio y conexiones keep-alive
+reutilizadas, en escalones de --rates peticiones/s. Por escalón mide p50/p95/p99
+con un histograma logarítmico (memoria constante) y la tasa de errores, y los
+cruza con la CPU y memoria de los pods que registra el Prometheus de
+setup_monitoring.py para contrastar los requests/limits de generate_app_yaml().
+
+    kubectl port-forward -n monitoring svc/prometheus-kube-prometheus-prometheus 9090 &
+    python3 loadtest.py --rates 10,25,50 --step-duration 2m
+    python3 loadtest.py --local          # Contra un stand-in local (un proceso = un pod)
+
+La latencia se mide desde el instante en que debía salir cada petición: si el
+cliente o el pool se retrasan, cuenta como latencia (sin omisión coordinada).
+"""
+import argparse
+import asyncio
+import os
+import random
+import ssl
+import subprocess
+import sys
+import time
+import urllib.parse
+
+from backends import BACKEND
+from manifests import APP_AUTOSCALING, APP_REPLICAS, app_resources, parse_quantity
+from rightsizing import (PROMETHEUS_URL, QUERIES, SELECTOR, PrometheusError, StreamingQuantile,
+                         format_cpu, format_memory, parse_duration, query_range)
+from rollout_check import TrafficRecorder
+
+# ==========================================
+# ⚙️ CONFIGURACIÓN
+# ==========================================
+BASE_DOMAIN = os.environ.get("SRE_BASE_DOMAIN", "your-domain.com")
+DOMAIN_NAME = os.environ.get("SRE_DOMAIN_NAME", f"amazon-web-demo.{BASE_DOMAIN}")   # Como setup_sdk.py
+RATES = "10,25,50"           # Peticiones/s de cada escalón
+STEP_DURATION = "60s"
+WARMUP = "10s"               # Al ritmo del primer escalón, fuera de las estadísticas
+ARRIVALS = "poisson"
+CONNECTIONS = 64             # Conexiones keep-alive como máximo
+MAX_INFLIGHT = 2000          # Por encima, la llegada se descarta (y se cuenta)
+REQUEST_TIMEOUT = 10
+SLO_P99_MS = 500
+SLO_ERROR_RATE = 0.001       # 0.1%
+# Correlación con Prometheus
+PROMETHEUS_STEP = 15
+PROMETHEUS_DELAY = 45        # Espera a que Prometheus scrapee el final de la prueba
+RATE_WINDOW = 60             # rate(...[1m]): el primer minuto de un escalón arrastra el anterior
+CPU_QUERY = f"sum by (pod) (rate(container_cpu_usage_seconds_total{{{SELECTOR}}}[1m]))"
+MEMORY_QUERY = QUERIES["memory"]
+# Stand-in local: un proceso con un solo event loop, como el pod de Node.js
+STANDIN_WORK = 3000          # Iteraciones de CPU por petición
+STANDIN_LATENCY = 0.002      # Espera de E/S simulada por petición (s)
+STANDIN_BODY = 6 * 1024      # Tamaño de la página
+SCRAPE_INTERVAL = 1.0        # En local, lectura de /metrics del stand-in
+
+class Colors:
+    BLUE = '\033[94m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    END = '\033[0m'
+
+# ---------------------------------------------------------
+# Cliente HTTP/1.1 asyncio con pool de conexiones
+# ---------------------------------------------------------
+class ConnectionPool:
+    """Conexiones keep-alive reutilizadas entre peticiones; como mucho 'size' a la vez."""
+
+    def __init__(self, url, size, timeout=REQUEST_TIMEOUT):
+        parts = urllib.parse.urlsplit(url)
+        self.tls = parts.scheme == "https"
+        self.host = parts.hostname
+        self.port = parts.port or (443 if self.tls else 80)
+        self.netloc = parts.netloc
+        self.path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self.size = size
+        self.timeout = timeout
+        self.idle = []
+        self.opened = 0
+        self._slots = None
+        self._ssl = ssl.create_default_context() if self.tls else None
+
+    async def _connect(self):
+        self.opened += 1
+        return await asyncio.wait_for(asyncio.open_connection(
+            self.host, self.port, ssl=self._ssl, server_hostname=self.host if self.tls else None), self.timeout)
+
+    async def _exchange(self, reader, writer, path):
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {self.netloc}\r\nUser-Agent: sre-loadtest\r\n"
+                     f"Accept: */*\r\n\r\n".encode())
+        await writer.drain()
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("el servidor cerró la conexión")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        keep_alive = headers.get("connection", "").lower() != "close"
+        if "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                chunks.append(await reader.readexactly(size + 2))
+                if size == 0:
+                    break
+            body = b"".join(chunk[:-2] for chunk in chunks)
+        else:
+            body, keep_alive = await reader.read(), False
+        return status, body, keep_alive
+
+    async def get(self, path=None):
+        """GET -> (código, cuerpo). Si una conexión ociosa ya estaba cerrada, reintenta con una nueva."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+        async with self._slots:
+            for attempt in range(2):
+                reused = bool(self.idle)
+                reader, writer = self.idle.pop() if reused else await self._connect()
+                try:
+                    status, body, keep_alive = await asyncio.wait_for(
+                        self._exchange(reader, writer, path or self.path), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    writer.close()
+                    if reused and attempt == 0:
+                        continue
+                    raise
+                except BaseException:
+                    writer.close()
+                    raise
+                if keep_alive:
+                    self.idle.append((reader, writer))
+                else:
+                    writer.close()
+                return status, body
+
+    def close(self):
+        for _, writer in self.idle:
+            writer.close()
+        self.idle.clear()
+
+# ---------------------------------------------------------
+# Generador en modelo abierto
+# ---------------------------------------------------------
+class StepStats:
+    """Resultados de un escalón: histograma de latencias correctas y errores por código."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.latency = StreamingQuantile()
+        self.ok = 0
+        self.errors = {}
+        self.dropped = 0
+        self.started = self.ended = 0.0
+
+    def record(self, status, latency):
+        if TrafficRecorder.is_error(status):
+            self.errors[status] = self.errors.get(status, 0) + 1
+        else:
+            self.ok += 1
+            self.latency.add(latency)
+
+    @property
+    def total(self):
+        return self.ok + sum(self.errors.values()) + self.dropped
+
+    @property
+    def error_rate(self):
+        return (sum(self.errors.values()) + self.dropped) / self.total if self.total else 0.0
+
+    @property
+    def throughput(self):
+        return self.ok / (self.ended - self.started) if self.ended > self.started else 0.0
+
+    def p(self, percentile):
+        return self.latency.quantile(percentile) * 1000
+
+async def fire(pool, scheduled, stats, loop):
+    try:
+        status, _ = await pool.get()
+    except (OSError, EOFError, ValueError, asyncio.TimeoutError):
+        status = 0   # Conexión rechazada, reset, respuesta ilegible o timeout
+    stats.record(status, loop.time() - scheduled)
+
+async def run_step(pool, stats, duration, arrivals, rng, max_inflight=MAX_INFLIGHT):
+    """Lanza peticiones a stats.rate por segundo durante 'duration' sin esperar respuestas."""
+    loop = asyncio.get_running_loop()
+    inflight = set()
+    start = scheduled = loop.time()
+    stats.started = time.time()
+    while True:
+        scheduled += rng.expovariate(stats.rate) if arrivals == "poisson" else 1 / stats.rate
+        if scheduled - start >= duration:
+            break
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(inflight) >= max_inflight:
+            stats.dropped += 1
+            continue
+        task = loop.create_task(fire(pool, scheduled, stats, loop))
+        inflight.add(task)
+        task.add_done_callback(inflight.discard)
+    if inflight:
+        await asyncio.wait(inflight)
+    stats.ended = time.time()
+
+# ---------------------------------------------------------
+# Uso de CPU/memoria de los pods
+# ---------------------------------------------------------
+class PrometheusUsage:
+    """CPU y memoria por pod de la app en el Prometheus del clúster."""
+
+    source = "Prometheus"
+
+    def __init__(self, url):
+        self.url = url
+
+    def usage(self, start, end):
+        start += min(RATE_WINDOW, (end - start) / 2)
+        cpu = query_range(self.url, CPU_QUERY, start, end, PROMETHEUS_STEP)
+        memory = query_range(self.url, MEMORY_QUERY, start, end, PROMETHEUS_STEP)
+        cpu_values = [float(v) for series in cpu for _, v in series["values"]]
+        memory_values = [float(v) for series in memory for _, v in series["values"]]
+        if not cpu_values or not memory_values:
+            return None
+        return {"pods": len({series["metric"].get("pod") for series in cpu}),
+                "cpu_avg": sum(cpu_values) / len(cpu_values), "cpu_max": max(cpu_values),
+                "memory_max": max(memory_values)}
+
+class ScrapeUsage:
+    """En local: lee /metrics del stand-in cada SCRAPE_INTERVAL (hace de Prometheus con un solo pod)."""
+
+    source = "stand-in /metrics"
+
+    def __init__(self, url):
+        self.pool = ConnectionPool(url, 1)
+        self.samples = []
+
+    async def run(self, stop):
+        while not stop.is_set():
+            try:
+                _, body = await self.pool.get("/metrics")
+                metrics = dict(line.split() for line in body.decode().splitlines() if line and line[0] != "#")
+                self.samples.append((time.time(), float(metrics["process_cpu_seconds_total"]),
+                                     float(metrics["process_resident_memory_bytes"])))
+            except (OSError, EOFError, ValueError, KeyError, asyncio.TimeoutError):
+                pass
+            try:
+                await asyncio.wait_for(stop.wait(), SCRAPE_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+        self.pool.close()
+
+    def usage(self, start, end):
+        points = [s for s in self.samples if start <= s[0] <= end]
+        rates = [(b[1] - a[1]) / (b[0] - a[0]) for a, b in zip(points, points[1:]) if b[0] > a[0]]
+        if not rates:
+            return None
+        return {"pods": 1, "cpu_avg": (points[-1][1] - points[0][1]) / (points[-1][0] - points[0][0]),
+                "cpu_max": max(rates), "memory_max": max(s[2] for s in points)}
+
+# ---------------------------------------------------------
+# Stand-in local de la app
+# ---------------------------------------------------------
+def _burn(iterations):
+    total = 0
+    for i in range(iterations):
+        total += i * i
+    return total
+
+def _resident_memory():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+async def standin(port, work, latency, body_size):
+    """Servidor HTTP/1.1 keep-alive de un solo event loop: '/' cuesta CPU + E/S, '/metrics' expone el proceso."""
+    page = b"<!doctype html><title>Amazon Web Demo</title>" + b"x" * body_size
+    served = 0
+
+    async def handle(reader, writer):
+        nonlocal served
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                if request_line.split()[1] == b"/metrics":
+                    payload = (f"process_cpu_seconds_total {time.process_time():.6f}\n"
+                               f"process_resident_memory_bytes {_resident_memory()}\n"
+                               f"http_requests_total {served}\n").encode()
+                else:
+                    served += 1
+                    _burn(work)
+                    await asyncio.sleep(latency)
+                    payload = page
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nContent-Length: %d\r\n\r\n"
+                             % len(payload) + payload)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, IndexError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", port)
+    print(f"PORT {server.sockets[0].getsockname()[1]}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+def start_standin(args):
+    """Arranca el stand-in en otro proceso (su CPU no se mezcla con la del generador). Devuelve (proceso, url)."""
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--standin", "--port", "0",
+                             "--standin-work", str(args.standin_work)], stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    if not line.startswith("PORT "):
+        proc.kill()
+        raise RuntimeError("el stand-in no arrancó")
+    return proc, f"http://127.0.0.1:{int(line.split()[1])}/"
+
+# ---------------------------------------------------------
+# Informe
+# ---------------------------------------------------------
+def fit_cpu(points):
+    """Recta CPU por pod = reposo + coste * rps por pod (mínimos cuadrados). None con menos de 2 escalones."""
+    if len(points) < 2:
+        return None
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    var = sum((x - mean_x) ** 2 for x, _ in points)
+    if var == 0:
+        return None
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in points) / var
+    return max(0.0, mean_y - slope * mean_x), slope
+
+def print_steps(steps, slo_p99_ms, slo_error_rate):
+    print(f"\n{Colors.BLUE}📈 Latencia y errores por escalón{Colors.END}")
+    print(f"   {'OBJETIVO':>10}{'REAL':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'MÁX':>9}{'ERRORES':>10}  SLO")
+    breached = False
+    for s in steps:
+        ok = s.p(99) <= slo_p99_ms and s.error_rate <= slo_error_rate
+        breached |= not ok
+        verdict = f"{Colors.GREEN}✔{Colors.END}" if ok else f"{Colors.RED}✖{Colors.END}"
+        codes = ", ".join(f"{code or 'sin respuesta'}: {n}" for code, n in sorted(s.errors.items()))
+        if s.dropped:
+            codes += (", " if codes else "") + f"descartadas: {s.dropped}"
+        print(f"   {s.rate:>8g}/s{s.throughput:>7.1f}/s{s.p(50):>7.1f}ms{s.p(95):>7.1f}ms{s.p(99):>7.1f}ms"
+              f"{s.latency.max * 1000:>7.0f}ms{s.error_rate * 100:>9.2f}%  {verdict} {codes}")
+    print(f"   SLO: p99 <= {slo_p99_ms:g}ms y errores <= {slo_error_rate * 100:g}%")
+    return breached
+
+def print_usage(steps, usages, source):
+    """Cruza el rendimiento de cada escalón con el uso de los pods y lo compara con requests/limits."""
+    resources = app_resources()
+    cpu_request = parse_quantity(resources["requests"]["cpu"])
+    memory_request = parse_quantity(resources["requests"]["memory"])
+    memory_limit = parse_quantity(resources["limits"]["memory"])
+    print(f"\n{Colors.BLUE}🧠 Uso por pod ({source}) frente a requests/limits{Colors.END}")
+    print(f"   {'OBJETIVO':>10}{'PODS':>6}{'RPS/POD':>9}{'CPU MEDIA':>11}{'CPU MÁX':>9}{'MEM MÁX':>9}")
+    points = []
+    for s, usage in zip(steps, usages):
+        if usage is None:
+            print(f"   {s.rate:>8g}/s   (sin datos)")
+            continue
+        per_pod = s.throughput / usage["pods"]
+        points.append((per_pod, usage["cpu_avg"]))
+        print(f"   {s.rate:>8g}/s{usage['pods']:>6}{per_pod:>9.1f}{format_cpu(usage['cpu_avg']):>11}"
+              f"{format_cpu(usage['cpu_max']):>9}{format_memory(usage['memory_max']):>9}")
+    measured = [u for u in usages if u]
+    if not measured:
+        print(f"{Colors.YELLOW}   ⚠️ Sin datos de uso: no se pueden contrastar los requests.{Colors.END}")
+        return
+    fit = fit_cpu(points)
+    if fit and fit[1] > 0:
+        idle, cost = fit
+        capacity = (cpu_request - idle) / cost
+        print(f"\n   CPU ≈ {format_cpu(idle)} en reposo + {format_cpu(cost * 100)} por cada 100 rps por pod")
+        print(f"   El request de {resources['requests']['cpu']} cubre ~{max(0.0, capacity):.0f} rps por pod "
+              f"(~{max(0.0, capacity) * APP_REPLICAS:.0f} rps con {APP_REPLICAS} réplicas; la HPA escala al "
+              f"{APP_AUTOSCALING['cpu_utilization']}%: ~{max(0.0, capacity) * APP_AUTOSCALING['cpu_utilization'] / 100:.0f} rps por pod)")
+    memory_max = max(u["memory_max"] for u in measured)
+    if memory_max > memory_limit:
+        print(f"{Colors.RED}   ❌ Memoria máx {format_memory(memory_max)} por encima del limit "
+              f"{resources['limits']['memory']}: OOMKilled bajo carga.{Colors.END}")
+    elif memory_max > memory_request:
+        print(f"{Colors.YELLOW}   ⚠️ Memoria máx {format_memory(memory_max)} por encima del request "
+              f"{resources['requests']['memory']}: el nodo puede quedarse corto.{Colors.END}")
+    else:
+        print(f"{Colors.GREEN}   ✔ Memoria máx {format_memory(memory_max)} dentro del request "
+              f"{resources['requests']['memory']} (limit {resources['limits']['memory']}).{Colors.END}")
+    print("   Para ajustar requests/limits con estos datos: python3 rightsizing.py --window 1h --apply")
+
+# ---------------------------------------------------------
+# Programa principal
+# ---------------------------------------------------------
+async def load_test(args, url, scraper):
+    pool = ConnectionPool(url, args.connections)
+    rng = random.Random(args.seed)
+    stop = asyncio.Event()
+    scrape_task = asyncio.get_running_loop().create_task(scraper.run(stop)) if scraper else None
+    steps = []
+    try:
+        if args.warmup:
+            print(f"   🔥 Calentamiento: {args.warmup:g}s a {args.rates[0]:g}/s")
+            await run_step(pool, StepStats(args.rates[0]), args.warmup, args.arrivals, rng, args.max_inflight)
+        for rate in args.rates:
+            stats = StepStats(rate)
+            print(f"   ▶️ {rate:g} peticiones/s durante {args.step_duration:g}s ({args.arrivals})")
+            await run_step(pool, stats, args.step_duration, args.arrivals, rng, args.max_inflight)
+            steps.append(stats)
+    finally:
+        stop.set()
+        if scrape_task:
+            await scrape_task
+        pool.close()
+    print(f"   🔌 {pool.opened} conexiones abiertas para {sum(s.total for s in steps)} peticiones")
+    return steps
+
+def parse_rates(text):
+    try:
+        rates = [float(r) for r in text.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Ritmos inválidos: {text!r} (usa p.ej. 10,25,50)")
+    if not rates or any(r <= 0 for r in rates):
+        raise argparse.ArgumentTypeError("Los ritmos deben ser positivos")
+    return rates
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga de la app con SLO y uso de los pods.")
+    parser.add_argument("--url", help=f"URL a probar (default: https://{DOMAIN_NAME}/)")
+    parser.add_argument("--local", action="store_true",
+                        help="Prueba contra un stand-in local (default con SRE_BACKEND=fake y sin --url)")
+    parser.add_argument("--rates", type=parse_rates, default=parse_rates(RATES),
+                        help=f"Peticiones/s de cada escalón (default: {RATES})")
+    parser.add_argument("--step-duration", type=parse_duration, default=STEP_DURATION,
+                        help=f"Duración de cada escalón (default: {STEP_DURATION})")
+    parser.add_argument("--warmup", type=parse_duration, default=WARMUP, help=f"Calentamiento (default: {WARMUP})")
+    parser.add_argument("--arrivals", choices=("poisson", "constant"), default=ARRIVALS)
+    parser.add_argument("--connections", type=int, default=CONNECTIONS,
+                        help=f"Máximo de conexiones keep-alive (default: {CONNECTIONS})")
+    parser.add_argument("--max-inflight", type=int, default=MAX_INFLIGHT)
+    parser.add_argument("--slo-p99", type=float, default=SLO_P99_MS, help=f"p99 máximo en ms (default: {SLO_P99_MS})")
+    parser.add_argument("--slo-error-rate", type=float, default=SLO_ERROR_RATE,
+                        help=f"Tasa de errores máxima (default: {SLO_ERROR_RATE})")
+    parser.add_argument("--prometheus-url", default=PROMETHEUS_URL, help=f"URL de Prometheus (default: {PROMETHEUS_URL})")
+    parser.add_argument("--prometheus-delay", type=parse_duration, default=PROMETHEUS_DELAY,
+                        help=f"Espera antes de consultar Prometheus (default: {PROMETHEUS_DELAY}s)")
+    parser.add_argument("--no-prometheus", action="store_true", help="No cruza los resultados con Prometheus")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--standin", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--standin-work", type=int, default=STANDIN_WORK,
+                        help=f"Iteraciones de CPU por petición del stand-in (default: {STANDIN_WORK})")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.standin:
+        asyncio.run(standin(args.port, args.standin_work, STANDIN_LATENCY, STANDIN_BODY))
+        return
+    print(f"{Colors.BLUE}================================================={Colors.END}")
+    print(f"{Colors.BLUE}   LOAD TEST (modelo abierto)                     {Colors.END}")
+    print(f"{Colors.BLUE}================================================={Colors.END}")
+    local = args.local or (BACKEND == "fake" and not args.url)
+    standin_proc = None
+    if local:
+        standin_proc, url = start_standin(args)
+        usage_source = ScrapeUsage(url)
+    else:
+        url = args.url or f"https://{DOMAIN_NAME}/"
+        usage_source = None if args.no_prometheus else PrometheusUsage(args.prometheus_url)
+    print(f"🎯 {url} {'(stand-in local)' if local else ''}")
+    try:
+        steps = asyncio.run(load_test(args, url, usage_source if local else None))
+    finally:
+        if standin_proc:
+            standin_proc.terminate()
+            standin_proc.wait()
+    breached = print_steps(steps, args.slo_p99, args.slo_error_rate)
+
+    if usage_source:
+        if not local and args.prometheus_delay:
+            print(f"\n   ⏳ Esperando {args.prometheus_delay:g}s a que Prometheus scrapee el final de la prueba...")
+            time.sleep(args.prometheus_delay)
+        try:
+            usages = [usage_source.usage(s.started, s.ended) for s in steps]
+        except (PrometheusError, OSError) as e:
+            print(f"{Colors.YELLOW}   ⚠️ No se pudo consultar Prometheus ({e}): sin correlación con el uso.{Colors.END}")
+        else:
+            print_usage(steps, usages, usage_source.source)
+    if breached:
+        print(f"\n{Colors.RED}❌ SLO incumplido en algún escalón.{Colors.END}")
+        sys.exit(1)
+    print(f"\n{Colors.GREEN}✅ SLO cumplido en todos los escalones.{Colors.END}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,849 @@
+#!/usr/bin/env python3
+"""
+Manifiestos de Kubernetes como datos: se construyen con funciones, se validan sin
+conexión contra un esquema mínimo de los tipos que usamos y se serializan a YAML
+con PyYAML, conservando el orden de las claves para que la salida sea determinista.
+
+La misma plantilla genera la app (Deployment + Service + Ingress) y el Ingress de
+Grafana; el resultado se memoriza por el hash de sus entradas.
+"""
+import json
+import os
+import re
+import tempfile
+
+import yaml
+
+from state_fingerprint import fingerprint
+
+# ==========================================
+# ⚙️ CONFIGURACIÓN (valores por defecto de la app)
+# ==========================================
+APP_LABEL = "amazon-app"
+APP_DEPLOYMENT = "amazon-deployment"
+APP_SERVICE = "amazon-service-alb"
+APP_INGRESS = "amazon-ingress-alb"
+APP_CONTAINER = "amazon-container"
+APP_IMAGE = "ooghenekaro/amazon:3"
+APP_PORT = 3000
+APP_REPLICAS = 6
+APP_RESOURCES = {
+    # Memoria: basada en el consumo observado en Grafana (~515Mi).
+    # CPU: el consumo real es ~0.4m; 50m basta para arrancar sin desperdiciar el nodo.
+    "requests": {"memory": "550Mi", "cpu": "50m"},
+    # Si hay un memory leak lo matamos antes de que afecte al nodo; burst de 1/4 de núcleo.
+    "limits": {"memory": "750Mi", "cpu": "250m"},
+}
+# HPA de la app (setup_sdk.py --autoscaling): sustituye a APP_REPLICAS
+APP_HPA = "amazon-hpa"
+APP_AUTOSCALING = {
+    "min_replicas": int(os.environ.get("SRE_HPA_MIN_REPLICAS", "2")),
+    "max_replicas": int(os.environ.get("SRE_HPA_MAX_REPLICAS", "12")),
+    # Objetivo en % de requests: con requests ajustados (rightsizing.py) refleja la carga real
+    "cpu_utilization": int(os.environ.get("SRE_HPA_CPU_TARGET", "70")),
+    "memory_utilization": int(os.environ["SRE_HPA_MEMORY_TARGET"]) if os.environ.get("SRE_HPA_MEMORY_TARGET") else None,
+}
+# Despliegue sin cortes: rolling update con probes, PDB y drenado coordinado con el ALB
+APP_PDB = "amazon-pdb"
+APP_HEALTH_PATH = "/"                  # La imagen no expone un endpoint de salud dedicado
+APP_ROLLOUT = {
+    "max_surge": "25%",
+    "max_unavailable": 0,              # Nunca por debajo de las réplicas deseadas durante un deploy
+    "min_ready_seconds": 5,
+    "probe_period_seconds": 5,
+    "startup_failure_threshold": 30,   # Hasta 150s para arrancar antes de que actúe el liveness
+    # preStop > lo que tardan el ALB y kube-proxy en dejar de enviar tráfico al pod que termina
+    "pre_stop_sleep_seconds": 15,
+    "termination_grace_seconds": 45,   # preStop + cierre ordenado de la app
+    "healthcheck_interval_seconds": 10,
+    "deregistration_delay_seconds": 30,  # Drenado en el ALB (default de AWS: 300s)
+    "pdb_max_unavailable": 1,
+}
+# Ruta de red directa (setup_sdk.py --ip-targets): el ALB envía a la IP del pod, sin NodePort
+# ni el salto extra de kube-proxy, y los pods se reparten por zona y por nodo
+APP_NAMESPACE = "default"
+APP_NETWORK = {
+    "target_type": "ip",
+    "service_type": "ClusterIP",
+    "topology_mode": "Auto",           # Topology Aware Routing: kube-proxy prefiere endpoints de su zona
+    "zone_max_skew": 1,
+    "host_max_skew": 1,
+    # Preferencia, no obligación: con pocos nodos una regla estricta dejaría pods en Pending
+    "when_unsatisfiable": "ScheduleAnyway",
+    "readiness_gate": True,            # El pod no está Ready hasta que el ALB lo ve sano en su target group
+}
+# Perfiles del kube-prometheus-stack (setup_monitoring.py --stack-profile o SRE_MONITORING_PROFILE).
+# "full" deja los valores del chart; "lean" lo ajusta a 2 nodos t3.medium compartidos con la app
+MONITORING_NAMESPACE = "monitoring"
+MONITORING_RELEASE = "prometheus"
+MONITORING_SERVICE_MONITOR = "amazon-app"
+APP_METRICS_PATH = "/metrics"          # Solo con setup_monitoring.py --app-metrics: la imagen de la demo no lo expone
+# Reglas de drop de cAdvisor que trae el chart: al fijar la lista hay que repetirlas
+CADVISOR_DEFAULT_DROPS = [
+    "container_cpu_(cfs_throttled_seconds_total|load_average_10s|system_seconds_total|user_seconds_total)",
+    "container_fs_(io_current|io_time_seconds_total|io_time_weighted_seconds_total|reads_merged_total|"
+    "sector_reads_total|sector_writes_total|writes_merged_total)",
+    "container_memory_(mapped_file|swap)",
+    "container_(file_descriptors|tasks_state|threads_max)",
+    "container_spec.*",
+    {"sourceLabels": ["id", "pod"], "regex": ".+;", "action": "drop"},   # cgroups sin pod (systemd)
+]
+MONITORING_PROFILES = {
+    "full": None,
+    "lean": {
+        "retention": "3d",
+        "retention_size": "4GB",       # Por debajo de 'storage': Prometheus borra bloques antes de llenar el volumen
+        "storage": "5Gi",              # emptyDir con límite: el clúster no trae el driver EBS CSI
+        "scrape_interval": "60s",
+        "app_scrape_interval": "30s",
+        "app_sample_limit": 2000,      # Si la app dispara su cardinalidad, Prometheus descarta el scrape entero
+        # El plano de control lo gestiona EKS: sus ServiceMonitors solo producen targets caídos y alertas
+        "disabled_components": ["kubeControllerManager", "kubeScheduler", "kubeEtcd", "kubeProxy"],
+        "disabled_rules": ["etcd", "kubeControllerManager", "kubeSchedulerAlerting", "kubeSchedulerRecording",
+                           "kubeProxy", "kubeApiserverSlos", "kubeApiserverBurnrate", "kubeApiserverHistogram",
+                           "windows"],
+        # Ruta de valores del chart -> requests/limits (node-exporter va en cada nodo)
+        "resources": {
+            "prometheus.prometheusSpec": {"requests": {"cpu": "100m", "memory": "512Mi"}, "limits": {"memory": "1Gi"}},
+            "grafana": {"requests": {"cpu": "50m", "memory": "160Mi"}, "limits": {"memory": "320Mi"}},
+            "grafana.sidecar": {"requests": {"cpu": "10m", "memory": "48Mi"}, "limits": {"memory": "96Mi"}},
+            "prometheus-node-exporter": {"requests": {"cpu": "10m", "memory": "24Mi"}, "limits": {"memory": "64Mi"}},
+            "kube-state-metrics": {"requests": {"cpu": "10m", "memory": "64Mi"}, "limits": {"memory": "128Mi"}},
+            "prometheusOperator": {"requests": {"cpu": "20m", "memory": "64Mi"}, "limits": {"memory": "128Mi"}},
+            "alertmanager.alertmanagerSpec": {"requests": {"cpu": "10m", "memory": "48Mi"}, "limits": {"memory": "96Mi"}},
+        },
+        # Ruta de valores del chart -> series a descartar al ingerir (regex sobre __name__ o regla completa)
+        "drop": {
+            "kubelet.serviceMonitor.cAdvisorMetricRelabelings": CADVISOR_DEFAULT_DROPS + [
+                "container_(blkio_device_usage_total|memory_failures_total|last_seen|start_time_seconds|"
+                "processes|sockets|threads|ulimits_soft)",
+                "container_network_(receive|transmit)_(errors|packets_dropped)_total",
+                "container_fs_.*",
+            ],
+            "kubelet.serviceMonitor.metricRelabelings": [
+                "(kubelet_runtime_operations_duration_seconds|kubelet_pod_worker_duration_seconds|"
+                "kubelet_http_requests_duration_seconds|storage_operation_duration_seconds|"
+                "rest_client_request_duration_seconds|rest_client_rate_limiter_duration_seconds|"
+                "csi_operations_seconds)_bucket",
+            ],
+            # Los histogramas del apiserver son, con diferencia, las series más numerosas del stack
+            "kubeApiServer.serviceMonitor.metricRelabelings": [
+                "apiserver_(request_duration_seconds|request_sli_duration_seconds|request_body_size_bytes|"
+                "response_sizes|watch_events_sizes|watch_list_duration_seconds)_bucket",
+                "(etcd_request_duration_seconds|workqueue_.*_seconds|apiserver_flowcontrol_.*)_bucket",
+                "apiserver_storage_.*",
+            ],
+            "prometheus-node-exporter.prometheus.monitor.metricRelabelings": [
+                "node_(scrape_collector_.*|cpu_guest_seconds_total|softnet_.*|schedstat_.*|timex_.*|"
+                "nf_conntrack_stat_.*|entropy_.*|arp_entries|filesystem_device_error)",
+                "node_network_(carrier.*|protocol_type|device_id|address_assign_type|iface_.*|"
+                "name_assign_type|net_dev_group|transmit_queue_length|dormant)",
+            ],
+        },
+    },
+}
+MONITORING_PROFILE = os.environ.get("SRE_MONITORING_PROFILE", "lean")
+# Copias de cada componente con requests (None = una por nodo); el resto tiene una réplica
+MONITORING_COPIES = {"prometheus-node-exporter": None, "grafana.sidecar": 2}   # sidecars: dashboards y datasources
+# Recomendación de rightsizing.py (--apply): si existe, sustituye a APP_RESOURCES
+APP_RESOURCES_FILE = os.environ.get("SRE_APP_RESOURCES_FILE", "app-resources.json")
+GENERATED_HEADER = "Generado por setup_sdk.py (manifests.py). No editar a mano: se sobrescribe."
+
+class Colors:
+    BLUE = '\033[94m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    END = '\033[0m'
+
+class ManifestError(ValueError):
+    """El manifiesto no cumple el esquema o es incoherente (selectores, backends...)."""
+
+# ---------------------------------------------------------
+# Constructores
+# ---------------------------------------------------------
+def deployment(name, label, container, image, port, replicas, resources, namespace=None,
+               rollout=None, health_path=None, network=None):
+    """
+    Deployment con antiafinidad preferente por nodo (lo pide el linter del pipeline).
+    replicas=None deja el número de réplicas en manos de una HPA. Con 'rollout'
+    (ver APP_ROLLOUT) añade estrategia, probes sobre health_path y drenado al terminar.
+    Con 'network' (ver APP_NETWORK) reparte los pods por zona y por nodo.
+    """
+    labels = {"app": label}
+    app_container = {
+        "name": container,
+        "image": image,
+        "ports": [{"containerPort": port}],
+        "resources": resources,
+    }
+    pod_spec = {
+        "affinity": {"podAntiAffinity": {"preferredDuringSchedulingIgnoredDuringExecution": [{
+            "weight": 100,
+            "podAffinityTerm": {
+                "labelSelector": {"matchExpressions": [
+                    {"key": "app", "operator": "In", "values": [label]}]},
+                "topologyKey": "kubernetes.io/hostname",
+            },
+        }]}},
+        "containers": [app_container],
+    }
+    spec = {"replicas": replicas} if replicas is not None else {}
+    if rollout:
+        spec["strategy"] = {"type": "RollingUpdate", "rollingUpdate": {
+            "maxSurge": rollout["max_surge"], "maxUnavailable": rollout["max_unavailable"]}}
+        spec["minReadySeconds"] = rollout["min_ready_seconds"]
+        period = rollout["probe_period_seconds"]
+        # startup: margen para arrancar; readiness: entra/sale del balanceo; liveness: reinicia si se cuelga
+        app_container["startupProbe"] = http_probe(health_path, port, period, rollout["startup_failure_threshold"])
+        app_container["readinessProbe"] = http_probe(health_path, port, period, 2)
+        app_container["livenessProbe"] = http_probe(health_path, port, period * 2, 3)
+        # Al terminar, el pod sigue sirviendo mientras el ALB y kube-proxy dejan de enviarle tráfico
+        app_container["lifecycle"] = {"preStop": {"sleep": {"seconds": rollout["pre_stop_sleep_seconds"]}}}
+        pod_spec["terminationGracePeriodSeconds"] = rollout["termination_grace_seconds"]
+    if network:
+        # pod-template-hash: durante un rollout cada ReplicaSet se reparte por su cuenta
+        pod_spec["topologySpreadConstraints"] = [{
+            "maxSkew": network[f"{scope}_max_skew"],
+            "topologyKey": key,
+            "whenUnsatisfiable": network["when_unsatisfiable"],
+            "labelSelector": {"matchLabels": dict(labels)},
+            "matchLabelKeys": ["pod-template-hash"],
+        } for scope, key in (("zone", "topology.kubernetes.io/zone"), ("host", "kubernetes.io/hostname"))]
+    spec["selector"] = {"matchLabels": dict(labels)}
+    spec["template"] = {"metadata": {"labels": dict(labels)}, "spec": pod_spec}
+    return {
+        "apiVersion": "apps/v1",
+        "kind": "Deployment",
+        "metadata": _metadata(name, namespace),
+        "spec": spec,
+    }
+
+def http_probe(path, port, period, failure_threshold, timeout=2):
+    return {
+        "httpGet": {"path": path, "port": port},
+        "periodSeconds": period,
+        "timeoutSeconds": timeout,
+        "failureThreshold": failure_threshold,
+    }
+
+def pod_disruption_budget(name, label, max_unavailable, namespace=None):
+    """PDB: los drenajes de nodos (p.ej. del Cluster Autoscaler) no tiran más de max_unavailable pods."""
+    return {
+        "apiVersion": "policy/v1",
+        "kind": "PodDisruptionBudget",
+        "metadata": _metadata(name, namespace),
+        "spec": {"maxUnavailable": max_unavailable, "selector": {"matchLabels": {"app": label}}},
+    }
+
+def alb_health_annotations(path, rollout):
+    """Health check del target group y tiempo de drenado de conexiones al desregistrar un target."""
+    return {
+        "alb.ingress.kubernetes.io/healthcheck-path": path,
+        "alb.ingress.kubernetes.io/healthcheck-interval-seconds": str(rollout["healthcheck_interval_seconds"]),
+        "alb.ingress.kubernetes.io/healthy-threshold-count": "2",
+        "alb.ingress.kubernetes.io/unhealthy-threshold-count": "2",
+        "alb.ingress.kubernetes.io/success-codes": "200-399",
+        "alb.ingress.kubernetes.io/target-group-attributes":
+            f"deregistration_delay.timeout_seconds={rollout['deregistration_delay_seconds']}",
+    }
+
+def service(name, label, port, target_port, service_type="NodePort", namespace=None, annotations=None):
+    metadata = _metadata(name, namespace)
+    metadata["labels"] = {"app": label}   # Lo que selecciona el ServiceMonitor
+    if annotations:
+        metadata["annotations"] = dict(annotations)
+    return {
+        "apiVersion": "v1",
+        "kind": "Service",
+        "metadata": metadata,
+        "spec": {
+            "type": service_type,
+            "ports": [{"port": port, "targetPort": target_port}],
+            "selector": {"app": label},
+        },
+    }
+
+def service_monitor(name, namespace, label, target_namespace, target_port, path, interval,
+                    release=None, sample_limit=None):
+    """ServiceMonitor del Prometheus Operator limitado a los Services con app=<label> de un namespace."""
+    metadata = _metadata(name, namespace)
+    if release:
+        metadata["labels"] = {"release": release}   # El Prometheus del chart solo ve los de su release
+    spec = {
+        "selector": {"matchLabels": {"app": label}},
+        "namespaceSelector": {"matchNames": [target_namespace]},
+        "endpoints": [{"targetPort": target_port, "path": path, "interval": interval}],
+    }
+    if sample_limit:
+        spec["sampleLimit"] = sample_limit
+    return {"apiVersion": "monitoring.coreos.com/v1", "kind": "ServiceMonitor", "metadata": metadata, "spec": spec}
+
+def namespace_object(name, labels=None):
+    metadata = {"name": name}
+    if labels:
+        metadata["labels"] = dict(labels)
+    return {"apiVersion": "v1", "kind": "Namespace", "metadata": metadata}
+
+def alb_ingress(name, host, cert_arn, service_name, service_port, namespace=None,
+                target_type="instance", annotations=None):
+    """Ingress para el AWS Load Balancer Controller con HTTPS y registro DNS vía ExternalDNS."""
+    all_annotations = {
+        "kubernetes.io/ingress.class": "alb",
+        "alb.ingress.kubernetes.io/scheme": "internet-facing",
+        "alb.ingress.kubernetes.io/target-type": target_type,
+        "external-dns.alpha.kubernetes.io/hostname": host,
+        "alb.ingress.kubernetes.io/certificate-arn": cert_arn,
+        "alb.ingress.kubernetes.io/listen-ports": json.dumps([{"HTTP": 80}, {"HTTPS": 443}]),
+        "alb.ingress.kubernetes.io/actions.ssl-redirect": json.dumps({
+            "Type": "redirect",
+            "RedirectConfig": {"Protocol": "HTTPS", "Port": "443", "StatusCode": "HTTP_301"}}),
+    }
+    all_annotations.update(annotations or {})
+    return {
+        "apiVersion": "networking.k8s.io/v1",
+        "kind": "Ingress",
+        "metadata": dict(_metadata(name, namespace), annotations=all_annotations),
+        "spec": {
+            "rules": [{
+                "host": host,
+                "http": {"paths": [{
+                    "path": "/",
+                    "pathType": "Prefix",
+                    "backend": {"service": {"name": service_name, "port": {"number": service_port}}},
+                }]},
+            }],
+        },
+    }
+
+def horizontal_pod_autoscaler(name, deployment_name, min_replicas, max_replicas, cpu_utilization=None,
+                              memory_utilization=None, namespace=None):
+    """
+    HPA (autoscaling/v2) sobre el uso medio en % de requests. Sube rápido ante picos
+    y baja despacio (ventana de 5 minutos) para no oscilar con el tráfico.
+    """
+    metrics = [{"type": "Resource", "resource": {"name": resource, "target": {
+                   "type": "Utilization", "averageUtilization": target}}}
+               for resource, target in (("cpu", cpu_utilization), ("memory", memory_utilization)) if target]
+    return {
+        "apiVersion": "autoscaling/v2",
+        "kind": "HorizontalPodAutoscaler",
+        "metadata": _metadata(name, namespace),
+        "spec": {
+            "scaleTargetRef": {"apiVersion": "apps/v1", "kind": "Deployment", "name": deployment_name},
+            "minReplicas": min_replicas,
+            "maxReplicas": max_replicas,
+            "metrics": metrics,
+            "behavior": {
+                "scaleUp": {"stabilizationWindowSeconds": 0, "selectPolicy": "Max", "policies": [
+                    {"type": "Percent", "value": 100, "periodSeconds": 30},
+                    {"type": "Pods", "value": 4, "periodSeconds": 30}]},
+                "scaleDown": {"stabilizationWindowSeconds": 300, "selectPolicy": "Max", "policies": [
+                    {"type": "Percent", "value": 50, "periodSeconds": 60}]},
+            },
+        },
+    }
+
+def app_manifests(domain_name, cert_arn, replicas=APP_REPLICAS, image=APP_IMAGE,
+                  resources=APP_RESOURCES, port=APP_PORT, autoscaling=None, rollout=APP_ROLLOUT,
+                  health_path=APP_HEALTH_PATH, network=None):
+    """
+    Deployment + Service + Ingress de la app web, más su HPA si se pasa 'autoscaling'.
+    rollout=None genera el manifiesto sin probes, PDB ni drenado (como antes).
+    network=APP_NETWORK usa targets IP con un Service ClusterIP en lugar de NodePort.
+    """
+    if network:
+        service_type, target_type = network["service_type"], network["target_type"]
+        service_annotations = {"service.kubernetes.io/topology-mode": network["topology_mode"]}
+    else:
+        service_type, target_type, service_annotations = "NodePort", "instance", None
+    objects = [
+        # Con HPA el Deployment no fija réplicas: cada apply las devolvería al valor del YAML
+        deployment(APP_DEPLOYMENT, APP_LABEL, APP_CONTAINER, image, port,
+                   None if autoscaling else replicas, resources, rollout=rollout, health_path=health_path,
+                   network=network),
+        service(APP_SERVICE, APP_LABEL, 80, port, service_type=service_type, annotations=service_annotations),
+        alb_ingress(APP_INGRESS, domain_name, cert_arn, APP_SERVICE, 80, target_type=target_type,
+                    annotations=alb_health_annotations(health_path, rollout) if rollout else None),
+    ]
+    if network and network.get("readiness_gate"):
+        # El ALB Controller inyecta el readiness gate en los pods nuevos de los namespaces etiquetados
+        objects.insert(0, namespace_object(APP_NAMESPACE, {"elbv2.k8s.aws/pod-readiness-gate-inject": "enabled"}))
+    if rollout:
+        objects.append(pod_disruption_budget(APP_PDB, APP_LABEL, rollout["pdb_max_unavailable"]))
+    if autoscaling:
+        objects.append(horizontal_pod_autoscaler(APP_HPA, APP_DEPLOYMENT, autoscaling["min_replicas"],
+                                                 autoscaling["max_replicas"], autoscaling.get("cpu_utilization"),
+                                                 autoscaling.get("memory_utilization")))
+    return objects
+
+def app_resources(path=APP_RESOURCES_FILE):
+    """requests/limits de la app: los recomendados por rightsizing.py si existen, si no APP_RESOURCES."""
+    try:
+        with open(path) as f:
+            resources = json.load(f)
+    except FileNotFoundError:
+        return APP_RESOURCES
+    except ValueError as e:
+        raise ManifestError(f"{path} no es JSON válido: {e}")
+    errors = []
+    _check(resources, RESOURCES, path, errors)
+    if errors:
+        raise ManifestError(f"Recursos inválidos en {path}:\n   - " + "\n   - ".join(errors))
+    return resources
+
+def monitoring_values(profile=MONITORING_PROFILE):
+    """
+    Valores de Helm del kube-prometheus-stack para un perfil de MONITORING_PROFILES
+    ({} con "full": los del chart). Lanza ManifestError si el perfil es incoherente.
+    """
+    if profile not in MONITORING_PROFILES:
+        raise ManifestError(f"Perfil de monitoreo desconocido: {profile} (usa {'/'.join(MONITORING_PROFILES)})")
+    settings = MONITORING_PROFILES[profile]
+    if settings is None:
+        return {}
+    _check_monitoring_profile(profile, settings)
+    values = {
+        "prometheus": {"prometheusSpec": {
+            "retention": settings["retention"],
+            "retentionSize": settings["retention_size"],
+            "scrapeInterval": settings["scrape_interval"],
+            "evaluationInterval": settings["scrape_interval"],
+            "storageSpec": {"emptyDir": {"sizeLimit": settings["storage"]}},
+        }},
+        "defaultRules": {"rules": {rule: False for rule in settings["disabled_rules"]}},
+    }
+    for component in settings["disabled_components"]:
+        values[component] = {"enabled": False}
+    for path, resources in settings["resources"].items():
+        _set_path(values, path + ".resources", resources)
+    for path, rules in settings["drop"].items():
+        _set_path(values, path, [rule if isinstance(rule, dict) else
+                                 {"sourceLabels": ["__name__"], "regex": rule, "action": "drop"} for rule in rules])
+    return values
+
+def monitoring_requests(profile=MONITORING_PROFILE, nodes=2):
+    """Memoria (bytes) que reservan los componentes del stack; None si el perfil no fija requests."""
+    settings = MONITORING_PROFILES[profile]
+    if settings is None:
+        return None
+    total = 0
+    for path, resources in settings["resources"].items():
+        copies = MONITORING_COPIES.get(path, 1)
+        total += parse_quantity(resources["requests"]["memory"]) * (nodes if copies is None else copies)
+    return total
+
+def _set_path(values, path, value):
+    *parents, leaf = path.split(".")
+    for key in parents:
+        values = values.setdefault(key, {})
+    values[leaf] = value
+
+def _metadata(name, namespace):
+    metadata = {"name": name}
+    if namespace:
+        metadata["namespace"] = namespace
+    return metadata
+
+# ---------------------------------------------------------
+# Validación sin conexión
+# ---------------------------------------------------------
+class Required:
+    """Marca un campo obligatorio dentro de un esquema."""
+
+    def __init__(self, schema):
+        self.schema = schema
+
+DNS_LABEL = re.compile(r"^[a-z0-9]([-a-z0-9]*[a-z0-9])?$")
+DNS_SUBDOMAIN = re.compile(r"^[a-z0-9]([-a-z0-9]*[a-z0-9])?(\.[a-z0-9]([-a-z0-9]*[a-z0-9])?)*$")
+QUANTITY = re.compile(r"^([0-9]+(\.[0-9]+)?)(m|k|M|G|T|Ki|Mi|Gi|Ti)?$")
+DURATION = re.compile(r"^([0-9]+(ms|s|m|h|d|w|y))+$")
+QUANTITY_FACTORS = {None: 1, "m": 1e-3, "k": 1e3, "M": 1e6, "G": 1e9, "T": 1e12,
+                    "Ki": 2 ** 10, "Mi": 2 ** 20, "Gi": 2 ** 30, "Ti": 2 ** 40}
+
+def parse_quantity(value):
+    """'50m' -> 0.05, '550Mi' -> 576716800, 2 -> 2.0 (cantidades de Kubernetes)."""
+    match = QUANTITY.match(str(value))
+    if not match:
+        raise ManifestError(f"Cantidad de Kubernetes inválida: {value!r}")
+    return float(match.group(1)) * QUANTITY_FACTORS[match.group(3)]
+
+def _dns_label(value):
+    return isinstance(value, str) and len(value) <= 63 and bool(DNS_LABEL.match(value))
+
+def _dns_subdomain(value):
+    return isinstance(value, str) and len(value) <= 253 and bool(DNS_SUBDOMAIN.match(value))
+
+def _port(value):
+    return isinstance(value, int) and not isinstance(value, bool) and 0 < value < 65536
+
+def _quantity(value):
+    return isinstance(value, (str, int)) and bool(QUANTITY.match(str(value)))
+
+def _duration(value):
+    return isinstance(value, str) and bool(DURATION.match(value))
+
+def _non_negative_int(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+def _positive_int(value):
+    return _non_negative_int(value) and value > 0
+
+def _int_or_percent(value):
+    return _non_negative_int(value) or (isinstance(value, str) and bool(re.match(r"^[0-9]+%$", value)))
+
+def _one_of(*options):
+    def check(value):
+        return value in options
+    check.__name__ = "uno de " + "/".join(options)
+    return check
+
+STRING_MAP = {"*": str}
+METADATA = {"name": Required(_dns_subdomain), "namespace": _dns_label,
+            "labels": STRING_MAP, "annotations": STRING_MAP}
+RESOURCES = {"requests": {"cpu": _quantity, "memory": _quantity},
+             "limits": {"cpu": _quantity, "memory": _quantity}}
+PROBE = {
+    "httpGet": Required({"path": Required(str), "port": Required(lambda v: _port(v) or isinstance(v, str))}),
+    "initialDelaySeconds": _non_negative_int, "periodSeconds": _positive_int, "timeoutSeconds": _positive_int,
+    "successThreshold": _positive_int, "failureThreshold": _positive_int,
+}
+CONTAINER = {
+    "name": Required(_dns_label),
+    "image": Required(str),
+    "ports": [{"containerPort": Required(_port), "name": str, "protocol": _one_of("TCP", "UDP")}],
+    "resources": RESOURCES,
+    "startupProbe": PROBE, "readinessProbe": PROBE, "livenessProbe": PROBE,
+    "lifecycle": {"preStop": {"sleep": {"seconds": Required(_positive_int)}, "exec": {"command": [str]}}},
+}
+LABEL_SELECTOR = {
+    "matchLabels": STRING_MAP,
+    "matchExpressions": [{"key": Required(str), "operator": Required(_one_of("In", "NotIn", "Exists", "DoesNotExist")),
+                          "values": [str]}],
+}
+SCALING_RULES = {
+    "stabilizationWindowSeconds": _non_negative_int,
+    "selectPolicy": _one_of("Max", "Min", "Disabled"),
+    "policies": [{"type": Required(_one_of("Pods", "Percent")), "value": Required(_positive_int),
+                  "periodSeconds": Required(_positive_int)}],
+}
+SCHEMAS = {
+    ("v1", "Namespace"): {
+        "apiVersion": Required(str), "kind": Required(str), "metadata": Required(METADATA),
+    },
+    ("apps/v1", "Deployment"): {
+        "apiVersion": Required(str), "kind": Required(str), "metadata": Required(METADATA),
+        "spec": Required({
+            "replicas": _non_negative_int,
+            "strategy": {"type": _one_of("RollingUpdate", "Recreate"),
+                         "rollingUpdate": {"maxSurge": _int_or_percent, "maxUnavailable": _int_or_percent}},
+            "minReadySeconds": _non_negative_int,
+            "progressDeadlineSeconds": _positive_int,
+            "selector": Required(LABEL_SELECTOR),
+            "template": Required({
+                "metadata": Required({"labels": Required(STRING_MAP), "annotations": STRING_MAP}),
+                "spec": Required({
+                    "affinity": {"podAntiAffinity": {"preferredDuringSchedulingIgnoredDuringExecution": [{
+                        "weight": Required(_non_negative_int),
+                        "podAffinityTerm": Required({"labelSelector": LABEL_SELECTOR,
+                                                     "topologyKey": Required(str)}),
+                    }]}},
+                    "topologySpreadConstraints": [{
+                        "maxSkew": Required(_positive_int),
+                        "topologyKey": Required(str),
+                        "whenUnsatisfiable": Required(_one_of("DoNotSchedule", "ScheduleAnyway")),
+                        "labelSelector": LABEL_SELECTOR,
+                        "matchLabelKeys": [str],
+                        "minDomains": _positive_int,
+                    }],
+                    "containers": Required([CONTAINER]),
+                    "terminationGracePeriodSeconds": _non_negative_int,
+                }),
+            }),
+        }),
+    },
+    ("v1", "Service"): {
+        "apiVersion": Required(str), "kind": Required(str), "metadata": Required(METADATA),
+        "spec": Required({
+            "type": _one_of("ClusterIP", "NodePort", "LoadBalancer", "ExternalName"),
+            "ports": Required([{"port": Required(_port), "targetPort": lambda v: _port(v) or isinstance(v, str),
+                                "name": str, "protocol": _one_of("TCP", "UDP")}]),
+            "selector": STRING_MAP,
+        }),
+    },
+    ("networking.k8s.io/v1", "Ingress"): {
+        "apiVersion": Required(str), "kind": Required(str), "metadata": Required(METADATA),
+        "spec": Required({
+            "ingressClassName": str,
+            "rules": Required([{
+                "host": _dns_subdomain,
+                "http": Required({"paths": Required([{
+                    "path": str,
+                    "pathType": Required(_one_of("Prefix", "Exact", "ImplementationSpecific")),
+                    "backend": Required({"service": Required({
+                        "name": Required(_dns_label),
+                        "port": Required({"number": _port, "name": str}),
+                    })}),
+                }])}),
+            }]),
+        }),
+    },
+    ("policy/v1", "PodDisruptionBudget"): {
+        "apiVersion": Required(str), "kind": Required(str), "metadata": Required(METADATA),
+        "spec": Required({"selector": Required(LABEL_SELECTOR), "minAvailable": _int_or_percent,
+                          "maxUnavailable": _int_or_percent}),
+    },
+    ("monitoring.coreos.com/v1", "ServiceMonitor"): {
+        "apiVersion": Required(str), "kind": Required(str), "metadata": Required(METADATA),
+        "spec": Required({
+            "selector": Required(LABEL_SELECTOR),
+            "namespaceSelector": {"matchNames": [_dns_label], "any": bool},
+            "endpoints": Required([{
+                "port": str, "targetPort": lambda v: _port(v) or isinstance(v, str),
+                "path": str, "interval": _duration, "scrapeTimeout": _duration,
+            }]),
+            "sampleLimit": _positive_int,
+        }),
+    },
+    ("autoscaling/v2", "HorizontalPodAutoscaler"): {
+        "apiVersion": Required(str), "kind": Required(str), "metadata": Required(METADATA),
+        "spec": Required({
+            "scaleTargetRef": Required({"apiVersion": str, "kind": Required(str), "name": Required(_dns_subdomain)}),
+            "minReplicas": _positive_int,
+            "maxReplicas": Required(_positive_int),
+            "metrics": [{
+                "type": Required(_one_of("Resource")),
+                "resource": Required({
+                    "name": Required(_one_of("cpu", "memory")),
+                    "target": Required({"type": Required(_one_of("Utilization", "AverageValue")),
+                                        "averageUtilization": _positive_int, "averageValue": _quantity}),
+                }),
+            }],
+            "behavior": {"scaleUp": SCALING_RULES, "scaleDown": SCALING_RULES},
+        }),
+    },
+}
+
+def _check(value, schema, path, errors):
+    if isinstance(schema, Required):
+        schema = schema.schema
+    if isinstance(schema, dict):
+        if not isinstance(value, dict):
+            errors.append(f"{path}: se esperaba un objeto")
+            return
+        if "*" in schema:
+            for key, item in value.items():
+                _check(item, schema["*"], f"{path}.{key}", errors)
+            return
+        for key, item in value.items():
+            if key not in schema:
+                errors.append(f"{path}.{key}: campo desconocido")
+            else:
+                _check(item, schema[key], f"{path}.{key}", errors)
+        for key, sub in schema.items():
+            if isinstance(sub, Required) and key not in value:
+                errors.append(f"{path}.{key}: campo obligatorio")
+    elif isinstance(schema, list):
+        if not isinstance(value, list) or (not value):
+            errors.append(f"{path}: se esperaba una lista no vacía")
+            return
+        for i, item in enumerate(value):
+            _check(item, schema[0], f"{path}[{i}]", errors)
+    elif isinstance(schema, type):
+        if not isinstance(value, schema):
+            errors.append(f"{path}: se esperaba {schema.__name__}, hay {value!r}")
+    elif not schema(value):
+        errors.append(f"{path}: valor inválido {value!r} ({schema.__name__.strip('_')})")
+
+def validate(objects):
+    """Valida esquema y coherencia entre objetos. Lanza ManifestError con todos los problemas."""
+    errors = []
+    services = {}
+    deployments = {}
+    pod_labels = []
+    for obj in objects:
+        key = (obj.get("apiVersion"), obj.get("kind"))
+        name = f"{obj.get('kind')}/{obj.get('metadata', {}).get('name')}"
+        if key not in SCHEMAS:
+            errors.append(f"{name}: tipo no soportado {key}")
+            continue
+        _check(obj, SCHEMAS[key], name, errors)
+        spec = obj.get("spec", {})
+        if obj["kind"] == "Deployment":
+            selector = spec.get("selector", {}).get("matchLabels", {})
+            labels = spec.get("template", {}).get("metadata", {}).get("labels", {})
+            if any(labels.get(k) != v for k, v in selector.items()):
+                errors.append(f"{name}: spec.selector no coincide con las etiquetas del pod {labels}")
+            pod_labels.append(labels)
+            deployments[obj["metadata"].get("name")] = obj
+            for container in spec.get("template", {}).get("spec", {}).get("containers", []):
+                _check_resources(name, container, errors)
+            _check_rollout(name, spec, errors)
+            _check_spread(name, spec, errors)
+        elif obj["kind"] == "Service":
+            services[obj["metadata"].get("name")] = ({p.get("port") for p in spec.get("ports", [])},
+                                                     spec.get("type", "ClusterIP"))
+            selector = spec.get("selector", {})
+            if pod_labels and selector and not any(
+                    all(labels.get(k) == v for k, v in selector.items()) for labels in pod_labels):
+                errors.append(f"{name}: el selector {selector} no apunta a ningún pod del manifiesto")
+        elif obj["kind"] == "Ingress":
+            target_type = obj["metadata"].get("annotations", {}).get("alb.ingress.kubernetes.io/target-type",
+                                                                     "instance")
+            for rule in spec.get("rules", []):
+                for path in rule.get("http", {}).get("paths", []):
+                    backend = path.get("backend", {}).get("service", {})
+                    # Solo comprobamos servicios del mismo manifiesto (p.ej. Grafana lo crea Helm)
+                    if backend.get("name") not in services:
+                        continue
+                    ports, service_type = services[backend.get("name")]
+                    number = backend.get("port", {}).get("number")
+                    if number not in ports:
+                        errors.append(f"{name}: el backend {backend.get('name')}:{number} no expone ese puerto")
+                    # En modo instance el ALB registra los nodos: necesita un puerto de nodo
+                    if target_type == "instance" and service_type not in ("NodePort", "LoadBalancer"):
+                        errors.append(f"{name}: target-type instance requiere un Service NodePort, "
+                                      f"{backend.get('name')} es {service_type}")
+        elif obj["kind"] == "HorizontalPodAutoscaler":
+            _check_autoscaler(name, spec, deployments, errors)
+        elif obj["kind"] == "PodDisruptionBudget":
+            _check_disruption_budget(name, spec, deployments, errors)
+    if errors:
+        raise ManifestError("Manifiesto inválido:\n   - " + "\n   - ".join(errors))
+
+def _check_resources(name, container, errors):
+    requests = container.get("resources", {}).get("requests", {})
+    limits = container.get("resources", {}).get("limits", {})
+    for resource in set(requests) & set(limits):
+        try:
+            if parse_quantity(requests[resource]) > parse_quantity(limits[resource]):
+                errors.append(f"{name}: requests.{resource} ({requests[resource]}) supera "
+                              f"limits.{resource} ({limits[resource]})")
+        except ManifestError:
+            pass   # El esquema ya reporta la cantidad inválida
+
+def _check_rollout(name, spec, errors):
+    rolling = spec.get("strategy", {}).get("rollingUpdate", {})
+    if rolling.get("maxSurge") in (0, "0%") and rolling.get("maxUnavailable") in (0, "0%"):
+        errors.append(f"{name}: maxSurge y maxUnavailable no pueden ser 0 a la vez (el rollout no avanzaría)")
+    pod_spec = spec.get("template", {}).get("spec", {})
+    grace = pod_spec.get("terminationGracePeriodSeconds", 30)
+    for container in pod_spec.get("containers", []):
+        ports = {p.get("containerPort") for p in container.get("ports", [])}
+        for probe in ("startupProbe", "readinessProbe", "livenessProbe"):
+            port = container.get(probe, {}).get("httpGet", {}).get("port")
+            if isinstance(port, int) and port not in ports:
+                errors.append(f"{name}: {probe} de {container.get('name')} apunta al puerto {port}, que no expone")
+        sleep = container.get("lifecycle", {}).get("preStop", {}).get("sleep", {}).get("seconds", 0)
+        if sleep >= grace:
+            # El kubelet mata el contenedor al vencer el grace period, esté o no en el preStop
+            errors.append(f"{name}: preStop ({sleep}s) debe ser menor que terminationGracePeriodSeconds ({grace}s)")
+
+def _check_spread(name, spec, errors):
+    labels = spec.get("template", {}).get("metadata", {}).get("labels", {})
+    for constraint in spec.get("template", {}).get("spec", {}).get("topologySpreadConstraints", []):
+        selector = constraint.get("labelSelector", {}).get("matchLabels", {})
+        # Un selector que no incluye a los propios pods no reparte nada
+        if any(labels.get(k) != v for k, v in selector.items()):
+            errors.append(f"{name}: topologySpreadConstraints ({constraint.get('topologyKey')}) "
+                          f"selecciona {selector}, que no coincide con los pods {labels}")
+
+def _check_monitoring_profile(profile, settings):
+    errors = []
+    for path, resources in settings["resources"].items():
+        _check(resources, RESOURCES, f"{profile}.{path}", errors)
+        if "memory" not in resources.get("requests", {}):
+            errors.append(f"{profile}.{path}: sin requests de memoria el scheduler no le reserva sitio")
+    for field in ("retention", "scrape_interval", "app_scrape_interval"):
+        if not _duration(settings[field]):
+            errors.append(f"{profile}.{field}: duración inválida {settings[field]!r}")
+    # retentionSize de Prometheus usa unidades base 2 (GB = GiB)
+    retention_size = re.sub(r"([KMGT])B$", r"\1i", settings["retention_size"])
+    if not _quantity(retention_size) or not _quantity(settings["storage"]):
+        errors.append(f"{profile}: retention_size/storage inválidos")
+    elif parse_quantity(retention_size) >= parse_quantity(settings["storage"]):
+        errors.append(f"{profile}: retention_size {settings['retention_size']} debe ser menor que storage "
+                      f"{settings['storage']} (si no, el volumen se llena antes de que Prometheus borre bloques)")
+    if errors:
+        raise ManifestError("Perfil de monitoreo inválido:\n   - " + "\n   - ".join(errors))
+
+def _check_disruption_budget(name, spec, deployments, errors):
+    if "minAvailable" in spec and "maxUnavailable" in spec:
+        errors.append(f"{name}: usa minAvailable o maxUnavailable, no ambos")
+    selector = spec.get("selector", {}).get("matchLabels", {})
+    targets = [d for d in deployments.values()
+               if all(d["spec"]["template"]["metadata"]["labels"].get(k) == v for k, v in selector.items())]
+    if deployments and not targets:
+        errors.append(f"{name}: el selector {selector} no apunta a ningún pod del manifiesto")
+    for target in targets:
+        replicas = target["spec"].get("replicas")
+        # Un PDB que no admite ninguna baja bloquea los drenajes de nodos (actualizaciones, autoscaler)
+        if spec.get("maxUnavailable") in (0, "0%") or (isinstance(spec.get("minAvailable"), int)
+                                                        and replicas is not None and spec["minAvailable"] >= replicas):
+            errors.append(f"{name}: no permite ninguna interrupción de {target['metadata']['name']} "
+                          f"y bloquearía el drenaje de nodos")
+
+def _check_autoscaler(name, spec, deployments, errors):
+    if spec.get("minReplicas", 1) > spec.get("maxReplicas", 0):
+        errors.append(f"{name}: minReplicas ({spec.get('minReplicas')}) supera maxReplicas ({spec.get('maxReplicas')})")
+    target = deployments.get(spec.get("scaleTargetRef", {}).get("name"))
+    if target is None:
+        return   # El Deployment objetivo no está en este manifiesto
+    if "replicas" in target["spec"]:
+        errors.append(f"{name}: el Deployment {target['metadata']['name']} fija spec.replicas y pelearía con la HPA")
+    # Un objetivo en % se calcula sobre requests: sin requests la HPA no puede escalar
+    for metric in spec.get("metrics", []):
+        resource = metric.get("resource", {})
+        if resource.get("target", {}).get("type") != "Utilization":
+            continue
+        for container in target["spec"].get("template", {}).get("spec", {}).get("containers", []):
+            if resource.get("name") not in container.get("resources", {}).get("requests", {}):
+                errors.append(f"{name}: el contenedor {container.get('name')} no tiene requests.{resource.get('name')} "
+                              f"y la HPA escala por % de utilización")
+
+# ---------------------------------------------------------
+# Serialización YAML (PyYAML, mismo orden de claves en que se construyeron)
+# ---------------------------------------------------------
+def to_yaml(obj):
+    """Un objeto -> YAML en bloque, claves en el orden en que se construyeron."""
+    return dump_all([obj])
+
+def dump_all(objects, header=None):
+    """Varios objetos separados por '---', con un comentario de cabecera opcional."""
+    # width amplio: las anotaciones largas no se parten en varias líneas
+    text = yaml.safe_dump_all(objects, sort_keys=False, default_flow_style=False,
+                              allow_unicode=True, width=4096)
+    return f"# {header}\n{text}" if header else text
+
+def load_all(text):
+    """Inverso de dump_all: lista de objetos (se ignoran los documentos vacíos)."""
+    try:
+        return [obj for obj in yaml.safe_load_all(text) if obj is not None]
+    except yaml.YAMLError as e:
+        raise ManifestError(f"YAML inválido: {e}")
+
+_rendered = {}
+
+def render(objects, header=None):
+    """Valida y serializa; el resultado se memoriza por el hash de las entradas."""
+    key = fingerprint([header, objects])
+    if key not in _rendered:
+        validate(objects)
+        _rendered[key] = dump_all(objects, header)
+    return _rendered[key]
+
+def write_if_changed(path, content):
+    """Escribe el archivo solo si su contenido cambia (atómico). Devuelve True si se escribió."""
+    try:
+        with open(path) as f:
+            if f.read() == content:
+                return False
+    except OSError:
+        pass
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".manifest-")
+    with os.fdopen(fd, "w") as f:
+        f.write(content)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+    return True
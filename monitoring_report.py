@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Informe del coste del propio stack de monitoreo: series activas, muestras por
+segundo, memoria por contenedor y qué parte de la memoria de los nodos reserva.
+
+Para comparar perfiles de setup_monitoring.py (--stack-profile):
+    python3 monitoring_report.py --save antes.json
+    python3 setup_monitoring.py --stack-profile lean
+    python3 monitoring_report.py --compare antes.json     # tras unos minutos de scrapes
+
+Prometheus no está expuesto fuera del clúster; antes de ejecutarlo:
+    kubectl port-forward -n monitoring svc/prometheus-kube-prometheus-prometheus 9090
+Con SRE_BACKEND=fake se usa un Prometheus local simulado con el perfil de SRE_MONITORING_PROFILE.
+"""
+import argparse
+import json
+import sys
+import time
+
+from backends import BACKEND
+from manifests import MONITORING_NAMESPACE, MONITORING_PROFILE
+from rightsizing import PROMETHEUS_URL, PrometheusError, query
+
+# ==========================================
+# ⚙️ CONFIGURACIÓN
+# ==========================================
+TOP_METRICS = 10
+QUERIES = {
+    "series": "sum(prometheus_tsdb_head_series)",
+    "samples_per_second": "sum(rate(prometheus_tsdb_head_samples_appended_total[5m]))",
+    "memory": f'sum by (container) (container_memory_working_set_bytes{{namespace="{MONITORING_NAMESPACE}",container!=""}})',
+    "requests": f'sum(kube_pod_container_resource_requests{{namespace="{MONITORING_NAMESPACE}",resource="memory"}})',
+    "requests_total": 'sum(kube_pod_container_resource_requests{resource="memory"})',
+    "allocatable": 'sum(kube_node_status_allocatable{resource="memory"})',
+    "top": f'topk({TOP_METRICS}, count by (__name__) ({{__name__=~".+"}}))',
+}
+
+class Colors:
+    BLUE = '\033[94m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    END = '\033[0m'
+
+def scalar(result):
+    return sum(float(sample["value"][1]) for sample in result)
+
+def by_label(result, label):
+    return {sample["metric"].get(label, "?"): float(sample["value"][1]) for sample in result}
+
+def snapshot(url):
+    """Una foto del stack con las consultas de QUERIES."""
+    results = {name: query(url, promql) for name, promql in QUERIES.items()}
+    return {
+        "taken_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "series": scalar(results["series"]),
+        "samples_per_second": scalar(results["samples_per_second"]),
+        "memory": by_label(results["memory"], "container"),
+        "requests": scalar(results["requests"]),
+        "requests_total": scalar(results["requests_total"]),
+        "allocatable": scalar(results["allocatable"]),
+        "top": by_label(results["top"], "__name__"),
+    }
+
+def format_memory(size):
+    return f"{size / 2 ** 20:,.0f}Mi"
+
+def change(before, after):
+    if not before:
+        return ""
+    delta = (after - before) / before * 100
+    color = Colors.GREEN if delta <= 0 else Colors.YELLOW
+    return f"{color}{delta:+.0f}%{Colors.END}"
+
+def print_report(current, previous=None):
+    rows = [
+        ("Series activas", "series", lambda v: f"{v:,.0f}"),
+        ("Muestras/s", "samples_per_second", lambda v: f"{v:,.0f}"),
+        ("Memoria del stack", None, format_memory),
+        ("Requests de memoria del stack", "requests", format_memory),
+    ]
+    print(f"\n{Colors.BLUE}📊 Stack de monitoreo ({MONITORING_NAMESPACE}){Colors.END}")
+    header = f"   {'':<32}{'ANTES':>12}{'AHORA':>12}  CAMBIO" if previous else f"   {'':<32}{'AHORA':>12}"
+    print(header)
+    for label, key, fmt in rows:
+        value = current[key] if key else sum(current["memory"].values())
+        if previous:
+            old = previous[key] if key else sum(previous["memory"].values())
+            print(f"   {label:<32}{fmt(old):>12}{fmt(value):>12}  {change(old, value)}")
+        else:
+            print(f"   {label:<32}{fmt(value):>12}")
+
+    print(f"\n{Colors.BLUE}🧠 Memoria por contenedor{Colors.END}")
+    names = sorted(set(current["memory"]) | set(previous["memory"] if previous else []),
+                   key=lambda name: -current["memory"].get(name, 0))
+    for name in names:
+        value = current["memory"].get(name, 0)
+        if previous:
+            old = previous["memory"].get(name, 0)
+            print(f"   {name:<32}{format_memory(old):>12}{format_memory(value):>12}  {change(old, value)}")
+        else:
+            print(f"   {name:<32}{format_memory(value):>12}")
+
+    print(f"\n{Colors.BLUE}🔝 Métricas con más series{Colors.END}")
+    for name, count in sorted(current["top"].items(), key=lambda item: -item[1]):
+        print(f"   {name:<60}{count:>10,.0f}")
+
+    # Lo que el scheduler ya no puede dar a la app: requests del stack sobre la memoria asignable
+    if current["allocatable"]:
+        share = current["requests"] / current["allocatable"] * 100
+        free = current["allocatable"] - current["requests_total"]
+        print(f"\n🧮 El stack reserva el {share:.0f}% de la memoria asignable de los nodos; "
+              f"quedan {format_memory(free)} sin reservar.")
+        if current["requests"] == 0:
+            print(f"{Colors.YELLOW}   ⚠️ Sin requests, el scheduler coloca el stack como si no ocupara memoria: "
+                  f"compite con la app en los mismos nodos.{Colors.END}")
+        elif free < 0:
+            print(f"{Colors.RED}   ❌ Las reservas superan la memoria asignable: habrá pods en Pending.{Colors.END}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Series activas y memoria del kube-prometheus-stack.")
+    parser.add_argument("--prometheus-url", help=f"URL de Prometheus (default: {PROMETHEUS_URL}; "
+                                                 "con SRE_BACKEND=fake, un Prometheus simulado)")
+    parser.add_argument("--save", metavar="ARCHIVO", help="Guarda la foto en este JSON (para --compare)")
+    parser.add_argument("--compare", metavar="ARCHIVO", help="Compara con una foto guardada con --save")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    fake = None
+    url = args.prometheus_url or PROMETHEUS_URL
+    if BACKEND == "fake" and not args.prometheus_url:
+        from fake_backend import FakePrometheus
+        fake = FakePrometheus(stack_profile=MONITORING_PROFILE)
+        url = fake.start()
+    print(f"📡 Prometheus: {url}")
+    try:
+        current = snapshot(url)
+    except (PrometheusError, OSError) as e:
+        print(f"{Colors.RED}❌ No se pudo consultar Prometheus: {e}{Colors.END}")
+        sys.exit(1)
+    finally:
+        if fake:
+            fake.stop()
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        print(f"   Comparando con {args.compare} ({previous['taken_at']})")
+    print_report(current, previous)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"\n💾 Foto guardada en {args.save}")
+
+if __name__ == "__main__":
+    main()
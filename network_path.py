@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Comparación local de la ruta de red de la app: ALB en modo instance (NodePort +
+kube-proxy) frente a modo ip (ALB -> pod), y tráfico interno con y sin Topology
+Aware Routing.
+
+Reparte los pods en nodos y zonas como lo haría el scheduler con las reglas del
+manifiesto generado (antiafinidad o topologySpreadConstraints) y levanta un servidor
+HTTP local por ALB, nodo y pod. Cada petición recorre la misma cadena de saltos que
+en el clúster, con una latencia inyectada por enlace según sea en la misma zona o
+entre zonas, y se miden saltos, cruces de zona y latencia real extremo a extremo.
+"""
+import argparse
+import http.client
+import http.server
+import random
+import threading
+import time
+
+from manifests import APP_NETWORK, app_manifests, validate
+
+# ==========================================
+# ⚙️ CONFIGURACIÓN
+# ==========================================
+ZONES = ("us-east-1a", "us-east-1b", "us-east-1c")
+NODES = 2                     # Como el node group de setup_sdk.py
+REQUESTS = 400                # Peticiones por escenario
+CONCURRENCY = 1               # Todos los "servidores" comparten el GIL: más clientes miden contención, no red
+SEED = 1
+# Latencia de ida por enlace (s). Entre zonas de AWS el RTT típico es ~0.5-1ms
+SAME_ZONE_LATENCY = 0.0001
+CROSS_ZONE_LATENCY = 0.0006
+
+class Colors:
+    BLUE = '\033[94m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    END = '\033[0m'
+
+# ---------------------------------------------------------
+# Lectura del manifiesto y reparto de pods
+# ---------------------------------------------------------
+def path_settings(objects):
+    """Lo que decide la ruta de red: target-type, topology-mode y claves de reparto de los pods."""
+    validate(objects)
+    by_kind = {o["kind"]: o for o in objects}
+    pod_spec = by_kind["Deployment"]["spec"]["template"]["spec"]
+    spread = [c["topologyKey"] for c in pod_spec.get("topologySpreadConstraints", [])]
+    if not spread:
+        # Sin constraints solo queda la antiafinidad preferente por nodo
+        spread = [term["podAffinityTerm"]["topologyKey"] for term in
+                  pod_spec.get("affinity", {}).get("podAntiAffinity", {}).get(
+                      "preferredDuringSchedulingIgnoredDuringExecution", [])]
+    return {
+        "replicas": by_kind["Deployment"]["spec"].get("replicas", 1),
+        "target_type": by_kind["Ingress"]["metadata"]["annotations"].get(
+            "alb.ingress.kubernetes.io/target-type", "instance"),
+        "topology_mode": by_kind["Service"]["metadata"].get("annotations", {}).get(
+            "service.kubernetes.io/topology-mode"),
+        "spread": spread,
+    }
+
+def make_nodes(count, zones):
+    """eksctl reparte el node group entre las zonas de sus subredes, en orden."""
+    return [{"name": f"node-{i}", "zone": zones[i % len(zones)]} for i in range(count)]
+
+def place_pods(replicas, nodes, spread):
+    """Scheduler simplificado: cada pod va al nodo con menos pods en las claves de reparto, en orden."""
+    keys = {"topology.kubernetes.io/zone": "zone", "kubernetes.io/hostname": "name"}
+    counts = {}
+    pods = []
+    for i in range(replicas):
+        def score(node):
+            return tuple(counts.get((key, node[keys[key]]), 0) for key in spread if key in keys)
+        node = min(nodes, key=score)   # min() es estable: a igualdad, el primer nodo
+        for key in spread:
+            if key in keys:
+                counts[(key, node[keys[key]])] = counts.get((key, node[keys[key]]), 0) + 1
+        pods.append({"name": f"pod-{i}", "zone": node["zone"], "node": node["name"]})
+    return pods
+
+def hints_active(settings, pods, nodes):
+    """
+    El controlador de EndpointSlices solo publica hints si cada zona con nodos tiene
+    endpoints (simplificación: en el clúster también compara con la CPU asignable por zona).
+    """
+    if settings["topology_mode"] != "Auto":
+        return False
+    return {n["zone"] for n in nodes} <= {p["zone"] for p in pods}
+
+# ---------------------------------------------------------
+# Red local: un servidor HTTP por máquina (ALB, cliente, nodo o pod)
+# ---------------------------------------------------------
+class LocalNetwork:
+    """Cada máquina reenvía la petición a la siguiente de la cabecera X-Route tras la latencia del enlace."""
+
+    def __init__(self, machines):
+        self.zones = {}
+        self.ports = {}
+        self.servers = []
+        network = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            disable_nagle_algorithm = True   # Sin esperas de ACK retardado entre cabeceras y cuerpo
+
+            def do_GET(self):
+                route = [hop for hop in self.headers.get("X-Route", "").split(",") if hop]
+                status, body = 200, b"ok"
+                if route:
+                    status, body = network.forward(self.server.machine, route)
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        for name, zone in machines:
+            server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+            server.daemon_threads = True
+            server.machine = name
+            self.zones[name] = zone
+            self.ports[name] = server.server_address[1]
+            self.servers.append(server)
+            # Sondeo corto: shutdown() espera una vuelta del bucle por cada servidor
+            threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def latency(self, source, target):
+        return SAME_ZONE_LATENCY if self.zones[source] == self.zones[target] else CROSS_ZONE_LATENCY
+
+    def forward(self, source, route):
+        target = route[0]
+        time.sleep(self.latency(source, target))
+        return self.send(target, route[1:])
+
+    def send(self, target, route):
+        connection = http.client.HTTPConnection("127.0.0.1", self.ports[target], timeout=10)
+        try:
+            connection.request("GET", "/", headers={"X-Route": ",".join(route)})
+            response = connection.getresponse()
+            return response.status, response.read()
+        finally:
+            connection.close()
+
+    def stop(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+def choose_route(settings, pods, nodes, rng, internal, use_hints):
+    """Máquinas que recorre una petición, empezando por el ALB (o el pod cliente si es interna)."""
+    zone = rng.choice(sorted({n["zone"] for n in nodes}))
+    if internal:
+        # Pod cliente en otra parte del clúster: kube-proxy de su nodo elige el endpoint
+        candidates = [p for p in pods if p["zone"] == zone] if use_hints else pods
+        return [f"client-{zone}", rng.choice(candidates)["name"]]
+    if settings["target_type"] == "ip":
+        return [f"alb-{zone}", rng.choice(pods)["name"]]
+    # instance: el ALB elige un nodo y el NodePort (externalTrafficPolicy Cluster) cualquier pod
+    node = rng.choice(nodes)
+    pod = rng.choice(pods)
+    if pod["node"] == node["name"]:
+        return [f"alb-{zone}", pod["name"]]   # DNAT a un pod local: sin salto de red extra
+    return [f"alb-{zone}", node["name"], pod["name"]]
+
+def measure(network, routes, concurrency):
+    """Ejecuta las rutas con 'concurrency' hilos. Devuelve las latencias extremo a extremo."""
+    latencies = []
+    lock = threading.Lock()
+    queue = list(routes)
+
+    def worker():
+        while True:
+            with lock:
+                if not queue:
+                    return
+                route = queue.pop()
+            start = time.perf_counter()
+            network.send(route[0], route[1:])
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sorted(latencies)
+
+def run_scenario(label, objects, nodes, args, internal=False):
+    settings = path_settings(objects)
+    pods = place_pods(settings["replicas"], nodes, settings["spread"])
+    use_hints = internal and hints_active(settings, pods, nodes)
+    zones = sorted({n["zone"] for n in nodes})
+    machines = ([(f"alb-{z}", z) for z in zones] + [(f"client-{z}", z) for z in zones]
+                + [(n["name"], n["zone"]) for n in nodes] + [(p["name"], p["zone"]) for p in pods])
+    rng = random.Random(args.seed)
+    routes = [choose_route(settings, pods, nodes, rng, internal, use_hints) for _ in range(args.requests)]
+    network = LocalNetwork(machines)
+    try:
+        latencies = measure(network, routes, args.concurrency)
+    finally:
+        network.stop()
+    links = [(a, b) for route in routes for a, b in zip(route, route[1:])]
+    per_zone = {z: sum(p["zone"] == z for p in pods) for z in zones}
+
+    def percentile(pct):
+        return latencies[min(len(latencies) - 1, int(pct / 100 * len(latencies)))] * 1000
+
+    return {
+        "label": label + (" (hints activos)" if use_hints else ""),
+        "hops": len(links) / len(routes),
+        "cross_zone": sum(network.zones[a] != network.zones[b] for a, b in links) / len(routes),
+        "p50": percentile(50), "p95": percentile(95), "p99": percentile(99),
+        "placement": " ".join(f"{z[-1]}:{n}" for z, n in per_zone.items()),
+    }
+
+def print_results(rows):
+    print(f"\n{Colors.BLUE}📊 Ruta de red por petición{Colors.END}")
+    print(f"   {'ESCENARIO':<46}{'SALTOS':>8}{'CRUCES AZ':>11}{'p50':>9}{'p95':>9}{'p99':>9}  PODS/ZONA")
+    for row in rows:
+        print(f"   {row['label']:<46}{row['hops']:>8.2f}{row['cross_zone']:>11.2f}"
+              f"{row['p50']:>7.2f}ms{row['p95']:>7.2f}ms{row['p99']:>7.2f}ms  {row['placement']}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compara en local la ruta de red instance vs ip y el tráfico por zona.")
+    parser.add_argument("--nodes", type=int, default=NODES, help=f"Nodos del clúster simulado (default: {NODES})")
+    parser.add_argument("--zones", type=int, default=2, choices=range(1, len(ZONES) + 1),
+                        help="Zonas entre las que se reparten los nodos (default: 2)")
+    parser.add_argument("--replicas", type=int, help="Réplicas de la app (default: las del manifiesto)")
+    parser.add_argument("--requests", type=int, default=REQUESTS)
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--seed", type=int, default=SEED)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    nodes = make_nodes(args.nodes, ZONES[:args.zones])
+    extra = {"replicas": args.replicas} if args.replicas else {}
+    before = app_manifests("app.example.com", "arn:aws:acm:example", **extra)
+    after = app_manifests("app.example.com", "arn:aws:acm:example", network=APP_NETWORK, **extra)
+    print(f"🛣️ {len(nodes)} nodos en {args.zones} zonas, {args.requests} peticiones por escenario "
+          f"(enlace misma zona {SAME_ZONE_LATENCY * 1000:g}ms, entre zonas {CROSS_ZONE_LATENCY * 1000:g}ms)")
+    rows = [
+        run_scenario("ALB instance + NodePort", before, nodes, args),
+        run_scenario("ALB ip + ClusterIP", after, nodes, args),
+        run_scenario("interno, sin topology-mode", before, nodes, args, internal=True),
+        run_scenario("interno, topology-mode Auto", after, nodes, args, internal=True),
+    ]
+    print_results(rows)
+    saved = rows[0]["hops"] - rows[1]["hops"]
+    print(f"\n{Colors.GREEN}✅ Targets IP: {saved:.2f} saltos menos por petición "
+          f"({rows[0]['cross_zone']:.2f} → {rows[1]['cross_zone']:.2f} cruces de zona), "
+          f"p50 {rows[0]['p50']:.2f}ms → {rows[1]['p50']:.2f}ms.{Colors.END}")
+
+if __name__ == "__main__":
+    main()
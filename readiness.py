@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Espera basada en el estado real de los recursos (sin sleeps fijos)."""
+import random
+import time
+
+from backends import get_backend
+from tracing import get_tracer
+
+# ==========================================
+# ⚙️ CONFIGURACIÓN
+# ==========================================
+DEFAULT_TIMEOUT = 600      # Segundos máximos que esperamos a un recurso
+INITIAL_DELAY = 2          # Primer intervalo entre consultas
+MAX_DELAY = 30             # Tope del backoff exponencial
+BACKOFF_FACTOR = 2.0
+
+class Colors:
+    BLUE = '\033[94m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    END = '\033[0m'
+
+class ReadinessError(Exception):
+    """El recurso no llegó al estado esperado."""
+
+class ReadinessTimeout(ReadinessError):
+    """Se agotó el plazo esperando al recurso."""
+
+class ResourceFailed(ReadinessError):
+    """El recurso reportó un fallo definitivo: no tiene sentido seguir esperando."""
+
+def wait_until(check, description, timeout=DEFAULT_TIMEOUT, initial_delay=INITIAL_DELAY,
+               max_delay=MAX_DELAY, factor=BACKOFF_FACTOR):
+    """
+    Consulta check() -> (listo, detalle) con backoff exponencial adaptativo.
+    Mientras el detalle cambie (hay progreso) el intervalo vuelve al mínimo;
+    si se repite, crece hasta max_delay. check() puede lanzar ResourceFailed.
+    """
+    with get_tracer().span(f"wait {description}", kind="wait", timeout=timeout) as span:
+        start = time.monotonic()
+        deadline = start + timeout
+        delay = initial_delay
+        last_detail = None
+        while True:
+            ready, detail = check()
+            if ready:
+                print(f"   {Colors.GREEN}✔ {description} ({time.monotonic() - start:.1f}s){Colors.END}")
+                span.set(detail=str(detail))
+                return detail
+            # Cada consulta extra cuenta como reintento en la traza
+            span.retries += 1
+            if detail != last_detail:
+                print(f"   ⏳ {description}: {detail}")
+                delay = initial_delay
+                last_detail = detail
+            else:
+                delay = min(delay * factor, max_delay)
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                span.set(detail=str(detail))
+                raise ReadinessTimeout(f"{description}: sin terminar tras {timeout}s (último estado: {detail})")
+            # Jitter para no sincronizar consultas de varios hilos contra la misma API
+            time.sleep(min(remaining, delay * random.uniform(0.5, 1.0)))
+
+# ---------------------------------------------------------
+# Consultas a Kubernetes / Helm
+# ---------------------------------------------------------
+def get_json(command):
+    """Ejecuta un comando que devuelve JSON. Devuelve None si el recurso no existe."""
+    try:
+        return get_backend().get_json(command)
+    except RuntimeError as e:
+        raise ReadinessError(str(e))
+
+def _deployment_status(dep):
+    """Devuelve (listo, detalle) para un objeto Deployment; lanza ResourceFailed si está atascado."""
+    name = dep["metadata"]["name"]
+    spec_replicas = dep["spec"].get("replicas", 1)
+    status = dep.get("status", {})
+    for cond in status.get("conditions", []):
+        if cond.get("type") == "Progressing" and cond.get("reason") == "ProgressDeadlineExceeded":
+            raise ResourceFailed(f"Deployment {name}: {cond.get('message', 'ProgressDeadlineExceeded')}")
+    if status.get("observedGeneration", 0) < dep["metadata"].get("generation", 0):
+        return False, f"{name}: esperando a que el controlador observe la nueva versión"
+    updated = status.get("updatedReplicas", 0)
+    available = status.get("availableReplicas", 0)
+    ready = updated >= spec_replicas and available >= spec_replicas and status.get("replicas", 0) == updated
+    return ready, f"{name}: {updated}/{spec_replicas} actualizadas, {available}/{spec_replicas} disponibles"
+
+def deployment_ready(name, namespace="default"):
+    """Check de rollout de un Deployment (equivalente a 'kubectl rollout status')."""
+    def check():
+        dep = get_backend().kube_get("deployment", name, namespace)
+        if dep is None:
+            return False, f"{name}: aún no existe"
+        return _deployment_status(dep)
+    return check
+
+def helm_release_ready(release, namespace):
+    """Check de un release de Helm: estado 'deployed' y todos sus Deployments disponibles."""
+    def check():
+        info = get_json(f"helm status {release} -n {namespace} -o json")
+        if info is None:
+            return False, "release aún no registrado"
+        state = info.get("info", {}).get("status", "unknown")
+        if state == "failed":
+            raise ResourceFailed(f"Release {release}: {info['info'].get('description', 'failed')}")
+        if state != "deployed":
+            return False, f"release en estado '{state}'"
+
+        deps = get_backend().kube_list("deployment", namespace, f"app.kubernetes.io/instance={release}")
+        pending = []
+        for dep in deps:
+            ready, detail = _deployment_status(dep)
+            if not ready:
+                pending.append(detail)
+        if pending:
+            return False, "; ".join(pending)
+        return True, f"{len(deps)} deployment(s) disponibles"
+    return check
+
+def ingress_ready(name, namespace="default"):
+    """Check de un Ingress: el controlador ya le asignó el hostname del ALB."""
+    def check():
+        ing = get_backend().kube_get("ingress", name, namespace)
+        if ing is None:
+            return False, f"{name}: aún no existe"
+        lbs = ing.get("status", {}).get("loadBalancer", {}).get("ingress", [])
+        if lbs and lbs[0].get("hostname"):
+            return True, lbs[0]["hostname"]
+        return False, f"{name}: esperando que se aprovisione el ALB"
+    return check
+
+# ---------------------------------------------------------
+# Consultas a AWS
+# ---------------------------------------------------------
+def ingress_load_balancers(elbv2_client, cluster_name, ingresses):
+    """
+    ALBs que el AWS Load Balancer Controller creó para los Ingress dados.
+    ingresses: lista de "namespace/nombre" (coincide con el tag ingress.k8s.aws/stack).
+    """
+    wanted = set(ingresses)
+    arns = []
+    for page in elbv2_client.get_paginator("describe_load_balancers").paginate():
+        arns.extend((lb["LoadBalancerArn"], lb["LoadBalancerName"]) for lb in page["LoadBalancers"])
+
+    found = []
+    # describe_tags admite como máximo 20 ARNs por llamada
+    for i in range(0, len(arns), 20):
+        chunk = dict(arns[i:i + 20])
+        for desc in elbv2_client.describe_tags(ResourceArns=list(chunk))["TagDescriptions"]:
+            tags = {t["Key"]: t["Value"] for t in desc["Tags"]}
+            if tags.get("elbv2.k8s.aws/cluster") == cluster_name and tags.get("ingress.k8s.aws/stack") in wanted:
+                found.append(chunk[desc["ResourceArn"]])
+    return found
+
+def load_balancers_gone(elbv2_client, cluster_name, ingresses):
+    """Check que se cumple cuando ya no queda ningún ALB de los Ingress dados."""
+    def check():
+        remaining = ingress_load_balancers(elbv2_client, cluster_name, ingresses)
+        if remaining:
+            return False, f"{len(remaining)} ALB(s) pendientes de borrar: {', '.join(sorted(remaining))}"
+        return True, "sin ALBs"
+    return check
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Recomendador de requests/limits para la app a partir de los datos reales de
+Prometheus (el kube-prometheus-stack que instala setup_monitoring.py).
+
+Consulta el uso de CPU y memoria de los contenedores de amazon-deployment en una
+ventana (por defecto 7 días) partida en tramos, y agrega cada tramo en un
+histograma logarítmico: la memoria no crece con la ventana ni con el número de pods.
+Los percentiles más un margen se convierten en requests/limits, que --apply guarda
+en app-resources.json y pasa al generador de manifiestos.
+
+Prometheus no está expuesto fuera del clúster; antes de ejecutarlo:
+    kubectl port-forward -n monitoring svc/prometheus-kube-prometheus-prometheus 9090
+Con SRE_BACKEND=fake se usa un Prometheus local simulado.
+"""
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from backends import BACKEND
+from tracing import get_tracer, TRACE_FORMATS
+from throttling import retry_call
+from manifests import (APP_DEPLOYMENT, APP_LABEL, APP_CONTAINER, APP_IMAGE, APP_PORT, APP_REPLICAS,
+                       APP_RESOURCES_FILE, app_resources, parse_quantity, validate, deployment, write_if_changed)
+
+# ==========================================
+# ⚙️ CONFIGURACIÓN
+# ==========================================
+PROMETHEUS_URL = os.environ.get("SRE_PROMETHEUS_URL", "http://localhost:9090")
+NAMESPACE = "default"
+WINDOW = "7d"                # Historia a analizar
+STEP = "1m"                  # Resolución de las muestras
+CHUNK = "6h"                 # Tramo por consulta (6h a 1m = 360 puntos por pod)
+QUERY_TIMEOUT = 60
+MAX_POINTS = 11000           # Prometheus rechaza consultas con más puntos por serie
+SELECTOR = f'namespace="{NAMESPACE}",container="{APP_CONTAINER}",pod=~"{APP_DEPLOYMENT}-.*"'
+QUERIES = {
+    "cpu": f"sum by (pod) (rate(container_cpu_usage_seconds_total{{{SELECTOR}}}[5m]))",
+    "memory": f"max by (pod) (container_memory_working_set_bytes{{{SELECTOR}}})",
+}
+
+# Percentiles del uso por pod y margen sobre ellos
+REQUEST_PERCENTILE = 95
+LIMIT_PERCENTILE = 99
+HEADROOM = 0.15
+SKETCH_ACCURACY = 0.01       # Error relativo máximo de los percentiles (1%)
+# Mínimos y redondeo (evita recomendaciones ridículas con series casi vacías)
+MIN_CPU = 0.010              # 10m
+MIN_CPU_LIMIT = 0.100        # El arranque de Node consume mucho más que el régimen: no lo estrangulamos
+MIN_MEMORY = 64 * 2 ** 20    # 64Mi
+CPU_ROUND = 0.005            # múltiplos de 5m
+MEMORY_ROUND = 16 * 2 ** 20  # múltiplos de 16Mi
+
+# Nodos del clúster (eksctl --node-type t3.medium --nodes 2)
+NODE_TYPE = "t3.medium"
+NODE_PRICE_HOUR = 0.0416     # On-Demand us-east-1, USD
+NODE_ALLOCATABLE = {"cpu": 1.93, "memory": 3388 * 2 ** 20, "pods": 17}
+# Lo que ya ocupan en cada nodo los DaemonSets de EKS (aws-node, kube-proxy)
+NODE_OVERHEAD = {"cpu": 0.125, "memory": 100 * 2 ** 20, "pods": 2}
+MIN_NODES = 2
+HOURS_PER_MONTH = 730
+
+tracer = get_tracer()
+
+class Colors:
+    BLUE = '\033[94m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    END = '\033[0m'
+
+class PrometheusError(Exception):
+    """Prometheus rechazó la consulta (sintaxis, demasiados puntos...)."""
+
+# ---------------------------------------------------------
+# Percentiles en memoria constante
+# ---------------------------------------------------------
+class StreamingQuantile:
+    """
+    Histograma con cubetas logarítmicas: cada muestra cae en la cubeta
+    ceil(log_gamma(v)), así que cualquier percentil tiene un error relativo
+    <= accuracy y la memoria depende del rango de valores, no de cuántos hay.
+    """
+
+    def __init__(self, accuracy=SKETCH_ACCURACY):
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zeros = 0
+        self.count = 0
+        self.max = 0.0
+
+    def add(self, value):
+        if math.isnan(value) or value < 0:
+            return
+        self.count += 1
+        self.max = max(self.max, value)
+        if value == 0:
+            self.zeros += 1
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def quantile(self, percentile):
+        """Valor aproximado del percentil (0-100); 0.0 si no hay muestras."""
+        if not self.count:
+            return 0.0
+        rank = percentile / 100 * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                # Punto medio de la cubeta (gamma^(i-1), gamma^i], acotado por el máximo real
+                return min(self.max, 2 * self.gamma ** index / (self.gamma + 1))
+        return self.max
+
+# ---------------------------------------------------------
+# Cliente de la API HTTP de Prometheus
+# ---------------------------------------------------------
+def parse_duration(text):
+    """'7d', '6h', '5m', '30s' o segundos -> segundos."""
+    match = re.match(r"^([0-9]+(?:\.[0-9]+)?)([smhdw]?)$", str(text).strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"Duración inválida: {text!r} (usa p.ej. 7d, 6h, 1m)")
+    factor = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}[match.group(2)]
+    return float(match.group(1)) * factor
+
+def query_range(url, query, start, end, step):
+    """Una consulta /api/v1/query_range. Reintenta 429/5xx; los 4xx suben como PrometheusError."""
+    params = {"query": query, "start": f"{start:.3f}", "end": f"{end:.3f}", "step": f"{step:g}"}
+    with tracer.span("prometheus query_range", kind="http", start=start, end=end):
+        return _api(url, "query_range", params)
+
+def query(url, promql):
+    """Consulta instantánea (/api/v1/query): lista de {'metric': ..., 'value': [ts, valor]}."""
+    with tracer.span("prometheus query", kind="http"):
+        return _api(url, "query", {"query": promql})
+
+def _api(url, endpoint, params):
+    params = urllib.parse.urlencode(params)
+
+    def request():
+        try:
+            with urllib.request.urlopen(f"{url}/api/v1/{endpoint}?{params}", timeout=QUERY_TIMEOUT) as response:
+                return json.load(response)
+        except urllib.error.HTTPError as e:
+            if e.code == 429 or e.code >= 500:
+                raise
+            try:
+                message = json.load(e).get("error", e.reason)
+            except ValueError:
+                message = e.reason
+            raise PrometheusError(f"HTTP {e.code}: {message}") from None
+
+    body = retry_call(f"Prometheus {endpoint}", request)
+    if body.get("status") != "success":
+        raise PrometheusError(body.get("error", "respuesta sin status=success"))
+    return body["data"]["result"]
+
+def collect(url, query, start, end, step, chunk):
+    """
+    Recorre [start, end] en tramos de 'chunk' segundos y vuelca cada muestra en un
+    StreamingQuantile. Devuelve (sketch, pods vistos). Solo un tramo vive en memoria.
+    """
+    sketch = StreamingQuantile()
+    pods = set()
+    chunk = min(chunk, step * (MAX_POINTS - 1))
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(end, chunk_start + chunk)
+        for series in query_range(url, query, chunk_start, chunk_end, step):
+            pods.add(series["metric"].get("pod", "?"))
+            for _, value in series["values"]:
+                sketch.add(float(value))
+        # Prometheus incluye ambos extremos: el siguiente tramo empieza un step después
+        chunk_start = chunk_end + step
+    return sketch, pods
+
+# ---------------------------------------------------------
+# Recomendación
+# ---------------------------------------------------------
+def round_up(value, multiple):
+    return math.ceil(value / multiple - 1e-9) * multiple
+
+def format_cpu(cores):
+    return f"{round(cores * 1000)}m"
+
+def format_memory(size):
+    return f"{round(size / 2 ** 20)}Mi"
+
+def recommend(cpu, memory, request_percentile, limit_percentile, headroom):
+    """requests = percentil de requests + margen; limits = percentil de limits (o el máximo de memoria) + margen."""
+    factor = 1 + headroom
+    cpu_request = round_up(max(MIN_CPU, cpu.quantile(request_percentile) * factor), CPU_ROUND)
+    cpu_limit = round_up(max(cpu_request, MIN_CPU_LIMIT, cpu.quantile(limit_percentile) * factor), CPU_ROUND)
+    memory_request = round_up(max(MIN_MEMORY, memory.quantile(request_percentile) * factor), MEMORY_ROUND)
+    # Superar el límite de memoria es un OOMKill: nunca por debajo del máximo observado
+    memory_limit = round_up(max(memory_request, memory.quantile(limit_percentile), memory.max) * factor, MEMORY_ROUND)
+    # Mismo orden de claves que APP_RESOURCES: el YAML generado no cambia si los valores no cambian
+    return {
+        "requests": {"memory": format_memory(memory_request), "cpu": format_cpu(cpu_request)},
+        "limits": {"memory": format_memory(memory_limit), "cpu": format_cpu(cpu_limit)},
+    }
+
+def nodes_needed(requests, replicas):
+    """Nodos t3.medium para las réplicas según sus requests (el recurso más escaso manda)."""
+    usage = {"cpu": parse_quantity(requests["cpu"]), "memory": parse_quantity(requests["memory"]), "pods": 1}
+    nodes = MIN_NODES
+    for resource, per_pod in usage.items():
+        free = NODE_ALLOCATABLE[resource] - NODE_OVERHEAD[resource]
+        nodes = max(nodes, math.ceil(replicas * per_pod / free))
+    return nodes
+
+def monthly_cost(nodes):
+    return nodes * NODE_PRICE_HOUR * HOURS_PER_MONTH
+
+def print_report(cpu, memory, pods, current, recommended, args):
+    print(f"\n{Colors.BLUE}📈 Uso observado por pod ({len(pods)} pods, {cpu.count + memory.count} muestras){Colors.END}")
+    print(f"   {'RECURSO':<10}{'p50':>10}{'p' + format(args.request_percentile, 'g'):>10}"
+          f"{'p' + format(args.limit_percentile, 'g'):>10}{'MÁX':>10}")
+    observed_cpu = lambda cores: f"{cores * 1000:.3g}m"   # El uso real puede ser < 1m
+    for name, sketch, fmt in (("cpu", cpu, observed_cpu), ("memory", memory, format_memory)):
+        print(f"   {name:<10}{fmt(sketch.quantile(50)):>10}{fmt(sketch.quantile(args.request_percentile)):>10}"
+              f"{fmt(sketch.quantile(args.limit_percentile)):>10}{fmt(sketch.max):>10}")
+
+    print(f"\n{Colors.BLUE}🎯 Recomendación (margen {args.headroom:.0%}){Colors.END}")
+    print(f"   {'CAMPO':<18}{'ACTUAL':>10}{'RECOMENDADO':>14}")
+    for section in ("requests", "limits"):
+        for resource in ("cpu", "memory"):
+            old, new = current[section][resource], recommended[section][resource]
+            color = Colors.YELLOW if old != new else ""
+            print(f"   {section + '.' + resource:<18}{old:>10}{color}{new:>14}{Colors.END if color else ''}")
+
+    old_nodes = nodes_needed(current["requests"], args.replicas)
+    new_nodes = nodes_needed(recommended["requests"], args.replicas)
+    delta = monthly_cost(new_nodes) - monthly_cost(old_nodes)
+    print(f"\n{Colors.BLUE}💰 Proyección para {args.replicas} réplicas en {NODE_TYPE} (${NODE_PRICE_HOUR}/h){Colors.END}")
+    print(f"   Nodos: {old_nodes} → {new_nodes} | Coste: ${monthly_cost(old_nodes):.2f}/mes → "
+          f"${monthly_cost(new_nodes):.2f}/mes ({delta:+.2f} USD/mes)")
+    print("   Solo cuenta la app y los DaemonSets de EKS; para el clúster completo: python3 capacity.py")
+
+def apply_recommendation(recommended):
+    """Guarda los recursos recomendados y regenera amazon-generated.yaml con ellos."""
+    # Validamos igual que el generador antes de escribir nada (p.ej. requests <= limits)
+    validate([deployment(APP_DEPLOYMENT, APP_LABEL, APP_CONTAINER, APP_IMAGE, APP_PORT, APP_REPLICAS, recommended)])
+    if write_if_changed(APP_RESOURCES_FILE, json.dumps(recommended, indent=2) + "\n"):
+        print(f"   💾 Recursos guardados en {APP_RESOURCES_FILE}")
+    else:
+        print(f"   💾 {APP_RESOURCES_FILE} ya tenía estos valores.")
+    import setup_sdk   # Importación tardía: crea los clientes de AWS del setup
+    setup_sdk.generate_app_yaml()
+    print("   ➤ Ejecuta setup_sdk.py (o el pipeline) para desplegarlo.")
+
+# ---------------------------------------------------------
+# Ejecución
+# ---------------------------------------------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Recomienda requests/limits de la app con datos de Prometheus.")
+    parser.add_argument("--prometheus-url", help=f"URL de Prometheus (default: {PROMETHEUS_URL}; "
+                                                 "con SRE_BACKEND=fake, un Prometheus simulado)")
+    parser.add_argument("--window", type=parse_duration, default=WINDOW, help=f"Historia a analizar (default: {WINDOW})")
+    parser.add_argument("--step", type=parse_duration, default=STEP, help=f"Resolución (default: {STEP})")
+    parser.add_argument("--chunk", type=parse_duration, default=CHUNK,
+                        help=f"Tramo de cada consulta a Prometheus (default: {CHUNK})")
+    parser.add_argument("--request-percentile", type=float, default=REQUEST_PERCENTILE)
+    parser.add_argument("--limit-percentile", type=float, default=LIMIT_PERCENTILE)
+    parser.add_argument("--headroom", type=float, default=HEADROOM, help=f"Margen sobre el percentil (default: {HEADROOM})")
+    parser.add_argument("--replicas", type=int, default=APP_REPLICAS, help="Réplicas para la proyección de nodos")
+    parser.add_argument("--apply", action="store_true",
+                        help=f"Guarda la recomendación en {APP_RESOURCES_FILE} y regenera amazon-generated.yaml")
+    parser.add_argument("--profile", action="store_true",
+                        help="Al terminar, muestra las consultas más lentas")
+    parser.add_argument("--trace", metavar="ARCHIVO", help="Exporta la traza a este archivo")
+    parser.add_argument("--trace-format", choices=TRACE_FORMATS, default="jsonl",
+                        help="Formato de --trace: jsonl (default), otlp (OpenTelemetry) o prometheus")
+    return parser.parse_args(argv)
+
+def rightsize(args):
+    print(f"{Colors.BLUE}================================================={Colors.END}")
+    print(f"{Colors.BLUE}   RIGHTSIZING ({APP_DEPLOYMENT})                 {Colors.END}")
+    print(f"{Colors.BLUE}================================================={Colors.END}")
+    fake = None
+    url = args.prometheus_url or PROMETHEUS_URL
+    if BACKEND == "fake" and not args.prometheus_url:
+        from fake_backend import FakePrometheus
+        fake = FakePrometheus()
+        url = fake.start()
+    print(f"📡 Prometheus: {url} | ventana {args.window / 3600:g}h, step {args.step:g}s, tramos de {args.chunk / 3600:g}h")
+
+    end = time.time()
+    start = end - args.window
+    try:
+        cpu, cpu_pods = collect(url, QUERIES["cpu"], start, end, args.step, args.chunk)
+        memory, memory_pods = collect(url, QUERIES["memory"], start, end, args.step, args.chunk)
+    except (PrometheusError, OSError) as e:
+        print(f"{Colors.RED}❌ No se pudo consultar Prometheus: {e}{Colors.END}")
+        sys.exit(1)
+    finally:
+        if fake:
+            fake.stop()
+    if not cpu.count or not memory.count:
+        print(f"{Colors.RED}❌ Prometheus no tiene datos de {APP_CONTAINER} en esa ventana.{Colors.END}")
+        sys.exit(1)
+
+    current = app_resources()
+    recommended = recommend(cpu, memory, args.request_percentile, args.limit_percentile, args.headroom)
+    print_report(cpu, memory, cpu_pods | memory_pods, current, recommended, args)
+    if args.apply:
+        print()
+        apply_recommendation(recommended)
+
+def main(argv=None):
+    args = parse_args(argv)
+    tracer.reset("rightsizing")
+    try:
+        with tracer.span("rightsizing", kind="script"):
+            rightsize(args)
+    finally:
+        tracer.finish(args.trace, args.trace_format, args.profile)
+
+if __name__ == "__main__":
+    main()
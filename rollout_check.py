@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Verificador de rollouts: mide la tasa de errores y la latencia mientras se despliega.
+
+- Contra la app real: genera tráfico a --url mientras ejecuta el comando de deploy
+  (lo que va tras '--') y falla si la tasa de errores supera --max-error-rate.
+      python3 rollout_check.py --url https://amazon-web-demo.your-domain.com/ -- \\
+          kubectl rollout restart deployment/amazon-deployment
+- --simulate: levanta un servidor local que imita el balanceador y los pods durante
+  un rolling update con los parámetros del manifiesto generado (probes, maxSurge/
+  maxUnavailable, minReadySeconds, preStop) y compara el manifiesto sin ellos con el actual.
+"""
+import argparse
+import http.server
+import itertools
+import math
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from manifests import APP_REPLICAS, APP_ROLLOUT, app_manifests, validate
+
+# ==========================================
+# ⚙️ CONFIGURACIÓN
+# ==========================================
+CONCURRENCY = 4              # Clientes lanzando peticiones en bucle
+REQUEST_TIMEOUT = 5
+SETTLE_SECONDS = 20          # Tráfico tras terminar el comando: los pods viejos siguen drenando
+MAX_ERROR_RATE = 0.001       # 0.1%
+
+# Simulación (segundos del clúster; SIM_TIME_SCALE los convierte a segundos reales)
+SIM_TIME_SCALE = 0.05        # 1s del clúster = 50ms reales
+SIM_BOOT_SECONDS = 8         # Lo que tarda la app en escuchar tras arrancar el contenedor
+SIM_PROPAGATION_SECONDS = 3  # Lo que tardan ALB/kube-proxy en sacar del balanceo un pod que termina
+SIM_TICK_SECONDS = 0.5       # Frecuencia del controlador de Deployments simulado
+SIM_LATENCY = 0.004          # Latencia real de una respuesta correcta
+
+class Colors:
+    BLUE = '\033[94m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    END = '\033[0m'
+
+# ---------------------------------------------------------
+# Generador de tráfico y métricas
+# ---------------------------------------------------------
+class TrafficRecorder:
+    """Guarda (instante, código HTTP, latencia) de cada petición. Código 0 = sin respuesta."""
+
+    def __init__(self):
+        self.samples = []
+        self._lock = threading.Lock()
+
+    def record(self, when, status, latency):
+        with self._lock:
+            self.samples.append((when, status, latency))
+
+    @staticmethod
+    def is_error(status):
+        return status == 0 or status >= 500
+
+    def summary(self):
+        with self._lock:
+            samples = sorted(self.samples)
+        errors = [s for s in samples if self.is_error(s[1])]
+        latencies = sorted(s[2] for s in samples if not self.is_error(s[1]))
+
+        def percentile(pct):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, math.ceil(pct / 100 * len(latencies)) - 1)]
+
+        # Racha de errores más larga: del primer al último error sin ninguna respuesta correcta en medio
+        longest, streak_start, last_error = 0.0, None, None
+        for when, status, _ in samples:
+            if self.is_error(status):
+                streak_start = when if streak_start is None else streak_start
+                last_error = when
+                longest = max(longest, last_error - streak_start)
+            else:
+                streak_start = None
+        codes = {}
+        for _, status, _ in errors:
+            codes[status] = codes.get(status, 0) + 1
+        return {
+            "requests": len(samples), "errors": len(errors),
+            "error_rate": len(errors) / len(samples) if samples else 0.0,
+            "p50": percentile(50), "p95": percentile(95), "p99": percentile(99),
+            "longest_error_streak": longest, "codes": codes,
+        }
+
+def generate_load(url, recorder, stop, concurrency=CONCURRENCY, timeout=REQUEST_TIMEOUT):
+    """Arranca 'concurrency' hilos que piden 'url' en bucle hasta que se activa 'stop'."""
+    def worker():
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url, timeout=timeout) as response:
+                    response.read()
+                    status = response.status
+            except urllib.error.HTTPError as e:
+                status = e.code
+            except OSError:
+                status = 0   # Conexión rechazada, reset o timeout
+            recorder.record(start, status, time.perf_counter() - start)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+# ---------------------------------------------------------
+# Simulación local: balanceador + pods + controlador de Deployments
+# ---------------------------------------------------------
+def resolve_rolling_value(value, replicas, round_up):
+    """'25%' o 2 -> número de pods (maxSurge redondea hacia arriba y maxUnavailable hacia abajo)."""
+    if isinstance(value, str) and value.endswith("%"):
+        amount = replicas * int(value[:-1]) / 100
+        return math.ceil(amount) if round_up else math.floor(amount)
+    return int(value)
+
+def settings_from_manifest(objects):
+    """Extrae del manifiesto generado lo que determina el comportamiento de un rollout."""
+    validate(objects)
+    dep = next(o for o in objects if o["kind"] == "Deployment")
+    container = dep["spec"]["template"]["spec"]["containers"][0]
+    replicas = dep["spec"].get("replicas", APP_REPLICAS)
+    rolling = dep["spec"].get("strategy", {}).get("rollingUpdate", {})
+    readiness = container.get("readinessProbe")
+    return {
+        "replicas": replicas,
+        # Defaults de Kubernetes si el Deployment no trae 'strategy'
+        "max_surge": resolve_rolling_value(rolling.get("maxSurge", "25%"), replicas, True),
+        "max_unavailable": resolve_rolling_value(rolling.get("maxUnavailable", "25%"), replicas, False),
+        "min_ready_seconds": dep["spec"].get("minReadySeconds", 0),
+        "readiness_period": readiness["periodSeconds"] if readiness else None,
+        "pre_stop_seconds": container.get("lifecycle", {}).get("preStop", {}).get("sleep", {}).get("seconds", 0),
+    }
+
+class SimulatedPod:
+    def __init__(self, started, settings, scale):
+        self.started = started
+        self.listening_at = started + SIM_BOOT_SECONDS * scale
+        period = settings["readiness_period"]
+        # Sin readinessProbe el pod cuenta como Ready en cuanto arranca el contenedor
+        self.ready_at = started + (math.ceil(SIM_BOOT_SECONDS / period) * period * scale if period else 0)
+        self.min_ready = settings["min_ready_seconds"] * scale
+        self.pre_stop = settings["pre_stop_seconds"] * scale
+        self.propagation = SIM_PROPAGATION_SECONDS * scale
+        self.terminating_at = None
+        self.stopped_at = None
+        self.out_of_rotation_at = None
+
+    def available(self, now):
+        return self.terminating_at is None and now >= self.ready_at + self.min_ready
+
+    def in_rotation(self, now):
+        return now >= self.ready_at and (self.out_of_rotation_at is None or now < self.out_of_rotation_at)
+
+    def serving(self, now):
+        return now >= self.listening_at and (self.stopped_at is None or now < self.stopped_at)
+
+    def terminate(self, now):
+        """SIGTERM: sale del balanceo con retraso; el proceso termina al acabar el preStop."""
+        self.terminating_at = now
+        self.out_of_rotation_at = now + self.propagation
+        self.stopped_at = now + self.pre_stop
+
+class RolloutSimulator:
+    """Servidor HTTP local que enruta cada petición a un pod en rotación, como el ALB."""
+
+    def __init__(self, settings, scale=SIM_TIME_SCALE):
+        self.settings = settings
+        self.scale = scale
+        self._lock = threading.Lock()
+        self._next = itertools.count()
+        now = time.monotonic()
+        self.pods = [SimulatedPod(now - 3600, settings, scale) for _ in range(settings["replicas"])]
+        simulator = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                status = simulator.route()
+                body = b"ok" if status == 200 else b"error"
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self.server.server_address[1]}/"
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def route(self):
+        now = time.monotonic()
+        with self._lock:
+            targets = [p for p in self.pods if p.in_rotation(now)]
+            pod = targets[next(self._next) % len(targets)] if targets else None
+        if pod is None:
+            return 503   # El ALB no tiene targets sanos
+        if not pod.serving(now):
+            return 502   # Target en rotación que no acepta conexiones (arrancando o ya terminado)
+        time.sleep(SIM_LATENCY)
+        return 200
+
+    def rolling_update(self):
+        """Controlador simplificado: respeta maxSurge/maxUnavailable y la disponibilidad de los pods nuevos."""
+        replicas = self.settings["replicas"]
+        surge, unavailable = self.settings["max_surge"], self.settings["max_unavailable"]
+        old, new = list(self.pods), []
+        start = time.monotonic()
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                live_old = [p for p in old if p.terminating_at is None]
+                if not live_old and all(p.available(now) for p in new):
+                    break
+                while len(live_old) + len(new) < replicas + surge and len(new) < replicas:
+                    pod = SimulatedPod(now, self.settings, self.scale)
+                    new.append(pod)
+                    self.pods.append(pod)
+                available = sum(p.available(now) for p in live_old + new)
+                for pod in live_old[:max(0, available - (replicas - unavailable))]:
+                    pod.terminate(now)
+            time.sleep(SIM_TICK_SECONDS * self.scale)
+        return (time.monotonic() - start) / self.scale
+
+def simulate(objects, concurrency, scale=SIM_TIME_SCALE):
+    """Rolling update simulado con tráfico constante. Devuelve (resumen, duración en s del clúster)."""
+    simulator = RolloutSimulator(settings_from_manifest(objects), scale)
+    url = simulator.start()
+    recorder, stop = TrafficRecorder(), threading.Event()
+    threads = generate_load(url, recorder, stop, concurrency)
+    try:
+        time.sleep(SIM_PROPAGATION_SECONDS * scale)
+        duration = simulator.rolling_update()
+        time.sleep(SETTLE_SECONDS * scale)   # Los pods viejos terminan su preStop
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        simulator.stop()
+    return recorder.summary(), duration
+
+# ---------------------------------------------------------
+# Informe
+# ---------------------------------------------------------
+def print_summary(rows, max_error_rate, scale=None):
+    print(f"\n{Colors.BLUE}📊 Tráfico durante el rollout{Colors.END}")
+    print(f"   {'ESCENARIO':<26}{'PETIC.':>8}{'ERRORES':>9}{'TASA':>9}{'p50':>9}{'p95':>9}{'p99':>9}"
+          f"{'RACHA ERR.':>12}{'ROLLOUT':>10}")
+    for label, summary, duration in rows:
+        color = Colors.RED if summary["error_rate"] > max_error_rate else Colors.GREEN
+        # En la simulación, la racha de errores se expresa en segundos del clúster
+        streak = summary["longest_error_streak"] / scale if scale else summary["longest_error_streak"]
+        print(f"   {label:<26}{summary['requests']:>8}{color}{summary['errors']:>9}{summary['error_rate']:>9.2%}{Colors.END}"
+              f"{summary['p50'] * 1000:>7.1f}ms{summary['p95'] * 1000:>7.1f}ms{summary['p99'] * 1000:>7.1f}ms"
+              f"{streak:>11.1f}s{duration:>9.1f}s")
+        if summary["codes"]:
+            detail = ", ".join(f"{'sin respuesta' if code == 0 else code}: {count}"
+                               for code, count in sorted(summary["codes"].items()))
+            print(f"   {'':<26}{Colors.YELLOW}↳ {detail}{Colors.END}")
+
+def run_simulation(args):
+    print(f"🧪 Simulando un rolling update ({SIM_TIME_SCALE:g}s reales por segundo del clúster, "
+          f"arranque de la app {SIM_BOOT_SECONDS}s, propagación {SIM_PROPAGATION_SECONDS}s)...")
+    scenarios = [
+        ("sin probes ni preStop", app_manifests("app.example.com", "arn:aws:acm:example", rollout=None)),
+        ("manifiesto actual", app_manifests("app.example.com", "arn:aws:acm:example", rollout=APP_ROLLOUT)),
+    ]
+    rows = []
+    for label, objects in scenarios:
+        summary, duration = simulate(objects, args.concurrency)
+        rows.append((label, summary, duration))
+    print_summary(rows, args.max_error_rate, SIM_TIME_SCALE)
+    return rows[-1][1]
+
+def run_live(args, command):
+    print(f"🚦 Tráfico a {args.url} ({args.concurrency} clientes)")
+    recorder, stop = TrafficRecorder(), threading.Event()
+    threads = generate_load(args.url, recorder, stop, args.concurrency)
+    start = time.monotonic()
+    returncode = 0
+    try:
+        if command:
+            print(f"   > {' '.join(command)}")
+            returncode = subprocess.run(command).returncode
+        time.sleep(args.settle)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    summary = recorder.summary()
+    print_summary([("deploy" if command else "sondeo", summary, time.monotonic() - start)], args.max_error_rate)
+    if returncode != 0:
+        print(f"{Colors.RED}❌ El comando de deploy terminó con código {returncode}.{Colors.END}")
+        sys.exit(returncode)
+    return summary
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Mide errores y latencia durante un rollout de la app.")
+    parser.add_argument("--url", help="URL de la app para medir un deploy real")
+    parser.add_argument("--simulate", action="store_true",
+                        help="Rolling update simulado en local con los parámetros del manifiesto generado")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--settle", type=float, default=SETTLE_SECONDS,
+                        help=f"Segundos de tráfico tras terminar el comando (default: {SETTLE_SECONDS})")
+    parser.add_argument("--max-error-rate", type=float, default=MAX_ERROR_RATE,
+                        help=f"Tasa de errores máxima antes de fallar (default: {MAX_ERROR_RATE})")
+    parser.epilog = "Los argumentos tras '--' son el comando de deploy a medir."
+    argv = sys.argv[1:] if argv is None else list(argv)
+    command = argv[argv.index("--") + 1:] if "--" in argv else []
+    args = parser.parse_args(argv[:argv.index("--")] if "--" in argv else argv)
+    if not args.simulate and not args.url:
+        parser.error("indica --url (deploy real) o --simulate")
+    args.command = command
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    summary = run_simulation(args) if args.simulate else run_live(args, args.command)
+    if summary["error_rate"] > args.max_error_rate:
+        print(f"\n{Colors.RED}❌ Tasa de errores {summary['error_rate']:.2%} por encima del máximo "
+              f"({args.max_error_rate:.2%}).{Colors.END}")
+        sys.exit(1)
+    print(f"\n{Colors.GREEN}✅ Rollout sin cortes ({summary['error_rate']:.2%} de errores).{Colors.END}")
+
+if __name__ == "__main__":
+    main()
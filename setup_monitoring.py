@@ -1,18 +1,49 @@
 #!/usr/bin/env python3
-import subprocess
 import time
 import sys
 import os
 import base64
+import argparse
+
+from backends import get_backend
+from tracing import get_tracer, TRACE_FORMATS
+from aws_cache import MetadataCache, describe_cluster_cached
+from manifests import (render, write_if_changed, alb_ingress, dump_all, service_monitor, monitoring_values,
+                       monitoring_requests, ManifestError, MONITORING_PROFILES, MONITORING_PROFILE,
+                       MONITORING_NAMESPACE, MONITORING_RELEASE, MONITORING_SERVICE_MONITOR, APP_LABEL,
+                       APP_NAMESPACE, APP_PORT, APP_METRICS_PATH)
+from capacity import node_group
+from vendor import VendorError, chart_path
+from readiness import wait_until, helm_release_ready, ingress_ready, ReadinessError
 
 # ==========================================
 # ⚙️ CONFIGURACIÓN
 # ==========================================
+# Cada valor se puede sobrescribir por variable de entorno (lo usa fleet.py para varios entornos)
+CLUSTER_NAME = os.environ.get("SRE_CLUSTER_NAME", "cluster-sre-demo")
+REGION = os.environ.get("SRE_REGION", "us-east-1")
+AWS_PROFILE = os.environ.get("AWS_PROFILE", "default")
 # Reutilizamos tu dominio y certificado
-BASE_DOMAIN = "your-domain.com"
-GRAFANA_DOMAIN = f"grafana.{BASE_DOMAIN}"
+BASE_DOMAIN = os.environ.get("SRE_BASE_DOMAIN", "your-domain.com")
+GRAFANA_DOMAIN = os.environ.get("SRE_GRAFANA_DOMAIN", f"grafana.{BASE_DOMAIN}")
 # Pega aquí TU ARN de certificado (el mismo de setup_sdk.py)
-CERT_ARN = "arn:aws:acm:us-east-1:AWS_ACCOUNT_ID:certificate/7d3e39ec-99b3-45f4-b8cb-7681e3462a70"
+CERT_ARN = os.environ.get("SRE_CERT_ARN", "arn:aws:acm:us-east-1:AWS_ACCOUNT_ID:certificate/7d3e39ec-99b3-45f4-b8cb-7681e3462a70")
+# Tiempo máximo (segundos) para que el stack y el ALB de Grafana estén listos
+STACK_READY_TIMEOUT = 900
+# Perfil del stack (manifests.MONITORING_PROFILES): "lean" (default) o "full" (valores del chart)
+STACK_PROFILE = MONITORING_PROFILE
+VALUES_FILE = "monitoring-values.yaml"
+# ServiceMonitor de la app (--app-metrics o SRE_APP_METRICS=1): solo si la imagen expone APP_METRICS_PATH.
+# La imagen de la demo no lo sirve: el target quedaría 'down' y TargetDown saltaría sin parar
+APP_METRICS = os.environ.get("SRE_APP_METRICS", "0").lower() in ("1", "true", "yes", "si")
+NODES = node_group()["nodes"]   # Como el node group de setup_sdk.py
+
+# Backend (boto3/Kubernetes en proceso, CLI o fake)
+backend = get_backend()
+tracer = get_tracer()
+
+# Caché de metadatos compartida con setup_sdk.py y cleanup_sdk_all.py
+cache = MetadataCache(AWS_PROFILE, REGION, CLUSTER_NAME)
 
 class Colors:
     BLUE = '\033[94m'
@@ -23,86 +54,147 @@ class Colors:
 
 def run_command(command, check=True):
     print(f"   > {command}")
-    try:
-        subprocess.run(command, shell=True, check=check)
-    except subprocess.CalledProcessError:
+    if backend.run(command).returncode != 0:
         print(f"{Colors.RED}   ❌ El comando falló.{Colors.END}")
         if check:
             sys.exit(1)
 
+def wait_for(check, description, timeout):
+    """Espera a que un recurso esté listo; aborta con el motivo si se atasca o vence el plazo."""
+    try:
+        return wait_until(check, description, timeout=timeout)
+    except ReadinessError as e:
+        print(f"{Colors.RED}   ❌ {e}{Colors.END}")
+        sys.exit(1)
+
+def check_cluster():
+    """Verifica (vía caché si es posible) que el clúster exista antes de instalar nada."""
+    eks_client = backend.client('eks', REGION)
+    cluster = describe_cluster_cached(cache, eks_client, CLUSTER_NAME)
+    if cluster is None:
+        print(f"{Colors.RED}❌ El clúster {CLUSTER_NAME} no existe. Ejecuta primero setup_sdk.py{Colors.END}")
+        sys.exit(1)
+    print(f"☸️  Clúster: {CLUSTER_NAME} ({cluster['status']}) | VPC: {cluster['vpc_id']}")
+
+def write_stack_values(profile):
+    """Genera el archivo de valores del perfil. Devuelve su ruta, o None si el perfil usa los del chart."""
+    try:
+        values = monitoring_values(profile)
+    except ManifestError as e:
+        print(f"{Colors.RED}   ❌ {e}{Colors.END}")
+        sys.exit(1)
+    if not values:
+        return None
+    header = f"Generado por setup_monitoring.py (perfil {profile}). No editar a mano: se sobrescribe."
+    write_if_changed(VALUES_FILE, dump_all([values], header=header))
+    return VALUES_FILE
+
 def install_prometheus_stack():
-    print(f"\n{Colors.GREEN}[1/3] Instalando Kube-Prometheus-Stack (Helm)...{Colors.END}")
+    print(f"\n{Colors.GREEN}[1/4] Instalando Kube-Prometheus-Stack (Helm, perfil {STACK_PROFILE})...{Colors.END}")
     
-    # 1. Agregar repositorio
-    run_command("helm repo add prometheus-community https://prometheus-community.github.io/helm-charts")
-    run_command("helm repo update")
+    # 1. Chart fijado en vendor-lock.json (desde la caché local; solo se descarga la primera vez)
+    try:
+        chart = chart_path("kube-prometheus-stack")
+    except VendorError as e:
+        print(f"{Colors.RED}   ❌ {e}{Colors.END}")
+        sys.exit(1)
     
     # 2. Crear namespace
-    run_command("kubectl create namespace monitoring --dry-run=client -o yaml | kubectl apply -f -")
+    print(f"   > kubectl create namespace {MONITORING_NAMESPACE}")
+    if not backend.kube_ensure_namespace(MONITORING_NAMESPACE):
+        print(f"{Colors.RED}   ❌ No se pudo crear el namespace.{Colors.END}")
+        sys.exit(1)
     
     # 3. Instalar
     # Desactivamos la creación de Ingress por defecto del chart porque crearemos uno personalizado para AWS ALB
-    cmd = """helm upgrade --install prometheus prometheus-community/kube-prometheus-stack \
-      --namespace monitoring \
-      --set grafana.adminPassword='admin' \
-      --wait"""
+    values_file = write_stack_values(STACK_PROFILE)
+    cmd = f"""helm upgrade --install {MONITORING_RELEASE} {chart} \
+      --namespace {MONITORING_NAMESPACE} \
+      --set grafana.adminPassword='admin'"""
+    if values_file:
+        # Retención, relabeling y requests del perfil (sin --reuse-values: volver a "full" restaura el chart)
+        cmd += f" \\\n      -f {values_file}"
+        reserved = monitoring_requests(STACK_PROFILE, NODES)
+        print(f"   🧮 Reservas de memoria del stack: {reserved / 2 ** 20:.0f}Mi en {NODES} nodos")
     run_command(cmd)
+    # Seguimos el progreso real (Prometheus Operator, Grafana, kube-state-metrics...)
+    wait_for(helm_release_ready(MONITORING_RELEASE, MONITORING_NAMESPACE), "Kube-Prometheus-Stack listo", STACK_READY_TIMEOUT)
+
+def create_app_service_monitor():
+    print(f"\n{Colors.GREEN}[2/4] ServiceMonitor de {APP_LABEL}...{Colors.END}")
+    if not APP_METRICS:
+        # Sin el flag, quitamos el de una ejecución anterior para que no siga fallando el scrape
+        print(f"   ⏭️  Omitido: la app no expone {APP_METRICS_PATH} (--app-metrics para crearlo)")
+        backend.kube_delete("servicemonitor", MONITORING_SERVICE_MONITOR, MONITORING_NAMESPACE)
+        return
+    settings = MONITORING_PROFILES[STACK_PROFILE] or {}
+    monitor = service_monitor(MONITORING_SERVICE_MONITOR, MONITORING_NAMESPACE, APP_LABEL, APP_NAMESPACE,
+                              APP_PORT, APP_METRICS_PATH, settings.get("app_scrape_interval", "30s"),
+                              release=MONITORING_RELEASE, sample_limit=settings.get("app_sample_limit"))
+    write_if_changed("app-servicemonitor.yaml", render([monitor]))
+    print("   > kubectl apply -f app-servicemonitor.yaml")
+    if not backend.kube_apply("app-servicemonitor.yaml"):
+        print(f"{Colors.RED}   ❌ No se pudo aplicar el ServiceMonitor.{Colors.END}")
+        sys.exit(1)
 
 def create_grafana_ingress():
-    print(f"\n{Colors.GREEN}[2/3] Exponiendo Grafana con HTTPS (Ingress ALB)...{Colors.END}")
+    print(f"\n{Colors.GREEN}[3/4] Exponiendo Grafana con HTTPS (Ingress ALB)...{Colors.END}")
     
     # El servicio de Grafana suele llamarse "prometheus-grafana" en el puerto 80
-    ingress_yaml = f"""
-apiVersion: networking.k8s.io/v1
-kind: Ingress
-metadata:
-  name: grafana-ingress
-  namespace: monitoring
-  annotations:
-    kubernetes.io/ingress.class: alb
-    alb.ingress.kubernetes.io/scheme: internet-facing
-    alb.ingress.kubernetes.io/target-type: ip
-    external-dns.alpha.kubernetes.io/hostname: {GRAFANA_DOMAIN}
-    alb.ingress.kubernetes.io/certificate-arn: {CERT_ARN}
-    alb.ingress.kubernetes.io/listen-ports: '[{{"HTTP": 80}}, {{"HTTPS":443}}]'
-    alb.ingress.kubernetes.io/actions.ssl-redirect: '{{"Type": "redirect", "RedirectConfig": {{ "Protocol": "HTTPS", "Port": "443", "StatusCode": "HTTP_301"}}}}'
-    # Importante para Grafana: Health Check
-    alb.ingress.kubernetes.io/healthcheck-path: /login
-    alb.ingress.kubernetes.io/success-codes: '200'
-spec:
-  rules:
-    - host: {GRAFANA_DOMAIN}
-      http:
-        paths:
-          - path: /
-            pathType: Prefix
-            backend:
-              service:
-                name: prometheus-grafana
-                port:
-                  number: 80
-"""
-    with open("grafana-ingress.yaml", "w") as f:
-        f.write(ingress_yaml.strip())
-        
-    run_command("kubectl apply -f grafana-ingress.yaml")
+    ingress = alb_ingress("grafana-ingress", GRAFANA_DOMAIN, CERT_ARN, "prometheus-grafana", 80,
+                          namespace="monitoring", target_type="ip", annotations={
+                              # Importante para Grafana: Health Check
+                              "alb.ingress.kubernetes.io/healthcheck-path": "/login",
+                              "alb.ingress.kubernetes.io/success-codes": "200",
+                          })
+    write_if_changed("grafana-ingress.yaml", render([ingress]))
+
+    print("   > kubectl apply -f grafana-ingress.yaml")
+    if not backend.kube_apply("grafana-ingress.yaml"):
+        print(f"{Colors.RED}   ❌ No se pudo aplicar el Ingress.{Colors.END}")
+        sys.exit(1)
+    hostname = wait_for(ingress_ready("grafana-ingress", "monitoring"), "ALB de grafana-ingress", STACK_READY_TIMEOUT)
+    print(f"   ⚖️ ALB asignado: {hostname}")
     print(f"   📄 Ingress creado para: https://{GRAFANA_DOMAIN}")
 
 def get_grafana_creds():
-    print(f"\n{Colors.GREEN}[3/3] Obteniendo credenciales...{Colors.END}")
+    print(f"\n{Colors.GREEN}[4/4] Obteniendo credenciales...{Colors.END}")
     # En este script forzamos la password a 'admin', pero es bueno saber cómo obtenerla si fuera aleatoria
     print(f"{Colors.YELLOW}   Usuario: admin{Colors.END}")
     print(f"{Colors.YELLOW}   Password: admin{Colors.END}")
     print("\n   ⚠️ Nota: Al entrar te pedirá cambiar la contraseña.")
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Instala Prometheus + Grafana y expone Grafana por HTTPS.")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignora la caché de metadatos de AWS y consulta todo de nuevo")
+    parser.add_argument("--stack-profile", choices=sorted(MONITORING_PROFILES), default=STACK_PROFILE,
+                        help=f"Perfil del kube-prometheus-stack (default: {STACK_PROFILE}; también SRE_MONITORING_PROFILE)")
+    parser.add_argument("--app-metrics", action="store_true",
+                        help=f"Crea el ServiceMonitor de la app (la imagen debe exponer {APP_METRICS_PATH}; "
+                             "también SRE_APP_METRICS=1)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Al terminar, muestra los pasos y comandos más lentos")
+    parser.add_argument("--trace", metavar="ARCHIVO",
+                        help="Exporta la traza (un span por paso, comando y llamada a AWS) a este archivo")
+    parser.add_argument("--trace-format", choices=TRACE_FORMATS, default="jsonl",
+                        help="Formato de --trace: jsonl (default), otlp (OpenTelemetry) o prometheus")
+    return parser.parse_args(argv)
+
+def install_monitoring(args):
+    global STACK_PROFILE, APP_METRICS
+    cache.enabled = not args.no_cache
+    STACK_PROFILE = args.stack_profile
+    APP_METRICS = APP_METRICS or args.app_metrics
     print(f"{Colors.BLUE}================================================={Colors.END}")
     print(f"{Colors.BLUE}   MONITORING SETUP (Prometheus & Grafana)       {Colors.END}")
     print(f"{Colors.BLUE}================================================={Colors.END}")
     
-    install_prometheus_stack()
-    create_grafana_ingress()
-    get_grafana_creds()
+    # Sin DAG: cada paso lleva su propio span en la traza
+    for step in (check_cluster, install_prometheus_stack, create_app_service_monitor, create_grafana_ingress,
+                 get_grafana_creds):
+        with tracer.span(step.__name__):
+            step()
     
     print(f"\n{Colors.BLUE}================================================={Colors.END}")
     print(f"{Colors.BLUE}   ✅ MONITORING ACTIVADO                        {Colors.END}")
@@ -110,6 +202,18 @@ def main():
     print(f"Tu Dashboard estará listo en unos minutos en:")
     print(f"👉 https://{GRAFANA_DOMAIN}")
     print(f"\nUsa 'kubectl get ingress -n monitoring' para ver el estado del balanceador.")
+    cache.report()
+    if os.environ.get("SRE_BACKEND_STATS"):
+        backend.print_stats()
+
+def main(argv=None):
+    args = parse_args(argv)
+    tracer.reset("setup_monitoring")
+    try:
+        with tracer.span("setup_monitoring", kind="script", cluster=CLUSTER_NAME, region=REGION):
+            install_monitoring(args)
+    finally:
+        tracer.finish(args.trace, args.trace_format, args.profile)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
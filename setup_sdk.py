@@ -1,28 +1,116 @@
 #!/usr/bin/env python3
-import boto3
-import subprocess
 import time
 import sys
 import json
 import os
+import argparse
+
+from backends import get_backend
+from dag_runner import Task, run_dag
+from aws_cache import MetadataCache, describe_cluster_cached, ACCOUNT_TTL
+from state_fingerprint import FingerprintStore, print_plan
+from step_journal import StepJournal, select_steps
+from readiness import wait_until, get_json, helm_release_ready, deployment_ready, ingress_ready, ReadinessError
+from tracing import get_tracer, TRACE_FORMATS
+from throttling import classify_error
+from capacity import node_group
+from vendor import VendorError, chart_path, file_bytes, image_values, pin, sync as vendor_sync
+from manifests import (render, write_if_changed, app_manifests, app_resources, GENERATED_HEADER,
+                       APP_REPLICAS, APP_IMAGE, APP_HPA, APP_AUTOSCALING, APP_SERVICE, APP_NETWORK)
 
 # ==========================================
 # ⚙️ CONFIGURACIÓN DEL PROYECTO
 # ==========================================
-CLUSTER_NAME = "cluster-sre-demo"
-REGION = "us-east-1"
-DOMAIN_NAME = "amazon-web-demo.your-domain.com" # Tu dominio
+# Cada valor se puede sobrescribir por variable de entorno (lo usa fleet.py para varios entornos)
+CLUSTER_NAME = os.environ.get("SRE_CLUSTER_NAME", "cluster-sre-demo")
+REGION = os.environ.get("SRE_REGION", "us-east-1")
+AWS_PROFILE = os.environ.get("AWS_PROFILE", "default")
+BASE_DOMAIN = os.environ.get("SRE_BASE_DOMAIN", "your-domain.com") # Zona de Route53 que gestiona ExternalDNS
+DOMAIN_NAME = os.environ.get("SRE_DOMAIN_NAME", f"amazon-web-demo.{BASE_DOMAIN}") # Tu dominio
 # Pega aquí tu ARN del certificado
-CERT_ARN = "arn:aws:acm:us-east-1:AWS_ACCOUNT_ID:certificate/7d3e39ec-99b3-45f4-b8cb-7681e3462a70"
+CERT_ARN = os.environ.get("SRE_CERT_ARN", "arn:aws:acm:us-east-1:AWS_ACCOUNT_ID:certificate/7d3e39ec-99b3-45f4-b8cb-7681e3462a70")
+
+# Autoscaling (--autoscaling o SRE_AUTOSCALING=1): HPA para la app (objetivos en manifests.APP_AUTOSCALING),
+# metrics-server y Cluster Autoscaler ajustando el node group entre NODES_MIN y NODES_MAX
+AUTOSCALING = os.environ.get("SRE_AUTOSCALING", "0").lower() in ("1", "true", "yes", "si")
+NODEGROUP_NAME = "standard-nodes"
+# Forma del node group: la de capacity.py --apply (capacity-plan.json) o t3.medium x 2
+NODE_GROUP = node_group()
+NODE_TYPE = NODE_GROUP["node_type"]
+NODES = NODE_GROUP["nodes"]
+NODES_MIN = int(os.environ.get("SRE_NODES_MIN", str(NODES)))
+NODES_MAX = int(os.environ.get("SRE_NODES_MAX", str(NODE_GROUP["nodes_max"])))
+# Targets IP (--ip-targets o SRE_IP_TARGETS=1): ALB -> pod directo con Service ClusterIP,
+# reparto por zona/nodo y Topology Aware Routing (parámetros en manifests.APP_NETWORK)
+IP_TARGETS = os.environ.get("SRE_IP_TARGETS", "0").lower() in ("1", "true", "yes", "si")
+
+# Tiempos máximos de espera (segundos) para los controladores y la app
+HELM_READY_TIMEOUT = 600
+APP_READY_TIMEOUT = 600
 
 # Versiones
 K8S_VERSION = "1.34"
-LBC_VERSION = "v2.7.2" # Versión base para descargar la política
+# Charts, política del ALB e imagen de ExternalDNS: versiones y digests fijados en vendor-lock.json
+# La imagen del Cluster Autoscaler debe coincidir con la versión minor de Kubernetes
+CLUSTER_AUTOSCALER_IMAGE_TAG = f"v{K8S_VERSION}.0"
+
+# Políticas IAM: una por clúster, para que borrar un entorno de fleet.py no deje sin permisos a los demás
+EXTERNAL_DNS_POLICY_NAME = f"AllowExternalDNSUpdates-{CLUSTER_NAME}"
+ALB_POLICY_NAME = f"AWSLoadBalancerControllerIAMPolicy-{CLUSTER_NAME}"
+CLUSTER_AUTOSCALER_POLICY_NAME = f"AmazonEKSClusterAutoscalerPolicy-{CLUSTER_NAME}"
+EXTERNAL_DNS_POLICY = {
+    "Version": "2012-10-17",
+    "Statement": [
+        {
+            "Effect": "Allow",
+            "Action": ["route53:ChangeResourceRecordSets"],
+            "Resource": "arn:aws:route53:::hostedzone/*"
+        },
+        {
+            "Effect": "Allow",
+            "Action": ["route53:ListHostedZones", "route53:ListResourceRecordSets"],
+            "Resource": "*"
+        }
+    ]
+}
+# Los node groups gestionados por EKS llevan el tag k8s.io/cluster-autoscaler/enabled=true:
+# el autoscaler solo puede cambiar el tamaño de esos ASG
+CLUSTER_AUTOSCALER_POLICY = {
+    "Version": "2012-10-17",
+    "Statement": [
+        {
+            "Effect": "Allow",
+            "Action": ["autoscaling:SetDesiredCapacity", "autoscaling:TerminateInstanceInAutoScalingGroup"],
+            "Resource": "*",
+            "Condition": {"StringEquals": {"aws:ResourceTag/k8s.io/cluster-autoscaler/enabled": "true"}}
+        },
+        {
+            "Effect": "Allow",
+            "Action": [
+                "autoscaling:DescribeAutoScalingGroups", "autoscaling:DescribeAutoScalingInstances",
+                "autoscaling:DescribeLaunchConfigurations", "autoscaling:DescribeScalingActivities",
+                "autoscaling:DescribeTags", "ec2:DescribeImages", "ec2:DescribeInstanceTypes",
+                "ec2:DescribeLaunchTemplateVersions", "ec2:GetInstanceTypesFromInstanceRequirements",
+                "eks:DescribeNodegroup"
+            ],
+            "Resource": "*"
+        }
+    ]
+}
 
-# Clientes Boto3
-eks_client = boto3.client('eks', region_name=REGION)
-iam_client = boto3.client('iam', region_name=REGION)
-sts_client = boto3.client('sts', region_name=REGION)
+# Backend (boto3/Kubernetes en proceso, CLI o fake) y clientes reutilizados
+backend = get_backend()
+tracer = get_tracer()
+eks_client = backend.client('eks', REGION)
+iam_client = backend.client('iam', REGION)
+sts_client = backend.client('sts', REGION)
+
+# Caché de metadatos compartida con setup_monitoring.py y cleanup_sdk_all.py
+cache = MetadataCache(AWS_PROFILE, REGION, CLUSTER_NAME)
+# Huellas del último estado aplicado por paso (para saltar lo ya convergido)
+state = FingerprintStore(cache.scope)
+# Diario de la ejecución en curso: si se corta, la siguiente reanuda desde el paso que falló
+journal = StepJournal(cache.scope, "setup_sdk")
 
 class Colors:
     BLUE = '\033[94m'
@@ -33,282 +121,538 @@ class Colors:
 
 def run_command(command, check=True):
     print(f"   > {command}")
-    try:
-        subprocess.run(command, shell=True, check=check)
-    except subprocess.CalledProcessError:
+    if backend.run(command).returncode != 0:
         print(f"{Colors.RED}   ❌ El comando falló.{Colors.END}")
         if check:
             sys.exit(1)
 
+def wait_for(check, description, timeout):
+    """Espera a que un recurso esté listo; aborta con el motivo si se atasca o vence el plazo."""
+    try:
+        return wait_until(check, description, timeout=timeout)
+    except ReadinessError as e:
+        print(f"{Colors.RED}   ❌ {e}{Colors.END}")
+        sys.exit(1)
+
 def get_account_id():
-    return sts_client.get_caller_identity()['Account']
+    return cache.get_or_fetch("account_id", lambda: sts_client.get_caller_identity()['Account'], ACCOUNT_TTL)
 
 def get_vpc_id():
     """Obtiene la VPC ID del clúster creado para configurar el Load Balancer."""
     try:
-        response = eks_client.describe_cluster(name=CLUSTER_NAME)
-        return response['cluster']['resourcesVpcConfig']['vpcId']
+        cluster = describe_cluster_cached(cache, eks_client, CLUSTER_NAME)
     except Exception as e:
-        print(f"{Colors.RED}Error obteniendo VPC ID: {e}{Colors.END}")
+        print(f"{Colors.RED}Error obteniendo VPC ID ({classify_error(e)}): {e}{Colors.END}")
         sys.exit(1)
+    if cluster is None:
+        print(f"{Colors.RED}Error obteniendo VPC ID: el clúster {CLUSTER_NAME} no existe{Colors.END}")
+        sys.exit(1)
+    return cluster['vpc_id']
+
+def get_policy_arn(account_id, policy_name):
+    return f"arn:aws:iam::{account_id}:policy/{policy_name}"
+
+def policy_exists(policy_arn):
+    try:
+        iam_client.get_policy(PolicyArn=policy_arn)
+        return True
+    except iam_client.exceptions.NoSuchEntityException:
+        return False
+
+def service_account_exists(name, namespace):
+    """Comprueba en vivo que el Service Account exista y tenga su rol IRSA anotado."""
+    sa = backend.kube_get("serviceaccount", name, namespace)
+    annotations = (sa or {}).get("metadata", {}).get("annotations", {})
+    return "eks.amazonaws.com/role-arn" in annotations
+
+def helm_release_deployed(release, namespace):
+    info = get_json(f"helm status {release} -n {namespace} -o json")
+    return info is not None and info.get("info", {}).get("status") == "deployed"
+
+def deployment_exists(name, namespace="default"):
+    return backend.kube_get("deployment", name, namespace) is not None
+
+def create_document_policy(step, policy_name, document, account_id):
+    """Crea una política IAM a partir de un documento definido en este script."""
+    policy_arn = get_policy_arn(account_id, policy_name)
+    inputs, live_check = document_policy_state(account_id, policy_name, document)
+    if state.converged(step, inputs, live_check):
+        return policy_arn
 
-def create_external_dns_policy(account_id):
-    """Crea la política IAM para ExternalDNS dinámicamente."""
-    policy_name = "AllowExternalDNSUpdates"
-    policy_arn = f"arn:aws:iam::{account_id}:policy/{policy_name}"
-    
-    # Definición JSON de la política
-    policy_doc = {
-        "Version": "2012-10-17",
-        "Statement": [
-            {
-                "Effect": "Allow",
-                "Action": ["route53:ChangeResourceRecordSets"],
-                "Resource": "arn:aws:route53:::hostedzone/*"
-            },
-            {
-                "Effect": "Allow",
-                "Action": ["route53:ListHostedZones", "route53:ListResourceRecordSets"],
-                "Resource": "*"
-            }
-        ]
-    }
-    
     print(f"   🔍 Verificando política {policy_name}...")
     try:
         iam_client.create_policy(
             PolicyName=policy_name,
-            PolicyDocument=json.dumps(policy_doc)
+            PolicyDocument=json.dumps(document)
         )
         print(f"   ✅ Política creada: {policy_name}")
     except iam_client.exceptions.EntityAlreadyExistsException:
-        print(f"   ⚠️ La política ya existe. Usando la existente.")
+        if state.recorded(step) is None:
+            print(f"   ⚠️ La política ya existe. Usando la existente.")
+        else:
+            # El documento cambió respecto a lo último aplicado: publicamos una nueva versión
+            update_policy_document(policy_arn, document)
+    cache.set(f"policy_arn:{policy_name}", policy_arn)
+    state.record(step, inputs)
     return policy_arn
 
+def create_external_dns_policy(account_id):
+    """Crea la política IAM para ExternalDNS dinámicamente."""
+    return create_document_policy("dns_policy", EXTERNAL_DNS_POLICY_NAME, EXTERNAL_DNS_POLICY, account_id)
+
+def create_cluster_autoscaler_policy(account_id):
+    """Política IAM del Cluster Autoscaler (misma mecánica que la de ExternalDNS)."""
+    return create_document_policy("ca_policy", CLUSTER_AUTOSCALER_POLICY_NAME, CLUSTER_AUTOSCALER_POLICY, account_id)
+
+def update_policy_document(policy_arn, document):
+    """Publica una nueva versión por defecto de la política (IAM admite como máximo 5)."""
+    versions = iam_client.list_policy_versions(PolicyArn=policy_arn)['Versions']
+    old = sorted((v for v in versions if not v['IsDefaultVersion']), key=lambda v: v['CreateDate'])
+    if len(versions) >= 5:
+        iam_client.delete_policy_version(PolicyArn=policy_arn, VersionId=old[0]['VersionId'])
+    iam_client.create_policy_version(PolicyArn=policy_arn, PolicyDocument=json.dumps(document),
+                                     SetAsDefault=True)
+    print(f"   🔄 Política actualizada con una nueva versión: {policy_arn}")
+
 def create_alb_policy():
-    """Descarga y crea la política para AWS Load Balancer Controller."""
-    policy_name = "AWSLoadBalancerControllerIAMPolicy"
-    url = "https://raw.githubusercontent.com/kubernetes-sigs/aws-load-balancer-controller/main/docs/install/iam_policy.json"
+    """Crea la política para AWS Load Balancer Controller a partir del documento fijado en el lock."""
+    policy_name = ALB_POLICY_NAME
+    account_id = get_account_id()
+    policy_arn = get_policy_arn(account_id, policy_name)
+    inputs, live_check = alb_policy_state(account_id)
+    if state.converged("alb_policy", inputs, live_check):
+        return policy_arn
     
-    print(f"   📥 Descargando política oficial IAM para ALB...")
-    run_command(f"curl -o iam_policy.json {url}")
+    print(f"   📥 Política oficial IAM para ALB ({pin('files', 'alb-iam-policy').split('@')[0]})...")
+    try:
+        policy_doc = json.loads(file_bytes("alb-iam-policy"))
+    except Exception as e:
+        print(f"{Colors.RED}   ❌ No se pudo obtener la política: {e}{Colors.END}")
+        sys.exit(1)
     
     print(f"   🔍 Creando/Actualizando política {policy_name} en AWS...")
-    # Usamos subprocess aquí para facilitar el uso del archivo descargado
-    cmd = f"aws iam create-policy --policy-name {policy_name} --policy-document file://iam_policy.json"
-    run_command(cmd, check=False) # Si falla porque existe, no importa
-    
-    # Limpieza
-    if os.path.exists("iam_policy.json"):
-        os.remove("iam_policy.json")
+    try:
+        iam_client.create_policy(PolicyName=policy_name, PolicyDocument=json.dumps(policy_doc))
+        print(f"   ✅ Política creada: {policy_name}")
+    except iam_client.exceptions.EntityAlreadyExistsException:
+        if state.recorded("alb_policy") is None:
+            print(f"   ⚠️ La política ya existe. Usando la existente.")
+        else:
+            # Cambió la versión del controlador: publicamos el nuevo documento como versión por defecto
+            update_policy_document(policy_arn, policy_doc)
     
-    account_id = get_account_id()
-    return f"arn:aws:iam::{account_id}:policy/{policy_name}"
+    cache.set(f"policy_arn:{policy_name}", policy_arn)
+    state.record("alb_policy", inputs)
+    return policy_arn
+
+def render_app_yaml():
+    """Devuelve el YAML de la aplicación (validado) con las variables correctas."""
+    return render(app_manifests(DOMAIN_NAME, CERT_ARN, replicas=APP_REPLICAS, image=APP_IMAGE,
+                                resources=app_resources(), autoscaling=APP_AUTOSCALING if AUTOSCALING else None,
+                                network=APP_NETWORK if IP_TARGETS else None),
+                  header=GENERATED_HEADER)
 
 def generate_app_yaml():
-    """Genera el archivo YAML de la aplicación con las variables correctas."""
-    yaml_content = f"""
-apiVersion: apps/v1
-kind: Deployment
-metadata:
-  name: amazon-deployment
-spec:
-  replicas: 4
-    matchLabels:
-      app: amazon-app
-  template:
-    metadata:
-      labels:
-        app: amazon-app
-    spec:
-      # --- ESTO SOLUCIONA EL ERROR DE ANTIAFFINITY DEL LINTER---
-      affinity:
-        podAntiAffinity:
-          preferredDuringSchedulingIgnoredDuringExecution:
-          - weight: 100
-            podAffinityTerm:
-              labelSelector:
-                matchExpressions:
-                - key: app
-                  operator: In
-                  values:
-                  - amazon-app
-              topologyKey: "kubernetes.io/hostname"
-      # -------------------------------
-      containers:
-        - name: amazon-container
-          image: ooghenekaro/amazon:3
-          ports:
-            - containerPort: 3000
-          # --- OPTIMIZACIÓN SRE ---
-          resources:
-            requests:
-              # Memoria: Basado en tu evidencia de Grafana (~515Mi)
-              memory: "550Mi"
-              # CPU: Bajamos de 250m a 50m porque tu consumo real es ~0.4m
-              # 50m es suficiente para arrancar y estar en reposo sin desperdiciar el nodo.
-              cpu: "50m"
-            limits:
-              # Si hay un memory leak, lo matamos antes de que afecte al nodo
-              memory: "750Mi"
-              # Damos espacio (burst) de hasta 1/4 de núcleo para cargas rápidas
-              cpu: "250m"
-          # -------------------------
----
-apiVersion: v1
-kind: Service
-metadata:
-  name: amazon-service-alb
-spec:
-  type: NodePort
-  ports:
-    - port: 80
-      targetPort: 3000
-  selector:
-    app: amazon-app
----
-apiVersion: networking.k8s.io/v1
-kind: Ingress
-metadata:
-  name: amazon-ingress-alb
-  annotations:
-    kubernetes.io/ingress.class: alb
-    alb.ingress.kubernetes.io/scheme: internet-facing
-    alb.ingress.kubernetes.io/target-type: instance
-    external-dns.alpha.kubernetes.io/hostname: {DOMAIN_NAME}
-    alb.ingress.kubernetes.io/certificate-arn: {CERT_ARN}
-    alb.ingress.kubernetes.io/listen-ports: '[{{"HTTP": 80}}, {{"HTTPS":443}}]'
-    alb.ingress.kubernetes.io/actions.ssl-redirect: '{{"Type": "redirect", "RedirectConfig": {{ "Protocol": "HTTPS", "Port": "443", "StatusCode": "HTTP_301"}}}}'
-spec:
-  rules:
-    - host: {DOMAIN_NAME}
-      http:
-        paths:
-          - path: /
-            pathType: Prefix
-            backend:
-              service:
-                name: amazon-service-alb
-                port:
-                  number: 80
-"""
-    with open("amazon-generated.yaml", "w") as f:
-        f.write(yaml_content.strip())
-    print(f"   📄 Archivo 'amazon-generated.yaml' creado con éxito y regenerado con RECURSOS OPTIMIZADOS (CPU Eficiente).")
-
-def main():
-    print(f"{Colors.BLUE}================================================={Colors.END}")
-    print(f"{Colors.BLUE}   SETUP SCRIPT (AWS EKS AUTOMATION)             {Colors.END}")
-    print(f"{Colors.BLUE}================================================={Colors.END}")
-    
-    account_id = get_account_id()
-    print(f"🆔 Cuenta AWS: {account_id}")
-    print(f"🌎 Región: {REGION}")
-    
-    # ---------------------------------------------------------
-    # PASO 1: Crear Clúster
-    # ---------------------------------------------------------
+    """Genera el archivo YAML de la aplicación; no lo reescribe si no cambió."""
+    if write_if_changed("amazon-generated.yaml", render_app_yaml()):
+        requests = app_resources()["requests"]
+        replicas = (f"HPA {APP_AUTOSCALING['min_replicas']}-{APP_AUTOSCALING['max_replicas']}"
+                    if AUTOSCALING else f"{APP_REPLICAS}")
+        print(f"   📄 Archivo 'amazon-generated.yaml' regenerado ({replicas} réplicas, "
+              f"requests {requests['cpu']}/{requests['memory']}).")
+    else:
+        print("   📄 'amazon-generated.yaml' ya está al día.")
+
+def create_cluster():
+    """Crea el clúster EKS con eksctl si todavía no existe."""
     print(f"\n{Colors.GREEN}[1/5] Creando Clúster EKS (Esto tardará ~15 mins)...{Colors.END}")
     # Verificamos si ya existe para ahorrar tiempo
-    try:
-        eks_client.describe_cluster(name=CLUSTER_NAME)
+    if describe_cluster_cached(cache, eks_client, CLUSTER_NAME):
         print(f"   ⚠️ El clúster {CLUSTER_NAME} ya existe. Saltando creación.")
-    except:
+    else:
         cmd_cluster = f"""eksctl create cluster \
         --name {CLUSTER_NAME} \
         --region {REGION} \
         --version {K8S_VERSION} \
-        --nodegroup-name standard-nodes \
-        --node-type t3.medium \
-        --nodes 2 \
+        --nodegroup-name {NODEGROUP_NAME} \
+        --node-type {NODE_TYPE} \
+        --nodes {NODES} \
         --with-oidc"""
+        if AUTOSCALING:
+            cmd_cluster += f" --nodes-min {NODES_MIN} --nodes-max {NODES_MAX}"
         run_command(cmd_cluster)
+        cache.invalidate("cluster")
+        if AUTOSCALING:
+            state.record("nodegroup", nodegroup_state())
 
-    vpc_id = get_vpc_id()
-    print(f"   🌐 VPC ID detectada: {vpc_id}")
+def scale_nodegroup():
+    """Límites del node group entre los que se mueve el Cluster Autoscaler (clústeres ya creados)."""
+    inputs = nodegroup_state()
+    if state.converged("nodegroup", inputs):
+        return
+    run_command(f"eksctl scale nodegroup --cluster {CLUSTER_NAME} --region {REGION} --name {NODEGROUP_NAME} "
+                f"--nodes-min {NODES_MIN} --nodes-max {NODES_MAX}")
+    state.record("nodegroup", inputs)
 
-    # ---------------------------------------------------------
-    # PASO 2: Políticas IAM
-    # ---------------------------------------------------------
-    print(f"\n{Colors.GREEN}[2/5] Configurando Políticas IAM...{Colors.END}")
-    dns_policy_arn = create_external_dns_policy(account_id)
-    alb_policy_arn = create_alb_policy()
-
-    # ---------------------------------------------------------
-    # PASO 3: Service Accounts (IRSA)
-    # ---------------------------------------------------------
-    print(f"\n{Colors.GREEN}[3/5] Creando Service Accounts (IRSA)...{Colors.END}")
-    
-    # ExternalDNS SA
-    cmd_sa_dns = f"""eksctl create iamserviceaccount \
-      --name external-dns \
-      --namespace default \
+def create_service_account(name, namespace, policy_arn):
+    """Crea un Service Account con rol IAM asociado (IRSA) mediante eksctl."""
+    print(f"\n{Colors.GREEN}[3/5] Creando Service Account (IRSA) {namespace}/{name}...{Colors.END}")
+    step = f"sa:{namespace}/{name}"
+    inputs, live_check = service_account_state(name, namespace, policy_arn)
+    if state.converged(step, inputs, live_check):
+        return
+    cmd_sa = f"""eksctl create iamserviceaccount \
+      --name {name} \
+      --namespace {namespace} \
       --cluster {CLUSTER_NAME} \
-      --attach-policy-arn {dns_policy_arn} \
+      --attach-policy-arn {policy_arn} \
       --approve --override-existing-serviceaccounts"""
-    run_command(cmd_sa_dns)
+    run_command(cmd_sa)
+    cache.set(f"irsa:{namespace}/{name}", policy_arn)
+    state.record(step, inputs)
 
-    # ALB Controller SA
-    cmd_sa_alb = f"""eksctl create iamserviceaccount \
-      --name aws-load-balancer-controller \
-      --namespace kube-system \
-      --cluster {CLUSTER_NAME} \
-      --attach-policy-arn {alb_policy_arn} \
-      --approve --override-existing-serviceaccounts"""
-    run_command(cmd_sa_alb)
+def vendor_charts():
+    """Deja en la caché local los charts fijados que va a instalar este setup (sin 'helm repo add/update')."""
+    charts = ["external-dns", "aws-load-balancer-controller"]
+    if AUTOSCALING:
+        charts += ["metrics-server", "cluster-autoscaler"]
+    try:
+        results = vendor_sync(kinds=("charts",), names=charts)
+    except VendorError as e:
+        print(f"{Colors.RED}   ❌ {e}{Colors.END}")
+        sys.exit(1)
+    downloaded = [name for _, name, _, _, origin in results if origin != "caché"]
+    if downloaded:
+        print(f"   📦 Charts descargados a la caché: {', '.join(downloaded)}")
+    else:
+        print("   ⚡ Charts en la caché local. Sin descargas.")
 
-    # ---------------------------------------------------------
-    # PASO 4: Instalación Helm Charts
-    # ---------------------------------------------------------
-    print(f"\n{Colors.GREEN}[4/5] Instalando Controladores (Helm)...{Colors.END}")
-    
-    # Repositorios
-    run_command("helm repo add eks https://aws.github.io/eks-charts")
-    run_command("helm repo add bitnami https://charts.bitnami.com/bitnami")
-    run_command("helm repo update")
+def helm_upgrade(release, chart, namespace, values):
+    """helm upgrade --install desde el .tgz cacheado del chart, con los valores --set dados (en orden)."""
+    try:
+        path = chart_path(chart)
+    except VendorError as e:
+        print(f"{Colors.RED}   ❌ {e}{Colors.END}")
+        sys.exit(1)
+    cmd = f"helm upgrade --install {release} {path} -n {namespace}"
+    for key, value in values.items():
+        cmd += f" \\\n      --set {key}={value}"
+    run_command(cmd)
 
-    # ExternalDNS
-    print("   ➤ Instalando ExternalDNS...")
+def helm_state(release, chart, namespace, values):
+    inputs = {"release": release, "chart": chart, "version": pin("charts", chart),
+              "namespace": namespace, "values": values}
+    return inputs, lambda: helm_release_deployed(release, namespace)
+
+def external_dns_values():
     # Nota: Usamos registro ECR público para evitar rate limits
-    cmd_helm_dns = f"""helm upgrade --install external-dns oci://registry-1.docker.io/bitnamicharts/external-dns \
-      --set provider=aws \
-      --set aws.zoneType=public \
-      --set txtOwnerId={CLUSTER_NAME} \
-      --set domainFilters[0]=your-domain.com \
-      --set serviceAccount.create=false \
-      --set serviceAccount.name=external-dns \
-      --set image.registry=public.ecr.aws \
-      --set image.repository=bitnami/external-dns \
-      --set image.tag=latest \
-      --set global.security.allowInsecureImages=true \
-      --set logLevel=debug \
-      --wait"""
-    run_command(cmd_helm_dns)
-
-    # ALB Controller
+    return {
+        "provider": "aws",
+        "aws.zoneType": "public",
+        "txtOwnerId": CLUSTER_NAME,
+        "domainFilters[0]": BASE_DOMAIN,
+        "serviceAccount.create": "false",
+        "serviceAccount.name": "external-dns",
+        **image_values("external-dns"),
+        "global.security.allowInsecureImages": "true",
+        "logLevel": "debug",
+    }
+
+def alb_controller_values(vpc_id):
+    return {
+        "clusterName": CLUSTER_NAME,
+        "serviceAccount.create": "false",
+        "serviceAccount.name": "aws-load-balancer-controller",
+        "region": REGION,
+        "vpcId": vpc_id,
+    }
+
+def cluster_autoscaler_values():
+    return {
+        "autoDiscovery.clusterName": CLUSTER_NAME,
+        "awsRegion": REGION,
+        "rbac.serviceAccount.create": "false",
+        "rbac.serviceAccount.name": "cluster-autoscaler",
+        "image.tag": CLUSTER_AUTOSCALER_IMAGE_TAG,
+        "extraArgs.balance-similar-node-groups": "true",
+        "extraArgs.skip-nodes-with-system-pods": "false",
+        "extraArgs.expander": "least-waste",
+    }
+
+def metrics_server_state():
+    # EKS no trae metrics-server: sin él la HPA no tiene métricas de CPU/memoria
+    return helm_state("metrics-server", "metrics-server", "kube-system", {})
+
+def cluster_autoscaler_state():
+    return helm_state("cluster-autoscaler", "cluster-autoscaler", "kube-system",
+                      cluster_autoscaler_values())
+
+def nodegroup_state():
+    return {"cluster": CLUSTER_NAME, "nodegroup": NODEGROUP_NAME, "min": NODES_MIN, "max": NODES_MAX}
+
+def external_dns_state():
+    return helm_state("external-dns", "external-dns", "default", external_dns_values())
+
+def alb_controller_state(vpc_id):
+    return helm_state("aws-load-balancer-controller", "aws-load-balancer-controller",
+                      "kube-system", alb_controller_values(vpc_id))
+
+def document_policy_state(account_id, policy_name, document):
+    arn = get_policy_arn(account_id, policy_name)
+    return {"name": policy_name, "document": document}, lambda: policy_exists(arn)
+
+def dns_policy_state(account_id):
+    return document_policy_state(account_id, EXTERNAL_DNS_POLICY_NAME, EXTERNAL_DNS_POLICY)
+
+def ca_policy_state(account_id):
+    return document_policy_state(account_id, CLUSTER_AUTOSCALER_POLICY_NAME, CLUSTER_AUTOSCALER_POLICY)
+
+def alb_policy_state(account_id):
+    arn = get_policy_arn(account_id, ALB_POLICY_NAME)
+    return {"name": ALB_POLICY_NAME, "document": pin("files", "alb-iam-policy")}, lambda: policy_exists(arn)
+
+def service_account_state(name, namespace, policy_arn):
+    inputs = {"name": name, "namespace": namespace, "cluster": CLUSTER_NAME, "policy_arn": policy_arn}
+    return inputs, lambda: service_account_exists(name, namespace)
+
+def app_state():
+    return {"manifest": render_app_yaml()}, lambda: deployment_exists("amazon-deployment")
+
+def install_helm_release(release, chart, namespace, values, description):
+    step = f"helm:{release}"
+    inputs, live_check = helm_state(release, chart, namespace, values)
+    if state.converged(step, inputs, live_check):
+        return
+    helm_upgrade(release, chart, namespace, values)
+    # En lugar de un '--wait' ciego, seguimos el estado real del release y sus Deployments
+    wait_for(helm_release_ready(release, namespace), f"{description} listo", HELM_READY_TIMEOUT)
+    state.record(step, inputs)
+
+def install_external_dns():
+    print("   ➤ Instalando ExternalDNS...")
+    inputs, _ = external_dns_state()
+    install_helm_release("external-dns", inputs["chart"], "default", inputs["values"], "ExternalDNS")
+
+def install_alb_controller(vpc_id):
     print("   ➤ Instalando AWS Load Balancer Controller...")
-    cmd_helm_alb = f"""helm upgrade --install aws-load-balancer-controller eks/aws-load-balancer-controller \
-      -n kube-system \
-      --set clusterName={CLUSTER_NAME} \
-      --set serviceAccount.create=false \
-      --set serviceAccount.name=aws-load-balancer-controller \
-      --set region={REGION} \
-      --set vpcId={vpc_id} \
-      --wait"""
-    run_command(cmd_helm_alb)
-
-    # ---------------------------------------------------------
-    # PASO 5: Despliegue de la App
-    # ---------------------------------------------------------
+    inputs, _ = alb_controller_state(vpc_id)
+    install_helm_release("aws-load-balancer-controller", inputs["chart"], "kube-system", inputs["values"],
+                         "AWS Load Balancer Controller")
+
+def install_metrics_server():
+    print("   ➤ Instalando metrics-server...")
+    inputs, _ = metrics_server_state()
+    install_helm_release("metrics-server", inputs["chart"], "kube-system", inputs["values"], "metrics-server")
+
+def install_cluster_autoscaler():
+    print("   ➤ Instalando Cluster Autoscaler...")
+    inputs, _ = cluster_autoscaler_state()
+    install_helm_release("cluster-autoscaler", inputs["chart"], "kube-system", inputs["values"], "Cluster Autoscaler")
+
+def remove_stale_hpa():
+    """Si se desactivó el autoscaling, la HPA aplicada antes seguiría cambiando las réplicas."""
+    if AUTOSCALING or state.recorded("hpa") is None:
+        return
+    print(f"   > Eliminando hpa/{APP_HPA} (autoscaling desactivado)")
+    backend.kube_delete("hpa", APP_HPA, "default")
+    state.forget("hpa")
+
+def replace_service_on_type_change():
+    """
+    Al pasar de NodePort a ClusterIP (o al revés) el apiserver rechaza el cambio si el Service
+    conserva su nodePort asignado: lo borramos y el apply lo recrea con el tipo nuevo.
+    """
+    desired = APP_NETWORK["service_type"] if IP_TARGETS else "NodePort"
+    # Sin registro, el Service (si existe) es de antes de --ip-targets: NodePort
+    action = state.diff("service_type", desired)
+    if action == "ok" or (action == "crear" and desired == "NodePort"):
+        return
+    live = backend.kube_get("service", APP_SERVICE, "default")
+    if live is None or live.get("spec", {}).get("type") == desired:
+        return
+    print(f"   {Colors.YELLOW}⚠️ service/{APP_SERVICE}: {live['spec'].get('type')} -> {desired}, "
+          f"se recrea (el ALB re-registra sus targets){Colors.END}")
+    backend.kube_delete("service", APP_SERVICE, "default")
+
+def deploy_app():
     print(f"\n{Colors.GREEN}[5/5] Desplegando Aplicación Web...{Colors.END}")
+    inputs, live_check = app_state()
+    if state.converged("app", inputs, live_check):
+        return
     generate_app_yaml()
-    run_command("kubectl apply -f amazon-generated.yaml")
+    replace_service_on_type_change()
+    print("   > kubectl apply -f amazon-generated.yaml")
+    if not backend.kube_apply("amazon-generated.yaml"):
+        print(f"{Colors.RED}   ❌ No se pudo aplicar el manifiesto.{Colors.END}")
+        sys.exit(1)
+    wait_for(deployment_ready("amazon-deployment"), "Rollout de amazon-deployment", APP_READY_TIMEOUT)
+    hostname = wait_for(ingress_ready("amazon-ingress-alb"), "ALB de amazon-ingress-alb", APP_READY_TIMEOUT)
+    print(f"   ⚖️ ALB asignado: {hostname}")
+    remove_stale_hpa()
+    if AUTOSCALING:
+        state.record("hpa", APP_AUTOSCALING)
+    state.record("service_type", APP_NETWORK["service_type"] if IP_TARGETS else "NodePort")
+    state.record("app", inputs)
+
+def plan(account_id):
+    """Modo --plan: compara el estado deseado con el último aplicado sin tocar nada."""
+    cluster = describe_cluster_cached(cache, eks_client, CLUSTER_NAME)
+    print(f"\n   {'cluster':<20} " + (f"{Colors.GREEN}✔ existe{Colors.END}" if cluster
+                                       else f"{Colors.YELLOW}+ crear{Colors.END}"))
+    dns_arn = get_policy_arn(account_id, EXTERNAL_DNS_POLICY_NAME)
+    alb_arn = get_policy_arn(account_id, ALB_POLICY_NAME)
+    # Sin clúster no hay VPC todavía: el release del ALB Controller aparecerá como 'crear'
+    vpc_id = cluster['vpc_id'] if cluster else None
+    steps = [
+        ("dns_policy", *dns_policy_state(account_id)),
+        ("alb_policy", *alb_policy_state(account_id)),
+        ("sa:default/external-dns", *service_account_state("external-dns", "default", dns_arn)),
+        ("sa:kube-system/aws-load-balancer-controller",
+         *service_account_state("aws-load-balancer-controller", "kube-system", alb_arn)),
+        ("helm:external-dns", *external_dns_state()),
+        ("helm:aws-load-balancer-controller", *alb_controller_state(vpc_id)),
+        ("app", *app_state()),
+    ]
+    if AUTOSCALING:
+        ca_arn = get_policy_arn(account_id, CLUSTER_AUTOSCALER_POLICY_NAME)
+        steps[-1:-1] = [
+            ("ca_policy", *ca_policy_state(account_id)),
+            ("sa:kube-system/cluster-autoscaler",
+             *service_account_state("cluster-autoscaler", "kube-system", ca_arn)),
+            ("nodegroup", nodegroup_state(), None),
+            ("helm:metrics-server", *metrics_server_state()),
+            ("helm:cluster-autoscaler", *cluster_autoscaler_state()),
+        ]
+    if not cluster:
+        # Los checks en vivo contra Kubernetes fallarían sin clúster
+        steps = [(name, inputs, None if name.startswith(("sa:", "helm:", "app")) else live)
+                 for name, inputs, live in steps]
+    return print_plan(state, steps)
+
+def build_setup_tasks(account_id):
+    """
+    Grafo de dependencias del setup. Solo se encadena lo que realmente depende:
+    las políticas IAM y los charts cacheados no necesitan el clúster, IRSA necesita
+    clúster + política, y cada chart necesita su Service Account.
+    """
+    # Con autoscaling, la HPA espera a la API de métricas
+    metrics_api = ["helm_metrics_server"] if AUTOSCALING else []
+    tasks = [
+        # PASO 1: Clúster
+        Task("cluster", lambda r: create_cluster()),
+        Task("vpc", lambda r: get_vpc_id(), deps=["cluster"]),
+        # PASO 2: Políticas IAM
+        Task("dns_policy", lambda r: create_external_dns_policy(account_id)),
+        Task("alb_policy", lambda r: create_alb_policy()),
+        # PASO 3: Service Accounts (IRSA)
+        Task("sa_dns", lambda r: create_service_account("external-dns", "default", r["dns_policy"]),
+             deps=["cluster", "dns_policy"]),
+        Task("sa_alb", lambda r: create_service_account("aws-load-balancer-controller", "kube-system", r["alb_policy"]),
+             deps=["cluster", "alb_policy"]),
+        # PASO 4: Helm (los charts se descargan una vez a la caché local, en paralelo con el clúster)
+        Task("charts", lambda r: vendor_charts()),
+        Task("helm_dns", lambda r: install_external_dns(), deps=["sa_dns", "charts"]),
+        Task("helm_alb", lambda r: install_alb_controller(r["vpc"]), deps=["sa_alb", "charts", "vpc"]),
+        # PASO 5: App (el webhook del ALB Controller debe estar listo antes del Ingress)
+        Task("app", lambda r: deploy_app(), deps=["helm_alb"] + metrics_api),
+    ]
+    if AUTOSCALING:
+        tasks += [
+            Task("ca_policy", lambda r: create_cluster_autoscaler_policy(account_id)),
+            Task("sa_ca", lambda r: create_service_account("cluster-autoscaler", "kube-system", r["ca_policy"]),
+                 deps=["cluster", "ca_policy"]),
+            Task("nodegroup", lambda r: scale_nodegroup(), deps=["cluster"]),
+            Task("helm_metrics_server", lambda r: install_metrics_server(), deps=["cluster", "charts"]),
+            Task("helm_ca", lambda r: install_cluster_autoscaler(), deps=["sa_ca", "nodegroup", "charts"]),
+        ]
+    return tasks
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Setup del clúster EKS y sus controladores.")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Número máximo de tareas ejecutándose en paralelo (default: 4)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignora la caché de metadatos de AWS y consulta todo de nuevo")
+    parser.add_argument("--plan", action="store_true",
+                        help="Muestra qué pasos cambiarían respecto a lo último aplicado, sin aplicar nada")
+    parser.add_argument("--force", action="store_true",
+                        help="Ejecuta todos los pasos aunque estén convergidos (implica --restart)")
+    parser.add_argument("--restart", action="store_true",
+                        help="Ignora el diario de una ejecución interrumpida y empieza desde el primer paso")
+    selectors = parser.add_mutually_exclusive_group()
+    selectors.add_argument("--from-step", metavar="PASO",
+                           help="Repite este paso y los que dependen de él; el resto sale del diario")
+    selectors.add_argument("--only", metavar="PASO[,PASO]", type=lambda v: v.split(","),
+                           help="Ejecuta solo estos pasos (sus dependencias deben constar en el diario)")
+    parser.add_argument("--autoscaling", action="store_true",
+                        help="Instala metrics-server, HPA y Cluster Autoscaler (también SRE_AUTOSCALING=1)")
+    parser.add_argument("--ip-targets", action="store_true",
+                        help="ALB con targets IP, Service ClusterIP y reparto por zona (también SRE_IP_TARGETS=1)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Al terminar, muestra los pasos y comandos más lentos")
+    parser.add_argument("--trace", metavar="ARCHIVO",
+                        help="Exporta la traza (un span por paso, comando y llamada a AWS) a este archivo")
+    parser.add_argument("--trace-format", choices=TRACE_FORMATS, default="jsonl",
+                        help="Formato de --trace: jsonl (default), otlp (OpenTelemetry) o prometheus")
+    return parser.parse_args(argv)
+
+def setup(args):
+    global AUTOSCALING, IP_TARGETS
+    cache.enabled = not args.no_cache
+    state.force = args.force
+    AUTOSCALING = AUTOSCALING or args.autoscaling
+    IP_TARGETS = IP_TARGETS or args.ip_targets
+    print(f"{Colors.BLUE}================================================={Colors.END}")
+    print(f"{Colors.BLUE}   SETUP SCRIPT (AWS EKS AUTOMATION)             {Colors.END}")
+    print(f"{Colors.BLUE}================================================={Colors.END}")
+    
+    account_id = get_account_id()
+    print(f"🆔 Cuenta AWS: {account_id}")
+    print(f"🌎 Región: {REGION}")
+    if AUTOSCALING:
+        print(f"📈 Autoscaling: HPA {APP_AUTOSCALING['min_replicas']}-{APP_AUTOSCALING['max_replicas']} réplicas, "
+              f"{NODES_MIN}-{NODES_MAX} nodos {NODE_TYPE}")
+    if IP_TARGETS:
+        print(f"🛣️ Red: ALB -> pod (target-type {APP_NETWORK['target_type']}, Service {APP_NETWORK['service_type']}, "
+              f"topology-mode {APP_NETWORK['topology_mode']})")
+
+    if args.plan:
+        plan(account_id)
+        return
+
+    # Reanudación: la configuración forma parte de la huella (otro dominio o --autoscaling empieza de cero)
+    tasks = build_setup_tasks(account_id)
+    journal.forget("cleanup_sdk_all")   # Lo que borró una limpieza a medias se vuelve a crear ahora
+    journal.begin({"account": account_id, "autoscaling": AUTOSCALING, "ip_targets": IP_TARGETS,
+                   "domain": DOMAIN_NAME, "cert": CERT_ARN, "k8s": K8S_VERSION},
+                  restart=args.restart or args.force, keep=bool(args.from_step or args.only))
+    try:
+        selected = select_steps(tasks, journal, args.from_step, args.only)
+    except ValueError as e:
+        print(f"{Colors.RED}❌ {e}{Colors.END}")
+        sys.exit(1)
+    results = run_dag(tasks, max_workers=args.workers, journal=journal, selected=selected)
+    journal.finish()
+    if "vpc" in results:
+        print(f"   🌐 VPC ID detectada: {results['vpc']}")
+    cache.report()
     
     print(f"\n{Colors.BLUE}================================================={Colors.END}")
     print(f"{Colors.BLUE}   ✅ INSTALACIÓN COMPLETADA EXITOSAMENTE        {Colors.END}")
     print(f"{Colors.BLUE}================================================={Colors.END}")
     print(f"Tu web estará disponible en unos minutos en: https://{DOMAIN_NAME}")
     print(f"Puedes monitorear el progreso con: kubectl get ingress")
+    if os.environ.get("SRE_BACKEND_STATS"):
+        backend.print_stats()
+
+def main(argv=None):
+    args = parse_args(argv)
+    tracer.reset("setup_sdk")
+    try:
+        with tracer.span("setup_sdk", kind="script", cluster=CLUSTER_NAME, region=REGION):
+            setup(args)
+    finally:
+        tracer.finish(args.trace, args.trace_format, args.profile)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
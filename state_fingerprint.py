@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Huellas (hash) del estado deseado por paso para saltar lo que ya está convergido."""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from aws_cache import file_lock
+
+# ==========================================
+# ⚙️ CONFIGURACIÓN
+# ==========================================
+STATE_PATH = os.environ.get("SRE_STATE_FILE",
+                            os.path.expanduser("~/.cache/sre-demo/last-applied.json"))
+
+class Colors:
+    BLUE = '\033[94m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    END = '\033[0m'
+
+def fingerprint(inputs):
+    """SHA-256 de la representación JSON canónica (claves ordenadas) de las entradas."""
+    canonical = json.dumps(inputs, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+class FingerprintStore:
+    """
+    Guarda la última huella aplicada de cada paso (por perfil/región/clúster).
+    Un paso está convergido si la huella deseada coincide con la registrada y,
+    cuando se indica, el recurso sigue existiendo en vivo.
+    """
+
+    def __init__(self, scope, path=STATE_PATH):
+        self.scope = scope
+        self.path = path
+        self.force = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, data):
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".last-applied-")
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def recorded(self, step):
+        with self._lock, file_lock(self.path):
+            return self._load().get(self.scope, {}).get(step)
+
+    def diff(self, step, inputs, live_check=None):
+        """Devuelve la acción necesaria: 'ok', 'crear', 'actualizar' o 'recrear' (deriva en vivo)."""
+        recorded = self.recorded(step)
+        if recorded is None:
+            return "crear"
+        if recorded != fingerprint(inputs):
+            return "actualizar"
+        if live_check is not None and not live_check():
+            return "recrear"
+        return "ok"
+
+    def converged(self, step, inputs, live_check=None):
+        """True si el paso puede saltarse. Imprime el motivo en ambos casos."""
+        if self.force:
+            return False
+        action = self.diff(step, inputs, live_check)
+        if action == "ok":
+            print(f"   ⚡ {step}: sin cambios desde la última ejecución. Saltando.")
+            return True
+        return False
+
+    def record(self, step, inputs):
+        with self._lock, file_lock(self.path):
+            data = self._load()
+            data.setdefault(self.scope, {})[step] = fingerprint(inputs)
+            self._save(data)
+
+    def forget(self, step=None):
+        """Olvida un paso, o todo el ámbito si step es None (p.ej. tras borrar el clúster)."""
+        with self._lock, file_lock(self.path):
+            data = self._load()
+            if step is None:
+                data.pop(self.scope, None)
+            else:
+                data.get(self.scope, {}).pop(step, None)
+            self._save(data)
+
+def print_plan(store, steps):
+    """
+    Modo --plan: muestra qué cambiaría sin aplicar nada.
+    steps: lista de (nombre, entradas, live_check) en orden de ejecución.
+    """
+    symbols = {
+        "ok": f"{Colors.GREEN}✔ sin cambios{Colors.END}",
+        "crear": f"{Colors.YELLOW}+ crear{Colors.END}",
+        "actualizar": f"{Colors.YELLOW}~ actualizar{Colors.END}",
+        "recrear": f"{Colors.RED}! recrear (no existe en vivo){Colors.END}",
+    }
+    print(f"\n{Colors.BLUE}📋 Plan de ejecución ({store.scope}){Colors.END}")
+    changes = 0
+    for name, inputs, live_check in steps:
+        action = store.diff(name, inputs, live_check)
+        changes += action != "ok"
+        print(f"   {name:<20} {symbols[action]}  {fingerprint(inputs)[:12]}")
+    print(f"   {changes} paso(s) con cambios, {len(steps) - changes} convergido(s).")
+    return changes
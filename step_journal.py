@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""Diario de pasos completados para reanudar setup y limpieza donde se cortaron."""
+import json
+import os
+import tempfile
+import threading
+import time
+
+from aws_cache import file_lock
+from dag_runner import prerequisites
+from state_fingerprint import STATE_PATH, fingerprint
+
+# ==========================================
+# ⚙️ CONFIGURACIÓN
+# ==========================================
+# Junto a las huellas de state_fingerprint (fleet.py y benchmark.py ya separan ese directorio por entorno)
+JOURNAL_PATH = os.environ.get("SRE_JOURNAL_FILE", os.path.join(os.path.dirname(STATE_PATH), "journal.json"))
+MAX_RESUME_AGE = 24 * 3600   # Una ejecución cortada hace más de un día ya no describe el estado real
+
+class Colors:
+    BLUE = '\033[94m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    END = '\033[0m'
+
+class StepJournal:
+    """
+    Registro durable de una ejecución de un script (por perfil/región/clúster):
+    qué pasos terminaron y su salida (VPC ID, ARNs de políticas...). Cada paso se
+    escribe en cuanto termina (archivo temporal + fsync + rename), así que un corte
+    a mitad de ejecución solo pierde el paso que estaba en marcha.
+    """
+
+    def __init__(self, scope, script, path=JOURNAL_PATH):
+        self.scope = scope
+        self.script = script
+        self.path = path
+        self.steps = {}
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, data):
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".journal-")
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2, sort_keys=True, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def _update(self, change):
+        """Aplica change(ejecución) a la entrada de este script y la guarda."""
+        with self._lock, file_lock(self.path):
+            data = self._load()
+            runs = data.setdefault(self.scope, {})
+            change(runs.setdefault(self.script, {}))
+            self._save(data)
+
+    def begin(self, config, restart=False, keep=False):
+        """
+        Abre una ejecución. Reutiliza los pasos de la anterior si quedó a medias
+        (o si keep, para --only/--from-step) con la misma configuración y no es
+        demasiado antigua. Devuelve el número de pasos reutilizados.
+        """
+        config_hash = fingerprint(config)
+        with self._lock, file_lock(self.path):
+            previous = self._load().get(self.scope, {}).get(self.script) or {}
+        reusable = (not restart and previous.get("config") == config_hash
+                    and time.time() - previous.get("updated", 0) < MAX_RESUME_AGE
+                    and (previous.get("status") == "en curso" or keep))
+        if previous.get("status") == "en curso" and previous.get("config") != config_hash and not restart:
+            print(f"{Colors.YELLOW}   ⚠️ La ejecución interrumpida usaba otra configuración: empezando de cero.{Colors.END}")
+        self.steps = dict(previous.get("steps", {})) if reusable else {}
+        if reusable and previous.get("status") == "en curso" and self.steps:
+            started = time.strftime("%Y-%m-%d %H:%M", time.localtime(previous["started"]))
+            print(f"♻️  Reanudando la ejecución interrumpida del {started}: {len(self.steps)} paso(s) ya "
+                  f"completados (--restart para empezar de cero)")
+
+        def change(run):
+            run.clear()
+            run.update(status="en curso", config=config_hash, started=time.time(), updated=time.time(),
+                       steps=self.steps)
+        self._update(change)
+        return len(self.steps)
+
+    def completed(self, step):
+        return step in self.steps
+
+    def output(self, step):
+        """Salida registrada de un paso; ValueError si no consta como completado."""
+        if step not in self.steps:
+            raise ValueError(f"El paso {step} no consta como completado en el diario")
+        return self.steps[step]["output"]
+
+    def record(self, step, output):
+        self.steps[step] = {"output": output, "finished": time.time()}
+
+        def change(run):
+            run.setdefault("steps", {})[step] = self.steps[step]
+            run["updated"] = time.time()
+        self._update(change)
+
+    def discard(self, steps):
+        """Marca pasos como pendientes (p.ej. --from-step)."""
+        for step in steps:
+            self.steps.pop(step, None)
+
+        def change(run):
+            for step in steps:
+                run.get("steps", {}).pop(step, None)
+        self._update(change)
+
+    def finish(self):
+        self._update(lambda run: run.update(status="completada", updated=time.time()))
+
+    def forget(self, script=None):
+        """Olvida la ejecución de este script (o de otro: la limpieza invalida la del setup y viceversa)."""
+        script = script or self.script
+        with self._lock, file_lock(self.path):
+            data = self._load()
+            if script in data.get(self.scope, {}):
+                del data[self.scope][script]
+                self._save(data)
+        if script == self.script:
+            self.steps = {}
+
+def dependents(tasks, names):
+    """Los pasos dados más todos los que dependen de ellos, directa o indirectamente."""
+    selected = set(names)
+    changed = True
+    while changed:
+        changed = False
+        for t in tasks:
+            if t.name not in selected and selected.intersection(t.deps):
+                selected.add(t.name)
+                changed = True
+    return selected
+
+def select_steps(tasks, journal, from_step=None, only=None):
+    """
+    Decide qué tareas del grafo se ejecutan; el resto toma su salida del diario.
+    Sin selectores: las que no constan como completadas. --from-step: ese paso y
+    todo lo que depende de él. --only: solo esos pasos, si todas sus dependencias
+    (también las indirectas) ya constan en el diario. Lanza ValueError con pasos desconocidos o dependencias
+    sin completar.
+    """
+    names = [t.name for t in tasks]
+    unknown = [n for n in ([from_step] if from_step else []) + list(only or []) if n not in names]
+    if unknown:
+        raise ValueError(f"Paso(s) desconocido(s): {', '.join(unknown)}. Pasos: {', '.join(names)}")
+    if from_step:
+        journal.discard(sorted(dependents(tasks, [from_step])))
+    if only:
+        selected = set(only)
+        missing = sorted(d for d in prerequisites(tasks, selected)
+                         if d not in selected and not journal.completed(d))
+        if missing:
+            raise ValueError(f"--only necesita que antes se hayan completado: {', '.join(missing)}")
+        return selected
+    return {n for n in names if not journal.completed(n)}
@@ -0,0 +1,19 @@
+"""Configuración común: backend fake sin latencia y caché/huellas/diario en un directorio temporal."""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Antes de importar los scripts: leen el entorno al cargarse
+_WORKDIR = tempfile.mkdtemp(prefix="sre-tests-")
+os.environ.update(
+    SRE_BACKEND="fake",
+    SRE_CACHE_FILE=os.path.join(_WORKDIR, "cache.json"),
+    SRE_STATE_FILE=os.path.join(_WORKDIR, "state.json"),
+    SRE_JOURNAL_FILE=os.path.join(_WORKDIR, "journal.json"),
+    SRE_VENDOR_DIR=os.path.join(_WORKDIR, "vendor"),
+    SRE_FAKE_LATENCY_SCALE="0",
+    SRE_FAKE_LB_DELETE_DELAY="0",
+)
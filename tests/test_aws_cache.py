@@ -0,0 +1,80 @@
+import pytest
+
+from aws_cache import MetadataCache, describe_cluster_cached
+from backends import ClientError
+
+def _cache(tmp_path, cluster="demo", enabled=True):
+    return MetadataCache("perfil", "us-east-1", cluster, path=str(tmp_path / "cache.json"), enabled=enabled)
+
+def test_set_get_and_scopes(tmp_path):
+    cache = _cache(tmp_path)
+    cache.set("vpc", "vpc-1")
+    assert cache.get("vpc") == "vpc-1"
+    assert _cache(tmp_path).get("vpc") == "vpc-1"
+    assert _cache(tmp_path, cluster="otro").get("vpc") is None
+    assert (cache.hits, cache.misses) == (1, 0)
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = _cache(tmp_path)
+    cache.set("vpc", "vpc-1", ttl=-1)
+    assert cache.get("vpc") is None
+    assert cache.misses == 1
+
+def test_invalidate_one_key_or_the_whole_scope(tmp_path):
+    cache, other = _cache(tmp_path), _cache(tmp_path, cluster="otro")
+    cache.set("vpc", "vpc-1")
+    cache.set("oidc", "issuer")
+    other.set("vpc", "vpc-2")
+    cache.invalidate("vpc")
+    assert (cache.get("vpc"), cache.get("oidc")) == (None, "issuer")
+    cache.invalidate()
+    assert cache.get("oidc") is None
+    assert other.get("vpc") == "vpc-2"
+
+def test_get_or_fetch_does_not_cache_none(tmp_path):
+    cache = _cache(tmp_path)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return None if len(calls) == 1 else "vpc-1"
+    assert cache.get_or_fetch("vpc", fetch) is None
+    assert cache.get_or_fetch("vpc", fetch) == "vpc-1"
+    assert cache.get_or_fetch("vpc", fetch) == "vpc-1"
+    assert len(calls) == 2
+
+def test_disabled_cache_never_stores(tmp_path):
+    cache = _cache(tmp_path, enabled=False)
+    cache.set("vpc", "vpc-1")
+    assert cache.get("vpc") is None
+    assert not (tmp_path / "cache.json").exists()
+
+class _Eks:
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = 0
+
+    def describe_cluster(self, name):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return {"cluster": {"status": "ACTIVE", "resourcesVpcConfig": {"vpcId": "vpc-1"},
+                            "identity": {"oidc": {"issuer": "https://oidc.eks/id/ABC"}}}}
+
+def test_missing_cluster_is_none_and_not_cached(tmp_path):
+    cache = _cache(tmp_path)
+    eks = _Eks(ClientError({"Error": {"Code": "ResourceNotFoundException", "Message": "no"}}, "DescribeCluster"))
+    assert describe_cluster_cached(cache, eks, "demo") is None
+    assert describe_cluster_cached(cache, eks, "demo") is None
+    assert eks.calls == 2
+
+def test_throttling_is_not_mistaken_for_a_missing_cluster(tmp_path):
+    eks = _Eks(ClientError({"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded"}}, "DescribeCluster"))
+    with pytest.raises(ClientError):
+        describe_cluster_cached(_cache(tmp_path), eks, "demo")
+
+def test_existing_cluster_is_cached(tmp_path):
+    cache, eks = _cache(tmp_path), _Eks()
+    first = describe_cluster_cached(cache, eks, "demo")
+    assert describe_cluster_cached(cache, eks, "demo") == first
+    assert eks.calls == 1
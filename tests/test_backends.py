@@ -0,0 +1,49 @@
+import pytest
+
+import backends
+from throttling import classify_error
+
+def _unreachable_client(monkeypatch, service="sts"):
+    boto3 = pytest.importorskip("boto3")
+    from botocore.config import Config
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "prueba")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "prueba")
+    client = boto3.session.Session().client(service, region_name="us-east-1", endpoint_url="http://127.0.0.1:9",
+                                            config=Config(retries={"max_attempts": 0}, connect_timeout=1))
+    backends.SdkBackend()._instrument(client, service)
+    return client
+
+def test_instrumentation_keeps_the_original_connection_error(monkeypatch):
+    client = _unreachable_client(monkeypatch)
+    with pytest.raises(Exception) as error:
+        client.get_caller_identity()
+    assert type(error.value).__name__ == "EndpointConnectionError"
+    assert classify_error(error.value) == "transient"
+
+def test_instrumentation_hooks_never_raise(monkeypatch):
+    client = _unreachable_client(monkeypatch)
+    # Un evento con argumentos inesperados no debe cambiar el resultado de la llamada
+    client.meta.events.emit("after-call-error.sts.GetCallerIdentity", context={}, exception=None)
+    client.meta.events.emit("after-call.sts.GetCallerIdentity", context={"sre_start": 0.0})
+
+class _UnreachableApiServer:
+    """Cliente dinámico cuyo API server ya no responde."""
+
+    class resources:
+        @staticmethod
+        def get(**kwargs):
+            raise ConnectionRefusedError("[Errno 111] Connection refused")
+
+def _sdk_without_api_server(monkeypatch):
+    backend = backends.SdkBackend()
+    monkeypatch.setattr(backend, "_kube", lambda: _UnreachableApiServer)
+    return backend
+
+def test_kube_apply_returns_false_when_the_api_server_is_gone(monkeypatch, tmp_path):
+    manifest = tmp_path / "app.yaml"
+    manifest.write_text("apiVersion: v1\nkind: Service\nmetadata:\n  name: app\n")
+    assert _sdk_without_api_server(monkeypatch).kube_apply(str(manifest)) is False
+
+def test_kube_delete_returns_false_when_the_api_server_is_gone(monkeypatch):
+    pytest.importorskip("kubernetes")
+    assert _sdk_without_api_server(monkeypatch).kube_delete("deployment", "amazon-deployment") is False
@@ -0,0 +1,47 @@
+import pytest
+
+import capacity
+from capacity import EKS_DAEMONSETS, MIN_NODES, max_pods, monthly_cost, node_shape, nodes_needed, pack
+
+DAEMONSETS = [capacity._pod(name, name, requests) for name, requests in EKS_DAEMONSETS.items()]
+
+def _replicas(count, memory="550Mi", cpu="50m", spread=("hostname", "zone"), strict=False):
+    return [capacity._pod(f"app-{i}", "app", {"memory": memory, "cpu": cpu}, spread, strict)
+            for i in range(count)]
+
+def test_max_pods_follows_the_vpc_cni_formula():
+    assert max_pods(3, 6) == 17     # t3.medium
+    assert max_pods(4, 15) == 58    # m5.xlarge
+    assert node_shape("t3.medium")["pods"] == 17
+
+def test_node_shape_subtracts_kubelet_reservations():
+    shape = node_shape("t3.medium")
+    assert 0 < shape["cpu"] < 2
+    assert 0 < shape["memory"] < 4 * 2 ** 30
+
+def test_monthly_cost():
+    assert monthly_cost(node_shape("t3.medium"), 2) == pytest.approx(0.0416 * 2 * 730)
+
+def test_pack_spreads_replicas_across_nodes():
+    nodes, pending = pack(_replicas(4), DAEMONSETS, node_shape("t3.large"), 2)
+    assert pending == []
+    assert [node["groups"]["app"] for node in nodes] == [2, 2]
+
+def test_pack_leaves_pods_pending_when_they_do_not_fit():
+    nodes, pending = pack(_replicas(8, memory="3Gi"), DAEMONSETS, node_shape("t3.medium"), 2)
+    assert len(pending) == 8 - sum(node["groups"].get("app", 0) for node in nodes)
+    assert pending
+
+def test_nodes_needed_is_the_smallest_count_that_schedules_everything():
+    shape = node_shape("t3.medium")
+    pods = _replicas(12, memory="1Gi")
+    count = nodes_needed(pods, DAEMONSETS, shape)
+    assert count >= MIN_NODES
+    assert pack(pods, DAEMONSETS, shape, count)[1] == []
+    assert pack(pods, DAEMONSETS, shape, count - 1)[1]
+
+def test_strict_anti_affinity_needs_one_node_per_replica():
+    assert nodes_needed(_replicas(5, strict=True), DAEMONSETS, node_shape("t3.xlarge")) == 5
+
+def test_pod_larger_than_any_node_cannot_be_planned():
+    assert nodes_needed(_replicas(1, memory="8Gi"), DAEMONSETS, node_shape("t3.medium")) is None
@@ -0,0 +1,49 @@
+import dag_runner
+import cleanup_sdk_all
+
+def _report(*kinds):
+    return {"orphans": [{"type": kind, "id": f"id-{kind}", "name": kind, "reason": "prueba"} for kind in kinds]}
+
+def test_orphan_tasks_without_load_balancers_have_no_dangling_deps():
+    tasks = cleanup_sdk_all.build_orphan_tasks(_report("target-group", "security-group"))
+    assert [t.name for t in tasks] == ["orphans_target-group", "orphans_security-group"]
+    assert all(t.deps == () for t in tasks)
+    dag_runner._validate(cleanup_sdk_all.build_teardown_tasks("123456789012", _report("target-group")))
+
+def test_target_and_security_groups_wait_for_orphan_load_balancers():
+    tasks = {t.name: t for t in cleanup_sdk_all.build_orphan_tasks(
+        _report("load-balancer", "target-group", "security-group", "dns-record"))}
+    assert tasks["orphans_target-group"].deps == ("orphans_load-balancer",)
+    assert tasks["orphans_security-group"].deps == ("orphans_load-balancer",)
+    assert tasks["orphans_dns-record"].deps == ()
+
+def test_empty_report_adds_no_tasks():
+    assert cleanup_sdk_all.build_orphan_tasks(_report()) == []
+
+def _policy_attached_to(*roles):
+    cloud = cleanup_sdk_all.backend.cloud
+    name = cleanup_sdk_all.POLICIES_TO_DELETE[0]
+    arn = cleanup_sdk_all.iam_client.create_policy(PolicyName=name, PolicyDocument="{}")["Policy"]["Arn"]
+    with cloud.lock:
+        for role in roles:
+            cloud.roles.setdefault(role, set()).add(arn)
+    return cloud, name, arn
+
+def test_policy_is_detached_from_this_cluster_roles_and_deleted():
+    own = f"eksctl-{cleanup_sdk_all.CLUSTER_NAME}-addon-iamserviceaccount-default-external-dns"
+    cloud, name, arn = _policy_attached_to(own)
+    cleanup_sdk_all.delete_iam_policy(name, cloud.account_id)
+    assert arn not in cloud.policies
+    assert arn not in cloud.roles[own]
+
+def test_policy_used_outside_the_cluster_is_reported_and_kept(capsys):
+    own = f"eksctl-{cleanup_sdk_all.CLUSTER_NAME}-addon-iamserviceaccount-default-external-dns"
+    cloud, name, arn = _policy_attached_to(own, "otro-equipo-rol")
+    cleanup_sdk_all.delete_iam_policy(name, cloud.account_id)
+    assert arn in cloud.policies
+    assert arn in cloud.roles["otro-equipo-rol"]
+    assert "rol otro-equipo-rol" in capsys.readouterr().out
+    with cloud.lock:
+        cloud.roles["otro-equipo-rol"].discard(arn)
+    cleanup_sdk_all.delete_iam_policy(name, cloud.account_id)
+    assert arn not in cloud.policies
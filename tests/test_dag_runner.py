@@ -0,0 +1,56 @@
+import pytest
+
+import dag_runner
+from dag_runner import Task, prerequisites, run_dag
+from step_journal import StepJournal
+
+def _noop(results):
+    return None
+
+def test_validate_rejects_duplicates_unknown_deps_and_cycles():
+    with pytest.raises(ValueError, match="duplicados"):
+        dag_runner._validate([Task("a", _noop), Task("a", _noop)])
+    with pytest.raises(ValueError, match="inexistentes"):
+        dag_runner._validate([Task("a", _noop, deps=["b"])])
+    with pytest.raises(ValueError, match="ciclo"):
+        dag_runner._validate([Task("a", _noop, deps=["b"]), Task("b", _noop, deps=["a"])])
+
+def test_tasks_receive_the_results_of_their_dependencies():
+    tasks = [
+        Task("vpc", lambda r: "vpc-1"),
+        Task("policy", lambda r: "arn:policy"),
+        Task("role", lambda r: f"{r['vpc']}+{r['policy']}", deps=["vpc", "policy"]),
+    ]
+    results = run_dag(tasks)
+    assert results == {"vpc": "vpc-1", "policy": "arn:policy", "role": "vpc-1+arn:policy"}
+    assert [t.status for t in tasks] == ["ok", "ok", "ok"]
+
+def test_failure_stops_dependents_and_is_raised():
+    def boom(results):
+        raise RuntimeError("falló la VPC")
+    ran = []
+    tasks = [Task("vpc", boom), Task("cluster", lambda r: ran.append("cluster"), deps=["vpc"])]
+    with pytest.raises(RuntimeError, match="falló la VPC"):
+        run_dag(tasks)
+    assert ran == []
+    assert [t.status for t in tasks] == ["falló", "omitida"]
+
+def test_prerequisites_are_transitive_and_exclude_the_given_steps():
+    tasks = [Task("a", _noop), Task("b", _noop, deps=["a"]), Task("c", _noop, deps=["b"]), Task("d", _noop)]
+    assert prerequisites(tasks, ["c"]) == {"a", "b"}
+    assert prerequisites(tasks, ["b", "c"]) == {"a", "b"}
+    assert prerequisites(tasks, ["d"]) == set()
+
+def test_selected_steps_take_their_dependencies_from_the_journal(tmp_path):
+    journal = StepJournal("perfil/region/cluster", "setup", path=str(tmp_path / "journal.json"))
+    journal.begin({"cluster": "demo"})
+    journal.record("vpc", "vpc-del-diario")
+    tasks = [
+        Task("vpc", lambda r: pytest.fail("no debe ejecutarse")),
+        Task("cluster", lambda r: f"cluster en {r['vpc']}", deps=["vpc"]),
+        Task("monitoring", lambda r: pytest.fail("no debe ejecutarse"), deps=["cluster"]),
+    ]
+    results = run_dag(tasks, journal=journal, selected={"cluster"})
+    assert results == {"vpc": "vpc-del-diario", "cluster": "cluster en vpc-del-diario"}
+    assert [t.status for t in tasks] == ["del diario", "ok", "no seleccionada"]
+    assert journal.output("cluster") == "cluster en vpc-del-diario"
@@ -0,0 +1,98 @@
+import pytest
+
+import inventory
+from inventory import Inventory, diff, find_orphans, read_snapshot, resource, write_snapshot
+
+CLUSTER = "cluster-pruebas"
+OWNER = {"elbv2.k8s.aws/cluster": CLUSTER, "ingress.k8s.aws/stack": "default/amazon-ingress-alb"}
+LB_ARN = "arn:aws:elasticloadbalancing:us-east-1:123456789012:loadbalancer/app/k8s-default/1"
+LB_DNS = "k8s-default-1.us-east-1.elb.amazonaws.com"
+
+def _cluster_resources(with_cluster=True):
+    resources = [
+        resource("load-balancer", LB_ARN, "k8s-default", CLUSTER, OWNER, attrs={"dns": LB_DNS},
+                 links={"stack": "default/amazon-ingress-alb", "dns": LB_DNS}),
+        resource("target-group", "arn:tg/1", "k8s-default-tg", CLUSTER, OWNER,
+                 attrs={"load_balancers": [LB_ARN]}, links={"stack": "default/amazon-ingress-alb"}),
+        resource("security-group", "sg-1", "k8s-default-sg", CLUSTER, OWNER,
+                 links={"stack": "default/amazon-ingress-alb"}),
+        resource("dns-record", "Z1|app.example.com.|A", "app.example.com (A)", CLUSTER,
+                 links={"target": LB_DNS, "zone": "Z1", "name": "app.example.com."}),
+        resource("iam-policy", "arn:policy/1", "AWSLoadBalancerControllerIAMPolicy"),
+    ]
+    if with_cluster:
+        resources.append(resource("eks-cluster", f"eks:{CLUSTER}", CLUSTER, CLUSTER))
+    return resources
+
+def test_indexes_by_type_owner_and_tag():
+    inv = Inventory(_cluster_resources())
+    assert [r["id"] for r in inv.of_type("target-group", CLUSTER)] == ["arn:tg/1"]
+    assert inv.of_type("target-group", "otro") == []
+    assert inv.owners() == [CLUSTER]
+    assert {r["id"] for r in inv.tagged(f"elbv2.k8s.aws/cluster={CLUSTER}")} == {LB_ARN, "arn:tg/1", "sg-1"}
+    assert [r["id"] for r in inv.linked("load-balancer", "dns", LB_DNS)] == [LB_ARN]
+
+def test_diff_reports_added_removed_and_changed():
+    before = Inventory(_cluster_resources())
+    changed = [r for r in _cluster_resources() if r["id"] != "arn:policy/1"]
+    changed[2] = resource("security-group", "sg-1", "k8s-default-sg", CLUSTER, dict(OWNER, extra="1"))
+    changed.append(resource("iam-role", "arn:role/1", "eksctl-x-cluster-ServiceRole", CLUSTER))
+    result = diff(before, Inventory(changed))
+    assert [r["id"] for r in result["added"]] == ["arn:role/1"]
+    assert [r["id"] for r in result["removed"]] == ["arn:policy/1"]
+    assert [old["id"] for old, new in result["changed"]] == ["sg-1"]
+    assert diff(before, Inventory(changed), owner=CLUSTER)["removed"] == []
+
+@pytest.mark.parametrize("name", ["foto.json", "foto.json.gz"])
+def test_snapshot_round_trip(tmp_path, name):
+    inv = Inventory(_cluster_resources(), account="123456789012", region="us-east-1")
+    path = str(tmp_path / name)
+    write_snapshot(inv, path)
+    loaded = read_snapshot(path)
+    assert (loaded.account, loaded.region, loaded.taken_at) == (inv.account, inv.region, inv.taken_at)
+    assert diff(inv, loaded) == {"added": [], "removed": [], "changed": []}
+
+def test_snapshot_with_other_version_is_rejected(tmp_path):
+    path = tmp_path / "foto.json"
+    path.write_text('{"version": 99, "resources": {}}')
+    with pytest.raises(ValueError, match="versión"):
+        read_snapshot(str(path))
+
+def test_everything_owned_is_orphan_when_the_cluster_is_gone():
+    orphans = find_orphans(Inventory(_cluster_resources(with_cluster=False)), CLUSTER)
+    assert sorted(r["type"] for r, _ in orphans) == ["dns-record", "load-balancer", "security-group",
+                                                     "target-group"]
+    assert all("ya no existe" in reason for _, reason in orphans)
+
+def test_resources_of_a_live_ingress_are_not_orphans():
+    kube = {"ingresses": {"default/amazon-ingress-alb"}, "roles": set()}
+    assert find_orphans(Inventory(_cluster_resources()), CLUSTER, kube) == []
+
+def test_deleted_ingress_orphans_its_alb_and_everything_hanging_from_it():
+    kube = {"ingresses": set(), "roles": set()}
+    orphans = {r["id"]: reason for r, reason in find_orphans(Inventory(_cluster_resources()), CLUSTER, kube)}
+    assert set(orphans) == {LB_ARN, "arn:tg/1", "sg-1", "Z1|app.example.com.|A"}
+    assert orphans["arn:tg/1"] == "sin ALB asociado"
+    # Sin acceso al clúster solo se aplican las reglas de AWS: el ALB no se toca
+    assert find_orphans(Inventory(_cluster_resources()), CLUSTER) == []
+
+@pytest.fixture
+def cloud(monkeypatch):
+    """Nube fake vacía para este test (se restaura al terminar)."""
+    cloud = inventory.backend.cloud
+    for name in ("clusters", "load_balancers", "target_groups", "security_groups", "zones"):
+        monkeypatch.setattr(cloud, name, {})
+    return cloud
+
+def test_collect_and_find_orphans_on_the_fake_cloud(cloud):
+    with cloud.lock:
+        cloud.target_groups["arn:tg/fake"] = {"name": "k8s-huerfano", "tags": {"elbv2.k8s.aws/cluster": CLUSTER},
+                                              "load_balancers": [], "deleted_at": None}
+        cloud.security_groups["sg-fake"] = {"name": "k8s-sg", "tags": OWNER, "vpc": "vpc-1", "deleted_at": None}
+    inv = inventory.collect()
+    assert inv.account == cloud.account_id
+    assert {r["id"] for r in inv.owned_by(CLUSTER)} == {"arn:tg/fake", "sg-fake"}
+    orphans = find_orphans(inv, CLUSTER)
+    report = inventory.orphan_report(inv, CLUSTER, orphans)
+    assert report["cluster_exists"] is False
+    assert sorted(entry["type"] for entry in report["orphans"]) == ["security-group", "target-group"]
@@ -0,0 +1,44 @@
+import pytest
+
+from manifests import APP_AUTOSCALING, ManifestError, app_manifests, dump_all, load_all, parse_quantity, validate
+
+DOMAIN = "app.example.com"
+CERT_ARN = "arn:aws:acm:us-east-1:123456789012:certificate/abc"
+
+def test_app_manifests_round_trip_through_yaml():
+    objects = app_manifests(DOMAIN, CERT_ARN)
+    validate(objects)
+    text = dump_all(objects, header="Generado en pruebas")
+    assert text.startswith("# Generado en pruebas\napiVersion: apps/v1\nkind: Deployment\n")
+    assert load_all(text) == objects
+
+def test_output_is_deterministic_and_keeps_build_order():
+    objects = app_manifests(DOMAIN, CERT_ARN, autoscaling=APP_AUTOSCALING)
+    assert [obj["kind"] for obj in objects][-1] == "HorizontalPodAutoscaler"
+    assert dump_all(objects) == dump_all(app_manifests(DOMAIN, CERT_ARN, autoscaling=APP_AUTOSCALING))
+    assert [list(obj)[:2] for obj in load_all(dump_all(objects))] == [["apiVersion", "kind"]] * len(objects)
+
+def test_ambiguous_strings_stay_strings():
+    values = {"surge": "25%", "flag": "yes", "mode": "0755", "port": "3000", "empty": "", "none": None}
+    assert load_all(dump_all([values])) == [values]
+
+def test_invalid_yaml_is_a_manifest_error():
+    with pytest.raises(ManifestError, match="YAML inválido"):
+        load_all("kind: [Deployment\n")
+
+def test_requests_above_limits_are_rejected():
+    resources = {"requests": {"memory": "1Gi", "cpu": "500m"}, "limits": {"memory": "512Mi", "cpu": "250m"}}
+    with pytest.raises(ManifestError):
+        validate(app_manifests(DOMAIN, CERT_ARN, resources=resources))
+
+def test_parse_quantity():
+    assert parse_quantity("50m") == pytest.approx(0.05)
+    assert parse_quantity("550Mi") == 550 * 2 ** 20
+    assert parse_quantity(2) == 2.0
+    with pytest.raises(ManifestError):
+        parse_quantity("medio giga")
+
+def test_fake_kubectl_rejects_invalid_yaml_like_the_real_path():
+    import fake_backend
+    with pytest.raises(ManifestError):
+        fake_backend._parse_documents("kind: Deployment\nmetadata: [sin cerrar\n")
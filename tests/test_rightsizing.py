@@ -0,0 +1,80 @@
+import math
+import random
+
+import pytest
+
+import rightsizing
+from fake_backend import FakePrometheus
+from manifests import parse_quantity
+from rightsizing import PrometheusError, StreamingQuantile, collect, parse_duration, recommend
+
+@pytest.fixture
+def prometheus():
+    fake = FakePrometheus(pods=3)
+    fake.start()
+    yield fake
+    fake.stop()
+
+def _sketch(values):
+    sketch = StreamingQuantile()
+    for value in values:
+        sketch.add(value)
+    return sketch
+
+def test_quantiles_stay_within_the_sketch_accuracy():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(math.log(500 * 2 ** 20), 0.3) for _ in range(20000)]
+    sketch = _sketch(values)
+    ordered = sorted(values)
+    for percentile in (50, 95, 99):
+        exact = ordered[int(percentile / 100 * (len(ordered) - 1))]
+        assert sketch.quantile(percentile) == pytest.approx(exact, rel=rightsizing.SKETCH_ACCURACY)
+    assert sketch.max == max(values)
+    # La memoria depende del rango de valores, no de las muestras
+    assert len(sketch.buckets) < 200
+
+def test_zeros_count_and_invalid_samples_are_ignored():
+    sketch = _sketch([0, 0, 0, float("nan"), -1, 2.0])
+    assert sketch.count == 4
+    assert sketch.quantile(50) == 0.0
+    assert sketch.quantile(100) == pytest.approx(2.0, rel=rightsizing.SKETCH_ACCURACY)
+    assert StreamingQuantile().quantile(95) == 0.0
+
+def test_recommendation_applies_headroom_minimums_and_rounding():
+    cpu = _sketch([0.0004] * 100)
+    memory = _sketch([480 * 2 ** 20] * 99 + [600 * 2 ** 20])
+    result = recommend(cpu, memory, 95, 99, 0.15)
+    assert result["requests"]["cpu"] == "10m"       # MIN_CPU
+    assert result["limits"]["cpu"] == "100m"        # MIN_CPU_LIMIT
+    assert parse_quantity(result["requests"]["memory"]) % rightsizing.MEMORY_ROUND == 0
+    assert parse_quantity(result["requests"]["memory"]) >= 480 * 2 ** 20 * 1.15
+    # El límite de memoria nunca queda por debajo del máximo observado
+    assert parse_quantity(result["limits"]["memory"]) >= 600 * 2 ** 20 * 1.15
+    assert list(result) == ["requests", "limits"]
+
+def test_collect_walks_the_window_in_chunks_without_repeating_samples(prometheus):
+    end = 1_700_000_000.0
+    start = end - 86400
+    sketch, pods = collect(prometheus.url, rightsizing.QUERIES["memory"], start, end, 60, 6 * 3600)
+    assert pods == set(prometheus.pods)
+    assert sketch.count == len(prometheus.pods) * (86400 // 60 + 1)
+    assert prometheus.requests == 4     # 4 tramos de 6h (el último, recortado al final)
+    assert sketch.quantile(50) == pytest.approx(prometheus.memory, rel=0.1)
+
+def test_collect_shrinks_chunks_above_the_point_limit(prometheus):
+    end = 1_700_000_000.0
+    start = end - 2 * 86400
+    sketch, _ = collect(prometheus.url, rightsizing.QUERIES["cpu"], start, end, 10, 2 * 86400)
+    assert sketch.count == len(prometheus.pods) * (2 * 86400 // 10 + 1)
+    assert prometheus.requests == 2
+
+def test_rejected_query_is_a_prometheus_error(prometheus):
+    with pytest.raises(PrometheusError, match="11,000 points"):
+        rightsizing.query_range(prometheus.url, rightsizing.QUERIES["cpu"], 0, 86400, 1)
+
+def test_parse_duration():
+    assert parse_duration("7d") == 7 * 86400
+    assert parse_duration("1m") == 60
+    assert parse_duration("90") == 90
+    with pytest.raises(Exception, match="Duración inválida"):
+        parse_duration("una semana")
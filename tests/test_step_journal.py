@@ -0,0 +1,98 @@
+import pytest
+
+from dag_runner import Task
+from step_journal import StepJournal, dependents, select_steps
+
+CONFIG = {"cluster": "demo", "region": "us-east-1"}
+
+def _journal(tmp_path, script="setup"):
+    return StepJournal("perfil/us-east-1/demo", script, path=str(tmp_path / "journal.json"))
+
+def _tasks():
+    noop = lambda results: None
+    return [Task("vpc", noop), Task("policy", noop), Task("cluster", noop, deps=["vpc"]),
+            Task("irsa", noop, deps=["cluster", "policy"]), Task("app", noop, deps=["irsa"])]
+
+def test_interrupted_run_is_resumed_with_the_same_config(tmp_path):
+    first = _journal(tmp_path)
+    assert first.begin(CONFIG) == 0
+    first.record("vpc", "vpc-1")
+
+    resumed = _journal(tmp_path)
+    assert resumed.begin(CONFIG) == 1
+    assert resumed.completed("vpc")
+    assert resumed.output("vpc") == "vpc-1"
+
+def test_other_config_restart_or_finished_run_start_from_scratch(tmp_path):
+    journal = _journal(tmp_path)
+    journal.begin(CONFIG)
+    journal.record("vpc", "vpc-1")
+    assert _journal(tmp_path).begin(dict(CONFIG, region="eu-west-1")) == 0
+
+    journal = _journal(tmp_path)
+    journal.begin(CONFIG)
+    journal.record("vpc", "vpc-1")
+    assert _journal(tmp_path).begin(CONFIG, restart=True) == 0
+
+    journal = _journal(tmp_path)
+    journal.begin(CONFIG)
+    journal.record("vpc", "vpc-1")
+    journal.finish()
+    assert _journal(tmp_path).begin(CONFIG) == 0
+
+def test_finished_run_is_kept_for_only_and_from_step(tmp_path):
+    journal = _journal(tmp_path)
+    journal.begin(CONFIG)
+    journal.record("vpc", "vpc-1")
+    journal.finish()
+    assert _journal(tmp_path).begin(CONFIG, keep=True) == 1
+
+def test_output_of_a_missing_step_is_a_value_error(tmp_path):
+    journal = _journal(tmp_path)
+    journal.begin(CONFIG)
+    with pytest.raises(ValueError, match="vpc no consta como completado"):
+        journal.output("vpc")
+
+def test_forget_removes_only_the_given_script(tmp_path):
+    setup, cleanup = _journal(tmp_path, "setup"), _journal(tmp_path, "cleanup")
+    setup.begin(CONFIG)
+    setup.record("vpc", "vpc-1")
+    cleanup.begin(CONFIG)
+    cleanup.forget("setup")
+    assert _journal(tmp_path, "setup").begin(CONFIG) == 0
+
+def test_dependents_include_indirect_steps():
+    assert dependents(_tasks(), ["vpc"]) == {"vpc", "cluster", "irsa", "app"}
+    assert dependents(_tasks(), ["policy"]) == {"policy", "irsa", "app"}
+
+def test_without_selectors_only_pending_steps_run(tmp_path):
+    journal = _journal(tmp_path)
+    journal.begin(CONFIG)
+    journal.record("vpc", "vpc-1")
+    assert select_steps(_tasks(), journal) == {"policy", "cluster", "irsa", "app"}
+
+def test_from_step_discards_the_step_and_its_dependents(tmp_path):
+    journal = _journal(tmp_path)
+    journal.begin(CONFIG)
+    for step in ("vpc", "policy", "cluster", "irsa", "app"):
+        journal.record(step, step)
+    assert select_steps(_tasks(), journal, from_step="irsa") == {"irsa", "app"}
+    assert not journal.completed("app")
+    assert journal.completed("cluster")
+
+def test_only_requires_the_whole_dependency_closure(tmp_path):
+    journal = _journal(tmp_path)
+    journal.begin(CONFIG)
+    journal.record("irsa", "role-arn")
+    # irsa consta, pero app también necesita (indirectamente) vpc, policy y cluster
+    with pytest.raises(ValueError, match="cluster, policy, vpc"):
+        select_steps(_tasks(), journal, only=["app"])
+    assert select_steps(_tasks(), journal, only=["vpc"]) == {"vpc"}
+
+def test_unknown_steps_are_rejected(tmp_path):
+    journal = _journal(tmp_path)
+    journal.begin(CONFIG)
+    with pytest.raises(ValueError, match="desconocido"):
+        select_steps(_tasks(), journal, only=["dns"])
+    with pytest.raises(ValueError, match="desconocido"):
+        select_steps(_tasks(), journal, from_step="dns")
@@ -0,0 +1,80 @@
+import pytest
+
+import throttling
+from backends import ClientError
+from throttling import TokenBucket, classify_error, retry_call
+
+def _aws_error(code, status=400):
+    return ClientError({"Error": {"Code": code, "Message": code},
+                        "ResponseMetadata": {"HTTPStatusCode": status}}, "Operacion")
+
+class _ApiException(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+@pytest.mark.parametrize("error, kind", [
+    (_aws_error("ThrottlingException"), "throttling"),
+    (_aws_error("SomethingElse", status=429), "throttling"),
+    (_aws_error("NoSuchEntity", status=404), "not_found"),
+    (_aws_error("InternalError", status=500), "transient"),
+    (_aws_error("AccessDenied", status=403), "fatal"),
+    (_ApiException(429), "throttling"),
+    (_ApiException(404), "not_found"),
+    (_ApiException(503), "transient"),
+    (_ApiException(422), "fatal"),
+    (TimeoutError("tiempo agotado"), "transient"),
+    (RuntimeError("Error from server (TooManyRequests): please try again"), "throttling"),
+    (RuntimeError("etcdserver: request timed out"), "transient"),
+    (RuntimeError('deployments.apps "amazon" not found'), "not_found"),
+    (RuntimeError("forbidden"), "fatal"),
+])
+def test_classify_error(error, kind):
+    assert classify_error(error) == kind
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    delays = []
+    monkeypatch.setattr(throttling.time, "sleep", delays.append)
+    return delays
+
+def test_retry_call_retries_transient_errors_until_success(no_sleep):
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise _aws_error("Throttling")
+        return "ok"
+    assert retry_call("prueba", flaky) == "ok"
+    assert len(calls) == 3
+    assert len(no_sleep) == 2
+
+def test_retry_call_gives_up_after_the_last_attempt(no_sleep):
+    calls = []
+
+    def always_throttled():
+        calls.append(1)
+        raise _aws_error("Throttling")
+    with pytest.raises(ClientError):
+        retry_call("prueba", always_throttled)
+    assert len(calls) == throttling.RETRY_ATTEMPTS
+
+def test_retry_call_does_not_retry_fatal_or_not_found(no_sleep):
+    for code in ("AccessDenied", "NoSuchEntity"):
+        calls = []
+
+        def fails():
+            calls.append(1)
+            raise _aws_error(code)
+        with pytest.raises(ClientError):
+            retry_call("prueba", fails)
+        assert len(calls) == 1
+    assert no_sleep == []
+
+def test_token_bucket_allows_a_burst_then_paces_calls(no_sleep):
+    bucket = TokenBucket(rate=10, burst=3)
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    wait = bucket.acquire()
+    assert wait == pytest.approx(0.1, abs=0.01)
+    assert no_sleep == [wait]
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Límite de ritmo y reintentos para las llamadas a AWS y Kubernetes.
+
+- classify_error(): distingue throttling, recurso inexistente, fallo transitorio y
+  error definitivo, para no confundir "la API está saturada" con "no existe".
+- TokenBucket: limita las llamadas por segundo a cada servicio desde este proceso.
+- retry_call(): reintenta throttling y fallos transitorios con backoff exponencial
+  y jitter completo; los errores definitivos y los "no existe" suben al momento.
+"""
+import os
+import random
+import threading
+import time
+
+from tracing import get_tracer
+
+# ==========================================
+# ⚙️ CONFIGURACIÓN
+# ==========================================
+AWS_MAX_ATTEMPTS = 10        # Intentos de botocore (modo adaptive) por llamada
+RETRY_ATTEMPTS = 6           # Intentos de retry_call() para Kubernetes, CLIs y el backend fake
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 20
+# Llamadas por segundo (ritmo, ráfaga) por servicio. fleet.py reparte el presupuesto entre
+# los entornos que corren a la vez con SRE_RATE_SCALE (p.ej. 0.33 con --concurrency 3).
+RATE_SCALE = float(os.environ.get("SRE_RATE_SCALE", "1.0"))
+RATE_LIMITS = {
+    "iam": (5, 10),          # IAM es global y con límites bajos compartidos por toda la cuenta
+    "eks": (10, 10),
+    "elbv2": (10, 20),
+    "sts": (20, 20),
+    "kube": (20, 40),        # API server del clúster
+}
+DEFAULT_RATE_LIMIT = (10, 20)
+
+THROTTLING_CODES = {
+    "Throttling", "ThrottlingException", "ThrottledException", "RequestThrottled",
+    "RequestThrottledException", "TooManyRequestsException", "RequestLimitExceeded",
+    "PriorRequestNotComplete", "SlowDown", "EC2ThrottledException", "BandwidthLimitExceeded",
+}
+NOT_FOUND_CODES = {
+    "ResourceNotFoundException", "NoSuchEntity", "NotFoundException", "NotFound",
+    "LoadBalancerNotFound", "NoSuchHostedZone",
+}
+TRANSIENT_CODES = {
+    "InternalError", "InternalFailure", "InternalServerError", "ServiceUnavailable",
+    "ServiceUnavailableException", "RequestTimeout", "RequestTimeoutException",
+}
+TRANSIENT_EXCEPTIONS = {
+    "EndpointConnectionError", "ConnectionClosedError", "ReadTimeoutError", "ConnectTimeoutError",
+    "ConnectionError", "TimeoutError",
+}
+# Salida de kubectl/helm/eksctl cuando el API server o AWS nos frenan
+THROTTLING_MESSAGES = ("toomanyrequests", "too many requests", "rate exceeded", "throttl",
+                       "client rate limiter")
+TRANSIENT_MESSAGES = ("etcdserver: request timed out", "the server is currently unable",
+                      "i/o timeout", "connection reset by peer", "tls handshake timeout",
+                      "unexpected eof")
+
+class Colors:
+    BLUE = '\033[94m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    END = '\033[0m'
+
+def classify_error(error):
+    """Devuelve 'throttling', 'not_found', 'transient' o 'fatal' para una excepción."""
+    # botocore ClientError (y el equivalente del backend fake)
+    response = getattr(error, "response", None)
+    if isinstance(response, dict) and "Error" in response:
+        code = response["Error"].get("Code", "")
+        status = response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+        if code in THROTTLING_CODES or status == 429:
+            return "throttling"
+        if code in NOT_FOUND_CODES:
+            return "not_found"
+        if code in TRANSIENT_CODES or (status or 0) >= 500:
+            return "transient"
+        return "fatal"
+    # kubernetes.client.ApiException (status HTTP)
+    status = getattr(error, "status", None)
+    if isinstance(status, int):
+        if status == 429:
+            return "throttling"
+        if status == 404:
+            return "not_found"
+        if status >= 500:
+            return "transient"
+        return "fatal"
+    if any(cls.__name__ in TRANSIENT_EXCEPTIONS for cls in type(error).__mro__):
+        return "transient"
+    # Errores de CLI: solo tenemos el texto de stderr
+    message = str(error).lower()
+    if any(m in message for m in THROTTLING_MESSAGES):
+        return "throttling"
+    if any(m in message for m in TRANSIENT_MESSAGES):
+        return "transient"
+    if "not found" in message or "notfound" in message:
+        return "not_found"
+    return "fatal"
+
+def is_retryable(error):
+    return classify_error(error) in ("throttling", "transient")
+
+class TokenBucket:
+    """Limitador de ritmo: 'rate' llamadas/s sostenidas con ráfagas de hasta 'burst'."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.waited = 0.0
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Consume un token; si no hay, reserva el siguiente y espera su turno. Devuelve la espera."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self._last) * self.rate)
+            self._last = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.waited += wait
+        if wait:
+            time.sleep(wait)
+        return wait
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+def rate_limiter(service):
+    """Token bucket compartido por todos los clientes de un servicio en este proceso."""
+    with _buckets_lock:
+        if service not in _buckets:
+            rate, burst = RATE_LIMITS.get(service, DEFAULT_RATE_LIMIT)
+            _buckets[service] = TokenBucket(rate * RATE_SCALE, max(1, burst * RATE_SCALE))
+        return _buckets[service]
+
+def retry_call(description, func, *args, **kwargs):
+    """
+    Llama a func(*args, **kwargs) reintentando throttling y fallos transitorios con
+    backoff exponencial y jitter completo. Cada reintento suma en el span actual.
+    """
+    for attempt in range(1, RETRY_ATTEMPTS + 1):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            kind = classify_error(e)
+            if kind not in ("throttling", "transient") or attempt == RETRY_ATTEMPTS:
+                raise
+            delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+            span = get_tracer().current()
+            if span is not None:
+                span.retries += 1
+            print(f"   {Colors.YELLOW}⏳ {description}: {kind} ({e.__class__.__name__}); "
+                  f"reintento {attempt}/{RETRY_ATTEMPTS - 1} en {delay:.1f}s{Colors.END}")
+            time.sleep(delay)
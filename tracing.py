@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Trazas de ejecución: un span por paso, comando, llamada a AWS y espera.
+
+Cada span guarda inicio, fin, estado, código de salida y reintentos. Se exportan
+como JSON lines (por defecto), OTLP/JSON (OpenTelemetry) o formato de texto de
+Prometheus, y --profile imprime los spans ordenados por duración.
+"""
+import contextlib
+import contextvars
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+
+# ==========================================
+# ⚙️ CONFIGURACIÓN
+# ==========================================
+TRACE_FILE = os.environ.get("SRE_TRACE_FILE")   # Exporta siempre a este archivo (lo usa fleet.py)
+TRACE_FORMATS = ("jsonl", "otlp", "prometheus")
+PROFILE_ROWS = 25                               # Spans que muestra --profile
+
+class Colors:
+    BLUE = '\033[94m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    END = '\033[0m'
+
+class Span:
+    """Intervalo medido: un paso del DAG, un comando externo, una llamada a AWS..."""
+
+    def __init__(self, name, kind, trace_id, parent_id=None, attributes=None):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.start = time.time()
+        self.end = None
+        self.status = "ok"
+        self.error = None
+        self.retries = 0
+
+    @property
+    def duration(self):
+        return (self.end if self.end is not None else time.time()) - self.start
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def fail(self, message):
+        self.status = "error"
+        self.error = message
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id, "span_id": self.span_id, "parent_id": self.parent_id,
+            "name": self.name, "kind": self.kind, "start": self.start, "end": self.end,
+            "duration": round(self.duration, 6), "status": self.status, "error": self.error,
+            "retries": self.retries, "attributes": self.attributes,
+        }
+
+class Tracer:
+    """
+    Colecciona los spans del proceso. El span actual viaja en un ContextVar, así que
+    los spans creados dentro de una tarea del DAG cuelgan de esa tarea.
+    """
+
+    def __init__(self, service):
+        self.service = service
+        self.trace_id = secrets.token_hex(16)
+        self.spans = []
+        self._lock = threading.Lock()
+        self._current = contextvars.ContextVar("sre_current_span", default=None)
+
+    def reset(self, service=None):
+        """Empieza una traza nueva (cada main() de los scripts es una traza)."""
+        with self._lock:
+            self.spans = []
+            self.trace_id = secrets.token_hex(16)
+            self.service = service or self.service
+
+    def current(self):
+        """Span activo en este hilo/contexto (None fuera de cualquier span)."""
+        return self._current.get()
+
+    def _new_span(self, name, kind, attributes):
+        parent = self._current.get()
+        return Span(name, kind, self.trace_id, parent.span_id if parent else None, attributes)
+
+    def _add(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    @contextlib.contextmanager
+    def span(self, name, kind="step", **attributes):
+        """Mide el bloque. Una excepción (o sys.exit con código != 0) marca el span como error."""
+        span = self._new_span(name, kind, attributes)
+        token = self._current.set(span)
+        try:
+            yield span
+        except SystemExit as e:
+            if e.code not in (0, None):
+                span.fail(f"exit {e.code}")
+            raise
+        except BaseException as e:
+            span.fail(f"{e.__class__.__name__}: {e}")
+            raise
+        finally:
+            span.end = time.time()
+            self._current.reset(token)
+            self._add(span)
+
+    def record(self, name, kind, duration, status="ok", error=None, retries=0, **attributes):
+        """Registra un span ya medido que acaba ahora (p.ej. desde los eventos de botocore)."""
+        span = self._new_span(name, kind, attributes)
+        span.end = time.time()
+        span.start = span.end - duration
+        span.status, span.error, span.retries = status, error, retries
+        self._add(span)
+        return span
+
+    # ---------------------------------------------------------
+    # Resumen y exportación
+    # ---------------------------------------------------------
+    def print_profile(self, limit=PROFILE_ROWS):
+        """Tabla de spans ordenada por duración, más el tiempo acumulado por tipo."""
+        with self._lock:
+            spans = list(self.spans)
+        if not spans:
+            return
+        # El total es el span del script; los hilos sin contexto copiado también quedan sin padre
+        roots = [s for s in spans if s.kind == "script"] or [s for s in spans if s.parent_id is None]
+        total = max(sum(s.duration for s in roots), 1e-9)
+        slowest = sorted(spans, key=lambda s: -s.duration)[:limit]
+        width = min(max([30] + [len(s.name) + 2 for s in slowest]), 60)
+
+        print(f"\n{Colors.BLUE}🔬 Perfil de ejecución ({self.service}, {len(spans)} spans){Colors.END}")
+        print(f"   {'SPAN':<{width}}{'TIPO':<8}{'DURACIÓN':>10}{'% TOTAL':>9}{'REINT.':>8}  ESTADO")
+        for s in slowest:
+            color = Colors.RED if s.status == "error" else ""
+            end = Colors.END if color else ""
+            name = s.name if len(s.name) <= width - 2 else s.name[:width - 5] + "..."
+            print(f"   {color}{name:<{width}}{s.kind:<8}{s.duration:9.2f}s{s.duration / total * 100:8.1f}%"
+                  f"{s.retries:>8}  {s.status}{end}")
+
+        by_kind = {}
+        for s in spans:
+            if s.kind != "script":
+                count, seconds = by_kind.get(s.kind, (0, 0.0))
+                by_kind[s.kind] = (count + 1, seconds + s.duration)
+        summary = ", ".join(f"{kind} {seconds:.1f}s/{count}"
+                            for kind, (count, seconds) in sorted(by_kind.items(), key=lambda kv: -kv[1][1]))
+        print(f"   Acumulado por tipo (puede solaparse en paralelo): {summary}")
+
+    def export(self, path, fmt="jsonl"):
+        """Escribe los spans en 'path'. JSON lines se añade al final (varias ejecuciones, un archivo)."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if fmt == "jsonl":
+            with open(path, "a") as f:
+                for s in spans:
+                    f.write(json.dumps(dict(s.to_dict(), service=self.service), default=str) + "\n")
+        elif fmt == "otlp":
+            with open(path, "w") as f:
+                json.dump(self._otlp(spans), f, indent=2, default=str)
+        elif fmt == "prometheus":
+            with open(path, "w") as f:
+                f.write(self._prometheus(spans))
+        else:
+            raise ValueError(f"Formato de traza desconocido: {fmt} (usa {', '.join(TRACE_FORMATS)})")
+        print(f"🧵 Traza ({fmt}, {len(spans)} spans) escrita en {path}")
+
+    def _otlp(self, spans):
+        """Formato OTLP/JSON: se puede enviar tal cual a un OpenTelemetry Collector (/v1/traces)."""
+        def attribute(key, value):
+            if isinstance(value, bool):
+                return {"key": key, "value": {"boolValue": value}}
+            if isinstance(value, int):
+                return {"key": key, "value": {"intValue": str(value)}}
+            if isinstance(value, float):
+                return {"key": key, "value": {"doubleValue": value}}
+            return {"key": key, "value": {"stringValue": str(value)}}
+
+        otlp_spans = []
+        for s in spans:
+            attributes = [attribute("sre.kind", s.kind), attribute("sre.retries", s.retries)]
+            attributes += [attribute(f"sre.{k}", v) for k, v in s.attributes.items()]
+            otlp_span = {
+                "traceId": s.trace_id, "spanId": s.span_id, "name": s.name,
+                "kind": 3 if s.kind in ("aws", "http", "kube") else 1,   # CLIENT / INTERNAL
+                "startTimeUnixNano": str(int(s.start * 1e9)),
+                "endTimeUnixNano": str(int((s.end or s.start) * 1e9)),
+                "attributes": attributes,
+                "status": {"code": 2, "message": s.error or ""} if s.status == "error" else {"code": 1},
+            }
+            if s.parent_id:
+                otlp_span["parentSpanId"] = s.parent_id
+            otlp_spans.append(otlp_span)
+        return {"resourceSpans": [{
+            "resource": {"attributes": [attribute("service.name", self.service)]},
+            "scopeSpans": [{"scope": {"name": "sre-demo"}, "spans": otlp_spans}],
+        }]}
+
+    def _prometheus(self, spans):
+        """Texto de exposición de Prometheus (sirve para el textfile collector de node_exporter)."""
+        groups = {}
+        for s in spans:
+            key = (s.kind, s.name)
+            count, seconds, errors, retries = groups.get(key, (0, 0.0, 0, 0))
+            groups[key] = (count + 1, seconds + s.duration, errors + (s.status == "error"), retries + s.retries)
+
+        def labels(kind, name):
+            name = name.replace("\\", "\\\\").replace('"', '\\"')
+            return f'{{service="{self.service}",kind="{kind}",name="{name}"}}'
+
+        lines = [
+            "# HELP sre_span_duration_seconds Tiempo de reloj por paso/operación.",
+            "# TYPE sre_span_duration_seconds summary",
+        ]
+        for (kind, name), (count, seconds, _, _) in sorted(groups.items()):
+            lines.append(f"sre_span_duration_seconds_sum{labels(kind, name)} {seconds:.6f}")
+            lines.append(f"sre_span_duration_seconds_count{labels(kind, name)} {count}")
+        lines += ["# HELP sre_span_errors_total Spans terminados con error.",
+                  "# TYPE sre_span_errors_total counter"]
+        lines += [f"sre_span_errors_total{labels(k, n)} {v[2]}" for (k, n), v in sorted(groups.items())]
+        lines += ["# HELP sre_span_retries_total Reintentos o sondeos extra por paso/operación.",
+                  "# TYPE sre_span_retries_total counter"]
+        lines += [f"sre_span_retries_total{labels(k, n)} {v[3]}" for (k, n), v in sorted(groups.items())]
+        return "\n".join(lines) + "\n"
+
+    def finish(self, path=None, fmt="jsonl", profile=False):
+        """Cierre de los scripts: imprime el perfil si se pidió y exporta la traza."""
+        if profile:
+            self.print_profile()
+        path = path or TRACE_FILE
+        if path:
+            self.export(path, fmt)
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+def get_tracer():
+    """Tracer único por proceso (backends, readiness y dag_runner escriben en el mismo)."""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            service = os.path.splitext(os.path.basename(sys.argv[0] or "sre-demo"))[0] or "sre-demo"
+            _tracer = Tracer(service)
+        return _tracer
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Vendoring de charts de Helm y documentos externos (p.ej. la política IAM del ALB).
+
+vendor-lock.json fija la versión (y el digest sha256) de cada artefacto. La primera vez
+se descargan con 'helm pull' (o desde un mirror) a una caché local direccionada por
+contenido; después setup_sdk.py y setup_monitoring.py instalan desde el .tgz cacheado,
+sin 'helm repo add/update' ni tráfico de red, y verificando el digest en cada uso.
+
+    python3 vendor.py                 # Descarga/verifica todo lo del lock
+    python3 vendor.py --lock          # Registra en el lock los digests de lo descargado
+    python3 vendor.py --check         # Sin red: falla si alguna entrada del lock no tiene digest (CI)
+    python3 vendor.py --serve         # Sirve la caché como mirror local (SRE_VENDOR_MIRROR)
+
+Con SRE_OFFLINE=1 nunca se sale a la red: lo que no esté en la caché (o en el mirror) es un error.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from aws_cache import file_lock
+from backends import BACKEND, get_backend
+
+# ==========================================
+# ⚙️ CONFIGURACIÓN
+# ==========================================
+LOCK_FILE = os.environ.get("SRE_VENDOR_LOCK",
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), "vendor-lock.json"))
+VENDOR_DIR = os.environ.get("SRE_VENDOR_DIR", os.path.expanduser("~/.cache/sre-demo/vendor"))
+# Mirror HTTP con la misma estructura que sirve 'vendor.py --serve' (/charts/<chart>-<versión>.tgz, /files/...)
+MIRROR = os.environ.get("SRE_VENDOR_MIRROR", "").rstrip("/")
+# Registro de imágenes alternativo (pull-through cache o registry local) para las imágenes del lock
+IMAGE_REGISTRY = os.environ.get("SRE_VENDOR_REGISTRY", "")
+OFFLINE = os.environ.get("SRE_OFFLINE", "0").lower() in ("1", "true", "yes", "si")
+# Con FROZEN, un artefacto sin digest en el lock es un error: solo 'vendor.py --lock' descarga sin
+# digest, para fijarlo y commitearlo. Desactivado por defecto mientras el lock tenga digests vacíos
+# (la primera descarga fija el suyo en la caché); actívalo (y 'vendor.py --check' en CI) tras el --lock.
+FROZEN = os.environ.get("SRE_VENDOR_FROZEN", "0").lower() in ("1", "true", "yes", "si")
+# El backend fake genera charts y documentos sintéticos: no pueden coincidir con los digests reales
+VERIFY = BACKEND != "fake"
+SERVE_PORT = 8790
+SYNC_WORKERS = 4
+DOWNLOAD_TIMEOUT = 120
+
+class Colors:
+    BLUE = '\033[94m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    END = '\033[0m'
+
+class VendorError(Exception):
+    """Artefacto no disponible (offline, sin digest con FROZEN) o con un digest distinto al fijado."""
+
+backend = get_backend()
+_lock_data = None
+_key_locks = {}
+_mutex = threading.Lock()
+
+# ---------------------------------------------------------
+# Lock y caché direccionada por contenido
+# ---------------------------------------------------------
+def load_lock(path=LOCK_FILE):
+    global _lock_data
+    with _mutex:
+        if _lock_data is None:
+            with open(path) as f:
+                _lock_data = json.load(f)
+        return _lock_data
+
+def save_lock(lock, path=LOCK_FILE):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".")
+    with os.fdopen(fd, "w") as f:
+        json.dump(lock, f, indent=2)
+        f.write("\n")
+    os.replace(tmp, path)
+
+def entry(kind, name):
+    try:
+        return load_lock()[kind][name]
+    except KeyError:
+        raise VendorError(f"'{name}' no está en {os.path.basename(LOCK_FILE)} ({kind})") from None
+
+def pin(kind, name):
+    """Versión (y digest si está fijado) del artefacto: va en las huellas de los pasos, sin tocar la red."""
+    item = entry(kind, name)
+    version = item.get("version") or item.get("tag")
+    return f"{version}@{item['digest']}" if item.get("digest") else version
+
+def digest_of(data):
+    return "sha256:" + hashlib.sha256(data).hexdigest()
+
+def suffix(kind, item):
+    return ".tgz" if kind == "charts" else os.path.splitext(item["url"])[1]
+
+def filename(kind, name, item):
+    """Nombre del artefacto en el mirror (el mismo que deja 'helm pull')."""
+    if kind == "charts":
+        return f"{item['chart']}-{item['version']}.tgz"
+    return f"{name}-{item['version']}{suffix(kind, item)}"
+
+def blob_path(digest, ext):
+    return os.path.join(VENDOR_DIR, "blobs", "sha256", digest.split(":", 1)[1] + ext)
+
+def refs_path():
+    return os.path.join(VENDOR_DIR, "refs.json")
+
+def read_refs():
+    """Índice '<tipo>/<nombre>@<versión>' -> digest del blob descargado."""
+    try:
+        with open(refs_path()) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def store(data, digest, ext, key):
+    """Guarda el blob (escritura atómica) y lo apunta en el índice; varios procesos comparten la caché."""
+    path = blob_path(digest, ext)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if not cached(path, digest):   # Blob nuevo o dañado: se (re)escribe
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    with file_lock(refs_path()):
+        refs = read_refs()
+        refs[key] = digest
+        fd, tmp = tempfile.mkstemp(dir=VENDOR_DIR)
+        with os.fdopen(fd, "w") as f:
+            json.dump(refs, f, indent=2, sort_keys=True)
+        os.replace(tmp, refs_path())
+    return path
+
+def cached(path, digest):
+    """El blob existe y su contenido sigue coincidiendo con su digest."""
+    try:
+        with open(path, "rb") as f:
+            return digest_of(f.read()) == digest
+    except FileNotFoundError:
+        return False
+
+# ---------------------------------------------------------
+# Descarga
+# ---------------------------------------------------------
+def helm_pull(item):
+    """'helm pull' de la versión fijada a un directorio temporal; no necesita 'helm repo add'."""
+    if item["repo"].startswith("oci://"):
+        ref = f"{item['repo']}/{item['chart']}"
+    else:
+        ref = f"{item['chart']} --repo {item['repo']}"
+    with tempfile.TemporaryDirectory(prefix="sre-vendor-") as tmp:
+        print(f"   > helm pull {ref} --version {item['version']}")
+        proc = backend.run(f"helm pull {ref} --version {item['version']} -d {tmp}", capture=True)
+        if proc.returncode != 0:
+            raise VendorError(f"helm pull {item['chart']} {item['version']} falló: {proc.stderr.strip()}")
+        with open(os.path.join(tmp, filename("charts", None, item)), "rb") as f:
+            return f.read()
+
+def download(kind, name, item):
+    if MIRROR:
+        return backend.fetch(f"{MIRROR}/{kind}/{filename(kind, name, item)}", timeout=DOWNLOAD_TIMEOUT)
+    if OFFLINE:
+        raise VendorError(f"{name} {item['version']} no está en la caché y SRE_OFFLINE está activo "
+                          f"(usa SRE_VENDOR_MIRROR o ejecuta 'vendor.py' con red)")
+    if kind == "charts":
+        return helm_pull(item)
+    print(f"   > GET {item['url'].format(version=item['version'])}")
+    return backend.fetch(item["url"].format(version=item["version"]), timeout=DOWNLOAD_TIMEOUT)
+
+def resolve(kind, name, frozen=None):
+    """
+    Ruta local verificada del artefacto: (ruta, digest, origen). Solo descarga si la
+    versión fijada no está en la caché o el blob ya no coincide con su digest.
+    """
+    item = entry(kind, name)
+    key = f"{kind}/{name}@{item['version']}"
+    pinned = item.get("digest") if VERIFY else None
+    if pinned is None and VERIFY and (FROZEN if frozen is None else frozen):
+        raise VendorError(f"{key} no tiene digest en el lock: ejecuta 'python3 vendor.py --lock' con red "
+                          f"y commitea vendor-lock.json")
+    with _mutex:
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+    with key_lock:   # Dos pasos que piden el mismo chart a la vez: una sola descarga
+        known = read_refs().get(key)
+        if known and (pinned is None or known == pinned):
+            path = blob_path(known, suffix(kind, item))
+            if cached(path, known):
+                return path, known, "caché"
+        data = download(kind, name, item)
+        digest = digest_of(data)
+        if pinned and digest != pinned:
+            raise VendorError(f"El digest de {key} no coincide: lock {pinned}, descargado {digest}")
+        return store(data, digest, suffix(kind, item), key), digest, "descargado"
+
+def chart_path(name):
+    """.tgz local del chart fijado, listo para 'helm upgrade --install <release> <ruta>'."""
+    return resolve("charts", name)[0]
+
+def file_bytes(name):
+    with open(resolve("files", name)[0], "rb") as f:
+        return f.read()
+
+def image_values(name, prefix="image"):
+    """Valores --set de Helm (registry/repository/tag/digest) de una imagen del lock."""
+    item = entry("images", name)
+    values = {
+        f"{prefix}.registry": IMAGE_REGISTRY or item["registry"],
+        f"{prefix}.repository": item["repository"],
+        f"{prefix}.tag": item["tag"],
+    }
+    if item.get("digest"):
+        values[f"{prefix}.digest"] = item["digest"]
+    return values
+
+def sync(kinds=("charts", "files"), names=None, frozen=None, workers=SYNC_WORKERS):
+    """Resuelve en paralelo los artefactos pedidos. Devuelve [(tipo, nombre, versión, digest, origen)]."""
+    lock = load_lock()
+    wanted = [(kind, name) for kind in kinds for name in lock.get(kind, {})
+              if names is None or name in names]
+
+    def one(pair):
+        kind, name = pair
+        _, digest, origin = resolve(kind, name, frozen)
+        return kind, name, lock[kind][name]["version"], digest, origin
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(wanted)))) as pool:
+        return list(pool.map(one, wanted))
+
+def missing_digests(kinds=("charts", "files")):
+    """Entradas del lock sin digest fijado (no toca la red)."""
+    lock = load_lock()
+    return [f"{kind}/{name}@{item['version']}" for kind in kinds
+            for name, item in sorted(lock.get(kind, {}).items()) if not item.get("digest")]
+
+def record_digests(results, path=LOCK_FILE):
+    """Trust on first use: fija en el lock el digest de lo descargado (no cambia los ya fijados)."""
+    lock = load_lock()
+    added = 0
+    for kind, name, _, digest, _ in results:
+        if lock[kind][name].get("digest") is None:
+            lock[kind][name]["digest"] = digest
+            added += 1
+    if added:
+        save_lock(lock, path)
+    return added
+
+# ---------------------------------------------------------
+# Mirror local
+# ---------------------------------------------------------
+def mirror_index():
+    """Ruta del mirror -> blob cacheado, para todo lo del lock que ya esté en la caché."""
+    lock, refs = load_lock(), read_refs()
+    index = {}
+    for kind in ("charts", "files"):
+        for name, item in lock.get(kind, {}).items():
+            digest = refs.get(f"{kind}/{name}@{item['version']}")
+            if digest and os.path.exists(blob_path(digest, suffix(kind, item))):
+                index[f"/{kind}/{filename(kind, name, item)}"] = blob_path(digest, suffix(kind, item))
+    return index
+
+def serve(port=SERVE_PORT, host="127.0.0.1"):
+    """Sirve la caché por HTTP: otro equipo (o un entorno sin red) la usa con SRE_VENDOR_MIRROR."""
+    # Importación tardía: setup_sdk.py importa este módulo y http.server no es barato
+    import http.server
+    index = mirror_index()
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = index.get(self.path)
+            if path is None:
+                self.send_error(404)
+                return
+            with open(path, "rb") as f:
+                body = f.read()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer((host, port), Handler)
+    print(f"🪞 Mirror local con {len(index)} artefacto(s) en http://{host}:{server.server_address[1]}")
+    print(f"   export SRE_VENDOR_MIRROR=http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def print_results(results):
+    print(f"\n{Colors.BLUE}📦 Artefactos fijados ({os.path.basename(LOCK_FILE)}){Colors.END}")
+    for kind, name, version, digest, origin in results:
+        color = Colors.GREEN if origin == "caché" else Colors.YELLOW
+        print(f"   {kind + '/' + name:<40}{version:<10}{digest[:19]}…  {color}{origin}{Colors.END}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Caché local de charts y documentos fijados en vendor-lock.json.")
+    parser.add_argument("--lock", action="store_true",
+                        help="Registra en el lock el digest de los artefactos que aún no lo tienen")
+    parser.add_argument("--frozen", action="store_true",
+                        help="Falla si algún artefacto no tiene digest en el lock (también SRE_VENDOR_FROZEN=1)")
+    parser.add_argument("--check", action="store_true",
+                        help="Sin descargar nada, falla si alguna entrada del lock no tiene digest (para CI)")
+    parser.add_argument("--only", action="append", metavar="NOMBRE",
+                        help="Solo este artefacto (se puede repetir)")
+    parser.add_argument("--serve", action="store_true", help="Sirve la caché como mirror HTTP local")
+    parser.add_argument("--port", type=int, default=SERVE_PORT, help=f"Puerto de --serve (default: {SERVE_PORT})")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.serve:
+        serve(args.port)
+        return
+    if args.check:
+        missing = missing_digests()
+        if missing:
+            print(f"{Colors.RED}   ❌ Sin digest en {os.path.basename(LOCK_FILE)}: {', '.join(missing)}{Colors.END}")
+            print(f"{Colors.RED}      Ejecuta 'python3 vendor.py --lock' con red y commitea el lock.{Colors.END}")
+            sys.exit(1)
+        print(f"{Colors.GREEN}✅ Todas las entradas de {os.path.basename(LOCK_FILE)} tienen digest.{Colors.END}")
+        return
+    if args.lock and not VERIFY:
+        print(f"{Colors.RED}   ❌ --lock con el backend fake fijaría digests de artefactos sintéticos.{Colors.END}")
+        sys.exit(1)
+    try:
+        results = sync(names=args.only, frozen=(args.frozen or FROZEN) and not args.lock)
+    except VendorError as e:
+        print(f"{Colors.RED}   ❌ {e}{Colors.END}")
+        sys.exit(1)
+    print_results(results)
+    if args.lock:
+        added = record_digests(results)
+        print(f"\n{Colors.GREEN}🔒 {added} digest(s) nuevos en {LOCK_FILE}.{Colors.END}")
+    print(f"\n{Colors.GREEN}✅ Caché en {VENDOR_DIR}.{Colors.END}")
+
+if __name__ == "__main__":
+    main()